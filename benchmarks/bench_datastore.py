@@ -0,0 +1,274 @@
+"""Benchmark data store backends with synthetic SpeedTest records.
+
+Records are generated in batches, so even 10M-record runs do not hold the
+data set in memory. Location names and timezones come from Faker when it
+is installed, and from a small built-in list otherwise. Each backend and
+scale runs in a fresh interpreter, so peak RSS belongs to that run only.
+
+For each run, the benchmark reports:
+  - append throughput (records/sec, incl. final flush/close)
+  - first-N and last-N query latency (median ms)
+  - on-disk size (data file and sidecar files)
+  - peak RSS
+
+Usage:
+    python -m benchmarks.bench_datastore [scale ...] [--backends=csv,json,sqlite,binary] [--batch=N] [--out=FILE]
+
+    Scales can be given as plain numbers or with 'k'/'m' suffix (e.g. 10k 1m 10m).
+    Results are written as JSON to '--out' (or STDOUT).
+"""
+
+import glob
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+_ROOT_ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SCALES_ = ('10k',)
+_BACKENDS_ = ('csv', 'json', 'sqlite', 'binary')
+_BATCH_SIZE_: int = 1000
+_QUERY_SIZES_ = (1, 100)
+_NUM_QUERIES_: int = 5
+_START_EPOCH_: int = 1577836800        # 2020-01-01T00:00:00Z
+_STEP_SECS_: int = 60
+_NUM_LOCATIONS_: int = 50
+
+_EXT_ = {'csv': 'csv', 'json': 'json', 'sqlite': 'sqlite', 'binary': 'bin'}
+
+# Used when Faker is not installed
+_LOCATIONS_ = [
+    ('Some City, US', 'America/New_York'),
+    ('Springfield, US', 'America/Chicago'),
+    ('Bergen, NO', 'Europe/Oslo'),
+    ('Osaka, JP', 'Asia/Tokyo'),
+    ('Perth, AU', 'Australia/Perth'),
+]
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def parse_scale(scale):
+    """Convert scale (e.g. '10k', '1m', '500') to number of records."""
+    scale = str(scale).strip().lower()
+    mult = {'k': 1000, 'm': 1000000}.get(scale[-1:], 1)
+
+    return int(float(scale[:-1] if mult > 1 else scale) * mult)
+
+
+def _faker_version():
+    try:
+        import faker
+    except ImportError:
+        return None
+
+    return faker.VERSION
+
+
+def _location_pool(seed, size=_NUM_LOCATIONS_):
+    try:
+        from faker import Faker
+    except ImportError:
+        return list(_LOCATIONS_)
+
+    fake = Faker()
+    fake.seed_instance(seed)
+    return [('{}, {}'.format(fake.city(), fake.country_code()), fake.timezone()) for _ in range(size)]
+
+
+def generate_records(numRecs, batchSize=_BATCH_SIZE_, seed=1):
+    """Generate synthetic SpeedTest records in batches.
+
+    Timestamps increase by one minute per record, so first-N and last-N
+    queries hit opposite ends of the data store.
+
+    Yields:
+        Lists of at most 'batchSize' data records
+    """
+    rand = random.Random(seed)
+    pool = _location_pool(seed)
+
+    for offset in range(0, numRecs, batchSize):
+        batch = []
+        for i in range(offset, min(offset + batchSize, numRecs)):
+            location, locationTZ = rand.choice(pool)
+            batch.append({
+                'timestamp': datetime.fromtimestamp(_START_EPOCH_ + i * _STEP_SECS_, timezone.utc).strftime(
+                    '%Y-%m-%dT%H:%M:%S.%fZ'),
+                'location': location,
+                'locationTZ': locationTZ,
+                'ping': round(rand.uniform(2.0, 80.0), 3),
+                'download': round(rand.uniform(5e6, 9e8), 2),
+                'upload': round(rand.uniform(1e6, 1e8), 2),
+            })
+        yield batch
+
+
+def _disk_size(host):
+    return sum(os.path.getsize(fname) for fname in glob.glob(glob.escape(host) + '*') if os.path.isfile(fname))
+
+
+def _peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss     # bytes on macOS, KB on Linux
+
+
+def _median_ms(func, numRepeats):
+    times = []
+    for _ in range(numRepeats):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(times)
+
+
+# =========================================================
+#               C O R E   F U N C T I O N S
+# =========================================================
+def bench_backend(backend, numRecs, dataDir, batchSize=_BATCH_SIZE_, numQueries=_NUM_QUERIES_, seed=1):
+    """Benchmark one data store backend in the current process.
+
+    Args:
+        backend:    Storage type (e.g. 'csv')
+        numRecs:    Number of records to append
+        dataDir:    Directory for data store files
+        batchSize:  Number of records per 'append_batch()' call
+        numQueries: Number of runs per query. Median latency is reported.
+        seed:       Random seed for generated records
+
+    Returns:
+        Dict with results
+    """
+    from src.utils.datastore.registry import get_store_class
+    from src.utils.show_data import _DB_FLDS_
+
+    host = os.path.join(dataDir, 'bench_{}.{}'.format(numRecs, _EXT_.get(backend, backend)))
+    settings = {'storage': backend, 'host': host, 'dbtable': 'SpeedTest'}
+    baseRss = _peak_rss_kb()
+
+    # Not shared through 'open_store()', so each run starts with fresh handles
+    store = get_store_class(backend)(settings, _DB_FLDS_)
+
+    appendSecs = 0.0
+    for batch in generate_records(numRecs, batchSize, seed):
+        start = time.perf_counter()
+        store.append_batch(batch)
+        appendSecs += time.perf_counter() - start
+
+    start = time.perf_counter()
+    store.close()
+    appendSecs += time.perf_counter() - start
+
+    latency = {}
+    for size in _QUERY_SIZES_:
+        for first in (True, False):
+            key = '{}{}Ms'.format('first' if first else 'last', size)
+            latency[key] = _median_ms(lambda: store.query_range(size, first), numQueries)
+    store.close()
+    diskBytes = _disk_size(host)
+
+    return {
+        'backend': backend,
+        'records': numRecs,
+        'batchSize': batchSize,
+        'appendSecs': appendSecs,
+        'appendPerSec': numRecs / appendSecs if appendSecs else None,
+        'latency': latency,
+        'diskBytes': diskBytes,
+        'bytesPerRecord': diskBytes / numRecs if numRecs else None,
+        'baseRssKB': baseRss,
+        'peakRssKB': _peak_rss_kb(),
+    }
+
+
+def _run_isolated(backend, numRecs, dataDir, batchSize, seed):
+    proc = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_datastore', '--worker', backend, str(numRecs), dataDir,
+         '--batch={}'.format(batchSize), '--seed={}'.format(seed)],
+        cwd=_ROOT_, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError("Benchmark for '{}' failed:\n{}".format(backend, proc.stderr))
+
+    return json.loads(proc.stdout)
+
+
+def bench_datastore(scales=_SCALES_, backends=_BACKENDS_, batchSize=_BATCH_SIZE_, seed=1, isolate=True):
+    """Benchmark data store backends at each scale.
+
+    Args:
+        scales:    List of scales (e.g. ['10k', '1m'])
+        backends:  List of storage types
+        batchSize: Number of records per 'append_batch()' call
+        seed:      Random seed for generated records
+        isolate:   If TRUE, run each backend/scale in a fresh interpreter (for peak RSS)
+
+    Returns:
+        Dict with run metadata and list of results
+    """
+    results = []
+
+    for scale in scales:
+        numRecs = parse_scale(scale)
+        for backend in backends:
+            dataDir = tempfile.mkdtemp(prefix='bench_datastore_')
+            try:
+                if isolate:
+                    result = _run_isolated(backend, numRecs, dataDir, batchSize, seed)
+                else:
+                    result = bench_backend(backend, numRecs, dataDir, batchSize, seed=seed)
+            finally:
+                shutil.rmtree(dataDir, ignore_errors=True)
+
+            result['scale'] = str(scale)
+            results.append(result)
+
+    return {
+        'meta': {
+            'date': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'faker': _faker_version(),
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    opts = dict(arg[2:].partition('=')[::2] for arg in sys.argv[1:] if arg.startswith('--'))
+    batch = int(opts.get('batch') or _BATCH_SIZE_)
+    seedVal = int(opts.get('seed') or 1)
+
+    if 'worker' in opts:
+        print(json.dumps(bench_backend(args[0], int(args[1]), args[2], batch, seed=seedVal)))
+        sys.exit(0)
+
+    output = json.dumps(bench_datastore(
+        args or _SCALES_,
+        opts['backends'].split(',') if opts.get('backends') else _BACKENDS_,
+        batch,
+        seedVal,
+    ), indent=2)
+
+    if opts.get('out'):
+        with open(opts['out'], 'w') as fh:
+            fh.write(output + '\n')
+    else:
+        print(output)
@@ -0,0 +1,60 @@
+"""Benchmark display pipeline with dirty-region updates.
+
+Runs a sequence of SpeedTest records through the display pipeline on the
+in-memory stand-in ePaper device, and compares pushed pixels with what
+full refreshes of every frame would have cost.
+
+Usage:
+    python -m benchmarks.bench_display [numFrames]
+"""
+
+import random
+import sys
+import time
+
+from src.displays.devices import FileDisplay
+from src.displays.pipeline import DisplayPipeline
+
+_NUM_FRAMES_: int = 500
+
+
+def bench_display(numFrames=_NUM_FRAMES_, seed=1):
+    """Push 'numFrames' records through display pipeline.
+
+    Returns:
+        Dict with frames/sec, refresh counts, and pixel counts
+    """
+    rand = random.Random(seed)
+    device = FileDisplay()
+    pipeline = DisplayPipeline(device)
+    record = {
+        'timestamp': '2020-07-15T17:08:55.735084Z', 'location': 'Some City, US',
+        'locationTZ': 'America/New_York', 'ping': 5.0, 'download': 290e6, 'upload': 29e6,
+    }
+
+    start = time.perf_counter()
+    for i in range(numFrames):
+        # Mostly small changes (ping), sometimes download/upload, so the mix resembles real runs
+        record['ping'] = round(5.0 + rand.random(), 1)
+        if i % 5 == 0:
+            record['download'] = 290e6 + rand.random() * 10e6
+            record['upload'] = 29e6 + rand.random() * 1e6
+        pipeline.show(record)
+    elapsed = time.perf_counter() - start
+
+    fullPixels = numFrames * device.width * device.height
+    return {
+        'fps': numFrames / elapsed,
+        'frames': pipeline.stats,
+        'device': device.stats,
+        'pixelRatio': device.stats['pixels'] / fullPixels,
+    }
+
+
+if __name__ == '__main__':
+    result = bench_display(int(sys.argv[1]) if len(sys.argv) > 1 else _NUM_FRAMES_)
+
+    print('Frames/sec:      {:.1f}'.format(result['fps']))
+    print('Pipeline:        {}'.format(result['frames']))
+    print('Device:          {}'.format(result['device']))
+    print('Pushed pixels:   {:.1%} of full refresh on every frame'.format(result['pixelRatio']))
@@ -0,0 +1,36 @@
+"""Benchmark SenseHat sampler throughput.
+
+Usage:
+    python -m benchmarks.bench_sampler [numSamples] [--numpy]
+"""
+
+import sys
+import time
+
+from src.sensors.sensehat import init_sensor
+from src.utils.collect_data import Sampler
+
+
+def bench_sampler(numSamples, useNumpy=False, simulate=True):
+    sampler = Sampler(init_sensor(simulate=simulate, seed=1), useNumpy=useNumpy)
+
+    start = time.perf_counter()
+    rate = sampler.run(numSamples)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'samples': numSamples,
+        'channels': len(sampler.channels),
+        'numpy': useNumpy,
+        'seconds': elapsed,
+        'samplesPerSec': rate,
+        'usecPerSample': (elapsed / numSamples) * 1000000,
+    }
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    result = bench_sampler(int(args[0]) if args else 100000, '--numpy' in sys.argv)
+
+    for key, val in result.items():
+        print('{:14s} {}'.format(key + ':', val))
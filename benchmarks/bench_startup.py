@@ -0,0 +1,144 @@
+"""Benchmark 'pired' startup time for each sub-command.
+
+Each sub-command is run in a fresh interpreter with 'python -X importtime'.
+Wall time is reported relative to a bare interpreter start, together with
+the total import time and the modules that were pulled in.
+
+Usage:
+    python -m benchmarks.bench_startup [numRepeats] [--json]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+_ROOT_ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_REPEAT_: int = 5
+
+# Startup overhead budget (ms) on top of a bare interpreter start. Can be
+# overridden with 'PIRED_STARTUP_BUDGET_MS' for slower machines (e.g. Pi Zero).
+_BUDGET_MS_: int = int(os.environ.get('PIRED_STARTUP_BUDGET_MS', 500))
+
+# Modules that a sub-command must NOT import
+_HEAVY_MODULES_ = ('requests', 'pytz', 'dateutil', 'concurrent.futures', 'numpy')
+
+_SUBCOMMANDS_ = {
+    'debug': (['debug'], _HEAVY_MODULES_),
+    'config --show': (['config', '--show'], _HEAVY_MODULES_),
+    'compact': (['compact', '--retain', '-1'], _HEAVY_MODULES_),
+    'dothing --history': (['dothing', '--history', '--count', '1'], ('requests', 'concurrent.futures', 'numpy')),
+}
+
+_CONFIG_DATA_ = """\
+[data]
+retain = -1
+
+[main]
+unit = bits
+location = Some City, US
+locationTZ = America/New_York
+storage = CSV
+host = {host}
+"""
+
+_CSV_DATA_ = """\
+timestamp,location,locationTZ,ping,download,upload
+2020-07-15T17:08:55.735084Z,"Some City, US",America/New_York,5.056,292887701.15,28967314.99
+"""
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def _parse_importtime(stderr):
+    modules = set()
+    totalUs = 0
+
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name[1:].startswith(' '):
+            totalUs += int(cumulative)          # Top-level imports only
+        modules.add(name.strip())
+
+    return totalUs, modules
+
+
+def _run(args, cwd):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + args,
+        cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    if proc.returncode != 0:
+        raise RuntimeError("Command '{}' failed:\n{}".format(' '.join(args), proc.stdout + proc.stderr))
+
+    return elapsed, proc.stderr
+
+
+def make_config(path):
+    """Create config file and data file for benchmark runs. Returns path to config file."""
+    dataFName = os.path.join(path, 'startup.csv')
+    configFName = os.path.join(path, 'startup.ini')
+
+    with open(dataFName, 'w') as fh:
+        fh.write(_CSV_DATA_)
+    with open(configFName, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(host=dataFName))
+
+    return configFName
+
+
+# =========================================================
+#               C O R E   F U N C T I O N S
+# =========================================================
+def bench_startup(numRepeats=_REPEAT_, configFName=None):
+    """Measure startup time for each sub-command.
+
+    Args:
+        numRepeats:  Number of runs per sub-command. Best time is reported.
+        configFName: Config file to use. If None, a temporary one is created.
+
+    Returns:
+        Dict with results per sub-command
+    """
+    with tempfile.TemporaryDirectory() as tmpDir:
+        configFName = configFName or make_config(tmpDir)
+
+        baseline = min(_run(['-c', 'pass'], _ROOT_)[0] for _ in range(numRepeats))
+        results = {'_baseline': {'wallMs': baseline * 1000}}
+
+        for name, (args, forbidden) in _SUBCOMMANDS_.items():
+            runs = [_run(['-m', 'src.cli', '--ini', configFName] + args, _ROOT_) for _ in range(numRepeats)]
+            wall, stderr = min(runs, key=lambda run: run[0])
+            importUs, modules = _parse_importtime(stderr)
+
+            results[name] = {
+                'wallMs': wall * 1000,
+                'overheadMs': (wall - baseline) * 1000,
+                'importMs': importUs / 1000,
+                'numModules': len(modules),
+                'heavyModules': sorted(mod for mod in forbidden if mod in modules),
+                'budgetMs': _BUDGET_MS_,
+            }
+
+    return results
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    results = bench_startup(int(args[0]) if args else _REPEAT_)
+
+    if '--json' in sys.argv:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            print('{:20s} {}'.format(name, ', '.join('{}={}'.format(
+                key, round(val, 1) if isinstance(val, float) else val) for key, val in result.items())))
@@ -1,27 +1,38 @@
+import math
 import os
-import re
 import sys
 import time
 
 import click
-import pytz
-import requests
-from dateutil import parser
 
+# NOTE: Heavy modules (e.g. 'requests', 'pytz', 'dateutil', thread pools) are
+#       imported inside the functions/commands that use them, so that each
+#       sub-command only pays for what it needs at startup.
 from .utils.debug.debug import debug_msg
-from .utils.settings import read_settings, save_settings, show_settings, isvalid_settings
+from .utils.settings import load_settings, save_settings, show_settings
+from .utils.show_data import get_speed_data, get_speed_rollups, show_current
+from .utils.store_data import open_speed_detector, open_speed_writer, compact_speed_data
+from .utils.timestamps import format_minute
+from .sensors.speedtest import run_speedtest
+from .sensors import openweather
 # from .sensors.sensehat import init_sensor as init_SenseHat
-# from .sensors.speedtest import run_speedtest, save_speed_data, get_speed_data
 
 _APP_NAME_: str = 'pired'
 _APP_CONFIG_: str = 'config.ini'
+_APP_EPAPER_: str = 'epaper.png'
 _APP_MIN_RUNS_: int = 1
 _APP_MAX_RUNS_: int = 100
 _APP_HISTORY_: int = 1000
 _APP_SLEEP_: int = 60
+_APP_PRUNE_SLACK_: float = 0.1
+_APP_BATCH_SIZE_: int = 10
 _APP_BITS_: str = 'bits'
+_APP_RAW_: str = 'raw'
+_APP_NA_: str = '- n/a -'
+_APP_DATE_FMT_: str = '%m/%d/%y %H:%M'
 
 _DB_NAME_: str = 'scilab'
+_DB_TABLE_: str = 'SpeedTest'
 
 _SENSOR_WEATHER_: str = 'OpenWeather'
 _SENSOR_SENSEHAT_: str = 'SenseHat'
@@ -35,9 +46,7 @@ class ApiKey(click.ParamType):
     name = 'api-key'
 
     def convert(self, value, param, ctx):
-        found = re.match(r'[0-9a-f]{32}', value)
-
-        if not found:
+        if not openweather.isvalid_api_key(value):
             self.fail(
                 f'{value} is not a 32-character hexadecimal string',
                 param,
@@ -47,26 +56,38 @@ class ApiKey(click.ParamType):
         return value
 
 
+class Timestamp(click.ParamType):
+    name = 'timestamp'
+
+    def convert(self, value, param, ctx):
+        from .utils.datastore.index import to_epoch
+
+        epoch = to_epoch(value)
+        if math.isnan(epoch):
+            self.fail(
+                f'{value} is not an ISO 8601 date/time (e.g. 2021-03-01 or 2021-03-01T12:00:00Z)',
+                param,
+                ctx,
+            )
+
+        return epoch
+
+
 # =========================================================
 #              H E L P E R   F U N C T I O N S
 # =========================================================
-def current_weather(location, api_key='OWM_API_KEY'):
-    """-- DUMMY FUNCTION --
+def current_weather(location, api_key='OWM_API_KEY', cacheFile=None):
+    """Get short description of current weather from OpenWeather.
+
+    Responses are cached per location (see 'sensors.openweather'), so
+    repeated calls within the OpenWeather update interval do no network I/O.
 
     Args:
-        location:  blah
-        api_key:   blah
+        location:  City name, optionally with country code (e.g. 'London,GB')
+        api_key:   OpenWeather API key
+        cacheFile: Optional path to cache file, so cached data outlives this process
     """
-    url = 'https://api.openweathermap.org/data/2.5/weather'
-
-    query_params = {
-        'q': location,
-        'appid': api_key,
-    }
-
-    response = requests.get(url, params=query_params)
-
-    return response.json()['weather'][0]['description']
+    return openweather.current_weather(location, api_key, cacheFile)
 
 
 def _pad_list(inList, maxLen, defaultVal):
@@ -74,13 +95,8 @@ def _pad_list(inList, maxLen, defaultVal):
 
 
 def _data_formatter(rowData, rowNum=0, isRaw=False, rateUnit=_APP_BITS_):
-    def _date_maker(timestamp, timezone, fmtStr):
-        dateOrig = parser.isoparse(timestamp)
-        dateFinal = dateOrig if timezone is None else dateOrig.astimezone(pytz.timezone(timezone))
-        return dateFinal.strftime(fmtStr)
-
     def _parse_timestamp(data, tz, fmtStr, defaultVal):
-        return defaultVal if 'timestamp' not in data else _date_maker(data['timestamp'], tz, fmtStr)
+        return defaultVal if 'timestamp' not in data else format_minute(data['timestamp'], tz, fmtStr)
 
     def _parse_ping(data, defaultVal):
         return defaultVal if 'ping' not in data else float(data['ping'])
@@ -88,8 +104,8 @@ def _data_formatter(rowData, rowNum=0, isRaw=False, rateUnit=_APP_BITS_):
     def _parse_speed(data, fldName, divisor, defaultVal):
         return defaultVal if fldName not in data else float(data[fldName] / divisor)
 
-    na = '- n/a -'
-    dateTimeFmtStr = '%m/%d/%y %H:%M'
+    na = _APP_NA_
+    dateTimeFmtStr = _APP_DATE_FMT_
     out = (str(rowNum),) if rowNum > 0 else tuple()
 
     # Mbit/s or MB/s
@@ -112,6 +128,73 @@ def _data_formatter(rowData, rowNum=0, isRaw=False, rateUnit=_APP_BITS_):
         return out + tuple(_pad_list(rowData, 5, na))
 
 
+def _format_timestamps(timestamps, timezones, fmtStr, defaultVal):
+    """Convert ISO timestamps to UTC and local date/time strings in one pass.
+
+    Conversions are memoized per minute (see 'timestamps.format_minute()'),
+    so repeated timestamps and timezones are only parsed once.
+
+    Args:
+        timestamps: List of ISO timestamps
+        timezones:  List of timezone names (one per timestamp). 'None' = no conversion
+        fmtStr:     Date/time format string
+        defaultVal: Value used for missing timestamps
+
+    Returns:
+        Tuple with list of UTC date/time strings and list of local date/time strings
+    """
+    utcOut = []
+    localOut = []
+
+    for timestamp, tzName in zip(timestamps, timezones):
+        if not timestamp:
+            utcOut.append(defaultVal)
+            localOut.append(defaultVal)
+        else:
+            utcOut.append(format_minute(timestamp, None, fmtStr))
+            localOut.append(format_minute(timestamp, tzName, fmtStr))
+
+    return utcOut, localOut
+
+
+def _format_numbers(values, divisor, fmtStr, defaultVal):
+    return [defaultVal if val is None else fmtStr.format(float(val) / divisor) for val in values]
+
+
+def _format_speed_columns(data, rateUnit=_APP_BITS_):
+    """Format 'raw' SpeedTest data records column by column.
+
+    This is the batch version of '_data_formatter()'. Each column is
+    converted in a single pass, and timestamp conversions are shared
+    through the cache in 'utils.timestamps'.
+
+    Args:
+        data:     List of data records (as dicts)
+        rateUnit: MB/s if 'bytes', else Mbit/s
+
+    Returns:
+        List of tuples with formatted strings for UTC date/time, local date/time, ping, download, and upload
+    """
+    # Mbit/s or MB/s
+    rateUnitDivisor = 1000000 if rateUnit.lower() != 'bytes' else 8000000
+    na = '{:8s}'.format(_APP_NA_)
+
+    utc, local = _format_timestamps(
+        [row.get('timestamp') for row in data],
+        [row.get('locationTZ') for row in data],
+        _APP_DATE_FMT_,
+        _APP_NA_
+    )
+
+    return list(zip(
+        utc,
+        local,
+        _format_numbers([row.get('ping') for row in data], 1, '{:8.3f}', na),
+        _format_numbers([row.get('download') for row in data], rateUnitDivisor, '{:8.2f}', na),
+        _format_numbers([row.get('upload') for row in data], rateUnitDivisor, '{:8.2f}', na),
+    ))
+
+
 def show_speed_data_summary(data, isRaw=False, rateUnit=_APP_BITS_):
     """Format and display summary SpeedTest data.
 
@@ -205,7 +288,7 @@ def show_speed_data_table(data, showRowNum=True, isRaw=False, rateUnit=_APP_BITS
         hdr3 = "  #  |  MM/DD/YY HH:MM  |  MM/DD/YY HH:MM  |    ms    |  {0:^6s}  |  {0:^6s}  ".format(unitLbl)
         divider = "-----|------------------|------------------|----------|----------|----------"
 
-        col1 = " {:>3s} |  {!s:14s}  |  {!s:14s}  |" if isRaw else " {:>3s} |  {:14s}  |  {:14s}  |"
+        col1 = " {:>3s} |  {:14s}  |  {:14s}  |"
     else:
         #           |123456789012345678|123456789012345678|1234567890|1234567890|1234567890|
         #           |                  |                  |          |          |          |
@@ -214,94 +297,315 @@ def show_speed_data_table(data, showRowNum=True, isRaw=False, rateUnit=_APP_BITS
         hdr3 = "  MM/DD/YY HH:MM  |  MM/DD/YY HH:MM  |    ms    |  {0:^6s}  |  {0:^6s}  ".format(unitLbl)
         divider = "------------------|------------------|----------|----------|----------"
 
-        col1 = "  {!s:14s}  |  {!s:14s}  |" if isRaw else "  {:14s}  |  {:14s}  |"
+        col1 = "  {:14s}  |  {:14s}  |"
 
-    colN = " {:8.3f} | {:8.2f} | {:8.2f} " if isRaw else " {:8s} | {:8s} | {:8s} "
+    colN = " {:8s} | {:8s} | {:8s} "
 
     template = col1 + colN
-    rowNum = 0
 
-    click.echo()
-    click.echo(hdr1)
-    click.echo(hdr2)
-    click.echo(divider)
-    click.echo(hdr3)
-    click.echo(divider)
+    if isRaw:
+        rows = _format_speed_columns(data, rateUnit)
+    else:
+        rows = [_pad_list(list(row), 5, _APP_NA_) for row in data]
+
+    if showRowNum:
+        rows = [(str(rowNum),) + tuple(row) for rowNum, row in enumerate(rows, 1)]
 
-    for row in data:
-        if showRowNum:
-            rowNum += 1
-        click.echo(template.format(*_data_formatter(row, rowNum, isRaw, rateUnit)))
+    # Build whole table first and write it in one go, rather than one 'echo' per row
+    lines = ['', hdr1, hdr2, divider, hdr3, divider]
+    lines.extend(template.format(*row) for row in rows)
+    lines.append('\n')
 
-    click.echo()
+    click.echo('\n'.join(lines), nl=False)
 
 
-def historic_speed_data(settings, numRecs, unit, first: bool):
+def historic_speed_data(settings, numRecs, unit, first: bool, resolution=_APP_RAW_, since=None, until=None):
     """Retrieve historic SpeedTest data.
 
     Args:
-        settings: List with data store settings
-        numRecs:  Number of records to retrieve
-        unit:     Unit string.
-        first:    Flag to indicate whether to retrieve first or last ## records.
+        settings:   List with data store settings
+        numRecs:    Number of records (or rollup buckets) to retrieve
+        unit:       Unit string.
+        first:      Flag to indicate whether to retrieve first or last ## records.
+        resolution: 'raw' for individual records, or '1m', '1h', '1d' for rollups
+        since:      Only records at or after this time (Unix epoch). None = no lower bound.
+        until:      Only records before this time (Unix epoch). None = no upper bound.
     """
 
     try:
-        data = get_speed_data(settings, numRecs, first)
+        if resolution == _APP_RAW_:
+            data = get_speed_data(settings, numRecs, first, since, until)
+        else:
+            data = get_speed_rollups(settings, resolution, numRecs, first, since, until)
 
         if len(data):
+            if resolution != _APP_RAW_:
+                click.echo('-- Mean values per {} bucket ({} record(s)) --'.format(
+                    resolution, sum(row['count'] for row in data)))
             show_speed_data_table(data, showRowNum=True, isRaw=True, rateUnit=unit)
         else:
             click.echo('-- No data records found! --')
 
-    except OSError as e:
+    except (OSError, ValueError) as e:
         raise click.ClickException(e)
 
 
-def new_speed_data(settings, numRuns, unit, display, summary: bool, save: bool):
-    """Retrieve new SpeedTest data.
+def historic_speed_stats(settings, unit, since=None, until=None):
+    """Show statistics for historic SpeedTest data.
+
+    All records in the time range are streamed from the data store and
+    summarized in a single pass, so memory use does not depend on the
+    number of records.
 
     Args:
         settings: List with data store settings
-        numRuns:  Number of times to run SpeedTest to retrieve
         unit:     Unit string.
-        display:  Which display to use
-        summary:  If true, only show summary info of SpeedTest data
-        save:     If true, then save SpeedTest data to data store
+        since:    Only records at or after this time (Unix epoch). None = no lower bound.
+        until:    Only records before this time (Unix epoch). None = no upper bound.
+    """
+    from .utils.stats_data import get_speed_stats
+
+    try:
+        stats = get_speed_stats(settings, since, until)
+
+    except (OSError, ValueError) as e:
+        raise click.ClickException(e)
+
+    numRecs = max(fldStats['count'] for fldStats in stats.values())
+    if not numRecs:
+        click.echo('-- No data records found! --')
+        return
+
+    # Mbit/s or MB/s
+    unitLbl = 'Mbit/s' if unit.lower() != 'bytes' else 'MB/s'
+    rateUnitDivisor = 1000000 if unit.lower() != 'bytes' else 8000000
+    na = '{:>8s}'.format(_APP_NA_)
+    cols = ('count', 'min', 'mean', 'stdev', 'p50', 'p95', 'p99', 'max')
+
+    lines = [
+        '',
+        '-- Statistics for {} record(s) --'.format(numRecs),
+        '',
+        '              |' + '|'.join(' {:^8s} '.format(col.upper()) for col in cols),
+        '--------------|' + '|'.join('-' * 10 for _ in cols),
+    ]
+    for name, label, divisor, fmtStr in [
+        ('ping', 'PING  ms', 1, '{:8.3f}'),
+        ('download', 'DOWN  ' + unitLbl, rateUnitDivisor, '{:8.2f}'),
+        ('upload', 'UP    ' + unitLbl, rateUnitDivisor, '{:8.2f}'),
+    ]:
+        fldStats = stats[name]
+        vals = ['{:8d}'.format(fldStats['count'])]
+        vals.extend(_format_numbers([fldStats[col] for col in cols[1:]], divisor, fmtStr, na))
+        lines.append(' {:12s} |'.format(label) + '|'.join(' {} '.format(val) for val in vals))
+    lines.append('\n')
+
+    click.echo('\n'.join(lines), nl=False)
+
+
+def _prune_speed_data(writer, retain):
+    start = time.perf_counter()
+    removed = writer.compact(retain, _APP_PRUNE_SLACK_)
+
+    click.echo('-- Retention: removed {} record(s) in {:.2f} ms --'.format(
+        removed, (time.perf_counter() - start) * 1000))
+
+    return removed
+
+
+def _open_display(settings):
+    """Open display pipeline for '--display epaper' based on '[main] epaper' setting."""
+    from .displays.pipeline import init_display
+
+    return init_display(settings.get('epaper', os.path.join(click.get_app_dir(_APP_NAME_), _APP_EPAPER_)))
+
+
+def _show_new_speed_data(data, runNum, numRuns, unit, display, summary: bool, screen=None):
+    if display.lower() == 'stdout':
+        click.echo('-- Internet Speed Test {} of {} --'.format(str(runNum), str(numRuns)))
+
+        if summary:
+            show_speed_data_summary(data, isRaw=True, rateUnit=unit)
+        else:
+            show_speed_data_details(data, isRaw=True, rateUnit=unit)
+
+        if data.get('anomaly'):
+            from .utils.anomaly_data import format_anomaly
+            click.echo('-- Anomaly: {} --\n'.format(format_anomaly(data['anomaly'])))
+
+    elif display.lower() == 'epaper' and screen is not None:
+        show_current(screen, data, unit)
+
+
+def new_speed_data(settings, numRuns, unit, display, summary: bool, save: bool, retain=-1, concurrent=False,
+                   sleep=None, controller=None):
+    """Retrieve new SpeedTest data.
+
+    Args:
+        settings:   List with data store settings
+        numRuns:    Number of times to run SpeedTest to retrieve
+        unit:       Unit string.
+        display:    Which display to use
+        summary:    If true, only show summary info of SpeedTest data
+        save:       If true, then save SpeedTest data to data store
+        retain:     Max number of records to keep in data store after each save. -1 = keep all
+        concurrent: If true, run SpeedTest on a fixed-rate timer and overlap display and
+                    saving of each run with the next run. Records are saved in batches.
+        sleep:      Seconds between runs. If None, use default.
+        controller: Optional 'scheduler.AdaptiveInterval' that sets the seconds between
+                    runs after each run, based on the data so far
+
+    Returns:
+        List of SpeedTest data records. Anomalous records are tagged under 'anomaly'.
     """
 
     data = []
-    for i in range(0, numRuns):
-        try:
-            data.append(run_speedtest(settings))
+    batch = []
+    batchSize = _APP_BATCH_SIZE_ if concurrent else 1
+    writer = None
+    detector = None
+    screen = None
+    scheduler = None
+    interval = _APP_SLEEP_ if sleep is None else sleep
+
+    def _save(force=False):
+        if writer is not None and batch and (force or len(batch) >= batchSize):
+            writer.write(batch)
+            batch.clear()
+            if retain >= 0:
+                _prune_speed_data(writer, retain)
+
+    def _collect(i):
+        return run_speedtest(settings)
+
+    def _consume(i, record):
+        nonlocal interval
+
+        data.append(record)
+        if detector is not None:
+            detector.tag(record)
+        _show_new_speed_data(record, i + 1, numRuns, unit, display, summary, screen)
+
+        if controller is not None:
+            interval = controller.update(record)
+            if scheduler is not None:
+                scheduler.set_interval(interval)
+
+        if save:
+            batch.append(record)
+            _save()
 
-        except OSError as e:
-            raise click.ClickException(e)
+    try:
+        if display.lower() == 'epaper':
+            screen = _open_display(settings)
 
-        if display.lower() == 'stdout':
-            click.echo('-- Internet Speed Test {} of {} --'.format(str(i + 1), str(numRuns)))
+        # One writer per run so file-based stores append through a single buffered handle
+        if save:
+            writer = open_speed_writer(settings)
+            detector = open_speed_detector(settings)
 
-            if summary:
-                show_speed_data_summary(data[i], isRaw=True, rateUnit=unit)
+        try:
+            if concurrent:
+                from .utils.scheduler import FixedRateScheduler
+                scheduler = FixedRateScheduler(interval)
+                scheduler.run(numRuns, _collect, _consume)
+                rate = scheduler.stats['rate']
             else:
-                show_speed_data_details(data[i], isRaw=True, rateUnit=unit)
+                start = last = time.monotonic()
+                for i in range(0, numRuns):
+                    last = time.monotonic()
+                    _consume(i, _collect(i))
+
+                    if (i + 1) < numRuns:
+                        time.sleep(interval)
+                rate = 60.0 * (numRuns - 1) / (last - start) if last > start else 0.0
+
+        finally:
+            # Save whatever was collected, even if a later run failed
+            if screen is not None:
+                screen.close()
+            if writer is not None:
+                try:
+                    _save(force=True)
+                finally:
+                    writer.close()
 
-        elif display.lower() == 'epaper':
-            #
-            #
-            click.echo('-- PRINT TO EPAPER CODE HERE --')
-            #
-            #
+    except OSError as e:
+        raise click.ClickException(e)
 
-        if (i + 1) < numRuns:
-            time.sleep(_APP_SLEEP_)
+    if numRuns > 1:
+        click.echo('-- Effective rate: {:.2f} run(s)/min --'.format(rate))
 
-    if save:
-        try:
-            save_speed_data(settings, data)
+    return data
+
+
+def browse_speed_data(settings, numRecs, unit, device=None, save=True):
+    """Page through SpeedTest data on ePaper screen with the SenseHat joystick.
+
+    Joystick events are read with asyncio as they arrive. Left/up and
+    right/down page through the last 'numRecs' records, and a press of the
+    middle button runs a new SpeedTest (on a worker thread, so the event
+    loop is not blocked) and shows it.
+
+    Args:
+        settings: List with data store settings
+        numRecs:  Number of most recent records to page through
+        unit:     Unit string.
+        device:   Joystick event device. If None, use '[main] joystick' setting or find SenseHat joystick.
+        save:     If true, then save new SpeedTest data to data store
+
+    Returns:
+        Tuple with number of joystick events handled and number of new SpeedTest runs
+    """
+    import asyncio
+
+    from .displays.pipeline import Pager
+    from .sensors.joystick import JoystickReader
+    from .utils.collect_data import collect_joystick, joystick_handlers
+    from .utils.store_data import save_speed_data
 
+    newRuns = []
+
+    async def _new_speed_data():
+        # A failed run or save is reported, but does not end the browse session
+        try:
+            record = await asyncio.get_running_loop().run_in_executor(None, run_speedtest, settings)
         except OSError as e:
-            raise click.ClickException(e)
+            click.echo('-- Unable to run speed test! --\n{}'.format(e))
+            return
+
+        if save:
+            try:
+                save_speed_data(settings, [record])
+            except OSError as e:
+                click.echo('-- Unable to save speed test data! --\n{}'.format(e))
+
+        newRuns.append(record)
+        pager.pages.append(record)
+        pager.index = len(pager.pages) - 1
+        pager.show()
+
+    async def _browse():
+        async with JoystickReader(device or settings.get('joystick')) as reader:
+            return await collect_joystick(reader, joystick_handlers(pager, sample=_new_speed_data))
+
+    screen = None
+    try:
+        screen = _open_display(settings)
+        pager = Pager(screen, get_speed_data(settings, numRecs, False), unit)
+        pager.index = max(len(pager.pages) - 1, 0)
+        pager.show()
+
+        handled = asyncio.run(_browse())
+
+    except OSError as e:
+        raise click.ClickException(e)
+
+    finally:
+        if screen is not None:
+            screen.close()
+
+    return handled, len(newRuns)
 
 
 # =========================================================
@@ -321,8 +625,9 @@ def main(ctx, ini: str = ''):
     """Check and log <some test> and related metrics.
 
     This tool can check and log the <some crazy stats> on demand. To continuously
-    check and log <some crazy stats>, simply use cron (or similar) to run
-    the '<appname> xxxxxxxx' command on a regular basis.
+    check and log <some crazy stats>, run the '<appname> daemon' command as a
+    service (or use cron or similar to run the '<appname> xxxxxxxx' command on
+    a regular basis).
     """
     ctx.obj = {
         'globals': {
@@ -406,6 +711,208 @@ def config(ctx, section: str, update: bool, force: bool, verify: bool):
         sys.exit(1)
 
 
+# ---------------------------------------------------------
+# CMD: compact
+# ---------------------------------------------------------
+@main.command()
+@click.option(
+    '--retain',
+    type=click.IntRange(-1, None),
+    default=None,
+    help="Max number of records to keep in data store. Defaults to '[data] retain' setting.",
+)
+@click.pass_context
+def compact(ctx, retain):
+    """
+    Remove oldest records from data store.
+    """
+    try:
+        ctx.obj['settings'] = load_settings(ctx.obj['globals'])
+        if retain is None:
+            retain = ctx.obj['settings'].retain
+
+        removed = compact_speed_data(ctx.obj['settings'].main, retain)
+
+    except (OSError, ValueError) as e:
+        click.echo("\nERROR! {}\n".format(e))
+        sys.exit(1)
+
+    click.echo("-- Removed {} record(s) from data store --".format(removed))
+
+
+# ---------------------------------------------------------
+# CMD: export
+# ---------------------------------------------------------
+@main.command()
+@click.option(
+    '--format', 'fmt',
+    type=click.Choice(['csv', 'jsonl', 'columnar'], case_sensitive=False),
+    default='csv', show_default=True,
+    help="Output format. 'columnar' is a compact binary format for analysis tools.",
+)
+@click.option(
+    '--output',
+    type=click.Path(dir_okay=False, writable=True, allow_dash=True),
+    default='-', show_default=True,
+    help="Output file name, or '-' for STDOUT.",
+)
+@click.option(
+    '--since',
+    type=Timestamp(),
+    default=None,
+    help='Only export records at or after this date/time (ISO 8601, UTC if no offset given).',
+)
+@click.option(
+    '--until',
+    type=Timestamp(),
+    default=None,
+    help='Only export records before this date/time (ISO 8601, UTC if no offset given).',
+)
+@click.pass_context
+def export(ctx, fmt: str, output: str, since, until):
+    """
+    Export records from data store.
+
+    Records are streamed in chunks, so exports of any size run in constant memory.
+    """
+    from .utils.export_data import export_speed_data
+
+    try:
+        ctx.obj['settings'] = load_settings(ctx.obj['globals'])
+
+        if output == '-':
+            numRecs = export_speed_data(
+                ctx.obj['settings'].main, click.get_binary_stream('stdout'), fmt.lower(), since, until)
+        else:
+            # Write to temp file first, so a failed export does not leave a partial file behind
+            tmpName = output + '.tmp'
+            try:
+                with open(tmpName, 'wb') as fh:
+                    numRecs = export_speed_data(ctx.obj['settings'].main, fh, fmt.lower(), since, until)
+                os.replace(tmpName, output)
+            finally:
+                if os.path.exists(tmpName):
+                    os.remove(tmpName)
+
+    except (OSError, ValueError) as e:
+        click.echo("\nERROR! {}\n".format(e), err=True)
+        sys.exit(1)
+
+    click.echo("-- Exported {} record(s) --".format(numRecs), err=True)
+
+
+# ---------------------------------------------------------
+# CMD: browse
+# ---------------------------------------------------------
+@main.command()
+@click.option(
+    '--count', 'cntr',
+    type=click.IntRange(1, _APP_HISTORY_, clamp=True),
+    default=10, show_default=True,
+    help='Number of most recent records to page through.',
+)
+@click.option(
+    '--device',
+    type=click.Path(),
+    default=None,
+    help="Joystick event device. Defaults to '[main] joystick' setting, or else the SenseHat joystick.",
+)
+@click.option(
+    '--save/--no-save', 'save',
+    default=True,
+    help='Save speed tests started with the joystick to data storage.',
+)
+@click.pass_context
+def browse(ctx, cntr: int, device, save: bool):
+    """
+    Page through speed tests on ePaper screen with the SenseHat joystick.
+
+    \b
+        Left/Up      Show previous record
+        Right/Down   Show next record
+        Middle       Run new speed test and show it
+    """
+    try:
+        ctx.obj['settings'] = load_settings(ctx.obj['globals'])
+    except (OSError, ValueError) as e:
+        raise click.ClickException(e)
+
+    settings = ctx.obj['settings']
+    try:
+        handled, newRuns = browse_speed_data(settings.main, cntr, settings.unit, device, save)
+    except KeyboardInterrupt:
+        return
+
+    click.echo("-- Joystick closed: {} event(s), {} new speed test(s) --".format(handled, newRuns))
+
+
+# ---------------------------------------------------------
+# CMD: daemon
+# ---------------------------------------------------------
+@main.command()
+@click.option(
+    '--interval',
+    type=click.IntRange(1, None),
+    default=None,
+    help="Seconds between test runs. Defaults to '[main] sleep' setting.",
+)
+@click.option(
+    '--display',
+    type=click.Choice(['stdout', 'epaper', 'none'], case_sensitive=False),
+    default='none', show_default=True,
+    help='Display summary of each speed test on STDOUT or ePaper screen.',
+)
+@click.option(
+    '--alert',
+    type=click.Choice(['stdout', 'epaper', 'none'], case_sensitive=False),
+    default='none', show_default=True,
+    help="Display speed tests flagged as anomalous on STDOUT or ePaper screen, also with '--display none'.",
+)
+@click.pass_context
+def daemon(ctx, interval, display: str, alert: str):
+    """
+    Run speed tests continuously until stopped.
+
+    \b
+    Settings are loaded once and the data store stays open.
+        SIGHUP   Reload config file
+        SIGTERM  Finish current test, save buffered records, and exit
+    """
+    screens = []
+
+    def _show(record, runNum):
+        target = display if display.lower() != 'none' or not record.get('anomaly') else alert
+        if target.lower() == 'epaper' and not screens:
+            screens.append(_open_display(worker.settings))
+        _show_new_speed_data(
+            record, runNum, '-', worker.settings.get('unit', _APP_BITS_), target, True, screens[0] if screens else None)
+
+    from .utils.daemon import Daemon
+
+    try:
+        worker = Daemon(
+            ctx.obj['globals'],
+            run_speedtest,
+            show=_show if display.lower() != 'none' or alert.lower() != 'none' else None,
+            interval=interval,
+            batchSize=_APP_BATCH_SIZE_,
+            pruneSlack=_APP_PRUNE_SLACK_,
+        )
+        click.echo("-- Daemon started (PID {}) --".format(os.getpid()))
+        stats = worker.run()
+
+    except (OSError, ValueError) as e:
+        click.echo("\nERROR! {}\n".format(e))
+        sys.exit(1)
+
+    finally:
+        for screen in screens:
+            screen.close()
+
+    click.echo("-- Daemon stopped: {runs} run(s), {failed} failed, {saved} record(s) saved, {pruned} pruned, "
+               "{anomalies} anomalous, {rate:.2f} run(s)/min --".format(**stats))
+
+
 # ---------------------------------------------------------
 # CMD: <main test or action>
 # ---------------------------------------------------------
@@ -431,18 +938,47 @@ def config(ctx, section: str, update: bool, force: bool, verify: bool):
     default=1, show_default=True,
     help='Number of tests to run in sequence, or records to retrieve for review.',
 )
+@click.option(
+    '--concurrent/--serial', 'concurrent',
+    default=False,
+    help='Run tests on a fixed-rate timer and overlap display/saving with the next test, or run them one after another.',
+)
 @click.option(
     '--history',
     is_flag=True,
     help="Show history of given number (using 'count') of previously saved speed tests.",
 )
+@click.option(
+    '--stats',
+    is_flag=True,
+    help="Works with '--history' flag. Show min/max/mean/percentiles of all records (in '--since'/'--until' range).",
+)
 @click.option(
     '--first/--last', 'first',
     default=True,
     help="Show 'first' or 'last' 'count' number of previously saved speed tests.",
 )
+@click.option(
+    '--resolution',
+    type=click.Choice([_APP_RAW_, '1m', '1h', '1d'], case_sensitive=False),
+    default=_APP_RAW_, show_default=True,
+    help="Works with '--history' flag. Show individual records, or mean values per minute, hour, or day.",
+)
+@click.option(
+    '--since',
+    type=Timestamp(),
+    default=None,
+    help="Works with '--history' flag. Only show records at or after this date/time (ISO 8601, UTC if no offset).",
+)
+@click.option(
+    '--until',
+    type=Timestamp(),
+    default=None,
+    help="Works with '--history' flag. Only show records before this date/time (ISO 8601, UTC if no offset).",
+)
 @click.pass_context
-def dothing(ctx, display: str, save: bool, summary_only: bool, cntr: int, history: bool, first: bool):
+def dothing(ctx, display: str, save: bool, summary_only: bool, cntr: int, concurrent: bool, history: bool, stats: bool,
+            first: bool, resolution: str, since, until):
     """This is the main thing that this app does.
 
     Replace this text with whatever this things does :-)
@@ -454,14 +990,19 @@ def dothing(ctx, display: str, save: bool, summary_only: bool, cntr: int, histor
         'download'  Download speed (Mbit/s)
         'upload'    Upload speed (Mbit/s)
     """
-    ctx.obj['settings'] = read_settings(ctx.obj['globals'])
-    if not isvalid_settings(ctx.obj['settings']):
-        raise click.ClickException("Invalid and/or incomplete config info!")
+    try:
+        ctx.obj['settings'] = load_settings(ctx.obj['globals'])
+    except (OSError, ValueError) as e:
+        raise click.ClickException(e)
 
-    unit = ctx.obj['settings']['speedtest'].get('unit', _APP_BITS_)
+    settings = ctx.obj['settings']
+    unit = settings.unit
 
     # Show historic data
-    if history:
+    if history and stats:
+        historic_speed_stats(settings.main, unit, since, until)
+
+    elif history:
         if cntr < 1 or cntr > ctx.obj['globals']['appHistory']:
             cntr = click.prompt(
                 "Enter number of data records to retrieve:",
@@ -470,7 +1011,7 @@ def dothing(ctx, display: str, save: bool, summary_only: bool, cntr: int, histor
                 show_default=True,
             )
 
-        historic_speed_data(ctx.obj['settings']['speedtest'], cntr, unit, first)
+        historic_speed_data(settings.main, cntr, unit, first, resolution.lower(), since, until)
 
     # Collect new data
     else:
@@ -482,7 +1023,14 @@ def dothing(ctx, display: str, save: bool, summary_only: bool, cntr: int, histor
                 show_default=True,
             )
 
-        new_speed_data(ctx.obj['settings']['speedtest'], cntr, unit, display, summary_only, save)
+        # Wait between runs adapts to the data if '[main] minsleep' < '[main] maxsleep'
+        controller = None
+        if settings.adaptive:
+            from .utils.scheduler import AdaptiveInterval
+            controller = AdaptiveInterval(settings.minsleep, settings.maxsleep, settings.sleep)
+
+        new_speed_data(settings.main, cntr, unit, display, summary_only, save, settings.retain, concurrent,
+                       settings.sleep, controller)
 
 
 # =========================================================
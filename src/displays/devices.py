@@ -0,0 +1,139 @@
+import os
+import struct
+import zlib
+
+from .framebuffer import FrameBuffer
+
+_EPAPER_W_: int = 250           # Waveshare 2.13" ePaper HAT (landscape)
+_EPAPER_H_: int = 122
+_LED_SIZE_: int = 8             # SenseHat LED matrix
+
+_LED_ON_ = (255, 255, 255)
+_LED_OFF_ = (0, 0, 0)
+_LED_COLORS_ = {1: _LED_ON_, 2: (0, 255, 0), 3: (255, 160, 0), 4: (255, 0, 0)}
+
+# Pixel value -> PNG grayscale. Anything 'on' is drawn black, like ink on paper.
+_PNG_GRAY_ = bytes([255] + [0] * 255)
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def _png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+def encode_png(fb):
+    """Encode framebuffer as 8-bit grayscale PNG. Returns PNG file content as bytes."""
+    width = fb.width
+    gray = fb.pixels.translate(_PNG_GRAY_)
+    raw = b''.join(b'\x00' + gray[y * width:(y + 1) * width] for y in range(fb.height))
+
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, fb.height, 8, 0, 0, 0, 0)),
+        _png_chunk(b'IDAT', zlib.compress(raw, 6)),
+        _png_chunk(b'IEND', b''),
+    ])
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class FileDisplay:
+    """Stand-in ePaper device backed by a PNG file.
+
+    The device keeps its own copy of the screen and only copies the
+    pushed regions into it, like a partial refresh on real hardware.
+    'stats' counts refreshes and pushed pixels, so update strategies
+    can be measured without hardware.
+
+    Args:
+        fname:  Path to PNG file. If None, keep screen in memory only.
+        width:  Width in pixels
+        height: Height in pixels
+    """
+
+    def __init__(self, fname=None, width=_EPAPER_W_, height=_EPAPER_H_):
+        self.fname = os.path.expanduser(fname) if fname else None
+        self.width = width
+        self.height = height
+        self.screen = FrameBuffer(width, height)
+        self.stats = {'partial': 0, 'full': 0, 'regions': 0, 'pixels': 0}
+
+        if self.fname:
+            path = os.path.dirname(os.path.abspath(self.fname))
+            if not os.path.isdir(path):
+                raise OSError("Display file folder '{}' does NOT exist or cannot be accessed!".format(path))
+
+    def push(self, fb, regions, full=False):
+        """Copy regions of framebuffer to device.
+
+        Args:
+            fb:      Framebuffer
+            regions: List of '(x, y, w, h)' tuples
+            full:    If TRUE, do full refresh (ignores 'regions')
+        """
+        if full:
+            regions = [(0, 0, self.width, self.height)]
+
+        width = self.width
+        for x, y, w, h in regions:
+            for row in range(y, y + h):
+                start = row * width + x
+                self.screen.pixels[start:start + w] = fb.pixels[start:start + w]
+            self.stats['pixels'] += w * h
+
+        self.stats['full' if full else 'partial'] += 1
+        self.stats['regions'] += len(regions)
+
+        if self.fname:
+            tmpName = self.fname + '.tmp'
+            with open(tmpName, 'wb') as fh:
+                fh.write(encode_png(self.screen))
+            os.replace(tmpName, self.fname)
+
+    def close(self):
+        pass
+
+
+class SenseHatDisplay:
+    """SenseHat 8x8 LED matrix.
+
+    Every LED write is a separate I/O call, so only pixels inside the
+    pushed regions that actually changed are written.
+
+    Args:
+        hat: SenseHat object. If None, create one.
+    """
+
+    def __init__(self, hat=None):
+        if hat is None:
+            from sense_hat import SenseHat
+            hat = SenseHat()
+
+        self._hat = hat
+        self.width = self.height = _LED_SIZE_
+        self.screen = FrameBuffer(self.width, self.height)
+        self.stats = {'partial': 0, 'full': 0, 'regions': 0, 'pixels': 0}
+
+    def push(self, fb, regions, full=False):
+        if full:
+            regions = [(0, 0, self.width, self.height)]
+            self._hat.clear()
+            self.screen.clear()
+
+        for x, y, w, h in regions:
+            for row in range(y, y + h):
+                for col in range(x, x + w):
+                    val = fb.get_pixel(col, row)
+                    if val != self.screen.get_pixel(col, row):
+                        self._hat.set_pixel(col, row, _LED_COLORS_.get(val, _LED_ON_) if val else _LED_OFF_)
+                        self.screen.set_pixel(col, row, val)
+                        self.stats['pixels'] += 1
+
+        self.stats['full' if full else 'partial'] += 1
+        self.stats['regions'] += len(regions)
+
+    def close(self):
+        self._hat.clear()
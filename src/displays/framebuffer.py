@@ -0,0 +1,184 @@
+_FONT_W_: int = 5
+_FONT_H_: int = 7
+_TILE_: int = 8
+
+# Classic 5x7 font. Each glyph is 5 column bytes, LSB is top row.
+_FONT_ = {
+    ' ': (0x00, 0x00, 0x00, 0x00, 0x00),
+    '!': (0x00, 0x00, 0x5F, 0x00, 0x00),
+    '%': (0x23, 0x13, 0x08, 0x64, 0x62),
+    ',': (0x00, 0x50, 0x30, 0x00, 0x00),
+    '-': (0x08, 0x08, 0x08, 0x08, 0x08),
+    '.': (0x00, 0x60, 0x60, 0x00, 0x00),
+    '/': (0x20, 0x10, 0x08, 0x04, 0x02),
+    ':': (0x00, 0x36, 0x36, 0x00, 0x00),
+    '?': (0x02, 0x01, 0x51, 0x09, 0x06),
+    '0': (0x3E, 0x51, 0x49, 0x45, 0x3E),
+    '1': (0x00, 0x42, 0x7F, 0x40, 0x00),
+    '2': (0x42, 0x61, 0x51, 0x49, 0x46),
+    '3': (0x21, 0x41, 0x45, 0x4B, 0x31),
+    '4': (0x18, 0x14, 0x12, 0x7F, 0x10),
+    '5': (0x27, 0x45, 0x45, 0x45, 0x39),
+    '6': (0x3C, 0x4A, 0x49, 0x49, 0x30),
+    '7': (0x01, 0x71, 0x09, 0x05, 0x03),
+    '8': (0x36, 0x49, 0x49, 0x49, 0x36),
+    '9': (0x06, 0x49, 0x49, 0x29, 0x1E),
+    'A': (0x7E, 0x11, 0x11, 0x11, 0x7E),
+    'B': (0x7F, 0x49, 0x49, 0x49, 0x36),
+    'C': (0x3E, 0x41, 0x41, 0x41, 0x22),
+    'D': (0x7F, 0x41, 0x41, 0x22, 0x1C),
+    'E': (0x7F, 0x49, 0x49, 0x49, 0x41),
+    'F': (0x7F, 0x09, 0x09, 0x01, 0x01),
+    'G': (0x3E, 0x41, 0x49, 0x49, 0x7A),
+    'H': (0x7F, 0x08, 0x08, 0x08, 0x7F),
+    'I': (0x00, 0x41, 0x7F, 0x41, 0x00),
+    'J': (0x20, 0x40, 0x41, 0x3F, 0x01),
+    'K': (0x7F, 0x08, 0x14, 0x22, 0x41),
+    'L': (0x7F, 0x40, 0x40, 0x40, 0x40),
+    'M': (0x7F, 0x02, 0x04, 0x02, 0x7F),
+    'N': (0x7F, 0x04, 0x08, 0x10, 0x7F),
+    'O': (0x3E, 0x41, 0x41, 0x41, 0x3E),
+    'P': (0x7F, 0x09, 0x09, 0x09, 0x06),
+    'Q': (0x3E, 0x41, 0x51, 0x21, 0x5E),
+    'R': (0x7F, 0x09, 0x19, 0x29, 0x46),
+    'S': (0x46, 0x49, 0x49, 0x49, 0x31),
+    'T': (0x01, 0x01, 0x7F, 0x01, 0x01),
+    'U': (0x3F, 0x40, 0x40, 0x40, 0x3F),
+    'V': (0x1F, 0x20, 0x40, 0x20, 0x1F),
+    'W': (0x7F, 0x20, 0x18, 0x20, 0x7F),
+    'X': (0x63, 0x14, 0x08, 0x14, 0x63),
+    'Y': (0x03, 0x04, 0x78, 0x04, 0x03),
+    'Z': (0x61, 0x51, 0x49, 0x45, 0x43),
+}
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class FrameBuffer:
+    """In-memory framebuffer with one byte per pixel.
+
+    Pixel values are device-neutral: 0 is 'off' (white paper or dark LED),
+    and any other value is 'on' or a color index for the device to map.
+
+    Args:
+        width:  Width in pixels
+        height: Height in pixels
+    """
+
+    def __init__(self, width, height):
+        self.width = int(width)
+        self.height = int(height)
+        self.pixels = bytearray(self.width * self.height)
+
+    def copy(self):
+        fb = FrameBuffer(self.width, self.height)
+        fb.pixels[:] = self.pixels
+        return fb
+
+    def clear(self, val=0):
+        self.pixels[:] = bytes((val,)) * len(self.pixels)
+
+    def get_pixel(self, x, y):
+        return self.pixels[y * self.width + x]
+
+    def set_pixel(self, x, y, val=1):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.pixels[y * self.width + x] = val
+
+    def fill_rect(self, x, y, w, h, val=1):
+        x0, x1 = max(x, 0), min(x + w, self.width)
+        if x1 <= x0:
+            return
+
+        span = bytes((val,)) * (x1 - x0)
+        for row in range(max(y, 0), min(y + h, self.height)):
+            start = row * self.width
+            self.pixels[start + x0:start + x1] = span
+
+    def text(self, x, y, text, val=1, scale=1):
+        """Draw text with built-in 5x7 font. Returns x position after last character."""
+        for char in str(text).upper():
+            glyph = _FONT_.get(char, _FONT_['?'])
+            for col, bits in enumerate(glyph):
+                for row in range(_FONT_H_):
+                    if bits & (1 << row):
+                        self.fill_rect(x + col * scale, y + row * scale, scale, scale, val)
+            x += (_FONT_W_ + 1) * scale
+
+        return x
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def text_size(text, scale=1):
+    """Return '(width, height)' of text drawn with 'FrameBuffer.text()'."""
+    return len(str(text)) * (_FONT_W_ + 1) * scale, _FONT_H_ * scale
+
+
+def dirty_regions(prev, curr, tile=_TILE_):
+    """Find regions that differ between two frames.
+
+    Frames are compared in 'tile' x 'tile' blocks using row slices, and
+    changed blocks are merged into rectangles: first into horizontal runs
+    on each tile row, then runs with the same span on consecutive tile
+    rows are joined.
+
+    Args:
+        prev: Previous frame (FrameBuffer) or None
+        curr: Current frame (FrameBuffer)
+        tile: Block size in pixels
+
+    Returns:
+        List of '(x, y, w, h)' tuples. Whole frame if 'prev' is None or of different size.
+    """
+    width, height = curr.width, curr.height
+    if prev is None or (prev.width, prev.height) != (width, height):
+        return [(0, 0, width, height)]
+
+    old, new = prev.pixels, curr.pixels
+    if old == new:
+        return []
+
+    regions = []
+    open_ = {}                      # (x, w) -> index in 'regions' of rect ending on previous tile row
+
+    for ty in range(0, height, tile):
+        rows = range(ty, min(ty + tile, height))
+        runs = []
+
+        if old[ty * width:rows[-1] * width + width] == new[ty * width:rows[-1] * width + width]:
+            open_ = {}
+            continue
+        runStart = None
+
+        for tx in range(0, width, tile):
+            end = min(tx + tile, width)
+            changed = any(old[row * width + tx:row * width + end] != new[row * width + tx:row * width + end]
+                          for row in rows)
+
+            if changed and runStart is None:
+                runStart = tx
+            elif not changed and runStart is not None:
+                runs.append((runStart, tx - runStart))
+                runStart = None
+
+        if runStart is not None:
+            runs.append((runStart, width - runStart))
+
+        rowH = len(rows)
+        nextOpen = {}
+        for run in runs:
+            idx = open_.get(run)
+            if idx is not None:
+                x, y, w, h = regions[idx]
+                regions[idx] = (x, y, w, h + rowH)
+            else:
+                idx = len(regions)
+                regions.append((run[0], ty, run[1], rowH))
+            nextOpen[run] = idx
+
+        open_ = nextOpen
+
+    return regions
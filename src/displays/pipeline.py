@@ -0,0 +1,205 @@
+import math
+
+from .framebuffer import FrameBuffer, dirty_regions, text_size
+from ..utils.timestamps import format_minute
+
+_FULL_EVERY_: int = 20          # Full refresh after this many partial ones (clears ePaper ghosting)
+_FULL_RATIO_: float = 0.5       # Full refresh when this much of the screen has changed
+_SENSEHAT_: str = 'sensehat'
+
+# Bar graph scale (in display units) for displays too small for text
+_BAR_MAX_ = {'download': 1000.0, 'upload': 1000.0, 'ping': 100.0}
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def _speed_values(record, unit):
+    # Mbit/s or MB/s
+    divisor = 1000000 if unit.lower() != 'bytes' else 8000000
+
+    def _val(name, div=1):
+        return None if record.get(name) is None else float(record[name]) / div
+
+    return _val('ping'), _val('download', divisor), _val('upload', divisor)
+
+
+def _render_bars(fb, record, unit):
+    ping, down, up = _speed_values(record, unit)
+
+    for col, (name, val, color) in enumerate([('download', down, 2), ('upload', up, 3), ('ping', ping, 4)]):
+        if val is None:
+            continue
+
+        height = min(int(math.ceil(fb.height * val / _BAR_MAX_[name])), fb.height)
+        x = col * (fb.width // 3 + 1)
+        fb.fill_rect(x, fb.height - height, max(fb.width // 3 - 1, 1), height, color)
+
+
+def render_speed_data(fb, record, unit='bits'):
+    """Draw SpeedTest data record into framebuffer.
+
+    Large displays (e.g. ePaper) get a text layout with date/time, download,
+    upload, and ping, and values tagged as anomalous are marked with '!'.
+    Small displays (e.g. SenseHat LED matrix) get a bar graph.
+
+    Args:
+        fb:     FrameBuffer
+        record: SpeedTest data record (as dict)
+        unit:   MB/s if 'bytes', else Mbit/s
+    """
+    lineH = text_size('0', 3)[1]
+    if fb.height < lineH * 3 + 10:
+        _render_bars(fb, record, unit)
+        return
+
+    ping, down, up = _speed_values(record, unit)
+    unitLbl = 'MBIT/S' if unit.lower() != 'bytes' else 'MB/S'
+    na = '- N/A -'
+
+    fb.text(2, 2, record.get('location') or 'SPEEDTEST')
+    if record.get('timestamp'):
+        dateStr = format_minute(record['timestamp'], record.get('locationTZ'))
+        fb.text(fb.width - text_size(dateStr)[0] - 2, 2, dateStr)
+
+    flagged = {tag['channel'] for tag in record.get('anomaly') or ()}
+    step = (fb.height - 12) // 3
+    for i, (name, label, val, fmtStr, lbl) in enumerate([
+        ('download', 'DOWN', down, '{:.2f}', unitLbl),
+        ('upload', 'UP', up, '{:.2f}', unitLbl),
+        ('ping', 'PING', ping, '{:.1f}', 'MS'),
+    ]):
+        y = 12 + i * step + (step - lineH) // 2
+        fb.text(2, y + lineH - text_size(label)[1], label)
+        x = fb.text(40, y, na if val is None else fmtStr.format(val), scale=3)
+        x = fb.text(x + 2, y + lineH - text_size(lbl)[1], lbl)
+        if name in flagged:
+            fb.text(x + 4, y, '!', scale=3)
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class DisplayPipeline:
+    """Render data records and push only what changed to a display device.
+
+    Each record is drawn into a fresh framebuffer, which is compared with
+    the last frame pushed to the device. Identical frames are skipped and
+    otherwise only the changed regions are pushed. A full refresh is done
+    for the first frame, when most of the screen has changed, and after
+    'fullEvery' partial refreshes.
+
+    Args:
+        device:    Display device with 'width', 'height', 'push()', and 'close()'
+        renderer:  Function called as 'renderer(fb, record, unit)'
+        fullEvery: Max number of partial refreshes between full ones. 0 = no limit
+        fullRatio: Changed area (as fraction of screen) that triggers a full refresh
+    """
+
+    def __init__(self, device, renderer=render_speed_data, fullEvery=_FULL_EVERY_, fullRatio=_FULL_RATIO_):
+        self.device = device
+        self.renderer = renderer
+        self.fullEvery = fullEvery
+        self.fullRatio = fullRatio
+        self.last = None
+        self.stats = {'frames': 0, 'skipped': 0, 'partial': 0, 'full': 0}
+        self._numPartial = 0
+
+    def show(self, record, unit='bits'):
+        """Render record and update display.
+
+        Returns:
+            List of '(x, y, w, h)' regions that were pushed
+        """
+        fb = FrameBuffer(self.device.width, self.device.height)
+        self.renderer(fb, record, unit)
+        self.stats['frames'] += 1
+
+        regions = dirty_regions(self.last, fb)
+        if not regions:
+            self.stats['skipped'] += 1
+            return regions
+
+        area = sum(w * h for _, _, w, h in regions)
+        full = (
+            self.last is None
+            or area >= self.fullRatio * fb.width * fb.height
+            or (self.fullEvery and self._numPartial >= self.fullEvery)
+        )
+
+        self.device.push(fb, regions, full)
+        self.last = fb
+
+        if full:
+            self._numPartial = 0
+            self.stats['full'] += 1
+        else:
+            self._numPartial += 1
+            self.stats['partial'] += 1
+
+        return regions
+
+    def close(self):
+        self.device.close()
+
+
+class Pager:
+    """Page through a list of data records on a display pipeline.
+
+    Args:
+        pipeline: DisplayPipeline object
+        pages:    List of data records
+        unit:     MB/s if 'bytes', else Mbit/s
+    """
+
+    def __init__(self, pipeline, pages, unit='bits'):
+        self.pipeline = pipeline
+        self.pages = pages
+        self.unit = unit
+        self.index = 0
+
+    def show(self):
+        """Show current page. Returns list of updated regions."""
+        if not self.pages:
+            return []
+
+        return self.pipeline.show(self.pages[self.index], self.unit)
+
+    def next(self):
+        if self.pages:
+            self.index = (self.index + 1) % len(self.pages)
+
+        return self.show()
+
+    def prev(self):
+        if self.pages:
+            self.index = (self.index - 1) % len(self.pages)
+
+        return self.show()
+
+
+# =========================================================
+#               C O R E   F U N C T I O N S
+# =========================================================
+def init_display(device):
+    """Create display pipeline for a given device.
+
+    Args:
+        device: 'sensehat' for the SenseHat LED matrix. Anything else is
+                used as path to the PNG file of the stand-in ePaper display.
+
+    Returns:
+        DisplayPipeline object
+
+    Raises:
+        OSError: If unable to access display device.
+    """
+    from .devices import FileDisplay, SenseHatDisplay
+
+    if str(device).lower() == _SENSEHAT_:
+        try:
+            return DisplayPipeline(SenseHatDisplay())
+        except (ImportError, OSError) as e:
+            raise OSError("Unable to access SenseHat LED matrix!\n{}".format(e))
+
+    return DisplayPipeline(FileDisplay(device))
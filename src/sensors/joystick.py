@@ -0,0 +1,184 @@
+import asyncio
+import glob
+import os
+import struct
+from collections import namedtuple
+
+_JOYSTICK_NAME_: str = 'Sense HAT Joystick'
+_SYSFS_INPUT_: str = '/sys/class/input/event*'
+_DEBOUNCE_: float = 0.05        # seconds
+_MAX_QUEUE_: int = 32
+_READ_EVENTS_: int = 64         # max events per 'read()'
+
+# 'struct input_event' from 'linux/input.h': timeval (2x long), type, code, value
+_EVENT_ = struct.Struct('llHHi')
+
+_EV_KEY_: int = 0x01
+_KEYS_ = {103: 'up', 108: 'down', 105: 'left', 106: 'right', 28: 'middle'}
+_ACTIONS_ = {0: 'released', 1: 'pressed', 2: 'held'}
+
+# Same fields as 'sense_hat.InputEvent'
+JoystickEvent = namedtuple('JoystickEvent', ('timestamp', 'direction', 'action'))
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def pack_event(direction, action, timestamp=0.0):
+    """Pack joystick event as raw 'input_event' bytes. Used by fake devices."""
+    code = next(key for key, val in _KEYS_.items() if val == direction)
+    value = next(key for key, val in _ACTIONS_.items() if val == action)
+    sec = int(timestamp)
+
+    return _EVENT_.pack(sec, int(round((timestamp - sec) * 1000000)), _EV_KEY_, code, value)
+
+
+def parse_events(buf):
+    """Parse raw 'input_event' records.
+
+    Args:
+        buf: Bytes read from event device
+
+    Returns:
+        Tuple with list of JoystickEvent objects and remaining (incomplete) bytes
+    """
+    size = _EVENT_.size
+    end = len(buf) - len(buf) % size
+    events = []
+
+    for sec, usec, evType, code, value in _EVENT_.iter_unpack(buf[:end]):
+        if evType == _EV_KEY_ and code in _KEYS_ and value in _ACTIONS_:
+            events.append(JoystickEvent(sec + usec / 1000000, _KEYS_[code], _ACTIONS_[value]))
+
+    return events, buf[end:]
+
+
+def find_joystick():
+    """Find event device for SenseHat joystick.
+
+    Returns:
+        Device path (e.g. '/dev/input/event0')
+
+    Raises:
+        OSError: If no joystick device is found.
+    """
+    for path in sorted(glob.glob(_SYSFS_INPUT_)):
+        try:
+            with open(os.path.join(path, 'device', 'name')) as fh:
+                if _JOYSTICK_NAME_ in fh.read():
+                    return os.path.join('/dev/input', os.path.basename(path))
+        except OSError:
+            continue
+
+    raise OSError("Unable to find '{}' input device!".format(_JOYSTICK_NAME_))
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class JoystickReader:
+    """Asyncio reader for SenseHat joystick events.
+
+    The device file descriptor is registered with the event loop, so
+    events are parsed as soon as the kernel delivers them and nothing
+    polls in between. Repeated events with the same direction and action
+    within 'debounce' seconds (by kernel timestamp) are dropped. Events
+    go into a bounded queue, and the oldest ones are discarded when
+    nobody keeps up.
+
+    Any file that delivers raw 'input_event' records works as device,
+    e.g. the read end of a pipe in tests.
+
+    Args:
+        path:     Event device path. If None, find SenseHat joystick.
+        debounce: Min seconds between two events with same direction and action
+        maxQueue: Max number of queued events
+    """
+
+    def __init__(self, path=None, debounce=_DEBOUNCE_, maxQueue=_MAX_QUEUE_):
+        self.path = path
+        self.debounce = debounce
+        self.maxQueue = maxQueue
+        self.queue = None
+        self.stats = {'events': 0, 'debounced': 0, 'dropped': 0}
+        self._fd = None
+        self._loop = None
+        self._buf = b''
+        self._last = {}
+
+    async def __aenter__(self):
+        self.open()
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.get()
+        if event is None:
+            raise StopAsyncIteration
+
+        return event
+
+    def open(self):
+        """Open device and start reading. Must be called from a running event loop.
+
+        Raises:
+            OSError: If unable to open device.
+        """
+        path = self.path or find_joystick()
+        try:
+            self._fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        except OSError as e:
+            raise OSError("Unable to open joystick device '{}'!\n{}".format(path, e))
+
+        self._loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(self.maxQueue)
+        self._loop.add_reader(self._fd, self._on_readable)
+
+    def close(self):
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+            self._put(None)
+
+    async def get(self):
+        """Wait for next event. Returns None once device is closed."""
+        event = await self.queue.get()
+        if event is None:
+            self.queue.put_nowait(None)         # Let later calls see end of stream too
+
+        return event
+
+    def _put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.stats['dropped'] += 1
+
+        self.queue.put_nowait(event)
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, _EVENT_.size * _READ_EVENTS_)
+        except BlockingIOError:
+            return
+
+        if not data:
+            self.close()
+            return
+
+        events, self._buf = parse_events(self._buf + data)
+        for event in events:
+            key = (event.direction, event.action)
+            last = self._last.get(key)
+            if last is not None and 0 <= event.timestamp - last < self.debounce:
+                self.stats['debounced'] += 1
+                continue
+
+            self._last[key] = event.timestamp
+            self.stats['events'] += 1
+            self._put(event)
@@ -0,0 +1,286 @@
+import json
+import os
+import re
+import threading
+import time
+
+_URL_: str = 'https://api.openweathermap.org/data/2.5/weather'
+_TTL_: float = 600.0            # OpenWeather updates current weather about every 10 minutes
+_TIMEOUT_: float = 10.0         # seconds per request
+_MAX_WORKERS_: int = 8
+
+_API_KEY_ = re.compile(r'[0-9a-f]{32}')
+
+_CLIENTS_ = {}
+_CLIENTS_LOCK_ = threading.Lock()
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def isvalid_api_key(apiKey):
+    """Check that API key is a 32-character hexadecimal string."""
+    return bool(apiKey) and _API_KEY_.fullmatch(str(apiKey)) is not None
+
+
+def _location_key(location):
+    # 'London,GB' and ' london, gb ' are the same place to OpenWeather
+    return ','.join(part.strip() for part in str(location).lower().split(','))
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class WeatherCache:
+    """TTL cache for weather data, keyed by location.
+
+    Entries carry the wall-clock time they were fetched, so a cache file
+    written by one process is still valid for the next one (e.g. repeated
+    cron runs). The cache can be shared between threads.
+
+    Args:
+        ttl:   Seconds an entry stays valid
+        fname: Optional path to cache file (JSON). If None, cache is in memory only.
+        clock: Wall-clock time function
+    """
+
+    def __init__(self, ttl=_TTL_, fname=None, clock=time.time):
+        self.ttl = float(ttl)
+        self.fname = fname
+        self.clock = clock
+        self.stats = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._changes = 0           # counts 'put()'/'clear()' calls, so a save knows what it covered
+        self._saved = 0
+
+        if fname:
+            self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, location):
+        """Return cached data for location, or None if missing or expired."""
+        key = _location_key(location)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not 0 <= self.clock() - entry[0] < self.ttl:
+                self.stats['misses'] += 1
+                return None
+
+            self.stats['hits'] += 1
+            return entry[1]
+
+    def put(self, location, data):
+        with self._lock:
+            self._entries[_location_key(location)] = (self.clock(), data)
+            self._changes += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._changes += 1
+
+    def load(self):
+        """Load unexpired entries from cache file. A missing or broken file is an empty cache."""
+        try:
+            with open(self.fname, 'r') as fh:
+                entries = json.load(fh)
+        except (OSError, ValueError):
+            return
+
+        now = self.clock()
+        with self._lock:
+            for key, entry in entries.items():
+                try:
+                    fetched, data = float(entry[0]), entry[1]
+                except (TypeError, ValueError, IndexError, KeyError):
+                    continue
+                if 0 <= now - fetched < self.ttl:
+                    self._entries[key] = (fetched, data)
+
+    def save(self):
+        """Write unexpired entries to cache file, if anything has changed.
+
+        The cache is only a shortcut, so failing to write it is not an error.
+        Changes stay unsaved, and the next call tries again.
+        """
+        if not self.fname or self._saved == self._changes:
+            return
+
+        now = self.clock()
+        with self._lock:
+            entries = {key: entry for key, entry in self._entries.items() if 0 <= now - entry[0] < self.ttl}
+            changes = self._changes
+
+        tmpName = self.fname + '.tmp'
+        try:
+            with open(tmpName, 'w') as fh:
+                json.dump(entries, fh, separators=(',', ':'))
+            os.replace(tmpName, self.fname)
+        except OSError:
+            return
+
+        with self._lock:
+            self._saved = max(self._saved, changes)
+
+
+class WeatherClient:
+    """OpenWeather client for current weather data.
+
+    Requests go through a pooled keep-alive session and responses are
+    cached per location for 'ttl' seconds, which matches how often
+    OpenWeather updates current weather. With a cache file, repeated runs
+    within the TTL do no network I/O at all.
+
+    Args:
+        apiKey:     OpenWeather API key
+        ttl:        Seconds a response stays valid
+        cacheFile:  Optional path to cache file
+        maxWorkers: Max number of concurrent requests (and pooled connections)
+        session:    Optional 'requests.Session' (or compatible) object
+        url:        API URL
+        timeout:    Request timeout in seconds
+        clock:      Wall-clock time function
+
+    Raises:
+        ValueError: If API key is invalid.
+    """
+
+    def __init__(self, apiKey, ttl=_TTL_, cacheFile=None, maxWorkers=_MAX_WORKERS_, session=None,
+                 url=_URL_, timeout=_TIMEOUT_, clock=time.time):
+        if not isvalid_api_key(apiKey):
+            raise ValueError("Invalid OpenWeather API key! Expected a 32-character hexadecimal string.")
+
+        self.apiKey = apiKey
+        self.url = url
+        self.timeout = timeout
+        self.maxWorkers = max(int(maxWorkers), 1)
+        self.cache = WeatherCache(ttl, cacheFile, clock)
+        self.session = session
+        self.stats = {'requests': 0}
+        self._sessionLock = threading.Lock()
+
+    def _get_session(self):
+        with self._sessionLock:
+            if self.session is None:
+                from ..utils.session import new_session
+
+                self.session = new_session(self.maxWorkers)
+
+        return self.session
+
+    def _fetch(self, location):
+        session = self._get_session()
+        self.stats['requests'] += 1
+
+        try:
+            resp = session.get(self.url, params={'q': location, 'appid': self.apiKey}, timeout=self.timeout)
+        except Exception as e:
+            raise OSError("Unable to access OpenWeather for '{}'!\n{}".format(location, e))
+
+        if resp.status_code != 200:
+            raise OSError("OpenWeather returned HTTP status {} for '{}'!".format(resp.status_code, location))
+
+        try:
+            data = resp.json()
+        except ValueError as e:
+            raise OSError("Invalid OpenWeather response for '{}'!\n{}".format(location, e))
+
+        self.cache.put(location, data)
+        return data
+
+    def current(self, location):
+        """Get current weather for a location.
+
+        Args:
+            location: City name, optionally with country code (e.g. 'London,GB')
+
+        Returns:
+            Dict with OpenWeather data
+
+        Raises:
+            OSError: If unable to get weather data.
+        """
+        data = self.cache.get(location)
+        if data is None:
+            data = self._fetch(location)
+            self.cache.save()
+
+        return data
+
+    def current_many(self, locations):
+        """Get current weather for many locations, fetching cache misses concurrently.
+
+        Args:
+            locations: List of locations
+
+        Returns:
+            Tuple with dict of weather data and dict of errors (OSError), both keyed by location
+        """
+        results = {}
+        errors = {}
+        misses = {}
+
+        for location in locations:
+            data = self.cache.get(location)
+            if data is not None:
+                results[location] = data
+            else:
+                # Same place spelled differently is fetched once
+                misses.setdefault(_location_key(location), []).append(location)
+
+        if misses:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(min(self.maxWorkers, len(misses))) as pool:
+                futures = [(names, pool.submit(self._fetch, names[0])) for names in misses.values()]
+
+            for names, future in futures:
+                try:
+                    data = future.result()
+                except OSError as e:
+                    errors.update((name, e) for name in names)
+                else:
+                    results.update((name, data) for name in names)
+
+            self.cache.save()
+
+        return results, errors
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+
+# =========================================================
+#               C O R E   F U N C T I O N S
+# =========================================================
+def get_client(apiKey, ttl=_TTL_, cacheFile=None):
+    """Return shared WeatherClient for API key and cache file, so that sessions and caches are reused."""
+    key = (apiKey, cacheFile)
+
+    with _CLIENTS_LOCK_:
+        client = _CLIENTS_.get(key)
+        if client is None or client.cache.ttl != float(ttl):
+            client = _CLIENTS_[key] = WeatherClient(apiKey, ttl, cacheFile)
+
+    return client
+
+
+def current_weather(location, apiKey, cacheFile=None):
+    """Get short description of current weather (e.g. 'light rain') for a location.
+
+    Raises:
+        ValueError: If API key is invalid.
+        OSError: If unable to get weather data.
+    """
+    data = get_client(apiKey, cacheFile=cacheFile).current(location)
+
+    try:
+        return data['weather'][0]['description']
+    except (KeyError, IndexError, TypeError):
+        raise OSError("Weather description missing in OpenWeather response for '{}'!".format(location))
@@ -0,0 +1,163 @@
+import math
+import os
+import random
+
+_CHNL_TEMP_: str = 'temperature'
+_CHNL_HUMID_: str = 'humidity'
+_CHNL_PRESS_: str = 'pressure'
+_CHNL_PITCH_: str = 'pitch'
+_CHNL_ROLL_: str = 'roll'
+_CHNL_YAW_: str = 'yaw'
+_CHNL_ACCEL_X_: str = 'accel_x'
+_CHNL_ACCEL_Y_: str = 'accel_y'
+_CHNL_ACCEL_Z_: str = 'accel_z'
+
+_CHANNELS_ = (
+    _CHNL_TEMP_, _CHNL_HUMID_, _CHNL_PRESS_,
+    _CHNL_PITCH_, _CHNL_ROLL_, _CHNL_YAW_,
+    _CHNL_ACCEL_X_, _CHNL_ACCEL_Y_, _CHNL_ACCEL_Z_,
+)
+
+# Channels that come out of a single SenseHat call. Reading
+# one of them means we get the others for free.
+_ORIENTATION_ = (_CHNL_PITCH_, _CHNL_ROLL_, _CHNL_YAW_)
+_ACCEL_ = (_CHNL_ACCEL_X_, _CHNL_ACCEL_Y_, _CHNL_ACCEL_Z_)
+
+# Set to '1' (or 'yes'/'true') to use the simulated SenseHat, e.g. for tests and benchmarks
+_SIMULATE_ENV_: str = 'SENSEHAT_SIMULATE'
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class SenseHatSensor:
+    """Hardware backend that reads channels from an attached SenseHat.
+
+    Each call to 'read()' hits the orientation and accelerometer
+    registers at most once, no matter how many of their channels
+    are requested.
+    """
+
+    def __init__(self, hat=None):
+        if hat is None:
+            from sense_hat import SenseHat
+            hat = SenseHat()
+
+        self._hat = hat
+
+    def read(self, channels):
+        """Read all requested channels in one pass.
+
+        Args:
+            channels: Sequence of channel names
+
+        Returns:
+            Tuple of float values in the same order as 'channels'
+        """
+        vals = {}
+        for name in channels:
+            if name in vals:
+                continue
+
+            if name == _CHNL_TEMP_:
+                vals[name] = self._hat.get_temperature()
+            elif name == _CHNL_HUMID_:
+                vals[name] = self._hat.get_humidity()
+            elif name == _CHNL_PRESS_:
+                vals[name] = self._hat.get_pressure()
+            elif name in _ORIENTATION_:
+                data = self._hat.get_orientation_degrees()
+                vals.update((key, data[key]) for key in _ORIENTATION_)
+            elif name in _ACCEL_:
+                data = self._hat.get_accelerometer_raw()
+                vals.update((key, data[key[-1]]) for key in _ACCEL_)
+            else:
+                raise ValueError("Invalid sensor channel '{}'".format(name))
+
+        return tuple(float(vals[name]) for name in channels)
+
+
+class SimulatedSenseHat:
+    """Stand-in backend that produces plausible SenseHat readings.
+
+    Values follow a seeded random walk around typical indoor
+    conditions so runs are repeatable and can be benchmarked on
+    machines without the actual hardware.
+    """
+
+    _BASELINE_ = {
+        _CHNL_TEMP_: (21.0, 0.05),
+        _CHNL_HUMID_: (45.0, 0.1),
+        _CHNL_PRESS_: (1013.25, 0.02),
+        _CHNL_PITCH_: (0.0, 0.5),
+        _CHNL_ROLL_: (0.0, 0.5),
+        _CHNL_YAW_: (180.0, 0.5),
+        _CHNL_ACCEL_X_: (0.0, 0.01),
+        _CHNL_ACCEL_Y_: (0.0, 0.01),
+        _CHNL_ACCEL_Z_: (1.0, 0.01),
+    }
+
+    def __init__(self, seed=None):
+        self._rand = random.Random(seed)
+        self._state = {key: val[0] for key, val in self._BASELINE_.items()}
+        self.reads = 0
+
+    def read(self, channels):
+        """Read all requested channels in one pass.
+
+        Args:
+            channels: Sequence of channel names
+
+        Returns:
+            Tuple of float values in the same order as 'channels'
+        """
+        self.reads += 1
+        gauss = self._rand.gauss
+        state = self._state
+        out = []
+
+        for name in channels:
+            try:
+                base, step = self._BASELINE_[name]
+            except KeyError:
+                raise ValueError("Invalid sensor channel '{}'".format(name))
+
+            # Random walk that slowly drifts back towards the baseline
+            val = state[name] + gauss(0, step) + (base - state[name]) * 0.01
+            if name in _ORIENTATION_:
+                val = math.fmod(val + 360.0, 360.0)
+
+            state[name] = val
+            out.append(val)
+
+        return tuple(out)
+
+
+# =========================================================
+#               C O R E   F U N C T I O N S
+# =========================================================
+def init_sensor(simulate=None, seed=None):
+    """Create SenseHat sensor backend.
+
+    Args:
+        simulate: If TRUE, use simulated SenseHat. If FALSE, use actual
+                  hardware. If None, use actual hardware unless the
+                  'SENSEHAT_SIMULATE' environment variable is set.
+        seed:     Random seed for simulated SenseHat
+
+    Returns:
+        Sensor backend object with a 'read(channels)' method
+
+    Raises:
+        OSError: If unable to access SenseHat hardware.
+    """
+    if simulate is None:
+        simulate = os.environ.get(_SIMULATE_ENV_, '').strip().lower() in ('1', 'yes', 'true', 'on')
+
+    if simulate:
+        return SimulatedSenseHat(seed)
+
+    try:
+        return SenseHatSensor()
+    except (ImportError, OSError) as e:
+        raise OSError("Unable to access SenseHat!\n{}".format(e))
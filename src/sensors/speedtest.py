@@ -0,0 +1,46 @@
+_KEEP_FLDS_ = ('timestamp', 'ping', 'download', 'upload', 'bytes_sent', 'bytes_received', 'share', 'server', 'client')
+
+
+# =========================================================
+#               C O R E   F U N C T I O N S
+# =========================================================
+def run_speedtest(settings):
+    """Run internet speed test using 'speedtest-cli'.
+
+    Args:
+        settings: List with SpeedTest settings
+
+    Returns:
+        Dict with SpeedTest data incl. 'location' and 'locationTZ'
+
+    Raises:
+        OSError: If unable to run SpeedTest.
+    """
+    try:
+        import speedtest
+    except ImportError as e:
+        raise OSError("Unable to run SpeedTest!\n{}".format(e))
+
+    threads = None if str(settings.get('threads', 'multi')).lower() != 'single' else 1
+
+    try:
+        tester = speedtest.Speedtest(secure=str(settings.get('ssl', False)).lower() == 'true')
+        tester.get_best_server()
+        tester.download(threads=threads)
+        tester.upload(threads=threads, pre_allocate=False)
+
+        if str(settings.get('share', False)).lower() == 'true':
+            tester.results.share()
+
+        results = tester.results.dict()
+
+    except speedtest.SpeedtestException as e:
+        raise OSError("Unable to run SpeedTest!\n{}".format(e))
+
+    data = {key: results.get(key) for key in _KEEP_FLDS_}
+    data.update([
+        ('location', settings.get('location')),
+        ('locationTZ', settings.get('locationTZ')),
+    ])
+
+    return data
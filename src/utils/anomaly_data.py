@@ -0,0 +1,201 @@
+import math
+
+from .datastore.index import to_epoch
+
+_ALPHA_: float = 0.03           # EWMA smoothing factor (baseline spans ~ last 60 samples)
+_Z_LIMIT_: float = 4.0          # z-score for single-sample outliers
+_DRIFT_: float = 0.5            # CUSUM slack (in std devs) before a shift starts to add up
+_CUSUM_LIMIT_: float = 8.0      # CUSUM sum (in std devs) that signals a level shift
+_WARMUP_: int = 30              # samples needed before anything is flagged
+
+_KIND_OUTLIER_: str = 'outlier'
+_KIND_SHIFT_UP_: str = 'shift-up'
+_KIND_SHIFT_DOWN_: str = 'shift-down'
+
+_STATE_FLDS_ = ('count', 'mean', 'var', 'high', 'low')
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def _to_float(val):
+    try:
+        val = float(val)
+    except (TypeError, ValueError):
+        return None
+
+    return val if math.isfinite(val) else None
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class ChannelDetector:
+    """Online outlier and level-shift detection for one channel.
+
+    Each sample is scored against an exponentially weighted moving mean
+    and variance (EWMA), and is flagged as 'outlier' if its z-score is
+    above 'zLimit'. A two-sided CUSUM of the z-scores catches smaller
+    shifts that persist over several samples ('shift-up'/'shift-down').
+
+    State is five numbers, and each sample costs O(1) time. Outliers are
+    clipped before they update the baseline, so a single spike does not
+    mask the samples that follow it.
+
+    Args:
+        alpha:      EWMA smoothing factor (0 < alpha <= 1)
+        zLimit:     z-score limit for outliers
+        drift:      CUSUM slack in std devs
+        cusumLimit: CUSUM limit in std devs
+        warmup:     Number of samples to learn from before flagging anything
+    """
+
+    def __init__(self, alpha=_ALPHA_, zLimit=_Z_LIMIT_, drift=_DRIFT_, cusumLimit=_CUSUM_LIMIT_, warmup=_WARMUP_):
+        if not 0 < alpha <= 1:
+            raise ValueError("Invalid EWMA smoothing factor '{}'! Must be between 0 and 1".format(alpha))
+
+        self.alpha = alpha
+        self.zLimit = zLimit
+        self.drift = drift
+        self.cusumLimit = cusumLimit
+        self.warmup = max(int(warmup), 1)
+
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.high = 0.0
+        self.low = 0.0
+
+    def check(self, val):
+        """Score one sample and add it to the baseline.
+
+        Returns:
+            Tuple with kind ('outlier', 'shift-up', 'shift-down') and score (z-score
+            or CUSUM sum), or None if sample is normal or not a number
+        """
+        val = _to_float(val)
+        if val is None:
+            return None
+
+        self.count += 1
+        if self.count == 1:
+            self.mean = val
+            return None
+
+        flag = None
+        stdev = math.sqrt(self.var)
+        if self.count > self.warmup and stdev > 0:
+            score = (val - self.mean) / stdev
+            self.high = max(0.0, self.high + score - self.drift)
+            self.low = max(0.0, self.low - score - self.drift)
+
+            if abs(score) > self.zLimit:
+                flag = (_KIND_OUTLIER_, score)
+                val = self.mean + math.copysign(self.zLimit * stdev, score)
+            elif self.high > self.cusumLimit:
+                flag = (_KIND_SHIFT_UP_, self.high)
+            elif self.low > self.cusumLimit:
+                flag = (_KIND_SHIFT_DOWN_, -self.low)
+
+            if flag is not None:
+                self.high = self.low = 0.0
+
+        # Plain running mean/variance until 1/count drops below alpha, then EWMA
+        alpha = max(self.alpha, 1.0 / self.count)
+        diff = val - self.mean
+        incr = alpha * diff
+        self.mean += incr
+        self.var = (1 - alpha) * (self.var + diff * incr)
+
+        return flag
+
+    def state(self):
+        return {name: getattr(self, name) for name in _STATE_FLDS_}
+
+    def load(self, state):
+        for name in _STATE_FLDS_:
+            if name in state:
+                setattr(self, name, type(getattr(self, name))(state[name]))
+
+
+class AnomalyDetector:
+    """Online anomaly detection for several channels (see 'ChannelDetector').
+
+    Args:
+        channels: Sequence of channel/field names (e.g. 'ping' or 'temperature')
+        kwargs:   Detector settings passed on to 'ChannelDetector'
+    """
+
+    def __init__(self, channels, **kwargs):
+        self.channels = {name: ChannelDetector(**kwargs) for name in channels}
+
+    def check(self, record):
+        """Check one record (or dict of sensor readings).
+
+        Returns:
+            List of anomaly tags (as dicts with 'channel', 'kind', 'value', and 'score')
+        """
+        tags = []
+        for name, detector in self.channels.items():
+            val = record.get(name)
+            flag = detector.check(val)
+            if flag is not None:
+                tags.append({'channel': name, 'kind': flag[0], 'value': float(val), 'score': flag[1]})
+
+        return tags
+
+    def tag(self, record):
+        """Check data record and add any anomaly tags to it under 'anomaly'.
+
+        Data stores save the tags next to the record (see 'DataStore.query_anomalies()').
+
+        Returns:
+            List of anomaly tags
+        """
+        tags = self.check(record)
+        if tags:
+            record['anomaly'] = tags
+
+        return tags
+
+    def scan(self, chunks):
+        """Check a stream of data record chunks, e.g. to learn from history.
+
+        Args:
+            chunks: Iterator w lists of data records (e.g. 'DataStore.iter_range()')
+
+        Returns:
+            List of '(epoch, tags)' tuples for anomalous records
+        """
+        found = []
+        for chunk in chunks:
+            for row in chunk:
+                tags = self.check(row)
+                if tags:
+                    found.append((to_epoch(row.get('timestamp')), tags))
+
+        return found
+
+    def state(self):
+        return {name: detector.state() for name, detector in self.channels.items()}
+
+    def load(self, state):
+        for name, chnlState in state.items():
+            if name in self.channels:
+                self.channels[name].load(chnlState)
+
+
+# =========================================================
+#                D A T A   F U N C T I O N S
+# =========================================================
+def format_anomaly(tags):
+    """Format anomaly tags as one short line, e.g. 'ping outlier (z=+5.1)'."""
+    out = []
+    for tag in tags:
+        if tag['kind'] == _KIND_OUTLIER_:
+            out.append('{} {} (z={:+.1f})'.format(tag['channel'], tag['kind'], tag['score']))
+        else:
+            out.append('{} {} (cusum={:+.1f})'.format(tag['channel'], tag['kind'], tag['score']))
+
+    return ', '.join(out)
+
@@ -1,17 +1,294 @@
+import asyncio
+import time
+from array import array
+from collections import deque
+
+from ..sensors.sensehat import init_sensor, _CHANNELS_, _CHNL_TEMP_, _CHNL_HUMID_, _ORIENTATION_
+from .stats_data import FieldStats, _QUANTILES_
+
+_BUFFER_SIZE_: int = 1024
+_TIMESTAMP_: str = 'timestamp'
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class RingBuffer:
+    """Preallocated columnar ring buffer for sensor samples.
+
+    Column 0 holds a monotonic timestamp and every other column
+    holds one sensor channel. Once the buffer is full, new samples
+    overwrite the oldest ones.
+    """
+
+    def __init__(self, channels, size=_BUFFER_SIZE_, useNumpy=False):
+        if size < 1:
+            raise ValueError("Invalid buffer size '{}'".format(size))
+
+        self.channels = (_TIMESTAMP_,) + tuple(channels)
+        self.size = size
+        self.count = 0
+
+        if useNumpy:
+            import numpy
+            self.columns = [numpy.zeros(size, dtype='float64') for _ in self.channels]
+        else:
+            self.columns = [array('d', bytes(8 * size)) for _ in self.channels]
+
+        self._index = {name: idx for idx, name in enumerate(self.channels)}
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def append(self, timestamp, values):
+        """Store one sample. 'values' must follow the channel order."""
+        pos = self.count % self.size
+        cols = self.columns
+
+        cols[0][pos] = timestamp
+        for idx, val in enumerate(values, 1):
+            cols[idx][pos] = val
+
+        self.count += 1
+
+    def column(self, name):
+        """Return channel values in order from oldest to newest sample."""
+        try:
+            col = self.columns[self._index[name]]
+        except KeyError:
+            raise ValueError("Invalid sensor channel '{}'".format(name))
+
+        if self.count <= self.size:
+            return col[:self.count]
+
+        pos = self.count % self.size
+        if hasattr(col, 'dtype'):
+            import numpy
+            return numpy.concatenate((col[pos:], col[:pos]))
+
+        return col[pos:] + col[:pos]
+
+    def latest(self):
+        """Return most recent sample as dict, or None if buffer is empty."""
+        if not self.count:
+            return None
+
+        pos = (self.count - 1) % self.size
+        return {name: float(col[pos]) for name, col in zip(self.channels, self.columns)}
+
+    def clear(self):
+        self.count = 0
+
+
+class Sampler:
+    """Read every configured channel in one pass into a ring buffer.
+
+    Args:
+        sensor:   Sensor backend with a 'read(channels)' method (see 'sensors.sensehat')
+        channels: Sequence of channel names to sample
+        size:     Number of samples to keep in ring buffer
+        useNumpy: If TRUE, use NumPy arrays for buffer columns
+        clock:    Monotonic clock used for timestamps
+        detector: Optional 'anomaly_data.AnomalyDetector'. Anomalous samples are kept
+                  as '(timestamp, tags)' tuples in 'anomalies' (newest 'size' only).
+    """
+
+    def __init__(self, sensor, channels=_CHANNELS_, size=_BUFFER_SIZE_, useNumpy=False, clock=time.monotonic,
+                 detector=None):
+        self.sensor = sensor
+        self.channels = tuple(channels)
+        self.buffer = RingBuffer(self.channels, size, useNumpy)
+        self.clock = clock
+        self.detector = detector
+        self.anomalies = deque(maxlen=size)
+
+    def _check(self, timestamp, values):
+        tags = self.detector.check(dict(zip(self.channels, values)))
+        if tags:
+            self.anomalies.append((timestamp, tags))
+
+    def sample(self):
+        """Take one sample of all channels.
+
+        Returns:
+            Tuple of channel values
+        """
+        # Timestamp taken before the read, same as in 'run()'
+        timestamp = self.clock()
+        values = self.sensor.read(self.channels)
+        self.buffer.append(timestamp, values)
+
+        if self.detector is not None:
+            self._check(timestamp, values)
+
+        return values
+
+    def run(self, numSamples, rate=None, sleep=time.sleep, controller=None):
+        """Take a series of samples.
+
+        Args:
+            numSamples: Number of samples to take
+            rate:       Samples per second. If None, sample as fast as possible.
+            sleep:      Sleep function used to wait between samples
+            controller: Optional 'scheduler.AdaptiveInterval'. If given, the time to
+                        the next sample comes from the controller, and 'rate' only
+                        sets the first interval.
+
+        Returns:
+            Effective sample rate (samples per second)
+        """
+        read = self.sensor.read
+        append = self.buffer.append
+        clock = self.clock
+        channels = self.channels
+        interval = (1.0 / rate) if rate else 0.0
+
+        check = self._check if self.detector is not None else None
+        adapt = controller.update if controller is not None else None
+
+        start = clock()
+        deadline = start
+        for _ in range(numSamples):
+            if check is None and adapt is None:
+                append(clock(), read(channels))
+            else:
+                timestamp = clock()
+                values = read(channels)
+                append(timestamp, values)
+                if check is not None:
+                    check(timestamp, values)
+                if adapt is not None:
+                    interval = adapt(dict(zip(channels, values)))
+
+            if interval:
+                # Fixed-rate schedule so that slow reads don't accumulate drift
+                deadline += interval
+                delay = deadline - clock()
+                if delay > 0:
+                    sleep(delay)
+
+        elapsed = clock() - start
+        return (numSamples / elapsed) if elapsed > 0 else float('inf')
+
+    def stats(self, quantiles=_QUANTILES_):
+        """Summarize buffered samples per channel (see 'stats_data.FieldStats.summary()').
+
+        Returns:
+            Dict with channel names as keys and summary dicts as values
+        """
+        out = {}
+        for name in self.channels:
+            fldStats = FieldStats(quantiles)
+            fldStats.update(self.buffer.column(name))
+            out[name] = fldStats.summary()
+
+        return out
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+_SAMPLER_ = None
+
+
+def _get_sampler(sampler=None):
+    global _SAMPLER_
+
+    if sampler is not None:
+        return sampler
+
+    if _SAMPLER_ is None:
+        _SAMPLER_ = Sampler(init_sensor())
+
+    return _SAMPLER_
+
+
+def _sample_channels(sampler, names):
+    sampler = _get_sampler(sampler)
+    values = dict(zip(sampler.channels, sampler.sample()))
+
+    try:
+        return tuple(values[name] for name in names)
+    except KeyError as e:
+        raise ValueError("Sensor channel {} is not configured".format(e))
+
+
 # =========================================================
 #             G E N E R I C   F U N C T I O N S
 # =========================================================
-def collect_temp():
-    pass
+def collect_temp(sampler=None):
+    return _sample_channels(sampler, (_CHNL_TEMP_,))[0]
+
+
+def collect_humid(sampler=None):
+    return _sample_channels(sampler, (_CHNL_HUMID_,))[0]
+
+
+def collect_pos(sampler=None):
+    return _sample_channels(sampler, _ORIENTATION_)
+
+
+async def collect_joystick(reader, handlers, numEvents=None):
+    """Dispatch joystick events to handlers until device is closed.
+
+    Handlers are called as soon as an event arrives. They run on the
+    event loop, so slow work (e.g. display refresh) should be kept short
+    or be a coroutine function.
+
+    Args:
+        reader:    Open 'sensors.joystick.JoystickReader'
+        handlers:  Dict with '(direction, action)' tuples or directions (for
+                   'pressed' events) as keys and 'handler(event)' as values
+        numEvents: Max number of events to handle. If None, run until device is closed.
+
+    Returns:
+        Number of events handled
+    """
+    handled = 0
+
+    async for event in reader:
+        handler = handlers.get((event.direction, event.action))
+        if handler is None and event.action == 'pressed':
+            handler = handlers.get(event.direction)
+
+        if handler is not None:
+            result = handler(event)
+            if asyncio.iscoroutine(result):
+                await result
+
+            handled += 1
+            if numEvents is not None and handled >= numEvents:
+                break
+
+    return handled
+
 
+def joystick_handlers(pager=None, sampler=None, sample=None):
+    """Default joystick mapping.
 
-def collect_humid():
-    pass
+    Left/right (and up/down) page through display pages, and a press of
+    the middle button takes a sample on demand.
 
+    Args:
+        pager:   Optional 'displays.pipeline.Pager' object
+        sampler: Optional Sampler object. If None, use default sampler.
+        sample:  Optional function (or coroutine function) called as 'sample()' on a
+                 middle press instead of sampling the SenseHat (e.g. to run a speed test)
 
-def collect_pos():
-    pass
+    Returns:
+        Dict with handlers for 'collect_joystick()'
+    """
+    if sample is not None:
+        handlers = {'middle': lambda event: sample()}
+    else:
+        handlers = {'middle': lambda event: _get_sampler(sampler).sample()}
 
+    if pager is not None:
+        handlers.update({
+            'left': lambda event: pager.prev(),
+            'up': lambda event: pager.prev(),
+            'right': lambda event: pager.next(),
+            'down': lambda event: pager.next(),
+        })
 
-def collect_joystick():
-    pass
+    return handlers
@@ -0,0 +1,208 @@
+import signal
+import threading
+
+import click
+
+from .settings import load_settings
+from .store_data import open_speed_detector, open_speed_writer
+from .scheduler import AdaptiveInterval, FixedRateScheduler
+
+_DEFAULT_INTERVAL_: int = 60
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class Daemon:
+    """Long-running collection loop.
+
+    Settings are read once and the data store writer stays open for the
+    life of the process. Each record is checked for anomalies before it is
+    shown (see 'anomaly_data'). If '[main] minsleep' < '[main] maxsleep', the
+    wait between runs adapts to the data (see 'scheduler.AdaptiveInterval').
+    Records are saved in batches. SIGHUP reloads the config file (applied
+    when the next record arrives), and SIGTERM/SIGINT stop the schedule,
+    wait for the running cycle, and flush any buffered records before the
+    writer is closed.
+
+    Failed runs and failed saves (e.g. during a network outage) are
+    reported and counted, but do not stop the daemon. Records that could
+    not be saved stay buffered and are saved with the next batch.
+
+    Args:
+        ctxGlobals: List of misc global values stored in CTX app object
+        collect:    Function called as 'collect(settings)' that returns one data record
+        show:       Optional function called as 'show(record, runNum)' for each record
+        interval:   Seconds between runs. If None, use '[main] sleep' setting (and adapt it
+                    within '[main] minsleep/maxsleep').
+        batchSize:  Number of records to buffer before saving
+        pruneSlack: See 'store_data.compact_speed_data()'
+
+    Raises:
+        OSError:    If unable to read config file or open data store.
+        ValueError: If config settings are invalid.
+    """
+
+    def __init__(self, ctxGlobals, collect, show=None, interval=None, batchSize=1, pruneSlack=0.0):
+        self.ctxGlobals = ctxGlobals
+        self.collect = collect
+        self.show = show
+        self.fixedInterval = interval
+        self.batchSize = max(int(batchSize), 1)
+        self.pruneSlack = pruneSlack
+
+        self.settings = None
+        self.writer = None
+        self.detector = None
+        self.controller = None
+        self.batch = []
+        self.stats = {'runs': 0, 'saved': 0, 'pruned': 0, 'reloads': 0, 'anomalies': 0, 'failed': 0, 'saveErrors': 0,
+                      'queueErrors': 0, 'rate': 0.0, 'interval': 0.0}
+        self._reloadEvent = threading.Event()
+
+        self.load()
+        self.scheduler = FixedRateScheduler(self.interval)
+
+    def load(self):
+        """(Re-)load config file and re-open data store writer.
+
+        The new settings are validated before anything is swapped, so an
+        invalid config file leaves the current settings in place.
+        """
+        config = load_settings(self.ctxGlobals)
+
+        # Flush first so a new writer for the same file sees all records on disk
+        self.flush()
+        writer = open_speed_writer(config.main)
+        try:
+            detector = open_speed_detector(config.main)
+        except OSError:
+            writer.close()
+            raise
+        self.close()
+
+        self.config = config
+        self.settings = config.main
+        self.retain = config.retain
+        self.interval = self.fixedInterval or config.sleep or _DEFAULT_INTERVAL_
+        self.writer = writer
+        self.detector = detector
+        self.controller = None
+
+        if not self.fixedInterval and config.adaptive:
+            self.controller = AdaptiveInterval(config.minsleep, config.maxsleep, self.interval)
+            self.interval = self.controller.interval
+
+        if getattr(self, 'scheduler', None) is not None:
+            self.scheduler.set_interval(self.interval)
+
+    def request_reload(self):
+        self._reloadEvent.set()
+
+    def stop(self):
+        self.scheduler.stop()
+
+    def flush(self):
+        """Save buffered records and enforce '[data] retain' setting."""
+        if self.writer is None or not self.batch:
+            return
+
+        # Batch is only cleared once saved, so the next flush tries again
+        try:
+            self.stats['saved'] += self.writer.write(self.batch)
+            self.batch = []
+            self.writer.flush()
+
+            # Saved locally, but not (yet) queued for remote upload (see 'uploader.RemoteWriter')
+            queueError = getattr(self.writer, 'queueError', None)
+            if queueError is not None:
+                self.stats['queueErrors'] += 1
+                click.echo("-- Saved data, but unable to queue it for upload. Will try again! --\n{}".format(
+                    queueError))
+
+            if self.retain >= 0:
+                self.stats['pruned'] += self.writer.compact(self.retain, self.pruneSlack)
+
+        except OSError as e:
+            self.stats['saveErrors'] += 1
+            click.echo("-- Unable to save data. Will try again with next batch! --\n{}".format(e))
+
+    def close(self):
+        if self.writer is not None:
+            try:
+                self.flush()
+            finally:
+                self.writer.close()
+                self.writer = None
+
+    def _reload(self):
+        try:
+            self.load()
+            self.stats['reloads'] += 1
+            click.echo("-- Reloaded config '{}' --".format(self.ctxGlobals['configFName']))
+
+        except (OSError, ValueError) as e:
+            click.echo("-- Unable to reload config. Keeping current settings! --\n{}".format(e))
+
+    def _collect(self, i):
+        # Errors are passed on to '_consume()' instead of raised, so one failed run does not stop the schedule
+        try:
+            return self.collect(self.settings)
+        except OSError as e:
+            return e
+
+    def _consume(self, i, record):
+        # Runs on the scheduler consumer thread, which is the only thread that touches the writer
+        if self._reloadEvent.is_set():
+            self._reloadEvent.clear()
+            self._reload()
+
+        self.stats['runs'] += 1
+        if isinstance(record, OSError):
+            self.stats['failed'] += 1
+            click.echo("-- Run {} failed! --\n{}".format(i + 1, record))
+            return
+
+        if self.detector.tag(record):
+            self.stats['anomalies'] += 1
+
+        if self.show is not None:
+            self.show(record, i + 1)
+
+        if self.controller is not None:
+            self.interval = self.controller.update(record)
+            self.scheduler.set_interval(self.interval)
+
+        self.batch.append(record)
+        if len(self.batch) >= self.batchSize:
+            self.flush()
+
+    def run(self, numRuns=None, installSignals=True):
+        """Run collection schedule until stopped.
+
+        Args:
+            numRuns:        Max number of runs. If None, run until stopped.
+            installSignals: If TRUE, handle SIGHUP/SIGTERM/SIGINT. Must be called from main thread.
+
+        Returns:
+            Dict with run statistics, incl. effective 'rate' (runs per minute) and last 'interval' (seconds)
+        """
+        handlers = {}
+        if installSignals:
+            handlers[signal.SIGTERM] = signal.signal(signal.SIGTERM, lambda *args: self.stop())
+            handlers[signal.SIGINT] = signal.signal(signal.SIGINT, lambda *args: self.stop())
+            if hasattr(signal, 'SIGHUP'):
+                handlers[signal.SIGHUP] = signal.signal(signal.SIGHUP, lambda *args: self.request_reload())
+
+        try:
+            self.scheduler.run(numRuns, self._collect, self._consume)
+
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+            self.close()
+            self.stats['rate'] = self.scheduler.stats['rate']
+            self.stats['interval'] = self.scheduler.interval
+
+        return self.stats
@@ -0,0 +1,149 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from .sqlite import _connect
+
+_ANOMALY_SUFFIX_: str = '.anomaly'
+_ANOMALY_TABLE_: str = 'Anomaly'
+_STATE_TABLE_: str = 'Detector'
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def anomaly_name(host, dbtable=None):
+    """Anomaly file name: data store file name (+ table name) + '.anomaly'."""
+    return os.path.expanduser(host) + ('.' + dbtable if dbtable else '') + _ANOMALY_SUFFIX_
+
+
+def _epoch_timestamp(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class AnomalyStore:
+    """Anomaly tags and detector state, kept next to the data store.
+
+    Tags are keyed by record timestamp and channel, so finding outliers
+    in a time range is an index range scan instead of a scan of every
+    raw record. The detector state (a few numbers per channel) is saved
+    in the same transaction, so detection picks up where it left off.
+
+    Args:
+        host: Path to anomaly file
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self._lock = threading.Lock()
+        self._conn = _connect(host, True, shared=True)
+
+        try:
+            with self._conn:
+                self._conn.execute(
+                    'CREATE TABLE IF NOT EXISTS {} (epoch REAL NOT NULL, channel TEXT NOT NULL, kind TEXT NOT NULL, '
+                    'value REAL, score REAL, PRIMARY KEY (epoch, channel)) WITHOUT ROWID'.format(_ANOMALY_TABLE_)
+                )
+                self._conn.execute(
+                    'CREATE TABLE IF NOT EXISTS {} (channel TEXT PRIMARY KEY, state TEXT NOT NULL)'.format(
+                        _STATE_TABLE_)
+                )
+        except sqlite3.Error as e:
+            self._conn.close()
+            raise OSError("Unable to open anomalies '{}'!\n{}".format(host, e))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT count(*) FROM {}'.format(_ANOMALY_TABLE_)).fetchone()[0]
+
+    def add(self, found, state=None):
+        """Save anomaly tags and (optionally) detector state.
+
+        Args:
+            found: List of '(epoch, tags)' tuples (see 'anomaly_data.AnomalyDetector.scan()')
+            state: Dict with detector state per channel
+
+        Returns:
+            Number of tags saved
+        """
+        params = [
+            (epoch, tag['channel'], tag['kind'], tag['value'], tag['score'])
+            for epoch, tags in found if not math.isnan(epoch) for tag in tags
+        ]
+
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        'INSERT OR REPLACE INTO {} VALUES (?, ?, ?, ?, ?)'.format(_ANOMALY_TABLE_), params)
+                    if state:
+                        self._conn.executemany(
+                            'INSERT OR REPLACE INTO {} VALUES (?, ?)'.format(_STATE_TABLE_),
+                            [(name, json.dumps(chnlState)) for name, chnlState in state.items()])
+            except sqlite3.Error as e:
+                raise OSError("Unable to update anomalies '{}'!\n{}".format(self.host, e))
+
+        return len(params)
+
+    def load_state(self):
+        """Return dict with saved detector state per channel."""
+        with self._lock:
+            try:
+                rows = self._conn.execute('SELECT channel, state FROM {}'.format(_STATE_TABLE_)).fetchall()
+            except sqlite3.Error as e:
+                raise OSError("Unable to read from anomalies '{}'!\n{}".format(self.host, e))
+
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    def query(self, since=None, until=None):
+        """Retrieve anomaly tags in time order.
+
+        With 'since' and/or 'until' (Unix epoch), only tags for records in
+        that time range are included.
+
+        Returns:
+            List of tags (as dicts with 'timestamp', 'channel', 'kind', 'value', and 'score')
+
+        Raises:
+            OSError: If anomalies cannot be accessed.
+        """
+        where = []
+        params = []
+        if since is not None:
+            where.append('epoch >= ?')
+            params.append(since)
+        if until is not None:
+            where.append('epoch < ?')
+            params.append(until)
+        sql = 'SELECT epoch, channel, kind, value, score FROM {}{} ORDER BY epoch, channel'.format(
+            _ANOMALY_TABLE_, ' WHERE ' + ' AND '.join(where) if where else '')
+
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, params).fetchall()
+            except sqlite3.Error as e:
+                raise OSError("Unable to read from anomalies '{}'!\n{}".format(self.host, e))
+
+        return [
+            {'timestamp': _epoch_timestamp(row[0]), 'channel': row[1], 'kind': row[2], 'value': row[3],
+             'score': row[4]}
+            for row in rows
+        ]
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
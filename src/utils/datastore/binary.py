@@ -0,0 +1,508 @@
+import json
+import math
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta
+
+from .index import to_epoch, bisect_range, num_to_remove
+from .registry import DataStore
+
+_MAGIC_: bytes = b'PIRBIN1\n'
+_STRINGS_SUFFIX_: str = '.strings'
+_WRITE_BUFFER_: int = 256 * 1024
+_ENCODING_: str = 'utf-8'
+_EPOCH_ = datetime(1970, 1, 1)
+_NULL_CODE_: int = 0xFFFF               # string code for missing values
+_MAX_STRINGS_: int = _NULL_CODE_
+
+# Field hint -> struct format. Timestamps are Unix epoch, and strings are codes into the string table.
+_HINT_FMT_ = {'time': 'd', 'real': 'd', 'str': 'H'}
+_HDR_ = struct.Struct('<8sHH')          # magic, header size, number of fields
+_HDR_FLD_ = struct.Struct('<BB')        # hint index, name length
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def strings_name(host):
+    return os.path.expanduser(host) + _STRINGS_SUFFIX_
+
+
+def _open_data_file(host):
+    fname = os.path.expanduser(host)
+    if not os.path.exists(fname):
+        raise OSError("Data store '{}' does NOT exist or cannot be accessed!".format(host))
+
+    return fname
+
+
+def _iso_timestamp(epoch):
+    # Naive UTC datetime plus 'isoformat()' is several times faster than 'fromtimestamp()' plus 'strftime()'
+    if math.isnan(epoch):
+        return None
+
+    return (_EPOCH_ + timedelta(seconds=epoch)).isoformat('T', 'microseconds') + 'Z'
+
+
+def _read_header(fh, host):
+    """Read header from start of data file. Returns '(layout, dataStart)'."""
+    buf = fh.read(_HDR_.size)
+    if len(buf) < _HDR_.size:
+        raise OSError("Data store '{}' is empty or truncated!".format(host))
+
+    magic, hdrSize, numFields = _HDR_.unpack(buf)
+    if magic != _MAGIC_:
+        raise OSError("Data store '{}' is not a binary data store!".format(host))
+
+    buf = fh.read(hdrSize - _HDR_.size)
+    hints = list(_HINT_FMT_)
+    fields = {}
+    pos = 0
+    try:
+        for _ in range(numFields):
+            hintIdx, nameLen = _HDR_FLD_.unpack_from(buf, pos)
+            pos += _HDR_FLD_.size
+            fields[buf[pos:pos + nameLen].decode(_ENCODING_)] = hints[hintIdx]
+            pos += nameLen
+    except (struct.error, IndexError, UnicodeDecodeError):
+        raise OSError("Data store '{}' has an invalid header!".format(host))
+
+    return RecordLayout(fields), hdrSize
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class RecordLayout:
+    """Fixed-width binary layout for data records.
+
+    Each record is packed into one little-endian struct based on the field
+    hints in the schema (see 'show_data._DB_FLDS_['binary']'): 'time' and
+    'real' fields are float64 (NaN = missing), and 'str' fields are uint16
+    codes into a 'StringTable'. A SpeedTest record takes 36 bytes.
+
+    Args:
+        fields: Dict with field names as keys and 'time', 'real', or 'str' as values
+
+    Raises:
+        ValueError: If a field hint is unknown.
+    """
+
+    def __init__(self, fields):
+        self.fields = {name: str(hint).lower() for name, hint in fields.items()}
+        for name, hint in self.fields.items():
+            if hint not in _HINT_FMT_:
+                raise ValueError("Invalid binary field type '{}' for '{}'!".format(hint, name))
+
+        self.names = list(self.fields)
+        self.hints = list(self.fields.values())
+        fmt = ''.join(_HINT_FMT_[hint] for hint in self.hints)
+        self.struct = struct.Struct('<' + fmt)
+        self.size = self.struct.size
+
+        self._byHint = {hint: [name for name in self.names if self.fields[name] == hint] for hint in _HINT_FMT_}
+
+        # Position of timestamp in unpacked tuple, and its byte offset within a record
+        self.tsPos = self.hints.index('time') if 'time' in self.hints else None
+        self.tsOffset = struct.calcsize('<' + fmt[:self.tsPos]) if self.tsPos is not None else None
+
+    def __eq__(self, other):
+        return isinstance(other, RecordLayout) and list(self.fields.items()) == list(other.fields.items())
+
+    def header(self):
+        hints = list(_HINT_FMT_)
+        body = b''
+        for name, hint in self.fields.items():
+            encName = name.encode(_ENCODING_)
+            body += _HDR_FLD_.pack(hints.index(hint), len(encName)) + encName
+
+        return _HDR_.pack(_MAGIC_, _HDR_.size + len(body), len(self.fields)) + body
+
+    def pack(self, row, strings):
+        vals = []
+        for name, hint in self.fields.items():
+            val = row.get(name)
+            if hint == 'str':
+                vals.append(_NULL_CODE_ if val is None else strings.code(str(val)))
+            elif hint == 'time':
+                vals.append(to_epoch(val))
+            else:
+                try:
+                    vals.append(float(val) if val is not None else math.nan)
+                except (TypeError, ValueError):
+                    vals.append(math.nan)
+
+        return self.struct.pack(*vals)
+
+    def unpack(self, vals, strings):
+        """Convert unpacked struct values to data record (as dict)."""
+        out = dict(zip(self.names, vals))
+
+        for name in self._byHint['str']:
+            out[name] = strings.value(out[name])
+        for name in self._byHint['time']:
+            out[name] = _iso_timestamp(out[name])
+        for name in self._byHint['real']:
+            if math.isnan(out[name]):
+                out[name] = None
+
+        return out
+
+
+class StringTable:
+    """Interned strings (e.g. location names) for binary data stores.
+
+    Strings are kept in a sidecar file with one JSON string per line, and a
+    string's code is its line number. A location that repeats in every
+    record is thus stored once, and costs 2 bytes per record.
+
+    Args:
+        fname: Path to string table file
+    """
+
+    def __init__(self, fname):
+        self.fname = fname
+        self._values = []
+        self._codes = {}
+        self._pending = []
+        self._end = 0
+
+        try:
+            with open(fname, 'rb') as fh:
+                buf = fh.read()
+        except OSError:
+            buf = b''
+
+        for line in buf.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                break           # Torn write at end of file
+            val = json.loads(line)
+            self._codes.setdefault(val, len(self._values))
+            self._values.append(val)
+            self._end += len(line)
+
+    def __len__(self):
+        return len(self._values)
+
+    def code(self, val):
+        """Return code for string, adding it to the table if needed."""
+        code = self._codes.get(val)
+        if code is None:
+            if len(self._values) >= _MAX_STRINGS_:
+                raise OSError("String table '{}' is full!".format(self.fname))
+            code = self._codes[val] = len(self._values)
+            self._values.append(val)
+            self._pending.append(val)
+
+        return code
+
+    def value(self, code):
+        return None if code == _NULL_CODE_ or code >= len(self._values) else self._values[code]
+
+    def flush(self):
+        """Append new strings to string table file."""
+        if not self._pending:
+            return
+
+        buf = ''.join(json.dumps(val) + '\n' for val in self._pending).encode(_ENCODING_)
+        with open(self.fname, 'ab') as fh:
+            fh.truncate(self._end)
+            fh.write(buf)
+        self._end += len(buf)
+        self._pending = []
+
+
+class BinaryWriter:
+    """Buffered appender for binary data store.
+
+    Records are packed into fixed-width rows (see 'RecordLayout') after a
+    small header that describes the layout, so the N-th record is always
+    at 'header + N * recordSize' and no index is needed. New strings are
+    written to the string table before the records that use them.
+
+    Args:
+        host:   Path to binary data file
+        fields: Dict with field names as keys and 'time', 'real', or 'str' as values
+
+    Raises:
+        OSError: If data store has a different record layout.
+    """
+
+    def __init__(self, host, fields):
+        fname = os.path.expanduser(host)
+        path = os.path.dirname(os.path.abspath(fname))
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        self.host = host
+        self.fields = fields
+        self.layout = RecordLayout(fields)
+        self._strings = StringTable(strings_name(host))
+
+        if os.path.exists(fname) and os.path.getsize(fname) > 0:
+            with open(fname, 'rb') as fh:
+                layout, dataStart = _read_header(fh, host)
+            if layout != self.layout:
+                raise OSError("Data store '{}' has a different record layout!".format(host))
+            end = dataStart + (os.path.getsize(fname) - dataStart) // layout.size * layout.size
+        else:
+            end = 0
+
+        self._fh = open(fname, 'ab', buffering=_WRITE_BUFFER_)
+        if self._fh.tell() > end:
+            # Torn write at end of file
+            self._fh.truncate(end)
+            self._fh.seek(end)
+
+        if end == 0:
+            self._fh.write(self.layout.header())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, data):
+        """Append data records. Returns number of records written."""
+        layout = self.layout
+        strings = self._strings
+        buf = b''.join(layout.pack(row, strings) for row in data)
+
+        strings.flush()
+        self._fh.write(buf)
+
+        return len(data)
+
+    def flush(self):
+        self._fh.flush()
+
+    def close(self):
+        if not self._fh.closed:
+            self._fh.close()
+
+    def compact(self, retain, slack=0.0):
+        """Trim data store (see 'compact()') and re-open writer. Returns number of records removed."""
+        self.close()
+        removed = compact(self.host, retain, slack)
+        self.__init__(self.host, self.fields)
+
+        return removed
+
+
+class BinaryReader:
+    """Memory-mapped reader for binary data store.
+
+    The data file is mapped read-only, so reading records touches only
+    the pages that hold them, however large the file is. Records from
+    'records()' are plain dicts, while 'rows()' returns the compact
+    unpacked tuples (with string codes) for callers that only need a
+    few fields.
+
+    Args:
+        host: Path to binary data file
+
+    Raises:
+        OSError: If data store cannot be accessed or is not a binary data store.
+    """
+
+    def __init__(self, host):
+        fname = _open_data_file(host)
+        self.host = host
+        self._fh = open(fname, 'rb')
+        try:
+            self.layout, self.dataStart = _read_header(self._fh, host)
+            size = os.fstat(self._fh.fileno()).st_size
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._fh.close()
+            raise
+
+        self._numRecs = (size - self.dataStart) // self.layout.size
+        self.strings = StringTable(strings_name(host))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._numRecs
+
+    def timestamp(self, pos):
+        """Return timestamp (Unix epoch) of record at 'pos' without unpacking the record."""
+        return struct.unpack_from('<d', self._mm, self.dataStart + pos * self.layout.size + self.layout.tsOffset)[0]
+
+    def search(self, since=None, until=None):
+        """Find records in time range 'since <= timestamp < until' with a binary search on the timestamps.
+
+        Returns:
+            Tuple '(start, stop)' with record positions
+        """
+        if self.layout.tsPos is None:
+            return 0, self._numRecs
+
+        return bisect_range(self.timestamp, self._numRecs, since, until)
+
+    def rows(self, start=0, stop=None):
+        """Return list of unpacked tuples for records 'start' to 'stop'."""
+        stop = self._numRecs if stop is None else min(stop, self._numRecs)
+        if start >= stop:
+            return []
+
+        size = self.layout.size
+        buf = self._mm[self.dataStart + start * size:self.dataStart + stop * size]
+        return list(self.layout.struct.iter_unpack(buf))
+
+    def records(self, start=0, stop=None):
+        """Return list of data records (as dicts) for records 'start' to 'stop'."""
+        return [self.layout.unpack(vals, self.strings) for vals in self.rows(start, stop)]
+
+    def close(self):
+        if not self._fh.closed:
+            self._mm.close()
+            self._fh.close()
+
+
+class BinaryStore(DataStore):
+    """Binary data store with fixed-width records (see 'DataStore' and 'BinaryWriter')."""
+
+    storage = 'binary'
+    schemaKey = 'binary'
+
+    def _open_writer(self):
+        return BinaryWriter(self.host, self.writeFields)
+
+    def _query(self, numRecs, first):
+        return get_data(self.host, numRecs, first)
+
+    def _query_between(self, numRecs, first, since, until):
+        return get_data(self.host, numRecs, first, since, until)
+
+    def _iter_range(self, since, until, chunkSize):
+        return iter_data(self.host, since, until, chunkSize)
+
+    def _compact(self, retain, slack):
+        return compact(self.host, retain, slack)
+
+    def _ping(self):
+        fname = _open_data_file(self.host)
+        if not os.access(fname, os.R_OK | os.W_OK):
+            raise OSError("Data store '{}' does NOT exist or cannot be accessed!".format(self.host))
+
+
+# =========================================================
+#                D A T A   F U N C T I O N S
+# =========================================================
+def get_data(host, numRecs, first=True, since=None, until=None):
+    """Retrieve first/last 'numRecs' records from binary data store.
+
+    Records are fixed-width, so either end is a single slice of the
+    memory-mapped data file. With a time range, its bounds are found with
+    a binary search on the timestamps first.
+
+    Args:
+        host:    Path to binary data file
+        numRecs: Number of records to retrieve
+        first:   If TRUE, retrieve first 'numRecs' records, else retrieve last 'numRecs' records
+        since:   Start of time range (Unix epoch). None = no lower bound.
+        until:   End of time range (Unix epoch, exclusive). None = no upper bound.
+
+    Returns:
+        List of data records (as dicts)
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    numRecs = max(int(numRecs), 0)
+
+    with BinaryReader(host) as reader:
+        start, stop = reader.search(since, until)
+        if first:
+            return reader.records(start, min(stop, start + numRecs))
+
+        return reader.records(max(stop - numRecs, start), stop)
+
+
+def iter_data(host, since=None, until=None, chunkSize=1000):
+    """Stream records in time range 'since <= timestamp < until' from binary data store.
+
+    The range bounds are found with a binary search on the timestamps, and
+    only the matching rows are unpacked, 'chunkSize' at a time.
+
+    Args:
+        host:      Path to binary data file
+        since:     Start of time range (Unix epoch). None = no lower bound.
+        until:     End of time range (Unix epoch, exclusive). None = no upper bound.
+        chunkSize: Max number of records per chunk
+
+    Yields:
+        Lists of data records (as dicts)
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    with BinaryReader(host) as reader:
+        start, stop = reader.search(since, until)
+        for pos in range(start, stop, chunkSize):
+            yield reader.records(pos, min(pos + chunkSize, stop))
+
+
+def save_data(host, fields, data):
+    """Append data records to binary data store.
+
+    Args:
+        host:   Path to binary data file
+        fields: Dict with field names as keys and 'time', 'real', or 'str' as values
+        data:   List of data records (as dicts)
+
+    Returns:
+        Number of records saved
+    """
+    with BinaryWriter(host, fields) as writer:
+        return writer.write(data)
+
+
+def compact(host, retain, slack=0.0):
+    """Remove oldest records so that at most 'retain' records are left.
+
+    The header and the retained records are copied to a new file. The
+    string table is kept as is.
+
+    Args:
+        host:   Path to binary data file
+        retain: Max number of records to keep. -1 = keep all, 0 = keep none
+        slack:  Fraction of 'retain' that may accumulate before trimming
+
+    Returns:
+        Number of records removed
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    fname = _open_data_file(host)
+
+    with open(fname, 'rb') as src:
+        layout, dataStart = _read_header(src, host)
+        numRecs = (os.fstat(src.fileno()).st_size - dataStart) // layout.size
+        numRemove = num_to_remove(numRecs, retain, slack)
+        if numRemove <= 0:
+            return 0
+
+        tmpName = fname + '.tmp'
+        with open(tmpName, 'wb') as dst:
+            src.seek(0)
+            dst.write(src.read(dataStart))
+            src.seek(dataStart + numRemove * layout.size)
+            remaining = (numRecs - numRemove) * layout.size
+            while remaining > 0:
+                buf = src.read(min(1024 * 1024, remaining))
+                if not buf:
+                    break
+                dst.write(buf)
+                remaining -= len(buf)
+
+    os.replace(tmpName, fname)
+    return numRemove
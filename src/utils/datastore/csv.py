@@ -0,0 +1,356 @@
+import csv
+import io
+import os
+from itertools import islice
+
+from .index import OffsetIndex, index_name, to_epoch, sync_index, truncate_head, num_to_remove, iter_range, read_range
+from .registry import DataStore
+
+_BLOCK_SIZE_: int = 64 * 1024
+_WRITE_BUFFER_: int = 256 * 1024
+_ENCODING_: str = 'utf-8'
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class CSVWriter:
+    """Buffered appender for CSV data store.
+
+    The file is opened once and kept open until 'close()', so a
+    whole run of records is appended through a single buffered
+    file handle. The header row is only written to new/empty files.
+    Byte offsets and timestamps of all records are kept in a sidecar
+    index, so old records can be trimmed without re-parsing the file.
+
+    Args:
+        host:   Path to CSV data file
+        fields: Dict with field names as keys
+    """
+
+    def __init__(self, host, fields):
+        fname = os.path.expanduser(host)
+        path = os.path.dirname(os.path.abspath(fname))
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        self.host = host
+        self.fields = fields
+        self._idx = OffsetIndex(index_name(host))
+        self._row = io.StringIO()
+        self._writer = csv.DictWriter(self._row, fieldnames=list(fields), extrasaction='ignore')
+
+        end = _sync_index(fname, self._idx)[1] if os.path.exists(fname) else 0
+
+        self._fh = open(fname, 'ab', buffering=_WRITE_BUFFER_)
+        if self._fh.tell() > end:
+            self._fh.truncate(end)
+
+        self._pos = end
+        if self._pos == 0:
+            self._writer.writeheader()
+            self._pos += self._fh.write(self._take_row())
+
+        self._idxFh = self._idx.open_append()
+        self._idxBuf = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _take_row(self):
+        line = self._row.getvalue().encode(_ENCODING_)
+        self._row.seek(0)
+        self._row.truncate()
+        return line
+
+    def write(self, data):
+        """Append data records. Returns number of records written."""
+        for row in data:
+            self._writer.writerow(row)
+            line = self._take_row()
+
+            self._fh.write(line)
+            self._idxBuf.append(OffsetIndex.pack(self._pos, to_epoch(row.get('timestamp'))))
+            self._pos += len(line)
+
+        return len(data)
+
+    def flush(self):
+        # Data first. Index entries are held until then, so the index never
+        # points past the end of the data file, whatever the buffer sizes.
+        self._fh.flush()
+        self._idxFh.write(b''.join(self._idxBuf))
+        self._idxBuf.clear()
+        self._idxFh.flush()
+
+    def close(self):
+        if not self._fh.closed:
+            self.flush()
+            self._fh.close()
+            self._idxFh.close()
+
+    def compact(self, retain, slack=0.0):
+        """Trim data store (see 'compact()') and re-open writer. Returns number of records removed."""
+        self.close()
+        removed = compact(self.host, retain, slack)
+        self.__init__(self.host, self.fields)
+
+        return removed
+
+
+class CSVStore(DataStore):
+    """CSV data store (see 'DataStore')."""
+
+    storage = 'csv'
+    schemaKey = 'csv'
+
+    def _open_writer(self):
+        return CSVWriter(self.host, self.writeFields)
+
+    def _query(self, numRecs, first):
+        return get_data(self.host, self.readFields, numRecs, first)
+
+    def _query_between(self, numRecs, first, since, until):
+        return get_range(self.host, self.readFields, numRecs, first, since, until)
+
+    def _iter_range(self, since, until, chunkSize):
+        return iter_data(self.host, self.readFields, since, until, chunkSize)
+
+    def _compact(self, retain, slack):
+        return compact(self.host, retain, slack)
+
+    def _ping(self):
+        fname = _open_data_file(self.host)
+        if not os.access(fname, os.R_OK | os.W_OK):
+            raise OSError("Data store '{}' does NOT exist or cannot be accessed!".format(self.host))
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def _convert(row, fields):
+    out = {}
+    for name, fldType in fields.items():
+        val = row.get(name)
+        if val is None or val == '':
+            out[name] = None
+        else:
+            out[name] = fldType(val) if fldType is not None else val
+
+    return out
+
+
+def _sync_index(fname, idx):
+    """Check/rebuild sidecar index. Returns '(dataStart, end)' byte offsets."""
+    with open(fname, 'rb') as fh:
+        header = fh.readline()
+
+    if not header.endswith(b'\n'):
+        return 0, 0
+
+    hdrs = next(csv.reader([header.decode(_ENCODING_)]))
+    tsCol = hdrs.index('timestamp') if 'timestamp' in hdrs else None
+
+    def _get_timestamp(line):
+        if tsCol is None:
+            return None
+        try:
+            return next(csv.reader([line.decode(_ENCODING_)]))[tsCol]
+        except (ValueError, IndexError, StopIteration):
+            return None
+
+    return len(header), sync_index(fname, idx, _get_timestamp, len(header))
+
+
+def _open_data_file(host):
+    fname = os.path.expanduser(host)
+    if not os.path.exists(fname):
+        raise OSError("Data store '{}' does NOT exist or cannot be accessed!".format(host))
+
+    return fname
+
+
+def _tail_lines(fh, numLines, dataStart, blockSize=_BLOCK_SIZE_):
+    """Read last 'numLines' lines by seeking backwards from end of file.
+
+    Only the trailing blocks that hold the requested lines are read.
+    Records with embedded line breaks are not supported.
+    """
+    pos = fh.seek(0, io.SEEK_END)
+    blocks = []
+    numBreaks = 0
+
+    # Only new blocks are counted, and blocks are joined once, so cost is linear in bytes read
+    while pos > dataStart and numBreaks <= numLines:
+        step = min(blockSize, pos - dataStart)
+        pos -= step
+        fh.seek(pos)
+        block = fh.read(step)
+        blocks.append(block)
+        numBreaks += block.count(b'\n')
+
+    lines = b''.join(reversed(blocks)).splitlines()
+    if pos > dataStart:
+        # First line is most likely partial
+        lines = lines[1:]
+
+    lines = [line for line in lines if line.strip()]
+    return lines[-numLines:] if numLines > 0 else []
+
+
+# =========================================================
+#                D A T A   F U N C T I O N S
+# =========================================================
+def get_data(host, fields, numRecs, first=True):
+    """Retrieve first/last 'numRecs' records from CSV data store.
+
+    First N records are read lazily and reading stops after N rows. Last N
+    records are found by reading blocks backwards from the end of the file,
+    so the file is never parsed in full.
+
+    Args:
+        host:    Path to CSV data file
+        fields:  Dict with field names as keys and type converters as values
+        numRecs: Number of records to retrieve
+        first:   If TRUE, retrieve first 'numRecs' records, else retrieve last 'numRecs' records
+
+    Returns:
+        List of data records (as dicts)
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    fname = _open_data_file(host)
+    numRecs = int(numRecs)
+
+    if first:
+        with open(fname, 'r', newline='', encoding=_ENCODING_) as fh:
+            reader = csv.DictReader(fh)
+            return [_convert(row, fields) for row in islice(reader, numRecs)]
+
+    with open(fname, 'rb') as fh:
+        header = fh.readline()
+        if not header.strip():
+            return []
+
+        hdrs = next(csv.reader([header.decode(_ENCODING_)]))
+        lines = _tail_lines(fh, numRecs, fh.tell())
+
+    reader = csv.reader(line.decode(_ENCODING_) for line in lines)
+    return [_convert(dict(zip(hdrs, row)), fields) for row in reader]
+
+
+def get_range(host, fields, numRecs, first=True, since=None, until=None):
+    """Retrieve first/last 'numRecs' records in time range 'since <= timestamp < until' from CSV data store.
+
+    Records are appended in time order, so the range bounds are found with a
+    binary search on the memory-mapped sidecar index, i.e. in O(log n), and
+    only the requested records are read from the data file.
+
+    Args:
+        host:    Path to CSV data file
+        fields:  Dict with field names as keys and type converters as values
+        numRecs: Number of records to retrieve
+        first:   If TRUE, retrieve first 'numRecs' records in range, else retrieve last 'numRecs' records
+        since:   Start of time range (Unix epoch). None = no lower bound.
+        until:   End of time range (Unix epoch, exclusive). None = no upper bound.
+
+    Returns:
+        List of data records (as dicts)
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    fname = _open_data_file(host)
+    idx = OffsetIndex(index_name(host))
+    dataStart, end = _sync_index(fname, idx)
+    if not dataStart:
+        return []
+
+    with open(fname, 'rb') as fh:
+        hdrs = next(csv.reader([fh.readline().decode(_ENCODING_)]))
+
+    lines = read_range(fname, idx, end, numRecs, first, since, until)
+    reader = csv.reader(line.decode(_ENCODING_) for line in lines)
+    return [_convert(dict(zip(hdrs, row)), fields) for row in reader]
+
+
+def iter_data(host, fields, since=None, until=None, chunkSize=1000):
+    """Stream records in time range 'since <= timestamp < until' from CSV data store.
+
+    The range bounds are found with a binary search on the sidecar index,
+    so only rows in range are read from the data file and parsed.
+
+    Args:
+        host:      Path to CSV data file
+        fields:    Dict with field names as keys and type converters as values
+        since:     Start of time range (Unix epoch). None = no lower bound.
+        until:     End of time range (Unix epoch, exclusive). None = no upper bound.
+        chunkSize: Max number of records per chunk
+
+    Yields:
+        Lists of data records (as dicts)
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    fname = _open_data_file(host)
+    idx = OffsetIndex(index_name(host))
+    dataStart, end = _sync_index(fname, idx)
+    if not dataStart:
+        return
+
+    with open(fname, 'rb') as fh:
+        hdrs = next(csv.reader([fh.readline().decode(_ENCODING_)]))
+
+    for lines in iter_range(fname, idx, end, since, until, chunkSize):
+        reader = csv.reader(line.decode(_ENCODING_) for line in lines)
+        yield [_convert(dict(zip(hdrs, row)), fields) for row in reader]
+
+
+def save_data(host, fields, data, writer=None):
+    """Append data records to CSV data store.
+
+    Args:
+        host:   Path to CSV data file
+        fields: Dict with field names as keys
+        data:   List of data records (as dicts)
+        writer: Open 'CSVWriter' to use. If None, a writer is opened and closed for this call.
+
+    Returns:
+        Number of records saved
+    """
+    if writer is not None:
+        return writer.write(data)
+
+    with CSVWriter(host, fields) as writer:
+        return writer.write(data)
+
+
+def compact(host, retain, slack=0.0):
+    """Remove oldest records so that at most 'retain' records are left.
+
+    The header row and the retained records are copied, and the sidecar
+    index is rewritten. With 'slack' > 0, the store may grow to
+    'retain * (1 + slack)' records before it is trimmed back to 'retain',
+    which keeps the amortized cost proportional to the records removed.
+
+    Args:
+        host:   Path to CSV data file
+        retain: Max number of records to keep. -1 = keep all, 0 = keep none
+        slack:  Fraction of 'retain' that may accumulate before trimming
+
+    Returns:
+        Number of records removed
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    fname = _open_data_file(host)
+    idx = OffsetIndex(index_name(host))
+    dataStart, end = _sync_index(fname, idx)
+
+    return truncate_head(fname, idx, num_to_remove(len(idx), retain, slack), end, dataStart)
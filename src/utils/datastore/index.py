@@ -0,0 +1,364 @@
+import mmap
+import os
+import struct
+from datetime import datetime, timezone
+
+_IDX_SUFFIX_: str = '.idx'
+_IDX_ENTRY_ = struct.Struct('<Qd')        # byte offset of record, timestamp (Unix epoch)
+_IDX_TS_ = struct.Struct('<d')
+_IDX_TS_OFFSET_: int = 8
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def to_epoch(timestamp):
+    """Convert ISO 8601 timestamp string to Unix epoch (float).
+
+    Returns NaN if timestamp is missing or cannot be parsed.
+    """
+    if timestamp is None:
+        return float('nan')
+
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+
+    tsStr = str(timestamp).strip()
+    if tsStr.endswith('Z'):
+        tsStr = tsStr[:-1] + '+00:00'
+
+    try:
+        dt = datetime.fromisoformat(tsStr)
+    except ValueError:
+        return float('nan')
+
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+
+    return dt.timestamp()
+
+
+def bisect_range(timestamp, numEntries, since=None, until=None):
+    """Find entries with 'since <= timestamp < until' in a list sorted by timestamp.
+
+    Records are appended in time order, so each bound is found with a
+    binary search, i.e. in O(log n) 'timestamp()' calls.
+
+    Args:
+        timestamp:  Function that returns timestamp (Unix epoch) of entry at given position
+        numEntries: Number of entries
+        since:      Start of time range (Unix epoch). None = no lower bound.
+        until:      End of time range (Unix epoch, exclusive). None = no upper bound.
+
+    Returns:
+        Tuple '(start, stop)' with positions of first matching entry and one past the last
+    """
+    def _lower_bound(target):
+        lo, hi = 0, numEntries
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if timestamp(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return lo
+
+    start = 0 if since is None else _lower_bound(since)
+    stop = numEntries if until is None else _lower_bound(until)
+
+    return start, max(start, stop)
+
+
+def index_name(host):
+    return os.path.expanduser(host) + _IDX_SUFFIX_
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class OffsetIndex:
+    """Sidecar index with one fixed-width entry per data record.
+
+    Each entry holds the byte offset of a record in the data file and
+    its timestamp, so the N-th record from either end can be found with
+    a single seek into the index and a single seek into the data file.
+
+    Args:
+        fname: Path to index file
+    """
+
+    def __init__(self, fname):
+        self.fname = fname
+
+    def __len__(self):
+        try:
+            return os.path.getsize(self.fname) // _IDX_ENTRY_.size
+        except OSError:
+            return 0
+
+    def exists(self):
+        return os.path.exists(self.fname)
+
+    def entry(self, pos):
+        """Return '(offset, timestamp)' for entry at 'pos' (negative 'pos' counts from end)."""
+        numEntries = len(self)
+        if pos < 0:
+            pos += numEntries
+        if pos < 0 or pos >= numEntries:
+            raise IndexError("Index entry '{}' out of range".format(pos))
+
+        with open(self.fname, 'rb') as fh:
+            fh.seek(pos * _IDX_ENTRY_.size)
+            return _IDX_ENTRY_.unpack(fh.read(_IDX_ENTRY_.size))
+
+    def entries(self, start=0, stop=None):
+        """Return list of '(offset, timestamp)' tuples for entries 'start' to 'stop'."""
+        numEntries = len(self)
+        stop = numEntries if stop is None else min(stop, numEntries)
+        if start >= stop:
+            return []
+
+        with open(self.fname, 'rb') as fh:
+            fh.seek(start * _IDX_ENTRY_.size)
+            buf = fh.read((stop - start) * _IDX_ENTRY_.size)
+
+        return list(_IDX_ENTRY_.iter_unpack(buf))
+
+    def search(self, since=None, until=None):
+        """Find entries in time range 'since <= timestamp < until' (see 'bisect_range()').
+
+        The index is memory-mapped, so the search only reads the few pages
+        it probes, however many entries there are.
+
+        Returns:
+            Tuple '(start, stop)' with entry positions
+        """
+        numEntries = len(self)
+        if not numEntries or (since is None and until is None):
+            return 0, numEntries
+
+        with open(self.fname, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            def _timestamp(pos):
+                return _IDX_TS_.unpack_from(view, pos * _IDX_ENTRY_.size + _IDX_TS_OFFSET_)[0]
+
+            return bisect_range(_timestamp, numEntries, since, until)
+
+    def open_append(self):
+        return open(self.fname, 'ab')
+
+    @staticmethod
+    def pack(offset, timestamp):
+        return _IDX_ENTRY_.pack(offset, timestamp)
+
+    def write(self, entries):
+        """Replace index with given '(offset, timestamp)' entries (atomically)."""
+        tmpName = self.fname + '.tmp'
+        with open(tmpName, 'wb') as fh:
+            for offset, timestamp in entries:
+                fh.write(_IDX_ENTRY_.pack(offset, timestamp))
+
+        os.replace(tmpName, self.fname)
+
+
+# =========================================================
+#               I N D E X   F U N C T I O N S
+# =========================================================
+def rebuild_index(fname, idx, getTimestamp, dataStart=0):
+    """Scan data file and write new index.
+
+    Args:
+        fname:        Path to data file
+        idx:          'OffsetIndex' to rebuild
+        getTimestamp: Function that returns timestamp for a given data line (bytes)
+        dataStart:    Byte offset of first record (e.g. after header row)
+
+    Returns:
+        End offset of last complete record
+    """
+    entries = []
+    pos = dataStart
+    with open(fname, 'rb') as fh:
+        fh.seek(dataStart)
+        for line in fh:
+            if not line.endswith(b'\n'):
+                break           # Torn write at end of file
+
+            if line.strip():
+                entries.append((pos, to_epoch(getTimestamp(line))))
+
+            pos += len(line)
+
+    idx.write(entries)
+    return pos
+
+
+def sync_index(fname, idx, getTimestamp, dataStart=0):
+    """Make sure index matches data file.
+
+    This is an O(1) check against the last index entry. The data file
+    is only scanned if the index is missing or out of date.
+
+    Args:
+        fname:        Path to data file
+        idx:          'OffsetIndex' to check
+        getTimestamp: Function that returns timestamp for a given data line (bytes)
+        dataStart:    Byte offset of first record (e.g. after header row)
+
+    Returns:
+        End offset of last complete record
+    """
+    size = os.path.getsize(fname)
+
+    if not len(idx):
+        return rebuild_index(fname, idx, getTimestamp, dataStart) if size > dataStart else dataStart
+
+    offset, _ = idx.entry(-1)
+    with open(fname, 'rb') as fh:
+        fh.seek(offset)
+        line = fh.readline()
+
+    end = offset + len(line)
+    if offset < dataStart or not line.endswith(b'\n') or end != size:
+        # Torn write, or records beyond last index entry (e.g. index write was lost)
+        return rebuild_index(fname, idx, getTimestamp, dataStart)
+
+    return end
+
+
+def truncate_head(fname, idx, numRemove, end, dataStart=0, blockSize=1024 * 1024):
+    """Remove first 'numRemove' records from data file and rewrite index.
+
+    Any header bytes before 'dataStart' are kept. Only the records that
+    remain are copied, and the index is rewritten with shifted offsets.
+
+    Args:
+        fname:     Path to data file
+        idx:       'OffsetIndex' for data file
+        numRemove: Number of records to remove
+        end:       End offset of last complete record (see 'sync_index()')
+        dataStart: Byte offset of first record (e.g. after header row)
+        blockSize: Copy block size
+
+    Returns:
+        Number of records removed
+    """
+    numRemove = min(numRemove, len(idx))
+    if numRemove <= 0:
+        return 0
+
+    entries = idx.entries(numRemove)
+    cut = entries[0][0] if entries else end
+    shift = cut - dataStart
+
+    tmpName = fname + '.tmp'
+    with open(fname, 'rb') as src, open(tmpName, 'wb') as dst:
+        if dataStart:
+            dst.write(src.read(dataStart))
+
+        src.seek(cut)
+        remaining = end - cut
+        while remaining > 0:
+            buf = src.read(min(blockSize, remaining))
+            if not buf:
+                break
+            dst.write(buf)
+            remaining -= len(buf)
+
+    # Data first. If the index write is lost, the last entry no longer ends at the
+    # end of the data file, so 'sync_index()' will rebuild it.
+    os.replace(tmpName, fname)
+    idx.write((offset - shift, timestamp) for offset, timestamp in entries)
+
+    return numRemove
+
+
+def read_lines(fh, idx, end, start, stop):
+    """Read data lines for index entries 'start' to 'stop' with a single read.
+
+    Args:
+        fh:    Data file handle (binary)
+        idx:   'OffsetIndex' for data file
+        end:   End offset of last complete record
+        start: Position of first index entry
+        stop:  Position one past last index entry
+
+    Returns:
+        List of data lines (bytes)
+    """
+    # One extra entry, as its offset is where the last record ends
+    entries = idx.entries(start, stop + 1)
+    numLines = min(stop - start, len(entries))
+    if numLines <= 0:
+        return []
+
+    spanStart = entries[0][0]
+    spanEnd = entries[numLines][0] if len(entries) > numLines else end
+    fh.seek(spanStart)
+    buf = fh.read(spanEnd - spanStart)
+
+    lines = []
+    for offset, _ in entries[:numLines]:
+        pos = offset - spanStart
+        line = buf[pos:buf.find(b'\n', pos) + 1]
+        if line.strip():
+            lines.append(line)
+
+    return lines
+
+
+def iter_range(fname, idx, end, since=None, until=None, chunkSize=1000):
+    """Stream data lines with index timestamps in range 'since <= timestamp < until'.
+
+    The range bounds are found with a binary search on the index (see
+    'OffsetIndex.search()'), and then only the matching records are read,
+    'chunkSize' records at a time.
+
+    Args:
+        fname:     Path to data file
+        idx:       'OffsetIndex' for data file (see 'sync_index()')
+        end:       End offset of last complete record
+        since:     Start of time range (Unix epoch). None = no lower bound.
+        until:     End of time range (Unix epoch, exclusive). None = no upper bound.
+        chunkSize: Number of records per chunk
+
+    Yields:
+        Lists of data lines (bytes)
+    """
+    start, stop = idx.search(since, until)
+
+    with open(fname, 'rb') as fh:
+        for pos in range(start, stop, chunkSize):
+            lines = read_lines(fh, idx, end, pos, min(pos + chunkSize, stop))
+            if lines:
+                yield lines
+
+
+def read_range(fname, idx, end, numRecs, first=True, since=None, until=None):
+    """Read first/last 'numRecs' data lines in time range 'since <= timestamp < until'.
+
+    Returns:
+        List of data lines (bytes)
+    """
+    start, stop = idx.search(since, until)
+    if first:
+        stop = min(stop, start + max(int(numRecs), 0))
+    else:
+        start = max(start, stop - max(int(numRecs), 0))
+
+    with open(fname, 'rb') as fh:
+        return read_lines(fh, idx, end, start, stop)
+
+
+def num_to_remove(numRecs, retain, slack=0.0):
+    """Number of records to remove so that 'retain' records are left.
+
+    With 'slack' > 0, nothing is removed until the store holds more than
+    'retain * (1 + slack)' records. File-based stores must copy the records
+    they keep, so this spreads that copy over many removed records.
+    """
+    retain = int(retain)
+    if retain < 0 or numRecs <= retain + int(retain * slack):
+        return 0
+
+    return numRecs - retain
@@ -0,0 +1,451 @@
+import csv
+import gzip
+import io
+import math
+import re
+import time
+from datetime import datetime, timezone
+
+from .index import to_epoch
+from .registry import DataStore
+
+_BATCH_SIZE_: int = 100
+_FLUSH_INTERVAL_: float = 10.0  # seconds
+_TIMEOUT_: float = 10.0         # seconds per request
+_PRECISION_: str = 'ms'
+
+_FLD_TIME_: str = 'time'
+_FLD_TAG_: str = 'tag'
+_FLD_FIELD_: str = 'field'
+
+_TAG_ESCAPES_ = str.maketrans({',': r'\,', '=': r'\=', ' ': r'\ '})
+_MEASUREMENT_ESCAPES_ = str.maketrans({',': r'\,', ' ': r'\ '})
+_NANOSECONDS_ = re.compile(r'(\.\d{6})\d+')
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def _format_field(val):
+    if isinstance(val, bool):
+        return 'true' if val else 'false'
+    if isinstance(val, int):
+        return '{}i'.format(val)
+    if isinstance(val, float):
+        return repr(val)
+
+    return '"{}"'.format(str(val).replace('\\', '\\\\').replace('"', '\\"'))
+
+
+def to_line(measurement, fields, record):
+    """Serialize data record as InfluxDB line protocol.
+
+    Args:
+        measurement: Measurement name
+        fields:      Dict with field names as keys and 'time', 'tag', or 'field' as values
+        record:      Data record (as dict)
+
+    Returns:
+        Line protocol string, or None if record has no field values
+    """
+    tags = []
+    values = []
+    stamp = ''
+
+    for name, kind in fields.items():
+        val = record.get(name)
+        if val is None or val == '':
+            continue
+
+        if kind == _FLD_TIME_:
+            epoch = to_epoch(val)
+            if not math.isnan(epoch):
+                stamp = ' {}'.format(int(round(epoch * 1000)))
+        elif kind == _FLD_TAG_:
+            tags.append(',{}={}'.format(name.translate(_TAG_ESCAPES_), str(val).translate(_TAG_ESCAPES_)))
+        else:
+            if isinstance(val, float) and not math.isfinite(val):
+                continue
+            values.append('{}={}'.format(name.translate(_TAG_ESCAPES_), _format_field(val)))
+
+    if not values:
+        return None
+
+    return '{}{} {}{}'.format(measurement.translate(_MEASUREMENT_ESCAPES_), ''.join(tags), ','.join(values), stamp)
+
+
+def _headers(token, extra=None):
+    headers = {'Authorization': 'Token {}'.format(token)} if token else {}
+    headers.update(extra or {})
+    return headers
+
+
+def _post(session, url, params, body, headers, timeout=_TIMEOUT_, stream=False):
+    try:
+        resp = session.post(url, params=params, data=body, headers=headers, timeout=timeout, stream=stream)
+    except Exception as e:
+        raise OSError("Unable to access data store '{}'!\n{}".format(url, e))
+
+    if not 200 <= resp.status_code < 300:
+        raise OSError("Data store '{}' returned HTTP status {}!\n{}".format(url, resp.status_code, resp.text[:200]))
+
+    return resp
+
+
+def _flux_string(val):
+    return '"{}"'.format(str(val).replace('\\', '\\\\').replace('"', '\\"'))
+
+
+def _parse_csv(text, fields):
+    """Parse (un-annotated) CSV response from InfluxDB v2.x query API into data records."""
+    return list(_iter_csv(io.StringIO(text), fields))
+
+
+def _iter_csv(lines, fields):
+    """Parse lines of (un-annotated) CSV response from InfluxDB v2.x query API into data records, one by one."""
+    hdrs = None
+
+    # Each result table starts with its own header row, and tables are separated by blank lines
+    for row in csv.reader(lines):
+        if not row:
+            hdrs = None
+            continue
+
+        if row[0].startswith('#'):
+            continue
+
+        if hdrs is None:
+            hdrs = row
+            continue
+
+        rec = dict(zip(hdrs, row))
+        out = {}
+        for name, fldType in fields.items():
+            val = rec.get('_time' if name == 'timestamp' else name)
+            if val is None or val == '':
+                out[name] = None
+            else:
+                out[name] = fldType(val) if fldType is not None else val
+        yield out
+
+
+def _flux_time(epoch, default):
+    if epoch is None:
+        return default
+
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def _iso_timestamp(rfc3339):
+    # InfluxDB returns RFC3339 timestamps with up to 9 digits for fractional seconds
+    dt = datetime.fromtimestamp(to_epoch(_NANOSECONDS_.sub(r'\1', rfc3339)), timezone.utc)
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class InfluxWriter:
+    """Buffered writer for InfluxDB v2.x.
+
+    Records are serialized as line protocol and sent as one gzip-compressed
+    POST per batch over a pooled HTTP session. A batch is sent once it
+    holds 'batchSize' records, or when 'flush()' is called and the oldest
+    buffered record is more than 'flushInterval' seconds old. 'close()'
+    always sends what is left.
+
+    Args:
+        host:          InfluxDB URL (e.g. 'http://localhost:8086')
+        org:           Organization name
+        bucket:        Bucket name
+        measurement:   Measurement name
+        token:         API token
+        fields:        Dict with field names as keys and 'time', 'tag', or 'field' as values
+        batchSize:     Max number of records per request
+        flushInterval: Max seconds that records are buffered. 0 = send on every flush
+        session:       Optional 'requests.Session' (or compatible) object
+        clock:         Monotonic clock
+    """
+
+    def __init__(self, host, org, bucket, measurement, token, fields, batchSize=_BATCH_SIZE_,
+                 flushInterval=_FLUSH_INTERVAL_, session=None, clock=time.monotonic):
+        if not host:
+            raise OSError("Data store host is not defined!")
+
+        from ..session import new_session
+
+        self.url = host.rstrip('/') + '/api/v2/write'
+        self.params = {'org': org, 'bucket': bucket, 'precision': _PRECISION_}
+        self.measurement = measurement
+        self.fields = fields
+        self.batchSize = max(int(batchSize), 1)
+        self.flushInterval = float(flushInterval)
+        self.clock = clock
+        self.session = session or new_session()
+        self._ownSession = session is None
+        self.headers = _headers(token, {'Content-Type': 'text/plain; charset=utf-8', 'Content-Encoding': 'gzip'})
+        self.stats = {'requests': 0, 'records': 0, 'bytes': 0}
+
+        self._lines = []
+        self._since = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, data):
+        """Buffer data records and send full batches. Returns number of records accepted."""
+        for row in data:
+            line = to_line(self.measurement, self.fields, row)
+            if line is None:
+                continue
+
+            if not self._lines:
+                self._since = self.clock()
+            self._lines.append(line)
+
+            if len(self._lines) >= self.batchSize:
+                self._send()
+
+        return len(data)
+
+    def flush(self, force=False):
+        """Send buffered records if forced or if they are older than 'flushInterval'."""
+        if self._lines and (force or self.clock() - self._since >= self.flushInterval):
+            self._send()
+
+    def close(self):
+        try:
+            self.flush(True)
+        finally:
+            if self._ownSession:
+                self.session.close()
+
+    def compact(self, retain, slack=0.0):
+        """Retention is managed by the bucket retention policy. Returns 0."""
+        return 0
+
+    def _send(self):
+        lines, self._lines = self._lines, []
+        body = gzip.compress('\n'.join(lines).encode('utf-8'))
+
+        try:
+            _post(self.session, self.url, self.params, body, self.headers)
+        except OSError:
+            # Keep records, so a later flush can try again
+            self._lines = lines + self._lines
+            raise
+
+        self.stats['requests'] += 1
+        self.stats['records'] += len(lines)
+        self.stats['bytes'] += len(body)
+
+
+class InfluxStore(DataStore):
+    """InfluxDB v2.x data store (see 'DataStore').
+
+    Writes, queries, and 'ping()' share one pooled HTTP session. For
+    queries, 'numRecs' is the size of the time window in hours. Rollups
+    are not supported.
+    """
+
+    storage = 'influx'
+    schemaKey = 'influx'
+
+    def __init__(self, settings, schema):
+        super().__init__(settings, schema)
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            from ..session import new_session
+
+            self._session = new_session()
+
+        return self._session
+
+    def _open_writer(self):
+        settings = self.settings
+        return InfluxWriter(
+            self.host, settings.get('org'), settings.get('dbname'), settings.get('dbtable'), settings.get('token'),
+            self.writeFields,
+            batchSize=int(settings.get('batch', _BATCH_SIZE_)),
+            flushInterval=float(settings.get('flush', _FLUSH_INTERVAL_)),
+            session=self._get_session(),
+        )
+
+    def _query(self, numRecs, first):
+        settings = self.settings
+        return get_data(self.host, settings.get('org'), settings.get('dbname'), settings.get('dbtable'),
+                        settings.get('token'), self.readFields, numRecs, self._get_session())
+
+    def _iter_range(self, since, until, chunkSize):
+        settings = self.settings
+        return iter_data(self.host, settings.get('org'), settings.get('dbname'), settings.get('dbtable'),
+                         settings.get('token'), self.readFields, since, until, chunkSize, self._get_session())
+
+    def _compact(self, retain, slack):
+        # Retention is managed by the bucket retention policy
+        return 0
+
+    def _rollup_name(self):
+        # Downsampling belongs in InfluxDB tasks
+        return None
+
+    def _anomaly_name(self):
+        # Detection still works, but tags are not saved
+        return None
+
+    def _ping(self):
+        if not self.host:
+            raise OSError("Data store host is not defined!")
+
+        url = self.host.rstrip('/') + '/ping'
+        try:
+            resp = self._get_session().get(url, timeout=_TIMEOUT_)
+        except Exception as e:
+            raise OSError("Unable to access data store '{}'!\n{}".format(url, e))
+
+        if not 200 <= resp.status_code < 300:
+            raise OSError("Data store '{}' returned HTTP status {}!".format(url, resp.status_code))
+
+    def close(self):
+        with self._lock:
+            try:
+                super().close()
+            finally:
+                if self._session is not None:
+                    self._session.close()
+                    self._session = None
+
+
+# =========================================================
+#                D A T A   F U N C T I O N S
+# =========================================================
+def get_data(host, org, bucket, measurement, token, fields, numHours, session=None):
+    """Retrieve records from the last 'numHours' hours from InfluxDB v2.x.
+
+    Args:
+        host:        InfluxDB URL (e.g. 'http://localhost:8086')
+        org:         Organization name
+        bucket:      Bucket name
+        measurement: Measurement name
+        token:       API token
+        fields:      Dict with field names as keys and types as values
+        numHours:    Size of time window (in hours)
+        session:     Optional 'requests.Session' (or compatible) object
+
+    Returns:
+        List of data records (as dicts) in time order
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    if not host:
+        raise OSError("Data store host is not defined!")
+
+    from ..session import new_session
+
+    flux = (
+        'from(bucket: {bucket})\n'
+        '  |> range(start: -{hours}h)\n'
+        '  |> filter(fn: (r) => r._measurement == {measurement})\n'
+        '  |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")\n'
+        '  |> group()\n'
+        '  |> sort(columns: ["_time"])'
+    ).format(bucket=_flux_string(bucket), hours=int(numHours), measurement=_flux_string(measurement))
+
+    client = session or new_session()
+    try:
+        resp = _post(
+            client,
+            host.rstrip('/') + '/api/v2/query',
+            {'org': org},
+            flux.encode('utf-8'),
+            _headers(token, {'Content-Type': 'application/vnd.flux', 'Accept': 'application/csv',
+                             'Accept-Encoding': 'gzip'}),
+        )
+    finally:
+        if session is None:
+            client.close()
+
+    data = _parse_csv(resp.text, dict(fields, timestamp=str))
+    for row in data:
+        if row.get('timestamp'):
+            row['timestamp'] = _iso_timestamp(row['timestamp'])
+
+    return data
+
+
+def iter_data(host, org, bucket, measurement, token, fields, since=None, until=None, chunkSize=1000, session=None):
+    """Stream records in time range 'since <= timestamp < until' from InfluxDB v2.x.
+
+    The range is part of the Flux query, so only matching records are
+    sent, and the (gzip-compressed) CSV response is parsed as it arrives.
+
+    Args:
+        host:        InfluxDB URL (e.g. 'http://localhost:8086')
+        org:         Organization name
+        bucket:      Bucket name
+        measurement: Measurement name
+        token:       API token
+        fields:      Dict with field names as keys and types as values
+        since:       Start of time range (Unix epoch). None = no lower bound.
+        until:       End of time range (Unix epoch, exclusive). None = up to now.
+        chunkSize:   Max number of records per chunk
+        session:     Optional 'requests.Session' (or compatible) object
+
+    Yields:
+        Lists of data records (as dicts) in time order
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    if not host:
+        raise OSError("Data store host is not defined!")
+
+    from ..session import new_session
+
+    flux = (
+        'from(bucket: {bucket})\n'
+        '  |> range(start: {start}, stop: {stop})\n'
+        '  |> filter(fn: (r) => r._measurement == {measurement})\n'
+        '  |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")\n'
+        '  |> group()\n'
+        '  |> sort(columns: ["_time"])'
+    ).format(bucket=_flux_string(bucket), start=_flux_time(since, '1970-01-01T00:00:00Z'),
+             stop=_flux_time(until, 'now()'), measurement=_flux_string(measurement))
+
+    client = session or new_session()
+    try:
+        resp = _post(
+            client,
+            host.rstrip('/') + '/api/v2/query',
+            {'org': org},
+            flux.encode('utf-8'),
+            _headers(token, {'Content-Type': 'application/vnd.flux', 'Accept': 'application/csv',
+                             'Accept-Encoding': 'gzip'}),
+            stream=True,
+        )
+        resp.encoding = 'utf-8'
+
+        chunk = []
+        try:
+            for row in _iter_csv(resp.iter_lines(decode_unicode=True), dict(fields, timestamp=str)):
+                if row.get('timestamp'):
+                    row['timestamp'] = _iso_timestamp(row['timestamp'])
+                chunk.append(row)
+                if len(chunk) >= chunkSize:
+                    yield chunk
+                    chunk = []
+        finally:
+            resp.close()
+
+        if chunk:
+            yield chunk
+
+    finally:
+        if session is None:
+            client.close()
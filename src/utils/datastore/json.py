@@ -0,0 +1,291 @@
+import json
+import os
+from itertools import islice
+
+from .index import OffsetIndex, index_name, to_epoch, sync_index, truncate_head, num_to_remove, iter_range, read_range
+from .registry import DataStore
+
+_WRITE_BUFFER_: int = 256 * 1024
+_ENCODING_: str = 'utf-8'
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def _convert(row, fields):
+    out = {}
+    for name, fldType in fields.items():
+        val = row.get(name)
+        out[name] = fldType(val) if (val is not None and fldType is not None) else val
+
+    return out
+
+
+def _open_data_file(host):
+    fname = os.path.expanduser(host)
+    if not os.path.exists(fname):
+        raise OSError("Data store '{}' does NOT exist or cannot be accessed!".format(host))
+
+    return fname
+
+
+def _get_timestamp(line):
+    try:
+        return json.loads(line).get('timestamp')
+    except (ValueError, AttributeError):
+        return None
+
+
+def _sync_index(fname, idx):
+    return sync_index(fname, idx, _get_timestamp)
+
+
+def _read_lines(fname, start, end):
+    with open(fname, 'rb') as fh:
+        fh.seek(start)
+        while fh.tell() < end:
+            line = fh.readline()
+            if not line:
+                break
+            if line.strip():
+                yield line
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class JSONLWriter:
+    """Buffered appender for JSON Lines data store.
+
+    Each record is written as one JSON document per line and its byte
+    offset and timestamp are appended to the sidecar index. Both files
+    stay open until 'close()'.
+
+    Args:
+        host:   Path to JSON Lines data file
+        fields: Dict with field names as keys
+    """
+
+    def __init__(self, host, fields):
+        fname = os.path.expanduser(host)
+        path = os.path.dirname(os.path.abspath(fname))
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        self.host = host
+        self.fields = fields
+        self._idx = OffsetIndex(index_name(host))
+
+        end = _sync_index(fname, self._idx) if os.path.exists(fname) else 0
+
+        self._fh = open(fname, 'ab', buffering=_WRITE_BUFFER_)
+        if self._fh.tell() > end:
+            self._fh.truncate(end)
+            self._fh.seek(end)
+
+        self._pos = end
+        self._idxFh = self._idx.open_append()
+        self._idxBuf = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, data):
+        """Append data records. Returns number of records written."""
+        for row in data:
+            line = (json.dumps({name: row.get(name) for name in self.fields}, separators=(',', ':')) + '\n')
+            line = line.encode(_ENCODING_)
+
+            self._fh.write(line)
+            self._idxBuf.append(OffsetIndex.pack(self._pos, to_epoch(row.get('timestamp'))))
+            self._pos += len(line)
+
+        return len(data)
+
+    def flush(self):
+        # Data first. Index entries are held until then, so the index never
+        # points past the end of the data file, whatever the buffer sizes.
+        self._fh.flush()
+        self._idxFh.write(b''.join(self._idxBuf))
+        self._idxBuf.clear()
+        self._idxFh.flush()
+
+    def close(self):
+        if not self._fh.closed:
+            self.flush()
+            self._fh.close()
+            self._idxFh.close()
+
+    def compact(self, retain, slack=0.0):
+        """Trim data store (see 'compact()') and re-open writer. Returns number of records removed."""
+        self.close()
+        removed = compact(self.host, retain, slack)
+        self.__init__(self.host, self.fields)
+
+        return removed
+
+
+class JSONStore(DataStore):
+    """JSON Lines data store (see 'DataStore')."""
+
+    storage = 'json'
+    schemaKey = 'json'
+
+    def _open_writer(self):
+        return JSONLWriter(self.host, self.writeFields)
+
+    def _query(self, numRecs, first):
+        return get_data(self.host, self.readFields, numRecs, first)
+
+    def _query_between(self, numRecs, first, since, until):
+        return get_range(self.host, self.readFields, numRecs, first, since, until)
+
+    def _iter_range(self, since, until, chunkSize):
+        return iter_data(self.host, self.readFields, since, until, chunkSize)
+
+    def _compact(self, retain, slack):
+        return compact(self.host, retain, slack)
+
+    def _ping(self):
+        fname = _open_data_file(self.host)
+        if not os.access(fname, os.R_OK | os.W_OK):
+            raise OSError("Data store '{}' does NOT exist or cannot be accessed!".format(self.host))
+
+
+# =========================================================
+#                D A T A   F U N C T I O N S
+# =========================================================
+def get_data(host, fields, numRecs, first=True):
+    """Retrieve first/last 'numRecs' records from JSON Lines data store.
+
+    Last N records are located through the sidecar offset index, so only
+    the requested records are read from the data file.
+
+    Args:
+        host:    Path to JSON Lines data file
+        fields:  Dict with field names as keys and type converters as values
+        numRecs: Number of records to retrieve
+        first:   If TRUE, retrieve first 'numRecs' records, else retrieve last 'numRecs' records
+
+    Returns:
+        List of data records (as dicts)
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    fname = _open_data_file(host)
+    idx = OffsetIndex(index_name(host))
+    end = _sync_index(fname, idx)
+    numRecs = int(numRecs)
+
+    if first:
+        start = 0
+    else:
+        numEntries = len(idx)
+        start = 0 if numRecs >= numEntries else idx.entry(numEntries - numRecs)[0]
+
+    lines = islice(_read_lines(fname, start, end), max(numRecs, 0))
+    return [_convert(json.loads(line), fields) for line in lines]
+
+
+def get_range(host, fields, numRecs, first=True, since=None, until=None):
+    """Retrieve first/last 'numRecs' records in time range 'since <= timestamp < until' from JSON Lines data store.
+
+    Records are appended in time order, so the range bounds are found with a
+    binary search on the memory-mapped sidecar index, i.e. in O(log n), and
+    only the requested records are read from the data file.
+
+    Args:
+        host:    Path to JSON Lines data file
+        fields:  Dict with field names as keys and type converters as values
+        numRecs: Number of records to retrieve
+        first:   If TRUE, retrieve first 'numRecs' records in range, else retrieve last 'numRecs' records
+        since:   Start of time range (Unix epoch). None = no lower bound.
+        until:   End of time range (Unix epoch, exclusive). None = no upper bound.
+
+    Returns:
+        List of data records (as dicts)
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    fname = _open_data_file(host)
+    idx = OffsetIndex(index_name(host))
+    end = _sync_index(fname, idx)
+
+    lines = read_range(fname, idx, end, numRecs, first, since, until)
+    return [_convert(json.loads(line), fields) for line in lines]
+
+
+def iter_data(host, fields, since=None, until=None, chunkSize=1000):
+    """Stream records in time range 'since <= timestamp < until' from JSON Lines data store.
+
+    The range bounds are found with a binary search on the sidecar index,
+    so only records in range are read from the data file and parsed.
+
+    Args:
+        host:      Path to JSON Lines data file
+        fields:    Dict with field names as keys and type converters as values
+        since:     Start of time range (Unix epoch). None = no lower bound.
+        until:     End of time range (Unix epoch, exclusive). None = no upper bound.
+        chunkSize: Max number of records per chunk
+
+    Yields:
+        Lists of data records (as dicts)
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    fname = _open_data_file(host)
+    idx = OffsetIndex(index_name(host))
+    end = _sync_index(fname, idx)
+
+    for lines in iter_range(fname, idx, end, since, until, chunkSize):
+        yield [_convert(json.loads(line), fields) for line in lines]
+
+
+def save_data(host, fields, data, writer=None):
+    """Append data records to JSON Lines data store.
+
+    Args:
+        host:   Path to JSON Lines data file
+        fields: Dict with field names as keys
+        data:   List of data records (as dicts)
+        writer: Open 'JSONLWriter' to use. If None, a writer is opened and closed for this call.
+
+    Returns:
+        Number of records saved
+    """
+    if writer is not None:
+        return writer.write(data)
+
+    with JSONLWriter(host, fields) as writer:
+        return writer.write(data)
+
+
+def compact(host, retain, slack=0.0):
+    """Remove oldest records so that at most 'retain' records are left.
+
+    Only the retained records are copied. With 'slack' > 0, the store may grow
+    to 'retain * (1 + slack)' records before it is trimmed back to 'retain',
+    which keeps the amortized cost proportional to the records removed.
+
+    Args:
+        host:   Path to JSON Lines data file
+        retain: Max number of records to keep. -1 = keep all, 0 = keep none
+        slack:  Fraction of 'retain' that may accumulate before trimming
+
+    Returns:
+        Number of records removed
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    fname = _open_data_file(host)
+    idx = OffsetIndex(index_name(host))
+    end = _sync_index(fname, idx)
+
+    return truncate_head(fname, idx, num_to_remove(len(idx), retain, slack), end)
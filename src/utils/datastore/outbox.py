@@ -0,0 +1,103 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from .sqlite import _connect
+
+_OUTBOX_SUFFIX_: str = '.outbox'
+_OUTBOX_TABLE_: str = 'Outbox'
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class Outbox:
+    """Durable FIFO queue of data records waiting to be uploaded.
+
+    Records are stored in a SQLite file, so they survive restarts and
+    long stretches without network access. Each record gets a unique
+    key when it is queued, which the remote end can use to recognize
+    retried uploads. The outbox can be shared between threads.
+
+    Args:
+        host: Path to outbox file
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self._lock = threading.Lock()
+        self._conn = _connect(host, True, shared=True)
+
+        try:
+            with self._conn:
+                self._conn.execute(
+                    'CREATE TABLE IF NOT EXISTS {} (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                    'key TEXT NOT NULL UNIQUE, payload TEXT NOT NULL, created REAL NOT NULL)'.format(_OUTBOX_TABLE_)
+                )
+        except sqlite3.Error as e:
+            self._conn.close()
+            raise OSError("Unable to open outbox '{}'!\n{}".format(host, e))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._query('SELECT count(*) FROM {}'.format(_OUTBOX_TABLE_))[0][0]
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            try:
+                return self._conn.execute(sql, params).fetchall()
+            except sqlite3.Error as e:
+                raise OSError("Unable to read from outbox '{}'!\n{}".format(self.host, e))
+
+    def _execute_many(self, sql, params):
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(sql, params)
+            except sqlite3.Error as e:
+                raise OSError("Unable to write to outbox '{}'!\n{}".format(self.host, e))
+
+    def append(self, data):
+        """Queue data records. Returns number of records queued."""
+        now = time.time()
+        self._execute_many(
+            'INSERT INTO {} (key, payload, created) VALUES (?, ?, ?)'.format(_OUTBOX_TABLE_),
+            [(uuid.uuid4().hex, json.dumps(row), now) for row in data],
+        )
+        return len(data)
+
+    def peek(self, limit):
+        """Get oldest records without removing them.
+
+        Returns:
+            List of '(id, key, record)' tuples
+        """
+        rows = self._query(
+            'SELECT id, key, payload FROM {} ORDER BY id LIMIT ?'.format(_OUTBOX_TABLE_), (int(limit),))
+        return [(rowId, key, json.loads(payload)) for rowId, key, payload in rows]
+
+    def ack(self, ids):
+        """Remove records that were uploaded."""
+        self._execute_many('DELETE FROM {} WHERE id = ?'.format(_OUTBOX_TABLE_), [(rowId,) for rowId in ids])
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def outbox_name(settings):
+    """Outbox file name from '[main] outbox' setting, or data store file name + '.outbox'."""
+    return os.path.expanduser(settings.get('outbox') or (settings.get('host') + _OUTBOX_SUFFIX_))
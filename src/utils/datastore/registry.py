@@ -0,0 +1,437 @@
+import atexit
+import importlib
+import os
+import threading
+import time
+
+# Storage type -> (module, class). Backends are only imported when used.
+_STORES_ = {
+    'csv': ('.csv', 'CSVStore'),
+    'json': ('.json', 'JSONStore'),
+    'sqlite': ('.sqlite', 'SQLiteStore'),
+    'binary': ('.binary', 'BinaryStore'),
+    'influx': ('.influx', 'InfluxStore'),
+}
+
+_CHUNK_SIZE_: int = 1000           # records per chunk for 'iter_range()'
+
+_OPEN_ = {}
+_OPEN_LOCK_ = threading.Lock()
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class DataStore:
+    """Base class for data store backends.
+
+    Handles (files, connections, HTTP sessions) are opened on first use
+    and kept until 'close()'. A closed store can still be used and simply
+    opens its handles again, so one store object can be shared for the
+    life of the process (see 'open_store()').
+
+    A store also works as data store writer (see 'store_data.open_speed_writer()').
+
+    Every appended batch also updates the rollups (see 'datastore.rollup'),
+    which are built from all raw records the first time they are opened.
+    Once the anomaly detector is in use (see 'detector()'), every appended
+    batch also saves anomaly tags and detector state (see 'datastore.anomaly').
+
+    Backends implement '_open_writer()', '_query()', '_iter_range()', '_compact()',
+    and '_ping()', and may override '_query_between()', '_rollup_name()', and '_anomaly_name()'.
+
+    Args:
+        settings: List with data store settings
+        schema:   Dict with field definitions by schema name (see 'show_data._DB_FLDS_')
+    """
+
+    storage = None
+    schemaKey = None
+
+    def __init__(self, settings, schema):
+        self.settings = settings
+        self.host = settings.get('host')
+        self.readFields = schema['raw']
+        self.writeFields = schema[self.schemaKey]
+        self.stats = {'appended': 0, 'batches': 0, 'queries': 0}
+        self._lock = threading.RLock()
+        self._writer = None
+        self._rollups = None
+        self._anomalies = None
+        self._detector = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def open(self):
+        """Open writer handle, if not already open. Returns self.
+
+        Raises:
+            OSError: If data store cannot be accessed.
+        """
+        with self._lock:
+            if self._writer is None:
+                self._writer = self._open_writer()
+
+        return self
+
+    def append_batch(self, data):
+        """Append data records. Returns number of records written."""
+        with self._lock:
+            num = self.open()._writer.write(data)
+            self.stats['appended'] += num
+            self.stats['batches'] += 1
+
+            name = self._rollup_name()
+            if name is not None:
+                if self._rollups is None and not os.path.exists(name):
+                    # New rollups are built from all raw records, incl. this batch
+                    self.flush()
+                    self._open_rollups()
+                else:
+                    self._open_rollups().add(data)
+
+            if self._detector is not None:
+                anomalies = self._open_anomalies()
+                if anomalies is not None:
+                    from .index import to_epoch
+                    anomalies.add(
+                        [(to_epoch(row.get('timestamp')), row['anomaly']) for row in data if row.get('anomaly')],
+                        self._detector.state())
+
+        return num
+
+    def write(self, data):
+        return self.append_batch(data)
+
+    def flush(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+
+    def query_range(self, numRecs, first=True, since=None, until=None):
+        """Retrieve first/last 'numRecs' records. Buffered records are flushed first.
+
+        Args:
+            numRecs: Number of records to retrieve
+            first:   If TRUE, retrieve first 'numRecs' records, else retrieve last 'numRecs' records
+            since:   Only records at or after this time (ISO 8601 string or Unix epoch). None = no lower bound.
+            until:   Only records before this time. None = no upper bound.
+
+        Raises:
+            OSError: If data store cannot be accessed.
+        """
+        with self._lock:
+            self.flush()
+            self.stats['queries'] += 1
+            if since is None and until is None:
+                return self._query(numRecs, first)
+
+            from .index import to_epoch
+            return self._query_between(
+                numRecs, first, None if since is None else to_epoch(since), None if until is None else to_epoch(until))
+
+    def iter_range(self, since=None, until=None, chunkSize=_CHUNK_SIZE_):
+        """Stream records with 'since <= timestamp < until' in chunks. Buffered records are flushed first.
+
+        The time range is passed on to the backend, so records outside the
+        range are skipped without being parsed (or sent) where possible.
+        Only one chunk is held in memory at a time.
+
+        Args:
+            since:     Start of time range (ISO 8601 string or Unix epoch). None = no lower bound.
+            until:     End of time range (exclusive). None = no upper bound.
+            chunkSize: Max number of records per chunk
+
+        Yields:
+            Lists of data records (as dicts)
+
+        Raises:
+            OSError: If data store cannot be accessed.
+        """
+        from .index import to_epoch
+
+        with self._lock:
+            self.flush()
+            self.stats['queries'] += 1
+
+        yield from self._iter_range(
+            None if since is None else to_epoch(since),
+            None if until is None else to_epoch(until),
+            max(int(chunkSize), 1),
+        )
+
+    def query_rollup(self, resolution, numRecs, first=True, since=None, until=None):
+        """Retrieve first/last 'numRecs' rollup buckets (see 'RollupStore.query()').
+
+        Raises:
+            ValueError: If resolution is unknown.
+            OSError:    If rollups are not supported or cannot be accessed.
+        """
+        with self._lock:
+            rollups = self._open_rollups()
+            if rollups is None:
+                raise OSError("Rollups are not supported for data storage type '{}'!".format(self.storage))
+
+            from .index import to_epoch
+
+            self.stats['queries'] += 1
+            return rollups.query(
+                resolution, numRecs, first, None if since is None else to_epoch(since),
+                None if until is None else to_epoch(until))
+
+    def detector(self):
+        """Return shared anomaly detector for all numeric fields (see 'anomaly_data.AnomalyDetector').
+
+        Use 'detector().tag(record)' on new records before they are appended.
+        The detector state is saved with every batch, so it carries over to
+        the next run. The first time, the detector learns from all raw
+        records, and anomalies found among them are tagged as well.
+
+        Raises:
+            OSError: If anomalies cannot be accessed.
+        """
+        with self._lock:
+            if self._detector is None:
+                from ..anomaly_data import AnomalyDetector
+
+                fields = [name for name, fldType in self.readFields.items() if fldType in (float, int)]
+                detector = AnomalyDetector(fields)
+                name = self._anomaly_name()
+
+                if name is not None and os.path.exists(name):
+                    detector.load(self._open_anomalies().load_state())
+                elif name is not None:
+                    self.flush()
+                    try:
+                        found = detector.scan(self._iter_range(None, None, _CHUNK_SIZE_))
+                    except OSError:
+                        # No data store yet, so nothing to learn from
+                        detector = AnomalyDetector(fields)
+                    else:
+                        self._open_anomalies().add(found, detector.state())
+
+                self._detector = detector
+
+        return self._detector
+
+    def query_anomalies(self, since=None, until=None):
+        """Retrieve anomaly tags for records in time range (see 'AnomalyStore.query()').
+
+        Raises:
+            OSError: If anomalies are not supported or cannot be accessed.
+        """
+        from .index import to_epoch
+
+        with self._lock:
+            name = self._anomaly_name()
+            if name is None:
+                raise OSError("Anomaly tags are not supported for data storage type '{}'!".format(self.storage))
+            if self._anomalies is None and not os.path.exists(name):
+                return []
+
+            self.stats['queries'] += 1
+            return self._open_anomalies().query(
+                None if since is None else to_epoch(since), None if until is None else to_epoch(until))
+
+    def compact(self, retain, slack=0.0):
+        """Remove oldest records so that at most 'retain' records are left. Returns number removed."""
+        with self._lock:
+            if self._writer is not None:
+                return self._writer.compact(retain, slack)
+
+            return self._compact(retain, slack)
+
+    def ping(self):
+        """Check that data store can be reached, without reading any records.
+
+        Returns:
+            Round-trip time in seconds
+
+        Raises:
+            OSError: If data store cannot be accessed.
+        """
+        start = time.perf_counter()
+        self._ping()
+        return time.perf_counter() - start
+
+    def close(self):
+        with self._lock:
+            try:
+                if self._writer is not None:
+                    self._writer.close()
+            finally:
+                self._writer = None
+                if self._rollups is not None:
+                    self._rollups.close()
+                    self._rollups = None
+                if self._anomalies is not None:
+                    self._anomalies.close()
+                    self._anomalies = None
+
+    def _open_rollups(self):
+        """Open rollups. New rollups are built from all raw records. Returns None if not supported."""
+        if self._rollups is None:
+            name = self._rollup_name()
+            if name is None:
+                return None
+
+            from .rollup import RollupStore
+
+            if not os.path.exists(name):
+                # Raw records are streamed in chunks into a temp file, which only replaces the
+                # (missing) rollup file once complete. So a missing data store or an interrupted
+                # build does not leave empty or partial rollups behind.
+                chunks = self._iter_range(None, None, _CHUNK_SIZE_)
+                chunk = next(chunks, None)
+                tmpName = name + '.tmp'
+                for fname in (tmpName, tmpName + '-wal', tmpName + '-shm'):
+                    if os.path.exists(fname):
+                        os.remove(fname)
+
+                with RollupStore(tmpName) as rollups:
+                    while chunk is not None:
+                        rollups.add(chunk)
+                        chunk = next(chunks, None)
+                os.replace(tmpName, name)
+
+            self._rollups = RollupStore(name)
+
+        return self._rollups
+
+    def _rollup_name(self):
+        from .rollup import rollup_name
+        return rollup_name(self.host)
+
+    def _open_anomalies(self):
+        """Open anomaly tags. Returns None if not supported."""
+        if self._anomalies is None:
+            name = self._anomaly_name()
+            if name is None:
+                return None
+
+            from .anomaly import AnomalyStore
+            self._anomalies = AnomalyStore(name)
+
+        return self._anomalies
+
+    def _anomaly_name(self):
+        from .anomaly import anomaly_name
+        return anomaly_name(self.host)
+
+    def _open_writer(self):
+        raise NotImplementedError
+
+    def _query(self, numRecs, first):
+        raise NotImplementedError
+
+    def _iter_range(self, since, until, chunkSize):
+        raise NotImplementedError
+
+    def _query_between(self, numRecs, first, since, until):
+        # Backends with sorted/indexed timestamps find the range bounds directly
+        from collections import deque
+
+        numRecs = max(int(numRecs), 0)
+        if first:
+            data = []
+            for chunk in self._iter_range(since, until, _CHUNK_SIZE_):
+                data.extend(chunk[:numRecs - len(data)])
+                if len(data) >= numRecs:
+                    break
+            return data
+
+        data = deque(maxlen=numRecs)
+        for chunk in self._iter_range(since, until, _CHUNK_SIZE_):
+            data.extend(chunk)
+        return list(data)
+
+    def _compact(self, retain, slack):
+        raise NotImplementedError
+
+    def _ping(self):
+        raise NotImplementedError
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def _store_key(storage, settings):
+    return (storage, settings.get('host'), settings.get('dbname'), settings.get('dbtable'), settings.get('org'))
+
+
+# =========================================================
+#               C O R E   F U N C T I O N S
+# =========================================================
+def register_store(storage, cls):
+    """Register data store class for a storage type (e.g. 'csv')."""
+    _STORES_[storage.lower()] = cls
+
+
+def get_store_class(storage):
+    """Return data store class for a storage type.
+
+    Raises:
+        OSError: If storage type is not supported.
+    """
+    entry = _STORES_.get(str(storage).lower())
+    if entry is None:
+        raise OSError("Data storage type '{}' is not supported!".format(str(storage)))
+
+    if isinstance(entry, tuple):
+        modName, clsName = entry
+        entry = getattr(importlib.import_module(modName, __package__), clsName)
+
+    return entry
+
+
+def open_store(settings, schema):
+    """Return shared data store for the given settings.
+
+    Stores are kept per storage type, host, and table, so repeated calls
+    within a process reuse the same handles. If other settings have
+    changed, the old store is closed and replaced.
+
+    Args:
+        settings: List with data store settings
+        schema:   Dict with field definitions by schema name
+
+    Returns:
+        DataStore object
+
+    Raises:
+        OSError: If data store is not supported.
+    """
+    storage = str(settings.get('storage')).lower()
+    key = _store_key(storage, settings)
+    stale = None
+
+    with _OPEN_LOCK_:
+        store = _OPEN_.get(key)
+        if store is not None and dict(store.settings) != dict(settings):
+            # Same data store, but other options (e.g. batch size) have changed
+            stale, store = store, None
+        if store is None:
+            store = _OPEN_[key] = get_store_class(settings.get('storage'))(settings, schema)
+
+    if stale is not None:
+        stale.close()
+
+    return store
+
+
+@atexit.register
+def close_stores():
+    """Close all shared data stores."""
+    with _OPEN_LOCK_:
+        stores = list(_OPEN_.values())
+        _OPEN_.clear()
+
+    for store in stores:
+        try:
+            store.close()
+        except OSError:
+            pass
@@ -0,0 +1,210 @@
+import math
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from .index import to_epoch
+from .sqlite import _connect
+
+_ROLLUP_SUFFIX_: str = '.rollup'
+_ROLLUP_TABLE_: str = 'Rollup'
+
+# Resolution name -> bucket size (seconds)
+_RESOLUTIONS_ = {'1m': 60, '1h': 3600, '1d': 86400}
+_METRICS_ = ('ping', 'download', 'upload')
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def rollup_name(host, dbtable=None):
+    """Rollup file name: data store file name (+ table name) + '.rollup'."""
+    return os.path.expanduser(host) + ('.' + dbtable if dbtable else '') + _ROLLUP_SUFFIX_
+
+
+def _bucket_timestamp(bucket):
+    return datetime.fromtimestamp(bucket, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def aggregate(data, resolutions=_RESOLUTIONS_):
+    """Aggregate data records into buckets for each resolution.
+
+    Args:
+        data:        List of data records (as dicts)
+        resolutions: Dict with resolution names as keys and bucket sizes (seconds) as values
+
+    Returns:
+        Dict with '(resolution, bucket, location)' keys and dicts with 'count',
+        'locationTZ', and '[n, min, max, sum]' lists per metric as values
+    """
+    out = {}
+
+    for row in data:
+        epoch = to_epoch(row.get('timestamp'))
+        if math.isnan(epoch):
+            continue
+
+        # Location is part of the primary key, and NULLs never match in an upsert
+        location = row.get('location') or ''
+        values = []
+        for name in _METRICS_:
+            try:
+                val = float(row.get(name))
+            except (TypeError, ValueError):
+                val = None
+            values.append(val if val is not None and math.isfinite(val) else None)
+
+        for res, size in resolutions.items():
+            key = (res, int(epoch // size) * size, location)
+            acc = out.get(key)
+            if acc is None:
+                acc = out[key] = {'count': 0, 'locationTZ': None}
+                acc.update((name, [0, None, None, 0.0]) for name in _METRICS_)
+
+            acc['count'] += 1
+            acc['locationTZ'] = row.get('locationTZ') or acc['locationTZ']
+            for name, val in zip(_METRICS_, values):
+                if val is None:
+                    continue
+                stats = acc[name]
+                stats[0] += 1
+                stats[1] = val if stats[1] is None else min(stats[1], val)
+                stats[2] = val if stats[2] is None else max(stats[2], val)
+                stats[3] += val
+
+    return out
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class RollupStore:
+    """Pre-aggregated min/max/mean/count per 1m, 1h, and 1d bucket.
+
+    Rollups live in a SQLite file next to the data store and are updated
+    with every saved batch: the batch is aggregated in memory first, and
+    each touched bucket is then merged with a single upsert. Long-range
+    history queries read one row per bucket instead of every record.
+    Rollups are not trimmed when raw records are compacted.
+
+    Args:
+        host: Path to rollup file
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self._lock = threading.Lock()
+        self._conn = _connect(host, True, shared=True)
+
+        metricCols = ''.join(
+            ', {0}_n INTEGER NOT NULL, {0}_min REAL, {0}_max REAL, {0}_sum REAL NOT NULL'.format(name)
+            for name in _METRICS_)
+        metricSet = ''.join(
+            ', {0}_n = {0}_n + excluded.{0}_n'
+            ', {0}_min = coalesce(min({0}_min, excluded.{0}_min), {0}_min, excluded.{0}_min)'
+            ', {0}_max = coalesce(max({0}_max, excluded.{0}_max), {0}_max, excluded.{0}_max)'
+            ', {0}_sum = {0}_sum + excluded.{0}_sum'.format(name)
+            for name in _METRICS_)
+        self._sql = (
+            'INSERT INTO {0} VALUES ({1}) ON CONFLICT (res, bucket, location) DO UPDATE SET '
+            'count = count + excluded.count, locationTZ = coalesce(excluded.locationTZ, locationTZ){2}'
+        ).format(_ROLLUP_TABLE_, ', '.join('?' for _ in range(5 + 4 * len(_METRICS_))), metricSet)
+
+        try:
+            with self._conn:
+                self._conn.execute(
+                    'CREATE TABLE IF NOT EXISTS {} (res TEXT NOT NULL, bucket INTEGER NOT NULL, '
+                    'location TEXT NOT NULL, locationTZ TEXT, count INTEGER NOT NULL{}, '
+                    'PRIMARY KEY (res, bucket, location)) WITHOUT ROWID'.format(_ROLLUP_TABLE_, metricCols)
+                )
+        except sqlite3.Error as e:
+            self._conn.close()
+            raise OSError("Unable to open rollups '{}'!\n{}".format(host, e))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT count(*) FROM {}'.format(_ROLLUP_TABLE_)).fetchone()[0]
+
+    def add(self, data):
+        """Merge data records into rollups. Returns number of buckets updated."""
+        params = []
+        for (res, bucket, location), acc in aggregate(data).items():
+            row = [res, bucket, location, acc['locationTZ'], acc['count']]
+            for name in _METRICS_:
+                row.extend(acc[name])
+            params.append(row)
+
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(self._sql, params)
+            except sqlite3.Error as e:
+                raise OSError("Unable to update rollups '{}'!\n{}".format(self.host, e))
+
+        return len(params)
+
+    def query(self, resolution, numRecs, first=True, since=None, until=None):
+        """Retrieve first/last 'numRecs' buckets for a resolution.
+
+        With 'since' and/or 'until' (Unix epoch), only buckets that start
+        in that time range are included.
+
+        Returns:
+            List of records (as dicts) in time order. Each has 'timestamp' (bucket
+            start), 'location', 'locationTZ', 'count', mean values under the metric
+            names (e.g. 'ping'), and '<metric>Min' and '<metric>Max'.
+
+        Raises:
+            ValueError: If resolution is unknown.
+            OSError:    If rollups cannot be accessed.
+        """
+        if resolution not in _RESOLUTIONS_:
+            raise ValueError("Invalid resolution '{}'! Must be one of: {}".format(
+                resolution, ', '.join(_RESOLUTIONS_)))
+
+        direction = 'ASC' if first else 'DESC'
+        cols = ''.join(', {0}_n, {0}_min, {0}_max, {0}_sum'.format(name) for name in _METRICS_)
+        where = ''
+        params = [resolution]
+        if since is not None:
+            where += ' AND bucket >= ?'
+            params.append(since)
+        if until is not None:
+            where += ' AND bucket < ?'
+            params.append(until)
+        sql = 'SELECT bucket, location, locationTZ, count{} FROM {} WHERE res = ?{} ORDER BY bucket {}, location {} ' \
+              'LIMIT ?'.format(cols, _ROLLUP_TABLE_, where, direction, direction)
+
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, params + [int(numRecs)]).fetchall()
+            except sqlite3.Error as e:
+                raise OSError("Unable to read from rollups '{}'!\n{}".format(self.host, e))
+
+        data = []
+        for row in (rows if first else rows[::-1]):
+            rec = {
+                'timestamp': _bucket_timestamp(row[0]),
+                'location': row[1] or None,
+                'locationTZ': row[2],
+                'count': row[3],
+            }
+            for i, name in enumerate(_METRICS_):
+                num, low, high, total = row[4 + i * 4:8 + i * 4]
+                rec.update([(name, total / num if num else None), (name + 'Min', low), (name + 'Max', high)])
+            data.append(rec)
+
+        return data
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,447 @@
+import os
+import sqlite3
+
+from .index import to_epoch
+from .registry import DataStore
+
+_IDX_HINT_: str = 'idx'
+_HINT_SEP_: str = '|'
+_ORDER_SEP_: str = '|'
+_TS_FLD_: str = 'timestamp'
+_EPOCH_FLD_: str = '_epoch'                 # Unix epoch of 'timestamp', for time range queries
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def _quote(name):
+    return '"{}"'.format(str(name).replace('"', '""'))
+
+
+def _parse_order(order):
+    fld, _, direction = (order or 'timestamp|ASC').partition(_ORDER_SEP_)
+    return fld, ('DESC' if direction.upper() == 'DESC' else 'ASC')
+
+
+def _connect(host, create=False, shared=False):
+    fname = os.path.expanduser(host)
+
+    if not create and not os.path.exists(fname):
+        raise OSError("Data store '{}' does NOT exist or cannot be accessed!".format(host))
+
+    if create:
+        path = os.path.dirname(os.path.abspath(fname))
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+    try:
+        # 'shared' connections may be used from several threads, with the caller doing the locking
+        conn = sqlite3.connect(fname, check_same_thread=not shared)
+        # WAL lets readers (e.g. '--history') run while a save is in progress,
+        # and NORMAL sync is durable enough for WAL without an fsync per commit.
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+    except sqlite3.Error as e:
+        raise OSError("Unable to open data store '{}'!\n{}".format(host, e))
+
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _create_table(conn, dbtable, fields):
+    """Create table and indexes based on 'TYPE|idx' field hints."""
+    cols = []
+    idxs = []
+    for name, hint in fields.items():
+        colType, _, flag = (hint or 'TEXT').partition(_HINT_SEP_)
+        cols.append('{} {}'.format(_quote(name), colType.upper()))
+        if flag.lower() == _IDX_HINT_:
+            idxs.append(name)
+
+    conn.execute('CREATE TABLE IF NOT EXISTS {} ({})'.format(_quote(dbtable), ', '.join(cols)))
+    for name in idxs:
+        conn.execute('CREATE INDEX IF NOT EXISTS {} ON {} ({})'.format(
+            _quote('idx_{}_{}'.format(dbtable, name)), _quote(dbtable), _quote(name)))
+
+    _add_epoch(conn, dbtable)
+
+
+def _table_exists(conn, dbtable):
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (dbtable,)).fetchone()
+    return row is not None
+
+
+def _has_epoch(conn, dbtable):
+    return any(row[1] == _EPOCH_FLD_ for row in conn.execute('PRAGMA table_info({})'.format(_quote(dbtable))))
+
+
+def _add_epoch(conn, dbtable):
+    """Add indexed epoch column to table (if missing), and fill it in for existing records.
+
+    Timestamps may be stored with or without fractions and UTC offsets,
+    so they are only compared as numbers (like the CSV/JSON index does).
+    """
+    if not _has_epoch(conn, dbtable):
+        conn.create_function('to_epoch', 1, to_epoch, deterministic=True)
+        conn.execute('ALTER TABLE {} ADD COLUMN {} REAL'.format(_quote(dbtable), _quote(_EPOCH_FLD_)))
+        conn.execute('UPDATE {} SET {} = to_epoch({})'.format(
+            _quote(dbtable), _quote(_EPOCH_FLD_), _quote(_TS_FLD_)))
+
+    conn.execute('CREATE INDEX IF NOT EXISTS {} ON {} ({})'.format(
+        _quote('idx_{}_{}'.format(dbtable, _EPOCH_FLD_)), _quote(dbtable), _quote(_EPOCH_FLD_)))
+
+
+def _range_clause(since, until):
+    """Build 'WHERE' clause and params for time range on epoch field."""
+    where = []
+    params = []
+    if since is not None:
+        where.append('{} >= ?'.format(_quote(_EPOCH_FLD_)))
+        params.append(float(since))
+    if until is not None:
+        where.append('{} < ?'.format(_quote(_EPOCH_FLD_)))
+        params.append(float(until))
+
+    return (' WHERE ' + ' AND '.join(where) if where else ''), params
+
+
+def _range_order(order, since, until):
+    # Time ranges are also sorted on the epoch field, so one index serves both
+    fld, direction = _parse_order(order)
+    if fld == _TS_FLD_ and (since is not None or until is not None):
+        fld = _EPOCH_FLD_
+
+    return '{}{}{}'.format(fld, _ORDER_SEP_, direction)
+
+
+def _build_query(fields, dbtable, order, first, where=''):
+    fld, direction = _parse_order(order)
+    if not first:
+        direction = 'ASC' if direction == 'DESC' else 'DESC'
+
+    return 'SELECT {} FROM {}{} ORDER BY {} {} LIMIT ?'.format(
+        ', '.join(_quote(name) for name in fields),
+        _quote(dbtable),
+        where,
+        _quote(fld),
+        direction,
+    )
+
+
+def _build_range_query(fields, dbtable, order, since, until):
+    fld, direction = _parse_order(_range_order(order, since, until))
+
+    where, params = _range_clause(since, until)
+    sql = 'SELECT {} FROM {}{} ORDER BY {} {}'.format(
+        ', '.join(_quote(name) for name in fields),
+        _quote(dbtable),
+        where,
+        _quote(fld),
+        direction,
+    )
+    return sql, params
+
+
+def _compact(conn, host, dbtable, retain):
+    retain = int(retain)
+    if retain < 0:
+        return 0
+
+    try:
+        if not _table_exists(conn, dbtable):
+            return 0
+
+        with conn:
+            if retain == 0:
+                cursor = conn.execute('DELETE FROM {}'.format(_quote(dbtable)))
+            else:
+                cursor = conn.execute(
+                    'DELETE FROM {0} WHERE rowid <= (SELECT max(rowid) FROM {0}) - ?'.format(_quote(dbtable)),
+                    (retain,)
+                )
+
+    except sqlite3.Error as e:
+        raise OSError("Unable to compact data store '{}'!\n{}".format(host, e))
+
+    return max(cursor.rowcount, 0)
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class SQLiteWriter:
+    """Writer that keeps one SQLite connection open until 'close()'.
+
+    Each 'write()' inserts its records with a single prepared statement
+    inside one transaction.
+
+    Args:
+        host:    Path to SQLite database file
+        fields:  Dict with field names as keys and 'TYPE|idx' hints as values
+        dbtable: Name of database table
+    """
+
+    def __init__(self, host, fields, dbtable):
+        self.host = host
+        self.dbtable = dbtable
+        self._names = list(fields.keys())
+        self._sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            _quote(dbtable),
+            ', '.join(_quote(name) for name in self._names + [_EPOCH_FLD_]),
+            ', '.join('?' for _ in range(len(self._names) + 1)),
+        )
+        self._conn = _connect(host, True)
+
+        try:
+            with self._conn:
+                _create_table(self._conn, dbtable, fields)
+        except sqlite3.Error as e:
+            self._conn.close()
+            raise OSError("Unable to save to data store '{}'!\n{}".format(host, e))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, data):
+        """Insert data records. Returns number of records written."""
+        names = self._names
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    self._sql, ([row.get(name) for name in names] + [to_epoch(row.get(_TS_FLD_))] for row in data))
+        except sqlite3.Error as e:
+            raise OSError("Unable to save to data store '{}'!\n{}".format(self.host, e))
+
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def compact(self, retain, slack=0.0):
+        """Trim data store (see 'compact()'). Returns number of records removed."""
+        return _compact(self._conn, self.host, self.dbtable, retain)
+
+
+class SQLiteStore(DataStore):
+    """SQLite data store (see 'DataStore').
+
+    Queries and 'ping()' share one read connection, which is kept open
+    next to the writer connection until 'close()'.
+    """
+
+    storage = 'sqlite'
+    schemaKey = 'sql'
+    order = 'timestamp|ASC'
+
+    def __init__(self, settings, schema):
+        super().__init__(settings, schema)
+        self.dbtable = settings.get('dbtable')
+        self._conn = None
+
+    def _get_conn(self):
+        if self._conn is None:
+            # Shared, as the store's lock already serializes access
+            self._conn = _connect(self.host, shared=True)
+
+        return self._conn
+
+    def _open_writer(self):
+        return SQLiteWriter(self.host, self.writeFields, self.dbtable)
+
+    def _rollup_name(self):
+        from .rollup import rollup_name
+        return rollup_name(self.host, self.dbtable)
+
+    def _anomaly_name(self):
+        from .anomaly import anomaly_name
+        return anomaly_name(self.host, self.dbtable)
+
+    def _query(self, numRecs, first):
+        return get_data(self.host, self.readFields, self.dbtable, self.order, numRecs, first, self._get_conn())
+
+    def _query_between(self, numRecs, first, since, until):
+        return get_data(self.host, self.readFields, self.dbtable, self.order, numRecs, first, self._get_conn(),
+                        since, until)
+
+    def _iter_range(self, since, until, chunkSize):
+        return iter_data(self.host, self.readFields, self.dbtable, self.order, since, until, chunkSize)
+
+    def _compact(self, retain, slack):
+        if int(retain) < 0:
+            return 0
+
+        return _compact(self._get_conn(), self.host, self.dbtable, retain)
+
+    def _ping(self):
+        try:
+            self._get_conn().execute('SELECT 1').fetchone()
+        except sqlite3.Error as e:
+            raise OSError("Unable to access data store '{}'!\n{}".format(self.host, e))
+
+    def close(self):
+        with self._lock:
+            try:
+                super().close()
+            finally:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+
+
+# =========================================================
+#                D A T A   F U N C T I O N S
+# =========================================================
+def get_data(host, fields, dbtable, order, numRecs, first=True, conn=None, since=None, until=None):
+    """Retrieve first/last 'numRecs' records from SQLite data store.
+
+    The 'LIMIT' query walks the index on the order field from either end,
+    so retrieving the last N records does not scan the whole table. A time
+    range becomes a range scan on the (indexed) epoch field.
+
+    Args:
+        host:    Path to SQLite database file
+        fields:  Dict with field names as keys
+        dbtable: Name of database table
+        order:   Sort order as '<field>|<ASC|DESC>'
+        numRecs: Number of records to retrieve
+        first:   If TRUE, retrieve first 'numRecs' records, else retrieve last 'numRecs' records
+        conn:    Open connection to use. If None, a connection is opened and closed for this call.
+        since:   Start of time range (Unix epoch). None = no lower bound.
+        until:   End of time range (Unix epoch, exclusive). None = no upper bound.
+
+    Returns:
+        List of data records (as dicts) in sort order
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    ownConn = conn is None
+    if ownConn:
+        conn = _connect(host)
+
+    try:
+        if not _table_exists(conn, dbtable):
+            return []
+
+        where, params = _range_clause(since, until)
+        if where and not _has_epoch(conn, dbtable):
+            with conn:
+                _add_epoch(conn, dbtable)
+
+        sql = _build_query(fields, dbtable, _range_order(order, since, until), first, where)
+        rows = conn.execute(sql, params + [int(numRecs)]).fetchall()
+
+    except sqlite3.Error as e:
+        raise OSError("Unable to read from data store '{}'!\n{}".format(host, e))
+
+    finally:
+        if ownConn:
+            conn.close()
+
+    data = [dict(row) for row in rows]
+    return data if first else data[::-1]
+
+
+def iter_data(host, fields, dbtable, order, since=None, until=None, chunkSize=1000):
+    """Stream records in time range 'since <= timestamp < until' from SQLite data store.
+
+    The range becomes a 'WHERE' clause on the (indexed) epoch field, and
+    rows are fetched 'chunkSize' at a time from one cursor. The cursor has
+    its own connection, so writes are not blocked while records are streamed.
+
+    Args:
+        host:      Path to SQLite database file
+        fields:    Dict with field names as keys
+        dbtable:   Name of database table
+        order:     Sort order as '<field>|<ASC|DESC>'
+        since:     Start of time range (Unix epoch). None = no lower bound.
+        until:     End of time range (Unix epoch, exclusive). None = no upper bound.
+        chunkSize: Max number of records per chunk
+
+    Yields:
+        Lists of data records (as dicts) in sort order
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    conn = _connect(host)
+    try:
+        if not _table_exists(conn, dbtable):
+            return
+
+        if (since is not None or until is not None) and not _has_epoch(conn, dbtable):
+            with conn:
+                _add_epoch(conn, dbtable)
+
+        cursor = conn.execute(*_build_range_query(fields, dbtable, order, since, until))
+        while True:
+            rows = cursor.fetchmany(chunkSize)
+            if not rows:
+                break
+            yield [dict(row) for row in rows]
+
+    except sqlite3.Error as e:
+        raise OSError("Unable to read from data store '{}'!\n{}".format(host, e))
+
+    finally:
+        conn.close()
+
+
+def save_data(host, fields, dbtable, data):
+    """Save data records to SQLite data store.
+
+    All records are inserted with a single prepared statement inside
+    one transaction.
+
+    Args:
+        host:    Path to SQLite database file
+        fields:  Dict with field names as keys and 'TYPE|idx' hints as values
+        dbtable: Name of database table
+        data:    List of data records (as dicts)
+
+    Returns:
+        Number of records saved
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    with SQLiteWriter(host, fields, dbtable) as writer:
+        return writer.write(data)
+
+
+def compact(host, dbtable, retain):
+    """Remove oldest records so that at most 'retain' records are left.
+
+    Records are only appended and removed from the head, so the newest
+    'retain' records are the last 'retain' rowids. The delete is a rowid
+    range scan, and its cost is proportional to the number of rows removed.
+
+    Args:
+        host:    Path to SQLite database file
+        dbtable: Name of database table
+        retain:  Max number of records to keep. -1 = keep all, 0 = keep none
+
+    Returns:
+        Number of records removed
+
+    Raises:
+        OSError: If data store cannot be accessed.
+    """
+    if int(retain) < 0:
+        return 0
+
+    conn = _connect(host)
+
+    try:
+        return _compact(conn, host, dbtable, retain)
+
+    finally:
+        conn.close()
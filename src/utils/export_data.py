@@ -0,0 +1,272 @@
+import csv
+import io
+import json
+import math
+import struct
+from datetime import datetime, timezone
+
+from .datastore.index import to_epoch
+
+_CHUNK_SIZE_: int = 1000
+_ENCODING_: str = 'utf-8'
+_TS_FMT_: str = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+_FMT_CSV_: str = 'csv'
+_FMT_JSONL_: str = 'jsonl'
+_FMT_COLUMNAR_: str = 'columnar'
+_FORMATS_ = (_FMT_CSV_, _FMT_JSONL_, _FMT_COLUMNAR_)
+
+# Columnar format: magic, schema, then row groups. A row group with 0 rows marks the end.
+_COL_MAGIC_: bytes = b'PIRCOL1\n'
+_COL_TIME_: bytes = b't'        # Unix epoch as float64 (NaN = missing)
+_COL_FLOAT_: bytes = b'd'       # float64 (NaN = missing)
+_COL_STRING_: bytes = b's'      # uint32 codes into a string dictionary that grows with each row group
+_COL_NULL_: int = 0xFFFFFFFF
+_U16_ = struct.Struct('<H')
+_U32_ = struct.Struct('<I')
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def _to_float(val):
+    try:
+        return float(val) if val is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _column_kind(name, fldType):
+    if name == 'timestamp':
+        return _COL_TIME_
+
+    return _COL_FLOAT_ if fldType in (float, int) else _COL_STRING_
+
+
+def _read_exact(fh, size):
+    buf = fh.read(size)
+    if len(buf) != size:
+        raise ValueError("Columnar data is truncated!")
+
+    return buf
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class CSVExporter:
+    """Write data records as CSV, one chunk per write. The header row is written right away.
+
+    Args:
+        fh:     Binary file handle
+        fields: Dict with field names as keys
+    """
+
+    def __init__(self, fh, fields):
+        self.fh = fh
+        self._buf = io.StringIO()
+        self._writer = csv.DictWriter(self._buf, fieldnames=list(fields), extrasaction='ignore', lineterminator='\n')
+        self._writer.writeheader()
+        self._flush_buf()
+
+    def _flush_buf(self):
+        self.fh.write(self._buf.getvalue().encode(_ENCODING_))
+        self._buf.seek(0)
+        self._buf.truncate()
+
+    def write(self, data):
+        self._writer.writerows(data)
+        self._flush_buf()
+
+    def close(self):
+        pass
+
+
+class JSONLExporter:
+    """Write data records as JSON Lines, one chunk per write.
+
+    Args:
+        fh:     Binary file handle
+        fields: Dict with field names as keys
+    """
+
+    def __init__(self, fh, fields):
+        self.fh = fh
+        self.names = list(fields)
+
+    def write(self, data):
+        lines = [json.dumps({name: row.get(name) for name in self.names}, separators=(',', ':')) for row in data]
+        if lines:
+            self.fh.write(('\n'.join(lines) + '\n').encode(_ENCODING_))
+
+    def close(self):
+        pass
+
+
+class ColumnarExporter:
+    """Write data records in compact binary columnar format, one row group per chunk.
+
+    Each row group stores every column as one contiguous block: timestamps
+    and numbers as little-endian float64 arrays, and strings (e.g. location)
+    as uint32 codes into a dictionary. Only strings not seen in earlier
+    row groups are written, so repeated locations cost 4 bytes per record.
+    Use 'read_columnar()' to read it back.
+
+    Args:
+        fh:     Binary file handle
+        fields: Dict with field names as keys and types as values (see 'show_data._DB_FLDS_['raw']')
+    """
+
+    def __init__(self, fh, fields):
+        self.fh = fh
+        self.columns = [(name, _column_kind(name, fldType)) for name, fldType in fields.items()]
+        self._dicts = {name: {} for name, kind in self.columns if kind == _COL_STRING_}
+
+        hdr = [_COL_MAGIC_, _U16_.pack(len(self.columns))]
+        for name, kind in self.columns:
+            encName = name.encode(_ENCODING_)
+            hdr.extend([kind, _U16_.pack(len(encName)), encName])
+        fh.write(b''.join(hdr))
+
+    def write(self, data):
+        numRows = len(data)
+        if not numRows:
+            return
+
+        out = [_U32_.pack(numRows)]
+        for name, kind in self.columns:
+            if kind == _COL_TIME_:
+                out.append(struct.pack('<{}d'.format(numRows), *(to_epoch(row.get(name)) for row in data)))
+            elif kind == _COL_FLOAT_:
+                out.append(struct.pack('<{}d'.format(numRows), *(_to_float(row.get(name)) for row in data)))
+            else:
+                strings = self._dicts[name]
+                newStrings = []
+                codes = []
+                for row in data:
+                    val = row.get(name)
+                    if val is None:
+                        codes.append(_COL_NULL_)
+                        continue
+                    code = strings.get(val)
+                    if code is None:
+                        code = strings[val] = len(strings)
+                        newStrings.append(str(val).encode(_ENCODING_))
+                    codes.append(code)
+
+                out.append(_U32_.pack(len(newStrings)))
+                out.extend(_U32_.pack(len(encVal)) + encVal for encVal in newStrings)
+                out.append(struct.pack('<{}I'.format(numRows), *codes))
+
+        self.fh.write(b''.join(out))
+
+    def close(self):
+        self.fh.write(_U32_.pack(0))
+
+
+_EXPORTERS_ = {_FMT_CSV_: CSVExporter, _FMT_JSONL_: JSONLExporter, _FMT_COLUMNAR_: ColumnarExporter}
+
+
+# =========================================================
+#                D A T A   F U N C T I O N S
+# =========================================================
+def read_columnar(fh):
+    """Read data records from binary columnar format (see 'ColumnarExporter').
+
+    Args:
+        fh: Binary file handle
+
+    Yields:
+        Lists of data records (as dicts), one list per row group
+
+    Raises:
+        ValueError: If data is not in columnar format or is truncated.
+    """
+    if fh.read(len(_COL_MAGIC_)) != _COL_MAGIC_:
+        raise ValueError("Data is not in columnar format!")
+
+    columns = []
+    for _ in range(_U16_.unpack(_read_exact(fh, _U16_.size))[0]):
+        kind = _read_exact(fh, 1)
+        nameLen = _U16_.unpack(_read_exact(fh, _U16_.size))[0]
+        columns.append((_read_exact(fh, nameLen).decode(_ENCODING_), kind))
+    dicts = {name: [] for name, kind in columns if kind == _COL_STRING_}
+
+    while True:
+        numRows = _U32_.unpack(_read_exact(fh, _U32_.size))[0]
+        if not numRows:
+            return
+
+        cols = []
+        for name, kind in columns:
+            if kind in (_COL_TIME_, _COL_FLOAT_):
+                vals = struct.unpack('<{}d'.format(numRows), _read_exact(fh, 8 * numRows))
+                if kind == _COL_TIME_:
+                    vals = [None if math.isnan(val) else
+                            datetime.fromtimestamp(val, timezone.utc).strftime(_TS_FMT_) for val in vals]
+                else:
+                    vals = [None if math.isnan(val) else val for val in vals]
+            elif kind == _COL_STRING_:
+                strings = dicts[name]
+                for _ in range(_U32_.unpack(_read_exact(fh, _U32_.size))[0]):
+                    strLen = _U32_.unpack(_read_exact(fh, _U32_.size))[0]
+                    strings.append(_read_exact(fh, strLen).decode(_ENCODING_))
+                codes = struct.unpack('<{}I'.format(numRows), _read_exact(fh, 4 * numRows))
+                vals = [None if code == _COL_NULL_ else strings[code] for code in codes]
+            else:
+                raise ValueError("Unknown column type '{}' in columnar data!".format(kind))
+            cols.append((name, vals))
+
+        yield [{name: vals[i] for name, vals in cols} for i in range(numRows)]
+
+
+def iter_speed_data(settings, since=None, until=None, chunkSize=_CHUNK_SIZE_):
+    """Stream SpeedTest records in time range from preferred data store (see 'DataStore.iter_range()').
+
+    Raises:
+        OSError: If data store is not supported and/or cannot be accessed.
+    """
+    from .show_data import get_store
+    return get_store(settings).iter_range(since, until, chunkSize)
+
+
+def export_speed_data(settings, fh, fmt=_FMT_CSV_, since=None, until=None, chunkSize=_CHUNK_SIZE_):
+    """Export SpeedTest records from preferred data store to a file.
+
+    Records are streamed from the data store one chunk at a time, and each
+    chunk is encoded and written in one go. Memory use does not depend on
+    the number of records exported.
+
+    Args:
+        settings:  List with data store settings
+        fh:        Binary file handle
+        fmt:       Output format: 'csv', 'jsonl', or 'columnar'
+        since:     Start of time range (ISO 8601 string or Unix epoch). None = no lower bound.
+        until:     End of time range (exclusive). None = no upper bound.
+        chunkSize: Max number of records per chunk
+
+    Returns:
+        Number of records exported
+
+    Raises:
+        ValueError: If output format is unknown.
+        OSError:    If data store is not supported and/or cannot be accessed.
+    """
+    from .show_data import _DB_FLDS_, get_store
+
+    exporterCls = _EXPORTERS_.get(str(fmt).lower())
+    if exporterCls is None:
+        raise ValueError("Invalid export format '{}'! Must be one of: {}".format(fmt, ', '.join(_FORMATS_)))
+
+    # Check data store before anything (e.g. CSV header) is written, so errors leave no partial output behind
+    store = get_store(settings)
+    store.ping()
+
+    numRecs = 0
+    exporter = exporterCls(fh, _DB_FLDS_['raw'])
+    for chunk in store.iter_range(since, until, chunkSize):
+        exporter.write(chunk)
+        numRecs += len(chunk)
+    exporter.close()
+
+    return numRecs
@@ -0,0 +1,209 @@
+import itertools
+import math
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_STOP_ = object()
+
+_ALPHA_: float = 0.2            # EWMA smoothing factor for channel mean/variance
+_CHANGE_LIMIT_: float = 0.2     # relative change between two samples that counts as activity
+_CV_LIMIT_: float = 0.1         # coefficient of variation (stdev/mean) that counts as activity
+_SPEED_UP_: float = 0.5         # interval factor when channels are active
+_BACK_OFF_: float = 1.25        # interval factor when channels are stable
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class AdaptiveInterval:
+    """Pick the interval between samples based on how much the readings move.
+
+    Every numeric channel keeps its last value and an EWMA mean and
+    variance (O(1) state per channel). When any channel changes by more
+    than 'changeLimit' (relative to its mean) from one sample to the next,
+    or its coefficient of variation goes above 'cvLimit', the interval is
+    cut by 'speedUp'. When all channels are stable, the interval grows by
+    'backOff'. The interval always stays within min/max.
+
+    Args:
+        minInterval: Shortest interval (seconds)
+        maxInterval: Longest interval (seconds)
+        interval:    Start interval. Defaults to 'maxInterval'.
+        channels:    Sequence of channel names to watch. If None, watch all numeric values.
+        changeLimit: Relative change between samples that speeds up sampling
+        cvLimit:     Coefficient of variation that speeds up sampling
+        speedUp:     Interval factor when active (< 1)
+        backOff:     Interval factor when stable (> 1)
+
+    Raises:
+        ValueError: If intervals or factors are invalid.
+    """
+
+    def __init__(self, minInterval, maxInterval, interval=None, channels=None, changeLimit=_CHANGE_LIMIT_,
+                 cvLimit=_CV_LIMIT_, speedUp=_SPEED_UP_, backOff=_BACK_OFF_):
+        if not 0 < minInterval <= maxInterval:
+            raise ValueError("Invalid min/max interval '{}/{}'!".format(minInterval, maxInterval))
+        if not (0 < speedUp <= 1 <= backOff):
+            raise ValueError("Invalid speed-up/back-off factor '{}/{}'!".format(speedUp, backOff))
+
+        self.minInterval = float(minInterval)
+        self.maxInterval = float(maxInterval)
+        self.interval = min(max(float(interval or maxInterval), self.minInterval), self.maxInterval)
+        self.channels = None if channels is None else tuple(channels)
+        self.changeLimit = changeLimit
+        self.cvLimit = cvLimit
+        self.speedUp = speedUp
+        self.backOff = backOff
+
+        self.stats = {'samples': 0, 'speedUps': 0, 'backOffs': 0}
+        self._state = {}
+
+    def _values(self, record):
+        names = record.keys() if self.channels is None else self.channels
+        for name in names:
+            val = record.get(name)
+            if isinstance(val, (int, float)) and not isinstance(val, bool) and math.isfinite(val):
+                yield name, float(val)
+
+    def _is_active(self, name, val):
+        state = self._state.get(name)
+        if state is None:
+            # [last value, mean, variance]
+            self._state[name] = [val, val, 0.0]
+            return False
+
+        last, mean, var = state
+        scale = max(abs(mean), 1e-9)
+        diff = val - mean
+        state[0] = val
+        state[1] = mean + _ALPHA_ * diff
+        state[2] = (1 - _ALPHA_) * (var + _ALPHA_ * diff * diff)
+
+        return abs(val - last) / scale > self.changeLimit or math.sqrt(state[2]) / scale > self.cvLimit
+
+    def update(self, record):
+        """Add one sample (dict of channel values) and return the interval until the next one."""
+        # Every channel is updated, so all baselines stay current
+        active = [self._is_active(name, val) for name, val in self._values(record)]
+        self.stats['samples'] += 1
+
+        if any(active):
+            interval = max(self.interval * self.speedUp, self.minInterval)
+            self.stats['speedUps'] += interval < self.interval
+        else:
+            interval = min(self.interval * self.backOff, self.maxInterval)
+            self.stats['backOffs'] += interval > self.interval
+        self.interval = interval
+
+        return interval
+
+
+class FixedRateScheduler:
+    """Run collection cycles on a fixed-rate timer.
+
+    Each tick submits 'collect(i)' to a thread pool, and a separate
+    consumer thread hands the results to 'consume(i, result)' in tick
+    order. This lets display and persistence of cycle N overlap with
+    collection of cycle N+1. Ticks are scheduled from the start time,
+    not from the end of the previous cycle, so slow cycles do not
+    accumulate drift. 'set_interval()' changes the rate while running,
+    and also applies to the tick that is being waited for.
+
+    Args:
+        interval: Seconds between ticks
+        workers:  Max number of concurrent 'collect()' calls. SpeedTest
+                  runs compete for bandwidth, so this defaults to 1.
+        clock:    Monotonic clock
+    """
+
+    def __init__(self, interval, workers=1, clock=time.monotonic):
+        self.interval = float(interval)
+        self.workers = workers
+        self.clock = clock
+        self.stopEvent = threading.Event()
+        self.stats = {'ticks': 0, 'maxLag': 0.0, 'rate': 0.0}
+        self._wakeEvent = threading.Event()
+
+    def set_interval(self, interval):
+        """Change seconds between ticks. Safe to call from 'consume()' or other threads."""
+        self.interval = float(interval)
+        self._wakeEvent.set()
+
+    def stop(self):
+        """Stop scheduling new ticks. Cycles already started are completed."""
+        self.stopEvent.set()
+        self._wakeEvent.set()
+
+    def run(self, numRuns, collect, consume):
+        """Run collection cycles until done or stopped.
+
+        Args:
+            numRuns: Number of cycles to run. If None, run until 'stop()' is called.
+            collect: Function called as 'collect(i)' on a worker thread
+            consume: Function called as 'consume(i, result)' on the consumer thread
+
+        Returns:
+            Number of cycles started. The effective rate (cycles per minute) is kept in 'stats['rate']'.
+
+        Raises:
+            Any exception raised by 'collect()' or 'consume()'.
+        """
+        pending = queue.Queue()
+        errors = []
+
+        def _consumer():
+            while True:
+                item = pending.get()
+                if item is _STOP_:
+                    return
+
+                try:
+                    consume(item[0], item[1].result())
+                except BaseException as e:
+                    errors.append(e)
+                    # Also wakes the main loop, so errors surface right away and not after the interval
+                    self.stop()
+                    return
+
+        consumer = threading.Thread(target=_consumer, name='scheduler-consumer', daemon=True)
+        consumer.start()
+
+        ticks = range(numRuns) if numRuns is not None else itertools.count()
+        start = due = last = self.clock()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for tick in ticks:
+                    if tick:
+                        # Interval is read again after each wake-up, so changes apply right away
+                        while not self.stopEvent.is_set():
+                            delay = due + self.interval - self.clock()
+                            if delay <= 0:
+                                break
+                            self._wakeEvent.wait(delay)
+                            self._wakeEvent.clear()
+                        due += self.interval
+
+                    # Checked after the wait as well, since a signal handler that calls
+                    # 'stop()' may only run once the wait has timed out.
+                    if self.stopEvent.is_set():
+                        break
+
+                    self.stats['maxLag'] = max(self.stats['maxLag'], self.clock() - due)
+                    self.stats['ticks'] += 1
+                    last = due
+                    pending.put((tick, executor.submit(collect, tick)))
+
+        finally:
+            pending.put(_STOP_)
+            consumer.join()
+
+            if self.stats['ticks'] > 1 and last > start:
+                self.stats['rate'] = 60.0 * (self.stats['ticks'] - 1) / (last - start)
+
+        if errors:
+            raise errors[0]
+
+        return self.stats['ticks']
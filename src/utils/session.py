@@ -0,0 +1,29 @@
+# =========================================================
+#               C O R E   F U N C T I O N S
+# =========================================================
+def new_session(poolSize=1, headers=None):
+    """Create pooled HTTP session.
+
+    The session keeps connections alive between requests, so repeated
+    calls to the same host skip the TCP/TLS handshake. Retries are left
+    to the caller, which knows whether a request is safe to repeat.
+
+    Args:
+        poolSize: Max number of connections kept per host
+        headers:  Optional dict with default headers
+
+    Returns:
+        'requests.Session' object
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=poolSize, max_retries=0)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    if headers:
+        session.headers.update(headers)
+
+    return session
@@ -1,9 +1,15 @@
+import hashlib
+import json
 import os
+import time
 from configparser import ConfigParser, ExtendedInterpolation, Error
+from dataclasses import dataclass, field, fields
+from enum import Enum
+from typing import Mapping
 
 import click
 
-# from .speedtest import get_speed_data
+from .show_data import get_store
 
 _DB_NAME_: str = 'scilab'
 _DB_TABLE_: str = 'SpeedTest'
@@ -11,12 +17,93 @@ _DB_TABLE_: str = 'SpeedTest'
 _CSV_: str = 'csv'
 _JSON_: str = 'json'
 _SQLite_: str = 'sqlite'
+_BINARY_: str = 'binary'
+_INFLUX_: str = 'influx'
 _API_: str = 'api'
 
 _SCTN_DATA_: str = 'data'
 _SCTN_MAIN_: str = 'main'
 _SCTN_ALL_: str = 'all'
 
+_CACHE_SUFFIX_: str = '.cache'
+_CACHE_VERSION_: int = 4
+_CACHE_RACY_: float = 2.0       # seconds. Files changed this close to a hash check are re-hashed.
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class Storage(Enum):
+    CSV = _CSV_
+    JSON = _JSON_
+    SQLITE = _SQLite_
+    BINARY = _BINARY_
+    INFLUX = _INFLUX_
+    API = _API_
+
+
+class OptionMap(Mapping):
+    """Read-only mapping of config options with case-insensitive names (like a config section)."""
+
+    def __init__(self, data=None):
+        self._data = {str(key).lower(): val for key, val in dict(data or {}).items()}
+
+    def __getitem__(self, key):
+        return self._data[str(key).lower()]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return 'OptionMap({!r})'.format(self._data)
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    """Validated application settings with typed values.
+
+    Built once from the config file by 'load_settings()'. 'main' holds all
+    '[main]' options (after interpolation) as strings, in the same shape
+    as a config section, so it can be passed to data store and sensor
+    functions as is.
+    """
+    retain: int = -1
+    history: int = 1
+    sort: str = 'first'
+    count: int = 1
+    sleep: int = 60
+    minsleep: int = 60
+    maxsleep: int = 60
+    threads: str = 'multi'
+    unit: str = 'bits'
+    share: bool = False
+    storage: Storage = None
+    main: Mapping = field(default_factory=dict)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'main', OptionMap(self.main))
+
+    @property
+    def first(self):
+        return self.sort != 'last'
+
+    @property
+    def adaptive(self):
+        """TRUE if wait time between test runs adapts to the data (see 'scheduler.AdaptiveInterval')."""
+        return self.minsleep < self.maxsleep
+
+    def to_dict(self):
+        data = {fld.name: getattr(self, fld.name) for fld in fields(self)}
+        data.update([('storage', self.storage.value), ('main', dict(self.main))])
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**dict(data, storage=Storage(data['storage'])))
+
 
 # =========================================================
 #              H E L P E R   F U N C T I O N S
@@ -34,6 +121,82 @@ def _get_option_val(settings, section, option=None, verify=False):
     return outStr
 
 
+def _new_config():
+    return ConfigParser(interpolation=ExtendedInterpolation(), allow_no_value=True)
+
+
+def _build_snapshot(config):
+    try:
+        main = dict(config[_SCTN_MAIN_])
+        sort = config.get(_SCTN_DATA_, 'sort', fallback='first').lower()
+        threads = config.get(_SCTN_MAIN_, 'threads', fallback='multi').lower()
+
+        sleep = config.getint(_SCTN_MAIN_, 'sleep', fallback=60)
+        maxsleep = config.getint(_SCTN_MAIN_, 'maxsleep', fallback=None)
+        minsleep = config.getint(_SCTN_MAIN_, 'minsleep', fallback=sleep if maxsleep is None else min(sleep, maxsleep))
+        if maxsleep is None:
+            maxsleep = max(sleep, minsleep)
+
+        # 'sleep = 0' runs back to back, but adaptive waits need a shortest wait of 1+ seconds
+        if not 0 <= minsleep <= maxsleep or 0 == minsleep < maxsleep:
+            raise ValueError("Invalid min/max sleep '{}/{}'".format(minsleep, maxsleep))
+        if sort not in ('first', 'last'):
+            raise ValueError("Invalid sort order '{}'".format(sort))
+        if threads not in ('single', 'multi'):
+            raise ValueError("Invalid thread setting '{}'".format(threads))
+
+        # 'API' is a valid choice, but has no data store yet ('remote' uploads still need a local store)
+        storage = Storage(str(main.get('storage')).lower())
+        if storage == Storage.API:
+            raise ValueError("Data storage type '{}' is not yet implemented".format(main.get('storage')))
+
+        return SettingsSnapshot(
+            retain=config.getint(_SCTN_DATA_, 'retain', fallback=-1),
+            history=config.getint(_SCTN_DATA_, 'history', fallback=1),
+            sort=sort,
+            count=config.getint(_SCTN_MAIN_, 'count', fallback=1),
+            sleep=sleep,
+            minsleep=minsleep,
+            maxsleep=maxsleep,
+            threads=threads,
+            unit='bytes' if config.get(_SCTN_MAIN_, 'unit', fallback='bits').lower() == 'bytes' else 'bits',
+            share=config.getboolean(_SCTN_MAIN_, 'share', fallback=False),
+            storage=storage,
+            main=main,
+        )
+    except (Error, ValueError) as e:
+        raise ValueError("Invalid configuration settings!\n{}".format(e))
+
+
+def _cache_name(configFName):
+    return configFName + _CACHE_SUFFIX_
+
+
+def _read_cache(cacheFName):
+    try:
+        with open(cacheFName, 'r') as fh:
+            cache = json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+    return cache if isinstance(cache, dict) and cache.get('version') == _CACHE_VERSION_ else None
+
+
+def _write_cache(cacheFName, cache, mode=0o600):
+    # The cache is only a shortcut, so failing to write it is not an error.
+    # It holds all of '[main]' (incl. any API token), so it is created with
+    # the permissions of the config file instead of the default umask.
+    tmpName = cacheFName + '.tmp'
+    try:
+        if os.path.exists(tmpName):
+            os.remove(tmpName)
+        with os.fdopen(os.open(tmpName, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode), 'w') as fh:
+            json.dump(cache, fh, separators=(',', ':'))
+        os.replace(tmpName, cacheFName)
+    except OSError:
+        pass
+
+
 # ---------------------------------------------------------
 #                  Manage Data Settings
 # ---------------------------------------------------------
@@ -92,6 +255,10 @@ def _validate_data_settings(settings):
 # [<name of test tool section>]
 # count = [1-100]                       - num test cycle runs
 # sleep = [1-60]                        - seconds between each test run
+# minsleep = <seconds>                  - shortest wait between test runs (default: 'sleep')
+# maxsleep = <seconds>                  - longest wait between test runs (default: 'sleep'). If
+#                                         'minsleep' < 'maxsleep', then the wait is shorter while the
+#                                         readings change, and longer while they are stable.
 #
 # threads = single|multi                - run single or multiple threads
 # unit = bits|bytes                     - display speeds in Mbits/s or MB/s
@@ -99,13 +266,21 @@ def _validate_data_settings(settings):
 # location = <some location name>       - name of location where test computer is located
 # locationTZ = <TZ name>                - Time zone at location (e.g. 'America/New York')
 #
-# storage = CSV|JSON|SQLite|API         - data storage type. Note: API not yet implemented.
+# storage = CSV|JSON|SQLite|Binary|Influx|API
+#                                       - data storage type. Note: API not yet implemented.
 #
-# host = <hostname or file path>        - data storage host. If file-based (i.e. CSV, JSON, SQLite),
+# host = <hostname or file path>        - data storage host. If file-based (i.e. CSV, JSON, SQLite, Binary),
 #                                         then this is a path/filename)
 #   Ex:     ~/speedtest.csv
 #           ~/speedtest.json
 #           ~/ntwkmgr.sqlite            - SQLite file can hold several tables
+#           ~/speedtest.bin             - Fixed-width binary records (+ '.strings' file)
+#           http://localhost:8086       - InfluxDB v2.x URL
+#
+# org = <org name>                      - Used for InfluxDB
+# token = <API token>                   - Used for InfluxDB
+# batch = <num records>                 - Used for InfluxDB: max records per write request
+# flush = <seconds>                     - Used for InfluxDB: max time records are buffered
 #
 def _get_main_settings(ctxGlobals):
     defaults = {
@@ -126,6 +301,18 @@ def _get_main_settings(ctxGlobals):
         default='60',
         show_default=True,
     )
+    minsleep = click.prompt(
+        "Enter shortest wait time (in seconds) while readings change:",
+        type=click.IntRange(1, sleep, clamp=True),
+        default=sleep,
+        show_default=True,
+    )
+    maxsleep = click.prompt(
+        "Enter longest wait time (in seconds) while readings are stable:",
+        type=click.IntRange(sleep, 3600, clamp=True),
+        default=sleep,
+        show_default=True,
+    )
 
     threads = click.prompt(
         "Number of threads for SpeedTest",
@@ -156,7 +343,7 @@ def _get_main_settings(ctxGlobals):
 
     storage = click.prompt(
         "Enter data storage type",
-        type=click.Choice(['CSV', 'JSON', 'SQLite', 'API'], case_sensitive=False),
+        type=click.Choice(['CSV', 'JSON', 'SQLite', 'Binary', 'Influx', 'API'], case_sensitive=False),
         default='SQLite',
         show_default=True,
     )
@@ -170,6 +357,12 @@ def _get_main_settings(ctxGlobals):
     elif storage.lower() == _SQLite_:
         settings = _get_main_settings_SQLite(defaults, ctxGlobals)
 
+    elif storage.lower() == _BINARY_:
+        settings = _get_main_settings_Binary(defaults, ctxGlobals)
+
+    elif storage.lower() == _INFLUX_:
+        settings = _get_main_settings_Influx(defaults, ctxGlobals)
+
     # elif storage.lower() == _API_:
     #    settings = _get_main_settings_API(defaults, ctxGlobals)
 
@@ -179,6 +372,8 @@ def _get_main_settings(ctxGlobals):
     settings.update([
         ('count', count),
         ('sleep', sleep),
+        ('minsleep', minsleep),
+        ('maxsleep', maxsleep),
         ('threads', ('multi' if threads.lower() != 'single' else 'single')),
         ('unit', ('bits' if unit.lower() != 'bytes' else 'bytes')),
         ('share', (False if share.lower() != 'yes' else True)),
@@ -231,6 +426,56 @@ def _get_main_settings_SQLite(defaults, ctxGlobals):
     return defaults
 
 
+def _get_main_settings_Binary(defaults, ctxGlobals):
+    host = click.prompt(
+        "Enter path to binary data file",
+        type=click.Path(),
+        default=os.path.join(click.get_app_dir(ctxGlobals['appName']), ctxGlobals['dbTable'].lower() + '.bin'),
+        show_default=True,
+    )
+
+    defaults.update([('host', host)])
+    return defaults
+
+
+def _get_main_settings_Influx(defaults, ctxGlobals):
+    host = click.prompt(
+        "Enter InfluxDB URL (protocol, host, and port)",
+        default='http://localhost:8086',
+        show_default=True,
+    )
+    org = click.prompt("Enter InfluxDB organization name")
+    token = click.prompt("Enter InfluxDB API token", default='', hide_input=True)
+    dbname = click.prompt(
+        "Enter name of InfluxDB bucket",
+        default=ctxGlobals['dbName'],
+        show_default=True,
+    )
+    dbtable = click.prompt(
+        "Enter name of measurement",
+        default=ctxGlobals['dbTable'],
+        show_default=True,
+    )
+    batch = click.prompt(
+        "Enter max number of records per write",
+        type=click.IntRange(1, 5000, clamp=True),
+        default=100,
+        show_default=True,
+    )
+    flush = click.prompt(
+        "Enter max time (in seconds) that records are buffered",
+        type=click.IntRange(0, 3600, clamp=True),
+        default=10,
+        show_default=True,
+    )
+
+    defaults.update([
+        ('host', host), ('org', org), ('token', token), ('dbname', dbname), ('dbtable', dbtable),
+        ('batch', batch), ('flush', flush),
+    ])
+    return defaults
+
+
 def _get_main_settings_API(defaults, ctxGlobals):
     pass
 
@@ -276,11 +521,25 @@ def _verify_datastore(settings):
         return "- Data store not defined in '{}' section".format(_SCTN_MAIN_)
 
     try:
-        get_speed_data(settings[_SCTN_MAIN_], 1, True)
+        elapsed = get_store(settings[_SCTN_MAIN_]).ping()
     except OSError:
         return "- Unable to access data store '{}'".format(settings[_SCTN_MAIN_].get('host'))
 
-    return '- Data store OK!'
+    return '- Data store OK! ({:.1f} ms)'.format(elapsed * 1000)
+
+
+def _verify_epaper(settings):
+    if not settings.has_option(_SCTN_MAIN_, 'epaper'):
+        return "- ePaper device not defined in '{}' section".format(_SCTN_MAIN_)
+
+    from ..displays.pipeline import init_display
+
+    try:
+        init_display(settings[_SCTN_MAIN_]['epaper']).close()
+    except OSError:
+        return "- Unable to access ePaper device '{}'".format(settings[_SCTN_MAIN_]['epaper'])
+
+    return '- ePaper device OK!'
 
 
 # =========================================================
@@ -300,18 +559,12 @@ def isvalid_settings(settings):
     # Need to put in some actual tests here
     #
 
-    if not _validate_wifi_settings(settings):
-        return False
-
     if not _validate_data_settings(settings):
         return False
 
     if not _validate_main_settings(settings):
         return False
 
-    if not _validate_sometest_settings(settings):
-        return False
-
     return True
 
 
@@ -330,7 +583,7 @@ def read_settings(ctxGlobals):
 
     if os.path.exists(ctxGlobals['configFName']):
         try:
-            config = ConfigParser(interpolation=ExtendedInterpolation(), allow_no_value=True)
+            config = _new_config()
             config.read(ctxGlobals['configFName'])
         except Error as e:
             raise ValueError("Invalid configuration settings!\n{}".format(e))
@@ -340,6 +593,74 @@ def read_settings(ctxGlobals):
     return config
 
 
+def load_settings(ctxGlobals):
+    """Load validated settings snapshot with typed values.
+
+    The snapshot is cached in '<config file>.cache', keyed by modification
+    time, size, and SHA-256 hash of the config file. While the file stays
+    unchanged, only a 'stat()' and a small JSON read are needed. The config
+    file is only parsed, interpolated, and validated again after it has
+    changed.
+
+    Args:
+        ctxGlobals: List of misc global values stored in CTX app object
+
+    Returns:
+        SettingsSnapshot object
+
+    Raises:
+        OSError:    If unable to read config file
+        ValueError: If config settings are invalid
+    """
+    configFName = ctxGlobals['configFName']
+    try:
+        stat = os.stat(configFName)
+    except OSError:
+        raise OSError("Config file '{}' does NOT exist or cannot be accessed!".format(configFName))
+
+    cacheFName = _cache_name(configFName)
+    cache = _read_cache(cacheFName)
+
+    # Same mtime and size are only trusted if the file was not changed right
+    # around the time it was hashed, as mtime resolution can be coarse.
+    if (
+        cache is not None
+        and cache.get('mtime') == stat.st_mtime_ns
+        and cache.get('size') == stat.st_size
+        and stat.st_mtime < cache.get('checked', 0) - _CACHE_RACY_
+    ):
+        return SettingsSnapshot.from_dict(cache['settings'])
+
+    with open(configFName, 'rb') as fh:
+        raw = fh.read()
+    digest = hashlib.sha256(raw).hexdigest()
+
+    if cache is not None and cache.get('hash') == digest:
+        snapshot = SettingsSnapshot.from_dict(cache['settings'])
+    else:
+        config = _new_config()
+        try:
+            config.read_string(raw.decode('utf-8'), configFName)
+        except (Error, UnicodeDecodeError) as e:
+            raise ValueError("Invalid configuration settings!\n{}".format(e))
+
+        if not isvalid_settings(config):
+            raise ValueError("Invalid and/or incomplete config info!")
+
+        snapshot = _build_snapshot(config)
+
+    _write_cache(cacheFName, {
+        'version': _CACHE_VERSION_,
+        'mtime': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'hash': digest,
+        'checked': time.time(),
+        'settings': snapshot.to_dict(),
+    }, stat.st_mode & 0o777)
+
+    return snapshot
+
+
 def save_settings(ctxGlobals, section, overwrite=False):
     """Save application settings to config file.
 
@@ -356,7 +677,7 @@ def save_settings(ctxGlobals, section, overwrite=False):
     if not section.lower() in [_SCTN_DATA_, _SCTN_MAIN_, _SCTN_ALL_]:
         raise ValueError("Invalid section '{}'".format(section))
 
-    config = ConfigParser(interpolation=ExtendedInterpolation(), allow_no_value=True)
+    config = _new_config()
 
     if not os.path.exists(ctxGlobals['configFName']):
         path = os.path.dirname(os.path.abspath(ctxGlobals['configFName']))
@@ -414,6 +735,8 @@ def show_settings(ctxGlobals, section, verify=False):
         #
         # count = [1-100]                       - num test cycle runs
         # sleep = [1-60]                        - seconds between each test run
+        # minsleep = <seconds>                  - shortest wait between test runs (default: 'sleep')
+        # maxsleep = <seconds>                  - longest wait between test runs (default: 'sleep')
         #
         # threads = single|multi                - run single or multiple threads
         # unit = bits|bytes                     - display speeds in Mbits/s or MB/s
@@ -421,20 +744,32 @@ def show_settings(ctxGlobals, section, verify=False):
         # location = <some location name>       - name of location where test computer is located
         # locationTZ = <TZ name>                - Time zone at location (e.g. 'America/New York')
         #
-        # storage = CSV|JSON|SQLite|API         - data storage type
+        # storage = CSV|JSON|SQLite|Binary|Influx|API
+        #                                       - data storage type. Note: API not yet implemented.
         #
-        # host = <hostname or file path>        - data storage host. If file-based (i.e. CSV, JSON, SQLite),
+        # host = <hostname or file path>        - data storage host. If file-based (i.e. CSV, JSON, SQLite, Binary),
         #                                         then this is a path/filename)
         #   Ex:     ~/speedtest.csv
         #           ~/speedtest.json
         #           ~/ntwkmgr.sqlite            - SQLite file can hold several tables
+        #           ~/speedtest.bin             - Fixed-width binary records (+ '.strings' file)
         #
         # dbtable = <db table name>             - Used for SQLite
-        # dbname = <db name>                    - Used for SQLite
+        # dbname = <db name>                    - Used for SQLite, and as bucket name for InfluxDB
+        # org = <org name>                      - Used for InfluxDB
+        # batch = <num records>                 - Used for InfluxDB: max records per write request
+        # flush = <seconds>                     - Used for InfluxDB: max time records are buffered
+        #
+        # epaper = sensehat|<PNG file path>     - display device for '--display epaper'
+        # joystick = <event device path>       - joystick for 'browse' (default: find SenseHat joystick)
+        # remote = <URL>                        - also upload records to this URL (via outbox)
+        # outbox = <file path>                  - outbox for remote uploads (default: '<host>.outbox')
         #
         click.echo("SpeedTest Settings")
         click.echo("  Test Run Count:   {}".format(_get_option_val(settings, _SCTN_MAIN_, 'count', verify)))
         click.echo("  Sleep/Wait Time:  {}".format(_get_option_val(settings, _SCTN_MAIN_, 'sleep', verify)))
+        click.echo("  Min Sleep Time:   {}".format(_get_option_val(settings, _SCTN_MAIN_, 'minsleep')))
+        click.echo("  Max Sleep Time:   {}".format(_get_option_val(settings, _SCTN_MAIN_, 'maxsleep')))
         click.echo("  Threads:          {}".format(_get_option_val(settings, _SCTN_MAIN_, 'threads', verify)))
         click.echo("  Speed Rate Unit:  {}".format(_get_option_val(settings, _SCTN_MAIN_, 'unit', verify)))
         click.echo("  Share Results:    {}".format(_get_option_val(settings, _SCTN_MAIN_, 'share', verify)))
@@ -444,6 +779,12 @@ def show_settings(ctxGlobals, section, verify=False):
         click.echo("  DB Host:          {}".format(_get_option_val(settings, _SCTN_MAIN_, 'host', verify)))
         click.echo("  DB Table:         {}".format(_get_option_val(settings, _SCTN_MAIN_, 'dbtable', verify)))
         click.echo("  DB Name:          {}".format(_get_option_val(settings, _SCTN_MAIN_, 'dbname', verify)))
+        click.echo("  DB Org:           {}".format(_get_option_val(settings, _SCTN_MAIN_, 'org', verify)))
+        click.echo("  DB Batch Size:    {}".format(_get_option_val(settings, _SCTN_MAIN_, 'batch', verify)))
+        click.echo("  DB Flush (sec):   {}".format(_get_option_val(settings, _SCTN_MAIN_, 'flush', verify)))
+        click.echo("  ePaper Device:    {}".format(_get_option_val(settings, _SCTN_MAIN_, 'epaper', verify)))
+        click.echo("  Joystick Device:  {}".format(_get_option_val(settings, _SCTN_MAIN_, 'joystick')))
+        click.echo("  Remote Upload:    {}".format(_get_option_val(settings, _SCTN_MAIN_, 'remote', verify)))
 
     if verify:
         #
@@ -452,7 +793,7 @@ def show_settings(ctxGlobals, section, verify=False):
         #  - Data store access
         #
         click.echo("\n--- [General Requirements] ----")
-        click.echo("ePaper Support:\n{}".format(_verify_epaper()))
+        click.echo("ePaper Support:\n{}".format(_verify_epaper(settings)))
         click.echo("Datastore Access:\n{}".format(_verify_datastore(settings)))
 
     click.echo("\n-------------------------------")
@@ -1,8 +1,18 @@
 # =========================================================
 #             G E N E R I C   F U N C T I O N S
 # =========================================================
-def show_current():
-    pass
+def show_current(display, data, unit='bits'):
+    """Show current data record on display.
+
+    Args:
+        display: Display pipeline (see 'displays.pipeline.init_display()')
+        data:    Data record (as dict)
+        unit:    MB/s if 'bytes', else Mbit/s
+
+    Returns:
+        List of '(x, y, w, h)' display regions that were updated
+    """
+    return display.show(data, unit)
 
 
 def show_history():
@@ -18,23 +28,40 @@ _DB_FLDS_ = {
     'csv': {'timestamp': None, 'location': None, 'locationTZ': None, 'ping': None, 'download': None, 'upload': None},
     'json': {'timestamp': None, 'location': None, 'locationTZ': None, 'ping': None, 'download': None, 'upload': None},
     'sql': {'timestamp': 'TEXT|idx', 'location': 'TEXT|idx', 'locationTZ': 'TEXT|idx', 'ping': 'REAL',
-            'download': 'REAL', 'upload': 'REAL'}
+            'download': 'REAL', 'upload': 'REAL'},
+    'influx': {'timestamp': 'time', 'location': 'tag', 'locationTZ': 'tag', 'ping': 'field', 'download': 'field',
+               'upload': 'field'},
+    'binary': {'timestamp': 'time', 'location': 'str', 'locationTZ': 'str', 'ping': 'real', 'download': 'real',
+               'upload': 'real'},
 }
 
 
 # =========================================================
 #                D A T A   F U N C T I O N S
 # =========================================================
-def get_speed_data(settings, numRecs, first=True):
+def get_store(settings):
+    """Return shared data store for data store settings (see 'datastore.registry.open_store()').
+
+    Raises:
+        OSError: If data store is not supported.
+    """
+    from .datastore.registry import open_store
+    return open_store(settings, _DB_FLDS_)
+
+
+def get_speed_data(settings, numRecs, first=True, since=None, until=None):
     """Retrieve SpeedTest data records from preferred data store as defined in application settings.
 
     Args:
         settings: List with data store settings
         numRecs:  Number of records to retrieve
-                  NOTE: for InfluxDB v2.x this represents last X hours
+                  NOTE: for InfluxDB v2.x this represents last X hours, unless a time range is given
 
         first:    If TRUE, retrieve first 'numRec' records, else retrieve last 'numRec' records
-                  NOTE: this is not used for InfluxDB v2.x
+                  NOTE: this is not used for InfluxDB v2.x, unless a time range is given
+
+        since:    Only records at or after this time (ISO 8601 string or Unix epoch). None = no lower bound.
+        until:    Only records before this time. None = no upper bound.
 
     Returns:
         List of data records
@@ -42,18 +69,25 @@ def get_speed_data(settings, numRecs, first=True):
     Raises:
         OSError: If data store is not supported and/or cannot be accessed.
     """
+    return get_store(settings).query_range(numRecs, first, since, until)
+
 
-    if settings.get('storage').lower() == 'csv':
-        from .datastore.csv import get_data
-        return get_data(settings.get('host'), _DB_FLDS_['raw'], numRecs, first)
+def get_speed_rollups(settings, resolution, numRecs, first=True, since=None, until=None):
+    """Retrieve SpeedTest rollups (min/max/mean/count per bucket) from preferred data store.
 
-    elif settings.get('storage').lower() == 'json':
-        from .datastore.json import get_data
-        return get_data(settings.get('host'), _DB_FLDS_['raw'], numRecs, first)
+    Args:
+        settings:   List with data store settings
+        resolution: Bucket size: '1m', '1h', or '1d'
+        numRecs:    Number of buckets to retrieve
+        first:      If TRUE, retrieve first 'numRec' buckets, else retrieve last 'numRec' buckets
+        since:      Only buckets that start at or after this time. None = no lower bound.
+        until:      Only buckets that start before this time. None = no upper bound.
 
-    elif settings.get('storage').lower() == 'sqlite':
-        from .datastore.sqlite import get_data
-        return get_data(settings.get('host'), _DB_FLDS_['raw'], settings.get('dbtable'), _DB_ORDER_, numRecs, first)
+    Returns:
+        List of rollup records with mean values under the usual field names
 
-    else:
-        raise OSError("Data storage type '{}' is not supported!".format(str(settings.get('storage'))))
+    Raises:
+        ValueError: If resolution is unknown.
+        OSError:    If data store is not supported and/or cannot be accessed.
+    """
+    return get_store(settings).query_rollup(resolution, numRecs, first, since, until)
@@ -0,0 +1,299 @@
+import bisect
+import math
+
+_CHUNK_SIZE_: int = 1000
+_QUANTILES_ = (0.5, 0.95, 0.99)
+_EXACT_SIZE_: int = 1000
+_SPEED_FLDS_ = ('ping', 'download', 'upload')
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def _is_number(val):
+    return val is not None and not (isinstance(val, float) and math.isnan(val))
+
+
+def _exact_quantile(values, prob):
+    """Quantile of sorted list w linear interpolation between closest ranks."""
+    pos = prob * (len(values) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class RunningStats:
+    """Count, min, max, mean, and variance of a stream of numbers in constant memory.
+
+    Single values are added with Welford's algorithm. Whole chunks are
+    summarized on their own and merged in (Chan et al.), which is both
+    faster in Python and just as numerically stable.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.min = None
+        self.max = None
+        self._m2 = 0.0
+
+    def add(self, val):
+        self.count += 1
+        delta = val - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (val - self.mean)
+
+        if self.min is None or val < self.min:
+            self.min = val
+        if self.max is None or val > self.max:
+            self.max = val
+
+    def update(self, values):
+        """Add list of numbers (no 'None' or NaN values)."""
+        if not values:
+            return
+
+        chunk = RunningStats()
+        chunk.count = len(values)
+        chunk.mean = math.fsum(values) / chunk.count
+        chunk._m2 = math.fsum((val - chunk.mean) ** 2 for val in values)
+        chunk.min = min(values)
+        chunk.max = max(values)
+
+        self.merge(chunk)
+
+    def merge(self, other):
+        """Combine with stats from another stream."""
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean, self._m2, self.min, self.max = \
+                other.count, other.mean, other._m2, other.min, other.max
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self):
+        """Sample variance. None if less than 2 values."""
+        return self._m2 / (self.count - 1) if self.count > 1 else None
+
+    @property
+    def stdev(self):
+        variance = self.variance
+        return math.sqrt(variance) if variance is not None else None
+
+
+class P2Quantiles:
+    """Estimate quantiles of a stream of numbers in constant memory.
+
+    This is the P² algorithm (Jain & Chlamtac), extended to track several
+    quantiles with one shared set of 2m + 3 markers. Marker heights are
+    adjusted with piecewise-parabolic interpolation as values arrive, and
+    no values are kept.
+
+    The first 'exactSize' values are kept in a sorted list instead, so
+    results for small streams are exact, and the markers start out at
+    their proper positions once the list is full.
+
+    Args:
+        probs:     Sequence of probabilities (0 < p < 1)
+        exactSize: Max number of values to keep before switching to estimates
+
+    Raises:
+        ValueError: If a probability is out of range.
+    """
+
+    def __init__(self, probs=_QUANTILES_, exactSize=_EXACT_SIZE_):
+        probs = tuple(sorted(set(probs)))
+        if not probs or probs[0] <= 0 or probs[-1] >= 1:
+            raise ValueError("Invalid quantile(s) '{}'! Must be between 0 and 1".format(probs))
+
+        # Marker at each quantile, halfway between neighbouring quantiles, and at min/max
+        marks = [0.0]
+        for prev, prob in zip((0.0,) + probs, probs):
+            marks.extend([(prev + prob) / 2, prob])
+        marks.extend([(probs[-1] + 1) / 2, 1.0])
+
+        self.probs = probs
+        self.count = 0
+        self.exactSize = max(exactSize, len(marks))
+        self._incr = marks
+        self._marker = {prob: 2 * idx + 2 for idx, prob in enumerate(probs)}
+        self._heights = []
+        self._pos = None
+
+    def _init_markers(self):
+        values = self._heights
+        last = len(self._incr) - 1
+        n = [int(round(1 + (self.count - 1) * incr)) for incr in self._incr]
+
+        # Positions must be strictly increasing, from first to last value
+        n[0], n[last] = 1, self.count
+        for i in range(1, last):
+            n[i] = max(n[i], n[i - 1] + 1)
+        for i in range(last - 1, 0, -1):
+            n[i] = min(n[i], n[i + 1] - 1)
+
+        self._heights = [values[pos - 1] for pos in n]
+        self._pos = n
+
+    def add(self, val):
+        q = self._heights
+        self.count += 1
+
+        if self._pos is None:
+            bisect.insort(q, val)
+            if self.count == self.exactSize:
+                self._init_markers()
+            return
+
+        n = self._pos
+        last = len(q) - 1
+
+        if val < q[0]:
+            q[0] = val
+            k = 0
+        elif val >= q[last]:
+            q[last] = val
+            k = last - 1
+        else:
+            k = bisect.bisect_right(q, val) - 1
+
+        for i in range(k + 1, last + 1):
+            n[i] += 1
+
+        # Move inner markers that are off their desired position by one or more
+        scale = self.count - 1
+        for i in range(1, last):
+            d = 1 + scale * self._incr[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                qi = q[i]
+                height = qi + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - qi) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (qi - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < height < q[i + 1]:
+                    height = qi + d * (q[i + d] - qi) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def update(self, values):
+        for val in values:
+            self.add(val)
+
+    def quantile(self, prob):
+        """Estimated quantile for given probability. None if no values.
+
+        Raises:
+            ValueError: If probability is not tracked.
+        """
+        if prob not in self._marker:
+            raise ValueError("Quantile '{}' is not tracked".format(prob))
+
+        if not self.count:
+            return None
+        if self._pos is None:
+            return _exact_quantile(self._heights, prob)
+
+        return self._heights[self._marker[prob]]
+
+
+class FieldStats:
+    """Streaming summary (count, min, max, mean, stdev, and quantiles) of one data field.
+
+    Missing values ('None' and NaN) are skipped.
+
+    Args:
+        quantiles: Sequence of probabilities to estimate quantiles for
+    """
+
+    def __init__(self, quantiles=_QUANTILES_):
+        self.stats = RunningStats()
+        self.quantiles = P2Quantiles(quantiles)
+
+    def add(self, val):
+        if _is_number(val):
+            self.stats.add(val)
+            self.quantiles.add(val)
+
+    def update(self, values):
+        values = [float(val) for val in values if _is_number(val)]
+        self.stats.update(values)
+        self.quantiles.update(values)
+
+    def summary(self):
+        """Return dict with 'count', 'min', 'max', 'mean', 'stdev', and 'p50', 'p95', etc."""
+        stats = self.stats
+        out = {
+            'count': stats.count,
+            'min': stats.min,
+            'max': stats.max,
+            'mean': stats.mean if stats.count else None,
+            'stdev': stats.stdev,
+        }
+        for prob in self.quantiles.probs:
+            out['p{:g}'.format(prob * 100)] = self.quantiles.quantile(prob)
+
+        return out
+
+
+# =========================================================
+#                D A T A   F U N C T I O N S
+# =========================================================
+def aggregate(chunks, fields, quantiles=_QUANTILES_):
+    """Summarize numeric fields in a stream of data record chunks in a single pass.
+
+    Works with any iterator that yields lists of data records (as dicts),
+    such as 'DataStore.iter_range()'. Only one chunk is held in memory at
+    a time, and the summary itself has a fixed size.
+
+    Args:
+        chunks:    Iterator w lists of data records
+        fields:    Sequence of field names to summarize
+        quantiles: Sequence of probabilities to estimate quantiles for
+
+    Returns:
+        Dict with field names as keys and 'FieldStats' as values
+    """
+    out = {name: FieldStats(quantiles) for name in fields}
+
+    for chunk in chunks:
+        for name, fldStats in out.items():
+            fldStats.update([row.get(name) for row in chunk])
+
+    return out
+
+
+def get_speed_stats(settings, since=None, until=None, quantiles=_QUANTILES_, chunkSize=_CHUNK_SIZE_):
+    """Summarize SpeedTest records in time range from preferred data store.
+
+    Args:
+        settings:  List with data store settings
+        since:     Start of time range (ISO 8601 string or Unix epoch). None = no lower bound.
+        until:     End of time range (exclusive). None = no upper bound.
+        quantiles: Sequence of probabilities to estimate quantiles for
+        chunkSize: Max number of records per chunk
+
+    Returns:
+        Dict with 'ping', 'download', and 'upload' as keys and summary dicts as values (see 'FieldStats.summary()')
+
+    Raises:
+        OSError: If data store is not supported and/or cannot be accessed.
+    """
+    from .export_data import iter_speed_data
+
+    stats = aggregate(iter_speed_data(settings, since, until, chunkSize), _SPEED_FLDS_, quantiles)
+
+    return {name: fldStats.summary() for name, fldStats in stats.items()}
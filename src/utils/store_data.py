@@ -1,6 +1,157 @@
-def save_to_sqlite():
-    pass
+from .show_data import _DB_FLDS_, get_store
 
 
-def upload_to_remote():
-    pass
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def _open_uploader(settings):
+    from .datastore.outbox import Outbox, outbox_name
+    from .uploader import Uploader
+
+    return Uploader(Outbox(outbox_name(settings)), settings.get('remote'))
+
+
+# =========================================================
+#                D A T A   F U N C T I O N S
+# =========================================================
+def save_to_sqlite(settings, data):
+    """Save data records to SQLite data store.
+
+    Args:
+        settings: List with data store settings
+        data:     List of data records
+
+    Returns:
+        Number of records saved
+    """
+    from .datastore.sqlite import save_data
+    return save_data(settings.get('host'), _DB_FLDS_['sql'], settings.get('dbtable'), data)
+
+
+def open_speed_writer(settings):
+    """Open writer for preferred data store as defined in application settings.
+
+    The writer is the shared data store for these settings (see
+    'show_data.get_store()'), so file-based data stores append through one
+    buffered handle. Closing it only releases the handles, and the store
+    opens them again on next use.
+
+    If '[main] remote' is set, records are also queued in an outbox and
+    uploaded to that URL in the background (see 'upload_to_remote()').
+
+    Args:
+        settings: List with data store settings
+
+    Returns:
+        Writer object with 'write(data)', 'flush()', 'compact()', and 'close()' methods
+
+    Raises:
+        OSError: If data store is not supported and/or cannot be accessed.
+    """
+
+    writer = get_store(settings).open()
+    if not settings.get('remote'):
+        return writer
+
+    from .uploader import RemoteWriter
+
+    try:
+        return RemoteWriter(writer, _open_uploader(settings))
+    except OSError:
+        writer.close()
+        raise
+
+
+def open_speed_detector(settings):
+    """Return anomaly detector for SpeedTest records in preferred data store (see 'DataStore.detector()').
+
+    Use 'tag(record)' on each new record before it is saved, and the tags
+    are saved next to the record.
+
+    Args:
+        settings: List with data store settings
+
+    Returns:
+        'anomaly_data.AnomalyDetector' object
+
+    Raises:
+        OSError: If data store is not supported and/or anomalies cannot be accessed.
+    """
+
+    return get_store(settings).detector()
+
+
+def save_speed_data(settings, data):
+    """Save SpeedTest data records to preferred data store as defined in application settings.
+
+    Args:
+        settings: List with data store settings
+        data:     List of data records
+
+    Returns:
+        Number of records saved
+
+    Raises:
+        OSError: If data store is not supported and/or cannot be accessed.
+    """
+
+    with open_speed_writer(settings) as writer:
+        return writer.write(data)
+
+
+def compact_speed_data(settings, retain, slack=0.0):
+    """Remove oldest SpeedTest data records so that at most 'retain' records are left.
+
+    Args:
+        settings: List with data store settings
+        retain:   Max number of records to keep. -1 = keep all, 0 = keep none
+        slack:    Fraction of 'retain' that file-based stores may accumulate before
+                  they are trimmed. Keeps the amortized cost of each trim proportional
+                  to the number of records removed.
+
+    Returns:
+        Number of records removed
+
+    Raises:
+        OSError: If data store is not supported and/or cannot be accessed.
+    """
+
+    return get_store(settings).compact(retain, slack)
+
+
+def upload_to_remote(settings, data=None):
+    """Queue data records for upload and send everything in the outbox to remote URL.
+
+    Records stay in the outbox (next to the data store file unless
+    '[main] outbox' is set) until the remote end has accepted them, so
+    nothing is lost while the network is down.
+
+    Args:
+        settings: List with data store settings incl. 'remote' URL
+        data:     Optional list of data records to queue first
+
+    Returns:
+        Tuple with number of records uploaded and number of records left in outbox
+
+    Raises:
+        OSError: If outbox cannot be accessed, or if no records could be uploaded.
+    """
+    if not settings.get('remote'):
+        raise OSError("Remote upload URL is not defined!")
+
+    uploader = _open_uploader(settings)
+
+    try:
+        if data:
+            uploader.outbox.append(data)
+
+        uploaded = uploader.drain()
+        remaining = len(uploader.outbox)
+
+    finally:
+        uploader.outbox.close()
+
+    if uploader.lastError is not None and not uploaded:
+        raise uploader.lastError
+
+    return uploaded, remaining
@@ -0,0 +1,85 @@
+import re
+from functools import lru_cache
+
+_TZ_CACHE_SIZE_: int = 64
+_MINUTE_CACHE_SIZE_: int = 4096
+_MINUTE_LEN_: int = 16                  # 'YYYY-MM-DDTHH:MM'
+_TZ_SUFFIX_ = re.compile(r'(Z|[+-]\d{2}(:?\d{2})?)$')
+
+
+# =========================================================
+#              H E L P E R   F U N C T I O N S
+# =========================================================
+def _minute_key(timestamp):
+    """Strip seconds from ISO timestamp, but keep UTC offset.
+
+    '2020-07-15T17:08:55.735084Z' -> '2020-07-15T17:08Z'
+
+    Timestamps in other layouts are returned as-is.
+    """
+    if len(timestamp) <= _MINUTE_LEN_ or timestamp[_MINUTE_LEN_] != ':':
+        return timestamp
+
+    found = _TZ_SUFFIX_.search(timestamp, _MINUTE_LEN_)
+    return timestamp[:_MINUTE_LEN_] + (found.group(0) if found else '')
+
+
+@lru_cache(maxsize=_MINUTE_CACHE_SIZE_)
+def _format_minute(minuteStamp, tzName, fmtStr):
+    from dateutil import parser
+
+    dateOrig = parser.isoparse(minuteStamp)
+    dateFinal = dateOrig if not tzName else dateOrig.astimezone(get_timezone(tzName))
+    return dateFinal.strftime(fmtStr)
+
+
+# =========================================================
+#                C O R E   F U N C T I O N S
+# =========================================================
+@lru_cache(maxsize=_TZ_CACHE_SIZE_)
+def get_timezone(tzName):
+    """Get (cached) 'pytz' timezone object.
+
+    Args:
+        tzName: Timezone name (e.g. 'America/New_York')
+
+    Returns:
+        Timezone object
+
+    Raises:
+        pytz.UnknownTimeZoneError: If timezone name is not valid.
+    """
+    import pytz
+
+    return pytz.timezone(tzName)
+
+
+def format_minute(timestamp, tzName=None, fmtStr='%m/%d/%y %H:%M'):
+    """Convert ISO timestamp to local date/time string with minute resolution.
+
+    Results are memoized on the timestamp truncated to the minute, so all
+    records taken within the same minute share a single parse and
+    timezone conversion. 'fmtStr' must therefore not include seconds.
+
+    Args:
+        timestamp: ISO 8601 timestamp string
+        tzName:    Timezone name. If None, keep timestamp UTC offset.
+        fmtStr:    Date/time format string (minute resolution)
+
+    Returns:
+        Formatted date/time string
+
+    Raises:
+        ValueError: If timestamp cannot be parsed.
+    """
+    return _format_minute(_minute_key(timestamp), tzName or None, fmtStr)
+
+
+def cache_info():
+    """Return cache statistics as dict with 'timezone' and 'minute' entries."""
+    return {'timezone': get_timezone.cache_info(), 'minute': _format_minute.cache_info()}
+
+
+def cache_clear():
+    get_timezone.cache_clear()
+    _format_minute.cache_clear()
@@ -0,0 +1,276 @@
+import gzip
+import hashlib
+import json
+import random
+import threading
+
+_BATCH_SIZE_: int = 100
+_TIMEOUT_: float = 10.0         # seconds per request
+_INTERVAL_: float = 60.0        # seconds between checks when idle
+_BACKOFF_: float = 2.0          # first retry delay (seconds)
+_MAX_BACKOFF_: float = 900.0    # max retry delay (seconds)
+_OK_STATUS_ = (409,)            # 409 = batch already received (duplicate idempotency key)
+
+
+# =========================================================
+#                H E L P E R   C L A S S E S
+# =========================================================
+class Uploader:
+    """Upload queued records from an outbox to a remote HTTP endpoint.
+
+    Records are sent in batches as one gzip-compressed JSON POST over a
+    pooled 'requests.Session'. Each batch carries an 'Idempotency-Key'
+    header derived from the keys of its records, so a retry after a lost
+    response can be recognized by the server. Records are removed from
+    the outbox only after the server has accepted them.
+
+    After a failed upload, retries back off exponentially (with jitter)
+    up to 'maxBackoff' seconds, or longer if the server asks for it with
+    'Retry-After'.
+
+    Args:
+        outbox:     'datastore.outbox.Outbox' object
+        url:        Upload URL
+        batchSize:  Max number of records per request
+        timeout:    Request timeout in seconds
+        interval:   Seconds between outbox checks when idle (background mode)
+        backoff:    First retry delay in seconds
+        maxBackoff: Max retry delay in seconds
+        session:    Optional 'requests.Session' (or compatible) object
+    """
+
+    def __init__(self, outbox, url, batchSize=_BATCH_SIZE_, timeout=_TIMEOUT_, interval=_INTERVAL_,
+                 backoff=_BACKOFF_, maxBackoff=_MAX_BACKOFF_, session=None):
+        self.outbox = outbox
+        self.url = url
+        self.batchSize = max(int(batchSize), 1)
+        self.timeout = timeout
+        self.interval = interval
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+        self.session = session
+
+        self.failures = 0               # consecutive failed uploads
+        self.retryAfter = 0.0
+        self.lastError = None
+        self.stats = {'uploaded': 0, 'requests': 0, 'failures': 0, 'bytes': 0}
+
+        self._wakeEvent = threading.Event()
+        self._stopEvent = threading.Event()
+        self._thread = None
+
+    def _get_session(self):
+        if self.session is None:
+            from .session import new_session
+
+            # One keep-alive connection is all a single uploader needs
+            self.session = new_session()
+
+        return self.session
+
+    @staticmethod
+    def batch_key(keys):
+        return hashlib.sha256('\n'.join(keys).encode('utf-8')).hexdigest()
+
+    def upload_batch(self):
+        """Upload oldest batch from outbox.
+
+        Returns:
+            Number of records uploaded. 0 if outbox is empty.
+
+        Raises:
+            OSError: If upload failed.
+        """
+        rows = self.outbox.peek(self.batchSize)
+        if not rows:
+            return 0
+
+        body = gzip.compress(json.dumps(
+            {'records': [dict(record, _key=key) for _, key, record in rows]},
+            separators=(',', ':'),
+        ).encode('utf-8'))
+        headers = {
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip',
+            'Idempotency-Key': self.batch_key([key for _, key, _ in rows]),
+        }
+
+        session = self._get_session()
+        self.stats['requests'] += 1
+        self.stats['bytes'] += len(body)
+
+        try:
+            resp = session.post(self.url, data=body, headers=headers, timeout=self.timeout)
+        except Exception as e:
+            raise OSError("Unable to upload to '{}'!\n{}".format(self.url, e))
+
+        if not (200 <= resp.status_code < 300 or resp.status_code in _OK_STATUS_):
+            try:
+                self.retryAfter = float(resp.headers.get('Retry-After', 0))
+            except ValueError:
+                self.retryAfter = 0.0
+            raise OSError("Upload to '{}' failed with HTTP status {}!".format(self.url, resp.status_code))
+
+        self.outbox.ack([rowId for rowId, _, _ in rows])
+        self.stats['uploaded'] += len(rows)
+        return len(rows)
+
+    def drain(self, maxBatches=None):
+        """Upload batches until outbox is empty or an upload fails.
+
+        Errors are not raised, but counted in 'failures' and kept in 'lastError'.
+
+        Args:
+            maxBatches: Max number of batches to upload. If None, no limit.
+
+        Returns:
+            Number of records uploaded
+        """
+        uploaded = 0
+        batches = 0
+
+        while maxBatches is None or batches < maxBatches:
+            try:
+                num = self.upload_batch()
+            except OSError as e:
+                self.failures += 1
+                self.stats['failures'] += 1
+                self.lastError = e
+                break
+
+            self.failures = 0
+            self.retryAfter = 0.0
+            if not num:
+                break
+
+            uploaded += num
+            batches += 1
+
+        return uploaded
+
+    def next_delay(self):
+        """Seconds to wait before next attempt. 0 if last attempt succeeded."""
+        if not self.failures:
+            return 0.0
+
+        delay = min(self.maxBackoff, self.backoff * 2 ** (self.failures - 1))
+        # 'Equal jitter' keeps at least half the delay, but spreads out stations that failed together
+        return max(delay * random.uniform(0.5, 1.0), self.retryAfter)
+
+    def notify(self):
+        """Wake up background uploader (e.g. after new records were queued)."""
+        self._wakeEvent.set()
+
+    def start(self):
+        """Start uploading in background thread."""
+        self._stopEvent.clear()
+        self._thread = threading.Thread(target=self._run, name='uploader', daemon=True)
+        self._thread.start()
+
+    def stop(self, drain=True):
+        """Stop background thread.
+
+        Args:
+            drain: If TRUE, make one more attempt to empty the outbox, unless
+                   the uploader is backing off from a failed upload.
+
+        Returns:
+            Number of records still in outbox
+        """
+        if self._thread is not None:
+            self._stopEvent.set()
+            self._wakeEvent.set()
+            self._thread.join()
+            self._thread = None
+
+        if drain and not self.failures:
+            self.drain()
+
+        return len(self.outbox)
+
+    def _run(self):
+        while not self._stopEvent.is_set():
+            self.drain()
+
+            if self.failures:
+                # New records should not cut a backoff short, so only 'stop()' can end this wait
+                self._stopEvent.wait(self.next_delay())
+            else:
+                self._wakeEvent.wait(self.interval)
+                self._wakeEvent.clear()
+
+
+class RemoteWriter:
+    """Data store writer that also queues each record for remote upload.
+
+    Wraps a regular data store writer. Records are written to the local
+    data store first and then to the outbox, and a background uploader
+    sends them on when the network is available.
+
+    Records that were saved locally but could not be queued are kept in
+    'pending' and queued again with the next write or flush, so callers
+    that retry a failed 'write()' never save records twice. 'queueError'
+    holds the last outbox error, and is None once everything is queued.
+
+    Args:
+        writer:   Data store writer (see 'store_data.open_speed_writer()')
+        uploader: Uploader object
+    """
+
+    def __init__(self, writer, uploader):
+        self.writer = writer
+        self.uploader = uploader
+        self.pending = []
+        self.queueError = None
+        self.uploader.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _queue(self):
+        if not self.pending:
+            return
+
+        try:
+            self.uploader.outbox.append(self.pending)
+        except OSError as e:
+            self.queueError = e
+            return
+
+        self.pending = []
+        self.queueError = None
+        self.uploader.notify()
+
+    def write(self, data):
+        """Save records to local data store and queue them for upload.
+
+        Returns:
+            Number of records saved locally. Check 'queueError' to see if they were also queued.
+
+        Raises:
+            OSError: If records could not be saved locally. Nothing is queued then.
+        """
+        num = self.writer.write(data)
+        self.pending.extend(data)
+        self._queue()
+        return num
+
+    def flush(self):
+        self.writer.flush()
+        self._queue()
+
+    def compact(self, retain, slack=0.0):
+        return self.writer.compact(retain, slack)
+
+    def close(self):
+        try:
+            self._queue()
+            self.writer.close()
+        finally:
+            try:
+                self.uploader.stop()
+            finally:
+                self.uploader.outbox.close()
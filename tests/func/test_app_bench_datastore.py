@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+
+"""Smoke tests for the data store benchmark harness."""
+
+import json
+
+import pytest
+
+from benchmarks.bench_datastore import bench_datastore, generate_records, parse_scale, _BACKENDS_
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+@pytest.mark.parametrize('scale, expected', [('10k', 10000), ('1M', 1000000), ('10m', 10000000), ('500', 500)])
+def test_parse_scale(scale, expected):
+    assert parse_scale(scale) == expected
+
+
+def test_generate_records():
+    batches = list(generate_records(25, 10))
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert batches[0][0]['timestamp'] == '2020-01-01T00:00:00.000000Z'
+    assert batches[0][1]['timestamp'] == '2020-01-01T00:01:00.000000Z'
+    assert list(generate_records(25, 10)) == batches
+
+
+def test_bench_datastore():
+    report = bench_datastore(['200'], batchSize=50, isolate=False)
+    assert json.loads(json.dumps(report)) == report
+
+    assert [result['backend'] for result in report['results']] == list(_BACKENDS_)
+    for result in report['results']:
+        assert result['records'] == 200
+        assert result['appendPerSec'] > 0
+        assert result['diskBytes'] > 0
+        assert set(result['latency']) == {'first1Ms', 'last1Ms', 'first100Ms', 'last100Ms'}
+
+
+def test_bench_datastore_isolated():
+    report = bench_datastore(['100'], ['sqlite'], isolate=True)
+
+    assert report['results'][0]['backend'] == 'sqlite'
+    assert report['results'][0]['peakRssKB'] > 0
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+"""CliRunner Tests for BROWSE command and arguments."""
+
+import os
+import threading
+import time
+
+import pytest
+
+from click.testing import CliRunner
+
+from src import cli
+from src.sensors.joystick import pack_event
+from src.utils.show_data import get_speed_data
+from src.utils.store_data import save_speed_data
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+def _make_record(i):
+    return {'timestamp': '2020-07-15T17:08:{:02d}.000000Z'.format(i), 'ping': float(i), 'download': 1000000.0,
+            'upload': 1000000.0}
+
+
+def _press(path, directions):
+    # Opening the write end blocks until the command opens the device
+    with open(path, 'wb', buffering=0) as fh:
+        for i, direction in enumerate(directions):
+            time.sleep(0.02)
+            fh.write(pack_event(direction, 'pressed', i) + pack_event(direction, 'released', i + 0.5))
+        time.sleep(0.2)
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+@pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason='Requires named pipes')
+def test_cli_cmd_BROWSE(new_config_file, tmpdir, monkeypatch):
+    """Test CLI 'BROWSE' command pages through records and runs speed tests on demand."""
+    settings = {'storage': 'CSV', 'host': str(tmpdir.join('test.csv'))}
+    save_speed_data(settings, [_make_record(i) for i in range(3)])
+
+    device = str(tmpdir.join('event0'))
+    os.mkfifo(device)
+    displayFile = tmpdir.join('epaper.png')
+    with open(new_config_file, 'w') as fh:
+        fh.write("[main]\nstorage = CSV\nhost = {}\nepaper = {}\njoystick = {}\n".format(
+            settings['host'], displayFile, device))
+
+    monkeypatch.setattr(cli, 'run_speedtest', lambda settings: _make_record(10))
+    writer = threading.Thread(target=_press, args=(device, ['left', 'left', 'right', 'middle']))
+    writer.start()
+
+    result = CliRunner().invoke(cli.main, args=['--ini', new_config_file, 'browse', '--count', '2'])
+    writer.join()
+
+    assert result.exit_code == 0
+    assert '-- Joystick closed: 4 event(s), 1 new speed test(s) --' in result.output
+    assert displayFile.read_binary()[:8] == b'\x89PNG\r\n\x1a\n'
+    assert [row['ping'] for row in get_speed_data(settings, 10)] == [0.0, 1.0, 2.0, 10.0]
+
+
+def test_cli_cmd_BROWSE_invalid_device(new_config_file, tmpdir):
+    """Test CLI 'BROWSE' command w missing joystick device."""
+    with open(new_config_file, 'w') as fh:
+        fh.write("[main]\nstorage = CSV\nhost = {}\nepaper = {}\n".format(
+            tmpdir.join('test.csv'), tmpdir.join('epaper.png')))
+    save_speed_data({'storage': 'CSV', 'host': str(tmpdir.join('test.csv'))}, [_make_record(1)])
+
+    result = CliRunner().invoke(
+        cli.main, args=['--ini', new_config_file, 'browse', '--device', str(tmpdir.join('missing'))])
+
+    assert result.exit_code == 1
+    assert 'Unable to open joystick device' in result.output
+
+
+@pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason='Requires named pipes')
+def test_cli_cmd_BROWSE_speedtest_error(new_config_file, tmpdir, monkeypatch):
+    """Test CLI 'BROWSE' command keeps reading joystick after a failed speed test."""
+    settings = {'storage': 'CSV', 'host': str(tmpdir.join('test.csv'))}
+    save_speed_data(settings, [_make_record(i) for i in range(3)])
+
+    device = str(tmpdir.join('event0'))
+    os.mkfifo(device)
+    with open(new_config_file, 'w') as fh:
+        fh.write("[main]\nstorage = CSV\nhost = {}\nepaper = {}\njoystick = {}\n".format(
+            settings['host'], tmpdir.join('epaper.png'), device))
+
+    results = iter([_make_record(10), OSError('No network'), _make_record(11)])
+
+    def _run_speedtest(settings):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(cli, 'run_speedtest', _run_speedtest)
+    writer = threading.Thread(target=_press, args=(device, ['middle', 'middle', 'middle', 'left']))
+    writer.start()
+
+    result = CliRunner().invoke(cli.main, args=['--ini', new_config_file, 'browse', '--count', '3'])
+    writer.join()
+
+    assert result.exit_code == 0
+    assert 'Unable to run speed test' in result.output
+    assert 'No network' in result.output
+    assert '-- Joystick closed: 4 event(s), 2 new speed test(s) --' in result.output
+    assert [row['ping'] for row in get_speed_data(settings, 10)] == [0.0, 1.0, 2.0, 10.0, 11.0]
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+"""CliRunner Tests for COMPACT command and arguments."""
+
+import pytest
+
+from click.testing import CliRunner
+
+from src import cli
+from src.utils.datastore.json import save_data
+from src.utils.show_data import _DB_FLDS_, get_speed_data
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+_CONFIG_DATA_ = """\
+[data]
+retain = {retain}
+
+[main]
+storage = JSON
+host = {host}
+"""
+
+
+@pytest.fixture
+def json_store(tmpdir_factory):
+    dataFile = str(tmpdir_factory.mktemp('test').join('test.jsonl'))
+    save_data(dataFile, _DB_FLDS_['json'], [
+        {'timestamp': '2020-07-15T17:00:{:02d}.000000Z'.format(i), 'ping': float(i)} for i in range(10)
+    ])
+
+    return dataFile
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_cli_cmd_COMPACT_raw(json_store, new_config_file):
+    """Test CLI 'COMPACT' command uses '[data] retain' setting."""
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(retain=4, host=json_store))
+
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'compact']
+    )
+    assert result.exit_code == 0
+    assert 'Removed 6 record(s)' in result.output
+
+    settings = {'storage': 'json', 'host': json_store}
+    assert [row['ping'] for row in get_speed_data(settings, 10, True)] == [6.0, 7.0, 8.0, 9.0]
+
+
+def test_cli_cmd_COMPACT_w_RETAIN_flg(json_store, new_config_file):
+    """Test CLI 'COMPACT' command w '--retain' flag."""
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(retain=-1, host=json_store))
+
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'compact', '--retain', '8']
+    )
+    assert result.exit_code == 0
+    assert 'Removed 2 record(s)' in result.output
+
+
+def test_cli_cmd_COMPACT_missing_config():
+    """Test CLI 'COMPACT' command w missing config file."""
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', '--INVALID--', 'compact']
+    )
+    assert result.exit_code == 1
+    assert 'ERROR!' in result.output
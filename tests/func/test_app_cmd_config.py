@@ -39,10 +39,14 @@ def test_cli_cmd_CONFIG_raw(new_config_file):
     result = runner.invoke(
         cli.main,
         args=['--ini', configFile, 'config', '--force'],
-        input="5\n5\nfirst\n5\n60\nmulti\nbits\nno\nGreensboro\nAmerica/New_York\nCSV\ntests/nuke.csv\nNukeApp"
+        input="5\n5\nfirst\n5\n60\n30\n120\nmulti\nbits\nno\nGreensboro\nAmerica/New_York\nCSV\ntests/nuke.csv\nNukeApp"
     )
     assert result.exit_code == 0
 
+    with open(configFile) as fh:
+        text = fh.read()
+    assert 'minsleep = 30' in text and 'maxsleep = 120' in text
+
     
 def test_cli_cmd_CONFIG_w_SECTION_flg():
     """Test CLI 'CONFIG' command w '--section' flag."""
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+
+"""CliRunner Tests for DAEMON command and arguments."""
+
+import os
+import signal
+
+import pytest
+
+from click.testing import CliRunner
+
+from src import cli
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_cli_cmd_DAEMON_missing_config():
+    """Test CLI 'DAEMON' command w missing config file."""
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', '--INVALID--', 'daemon']
+    )
+    assert result.exit_code == 1
+    assert 'ERROR!' in result.output
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGTERM'), reason='Requires POSIX signals')
+def test_cli_cmd_DAEMON_w_INTERVAL_flg(new_config_file, tmpdir, monkeypatch):
+    """Test CLI 'DAEMON' command runs until SIGTERM."""
+    with open(new_config_file, 'w') as fh:
+        fh.write("[main]\nstorage = CSV\nhost = {}\n".format(tmpdir.join('test.csv')))
+
+    runs = []
+
+    def _run_speedtest(settings):
+        runs.append(1)
+        if len(runs) == 3:
+            os.kill(os.getpid(), signal.SIGTERM)
+        return {'timestamp': '2020-07-15T17:08:55.735084Z', 'ping': 5.0, 'download': 1.0, 'upload': 1.0}
+
+    monkeypatch.setattr(cli, 'run_speedtest', _run_speedtest)
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'daemon', '--interval', '1', '--display', 'stdout']
+    )
+    assert result.exit_code == 0
+    assert '-- Daemon started' in result.output
+    assert '-- Daemon stopped: 3 run(s), 0 failed, 3 record(s) saved' in result.output
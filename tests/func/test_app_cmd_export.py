@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+
+"""CliRunner Tests for EXPORT command and arguments."""
+
+import json
+
+import pytest
+
+from click.testing import CliRunner
+
+from src import cli
+from src.utils.datastore.json import save_data
+from src.utils.export_data import read_columnar
+from src.utils.show_data import _DB_FLDS_
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+_CONFIG_DATA_ = """\
+[data]
+retain = -1
+
+[main]
+storage = JSON
+host = {host}
+"""
+
+
+@pytest.fixture
+def json_store(tmpdir_factory):
+    dataFile = str(tmpdir_factory.mktemp('test').join('test.jsonl'))
+    save_data(dataFile, _DB_FLDS_['json'], [
+        {'timestamp': '2020-07-15T17:00:{:02d}.000000Z'.format(i), 'location': 'Some City, US', 'ping': float(i)}
+        for i in range(10)
+    ])
+
+    return dataFile
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_cli_cmd_EXPORT_raw(json_store, new_config_file):
+    """Test CLI 'EXPORT' command writes CSV to STDOUT and summary to STDERR."""
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(host=json_store))
+
+    runner = CliRunner(mix_stderr=False)
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'export']
+    )
+    assert result.exit_code == 0
+    assert result.stdout.splitlines()[0] == 'timestamp,location,locationTZ,ping,download,upload'
+    assert len(result.stdout.splitlines()) == 11
+    assert 'Exported 10 record(s)' in result.stderr
+
+
+def test_cli_cmd_EXPORT_w_SINCE_UNTIL_flg(json_store, new_config_file, tmpdir):
+    """Test CLI 'EXPORT' command w '--since', '--until', and '--output' flags."""
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(host=json_store))
+
+    outFile = str(tmpdir.join('export.jsonl'))
+    runner = CliRunner(mix_stderr=False)
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'export', '--format', 'jsonl', '--output', outFile,
+              '--since', '2020-07-15T17:00:03Z', '--until', '2020-07-15 17:00:06']
+    )
+    assert result.exit_code == 0
+    assert 'Exported 3 record(s)' in result.stderr
+    with open(outFile) as fh:
+        assert [json.loads(line)['ping'] for line in fh] == [3.0, 4.0, 5.0]
+
+    outFile = str(tmpdir.join('export.bin'))
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'export', '--format', 'columnar', '--output', outFile,
+              '--since', '2020-07-15T17:00:08Z']
+    )
+    assert result.exit_code == 0
+    with open(outFile, 'rb') as fh:
+        assert [row['ping'] for chunk in read_columnar(fh) for row in chunk] == [8.0, 9.0]
+
+
+def test_cli_cmd_EXPORT_invalid_args(json_store, new_config_file, tmpdir):
+    """Test CLI 'EXPORT' command w invalid time and missing data store."""
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(host=json_store))
+
+    runner = CliRunner(mix_stderr=False)
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'export', '--since', 'yesterday']
+    )
+    assert result.exit_code == 2
+    assert 'not an ISO 8601 date/time' in result.stderr
+
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(host=str(tmpdir.join('missing.jsonl'))))
+
+    outFile = tmpdir.join('export.csv')
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'export', '--output', str(outFile)]
+    )
+    assert result.exit_code == 1
+    assert 'ERROR!' in result.stderr
+    assert not outFile.exists()
+
+    result = runner.invoke(cli.main, args=['--ini', new_config_file, 'export'])
+    assert result.exit_code == 1
+    assert result.stdout == ''
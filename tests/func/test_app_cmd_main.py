@@ -7,11 +7,48 @@ import pytest
 from click.testing import CliRunner
 
 from src import cli
+from src.utils.show_data import get_speed_data, get_store
+from src.utils.store_data import save_speed_data
 
 
 # =========================================================
 #     G L O B A L S   &   P Y T E S T   F I X T U R E S
 # =========================================================
+_CONFIG_DATA_ = """\
+[data]
+retain = {retain}
+
+[main]
+sleep = 0
+unit = bits
+location = Some City, US
+locationTZ = America/New_York
+storage = {storage}
+host = {host}
+dbtable = TestApp
+"""
+
+
+@pytest.fixture
+def fake_speedtest(monkeypatch):
+    """Replace SpeedTest runs with numbered fake records."""
+    runs = []
+
+    def _run_speedtest(settings):
+        runs.append(len(runs))
+        return {
+            'timestamp': '2020-07-15T17:08:{:02d}.000000Z'.format(len(runs)),
+            'location': settings.get('location'),
+            'locationTZ': settings.get('locationTZ'),
+            'ping': float(len(runs)),
+            'download': 1000000.0,
+            'upload': 1000000.0,
+        }
+
+    monkeypatch.setattr(cli, 'run_speedtest', _run_speedtest)
+    return runs
+
+
 @pytest.fixture
 def response():
     """Sample pytest fixture.
@@ -96,18 +133,183 @@ def test_cli_cmd_MAIN_w_COUNT_flg():
     assert True
 
     
-def test_cli_cmd_MAIN_w_HISTORY_flg():
+def test_cli_cmd_MAIN_w_HISTORY_flg(fake_speedtest, new_config_file, tmpdir):
     """Test CLI '<DO THING>' command w '--history' flag."""
+    settings = {'storage': 'CSV', 'host': str(tmpdir.join('test.csv'))}
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(retain=-1, **settings))
+
     runner = CliRunner()
-    
-    #result = runner.invoke(
-    #    cli.main,
-    #    args=['--ini', 'tests/test_config.ini','CONFIG','--msg','>> Pytest <<']
-    #)
-    #assert result.exit_code == 0
-    #assert '>> Pytest <<' in result.output
-    #assert 'tests/test_config.ini' in result.output
-    assert True
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'dothing', '--count', '3', '--display', 'none']
+    )
+    assert result.exit_code == 0
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'dothing', '--count', '2', '--history', '--last']
+    )
+    assert result.exit_code == 0
+    assert '|  07/15/20 17:08  |  07/15/20 13:08  |    2.000 |     1.00 |     1.00 ' in result.output
+    assert '|  07/15/20 17:08  |  07/15/20 13:08  |    3.000 |     1.00 |     1.00 ' in result.output
+    assert '    1.000 ' not in result.output
+    assert result.output.endswith('\n\n')
+
+
+def test_cli_cmd_MAIN_w_HISTORY_and_RESOLUTION_flg(fake_speedtest, new_config_file, tmpdir):
+    """Test CLI '<DO THING>' command w '--history' and '--resolution' flags."""
+    settings = {'storage': 'SQLite', 'host': str(tmpdir.join('test.sqlite'))}
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(retain=2, **settings))
+
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'dothing', '--count', '4', '--display', 'none']
+    )
+    assert result.exit_code == 0
+
+    # Rollups keep records that retention removed from the data store
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'dothing', '--count', '5', '--history', '--resolution', '1h']
+    )
+    assert result.exit_code == 0
+    assert '-- Mean values per 1h bucket (4 record(s)) --' in result.output
+    assert '|  07/15/20 17:00  |  07/15/20 13:00  |    2.500 |     1.00 |     1.00 ' in result.output
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'dothing', '--count', '5', '--history']
+    )
+    assert '    1.000 ' not in result.output
+    assert '    4.000 ' in result.output
+
+
+@pytest.mark.parametrize('storage, ext', [('CSV', 'csv'), ('Binary', 'bin')])
+def test_cli_cmd_MAIN_w_HISTORY_and_SINCE_UNTIL_flg(fake_speedtest, new_config_file, tmpdir, storage, ext):
+    """Test CLI '<DO THING>' command w '--history', '--since', and '--until' flags."""
+    settings = {'storage': storage, 'host': str(tmpdir.join('test.' + ext))}
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(retain=-1, **settings))
+
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'dothing', '--count', '6', '--display', 'none']
+    )
+    assert result.exit_code == 0
+
+    # Records 2-5 are in range, and '--count' picks first/last from those
+    args = ['--ini', new_config_file, 'dothing', '--history', '--count', '2',
+            '--since', '2020-07-15T17:08:02Z', '--until', '2020-07-15T13:08:06-04:00']
+    result = runner.invoke(cli.main, args=args)
+    assert result.exit_code == 0
+    assert [line.split('|')[3].strip() for line in result.output.splitlines() if '|  07/15/20' in line] == \
+        ['2.000', '3.000']
+
+    result = runner.invoke(cli.main, args=args + ['--last'])
+    assert [line.split('|')[3].strip() for line in result.output.splitlines() if '|  07/15/20' in line] == \
+        ['4.000', '5.000']
+
+    result = runner.invoke(cli.main, args=args[:-4] + ['--since', '2021-01-01'])
+    assert '-- No data records found! --' in result.output
+
+    result = runner.invoke(cli.main, args=args[:-4] + ['--until', 'noon'])
+    assert result.exit_code == 2
+
+
+def test_cli_cmd_MAIN_w_HISTORY_and_STATS_flg(fake_speedtest, new_config_file, tmpdir):
+    """Test CLI '<DO THING>' command w '--history' and '--stats' flags."""
+    settings = {'storage': 'JSON', 'host': str(tmpdir.join('test.json'))}
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(retain=-1, **settings))
+
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'dothing', '--count', '5', '--display', 'none']
+    )
+    assert result.exit_code == 0
+
+    # '--count' is ignored, and all records in range are summarized
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'dothing', '--history', '--stats', '--count', '0',
+              '--since', '2020-07-15T17:08:02Z']
+    )
+    assert result.exit_code == 0
+    assert '-- Statistics for 4 record(s) --' in result.output
+    assert ' PING  ms     |        4 |    2.000 |    3.500 |    1.291 |    3.500 |    4.850 |    4.970 |    5.000 ' \
+        in result.output
+    assert ' DOWN  Mbit/s |        4 |     1.00 |     1.00 |     0.00 |     1.00 |     1.00 |     1.00 |     1.00 ' \
+        in result.output
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'dothing', '--history', '--stats', '--until', '2020-01-01']
+    )
+    assert result.exit_code == 0
+    assert '-- No data records found! --' in result.output
+
+
+def test_cli_cmd_MAIN_flags_anomalies(new_config_file, tmpdir, monkeypatch):
+    """Test CLI '<DO THING>' command tags and shows anomalous speed tests."""
+    settings = {'storage': 'CSV', 'host': str(tmpdir.join('test.csv'))}
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(retain=-1, **settings))
+
+    # Detector learns from records already in data store
+    save_speed_data(settings, [
+        {'timestamp': '2020-07-15T16:{:02d}:00.000000Z'.format(i), 'ping': 10.0 + i % 3, 'download': 1000000.0,
+         'upload': 1000000.0}
+        for i in range(60)
+    ])
+    monkeypatch.setattr(cli, 'run_speedtest', lambda settings: {
+        'timestamp': '2020-07-15T17:00:00.000000Z', 'ping': 250.0, 'download': 1000000.0, 'upload': 1000000.0})
+
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'dothing', '--count', '1']
+    )
+    assert result.exit_code == 0
+    assert '-- Anomaly: ping outlier (z=+' in result.output
+    assert [tag['channel'] for tag in get_store(settings).query_anomalies(since='2020-07-15T17:00:00Z')] == ['ping']
+
+
+def test_show_speed_data_table_matches_row_formatter(capsys):
+    """Test batch table formatting against per-row '_data_formatter()' output."""
+    data = [
+        {'timestamp': '2020-07-15T17:08:55.735084Z', 'locationTZ': 'America/New_York',
+         'ping': 5.056, 'download': 292887701.15, 'upload': 28967314.99},
+        {'timestamp': '2020-12-31T23:59:59.000000Z', 'locationTZ': 'Europe/Oslo',
+         'ping': 12.5, 'download': 1000000.0, 'upload': 500000.0},
+        {'timestamp': '2020-12-31T23:59:59.000000Z', 'locationTZ': None,
+         'ping': 0.0, 'download': 0.0, 'upload': 0.0},
+    ]
+
+    cli.show_speed_data_table(data, showRowNum=True, isRaw=True, rateUnit='bytes')
+    lines = capsys.readouterr().out.splitlines()[6:-1]
+
+    template = " {:>3s} |  {!s:14s}  |  {!s:14s}  | {:8.3f} | {:8.2f} | {:8.2f} "
+    assert lines == [
+        template.format(*cli._data_formatter(row, i + 1, True, 'bytes')) for i, row in enumerate(data)
+    ]
+
+
+def test_show_speed_data_table_missing_values(capsys):
+    """Test batch table formatting w missing values."""
+    cli.show_speed_data_table([{'ping': 1.0}], showRowNum=False, isRaw=True)
+    lines = capsys.readouterr().out.splitlines()
+
+    assert lines[6] == "  - n/a -         |  - n/a -         |    1.000 | - n/a -  | - n/a -  "
 
 def test_cli_cmd_MAIN_w_FIRST_flg():
     """Test CLI '<DO THING>' command w '--first' flag."""
@@ -121,4 +323,85 @@ def test_cli_cmd_MAIN_w_FIRST_flg():
     #assert '>> Pytest <<' in result.output
     #assert 'tests/test_config.ini' in result.output
     assert True
-            
\ No newline at end of file
+
+
+@pytest.mark.parametrize('storage, fname', [('CSV', 'test.csv'), ('JSON', 'test.jsonl'), ('SQLite', 'test.sqlite')])
+def test_cli_cmd_MAIN_w_RETAIN_setting(fake_speedtest, new_config_file, tmpdir, storage, fname):
+    """Test CLI '<DO THING>' command enforces '[data] retain' after each save."""
+    settings = {'storage': storage, 'host': str(tmpdir.join(fname)), 'dbtable': 'TestApp'}
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(retain=3, **settings))
+
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'dothing', '--count', '5', '--display', 'none']
+    )
+    assert result.exit_code == 0
+    assert result.output.count('-- Retention: removed') == 5
+
+    assert [row['ping'] for row in get_speed_data(settings, 10, True)] == [3.0, 4.0, 5.0]
+
+
+def test_cli_cmd_MAIN_w_CONCURRENT_flg(fake_speedtest, new_config_file, tmpdir, monkeypatch):
+    """Test CLI '<DO THING>' command w '--concurrent' flag saves in batches."""
+    settings = {'storage': 'CSV', 'host': str(tmpdir.join('test.csv')), 'dbtable': 'TestApp'}
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(retain=-1, **settings))
+
+    monkeypatch.setattr(cli, '_APP_BATCH_SIZE_', 2)
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'dothing', '--count', '5', '--concurrent']
+    )
+    assert result.exit_code == 0
+    assert result.output.count('-- Internet Speed Test') == 5
+    assert '-- Internet Speed Test 5 of 5 --' in result.output
+
+    assert [row['ping'] for row in get_speed_data(settings, 10, True)] == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_cli_cmd_MAIN_w_CONCURRENT_flg_keeps_saved_on_error(fake_speedtest, new_config_file, tmpdir, monkeypatch):
+    """Test CLI '<DO THING>' command w '--concurrent' flag saves collected records if a run fails."""
+    settings = {'storage': 'CSV', 'host': str(tmpdir.join('test.csv')), 'dbtable': 'TestApp'}
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(retain=-1, **settings))
+
+    runSpeedtest = cli.run_speedtest
+
+    def _failing_speedtest(settings):
+        if len(fake_speedtest) == 3:
+            raise OSError('Network is down')
+        return runSpeedtest(settings)
+
+    monkeypatch.setattr(cli, 'run_speedtest', _failing_speedtest)
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'dothing', '--count', '10', '--concurrent', '--display', 'none']
+    )
+    assert result.exit_code == 1
+    assert 'Network is down' in result.output
+
+    assert [row['ping'] for row in get_speed_data(settings, 10, True)] == [1.0, 2.0, 3.0]
+
+
+def test_cli_cmd_MAIN_w_EPAPER_display(fake_speedtest, new_config_file, tmpdir):
+    """Test CLI '<DO THING>' command w '--display epaper' on PNG stand-in device."""
+    settings = {'storage': 'CSV', 'host': str(tmpdir.join('test.csv'))}
+    displayFile = tmpdir.join('epaper.png')
+    with open(new_config_file, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(retain=-1, **settings) + 'epaper = {}\n'.format(displayFile))
+
+    runner = CliRunner()
+
+    result = runner.invoke(
+        cli.main,
+        args=['--ini', new_config_file, 'dothing', '--count', '2', '--display', 'epaper', '--no-save']
+    )
+    assert result.exit_code == 0
+    assert displayFile.read_binary()[:8] == b'\x89PNG\r\n\x1a\n'
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+
+"""Startup time and lazy import tests for 'pired' sub-commands."""
+
+import pytest
+
+from benchmarks.bench_startup import bench_startup, _SUBCOMMANDS_, _BUDGET_MS_
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+@pytest.fixture(scope='module')
+def startup_results():
+    return bench_startup(numRepeats=3)
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+@pytest.mark.parametrize('name', list(_SUBCOMMANDS_.keys()))
+def test_startup_lazy_imports(startup_results, name):
+    assert startup_results[name]['heavyModules'] == []
+
+
+@pytest.mark.parametrize('name', list(_SUBCOMMANDS_.keys()))
+def test_startup_budget(startup_results, name):
+    assert startup_results[name]['overheadMs'] < _BUDGET_MS_
@@ -2,6 +2,7 @@ import os
 import json
 import random
 import string
+from datetime import datetime, timezone
 
 import pytest
 
@@ -55,6 +56,28 @@ a valid INI
 file format.
 """
 
+_RECORD_ORIGIN_: float = 1594832400.0      # 2020-07-15T17:00:00Z
+
+# Field values: constant, or function called with record number
+_RECORD_FIELDS_ = {
+    'location': 'Some City, US',
+    'locationTZ': 'America/New_York',
+    'ping': float,
+    'download': lambda i: 1000000.0 * i,
+    'upload': lambda i: 500000.0 * i,
+}
+
+
+def _make_records(num, start=0, step=1, origin=_RECORD_ORIGIN_, **fields):
+    values = dict(_RECORD_FIELDS_, **fields)
+    return [
+        dict(
+            timestamp=datetime.fromtimestamp(origin + i * step, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+            **{name: val(i) if callable(val) else val for name, val in values.items()}
+        )
+        for i in range(start, start + num)
+    ]
+
 
 # =========================================================
 #  U N I T   T E S T I N G   P Y T E S T   F I X T U R E S
@@ -103,3 +126,16 @@ def invalid_config_ini_fomat(tmpdir_factory):
     configFile.write(_INVALID_CONFIG_FILE_FORMAT_)
 
     return str(configFile)
+
+
+@pytest.fixture()
+def make_records():
+    """Factory for SpeedTest data records.
+
+    Called as 'make_records(num, start=0, step=1, origin=<epoch>, **fields)'. Records
+    are numbered from 'start' and are 'step' seconds apart from 'origin' (default:
+    2020-07-15T17:00:00Z). Any field can be set with a keyword argument, either to a
+    constant or to a function that is called with the record number. Test modules
+    can override this fixture to change the defaults for all their tests.
+    """
+    return _make_records
@@ -0,0 +1,74 @@
+import math
+import random
+
+import pytest
+
+from src.utils.anomaly_data import AnomalyDetector, ChannelDetector, format_anomaly
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+def _noise(num, seed=1, mean=20.0):
+    rnd = random.Random(seed)
+    return [rnd.gauss(mean, 1.0) for _ in range(num)]
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_channel_detector_outlier():
+    detector = ChannelDetector()
+    flags = [detector.check(val) for val in _noise(300)]
+    assert flags.count(None) == 300
+
+    kind, score = detector.check(40.0)
+    assert kind == 'outlier' and score > 10
+
+    # Spike is clipped, so the baseline does not move much
+    assert detector.mean == pytest.approx(20.0, abs=0.5)
+    assert detector.check(20.0) is None
+
+
+def test_channel_detector_level_shift():
+    detector = ChannelDetector()
+    for val in _noise(300):
+        detector.check(val)
+
+    flags = [detector.check(val) for val in _noise(30, seed=3, mean=21.5)]
+    shifts = [flag for flag in flags if flag is not None]
+    assert shifts and shifts[0][0] == 'shift-up'
+
+
+def test_channel_detector_warmup_and_invalid_values():
+    detector = ChannelDetector(warmup=5)
+    assert [detector.check(val) for val in [1.0, 1.0, 1.0, None, 'n/a', math.nan, 1.0, 9.0]] == [None] * 8
+    assert detector.count == 5
+
+    with pytest.raises(ValueError):
+        ChannelDetector(alpha=0)
+
+
+def test_anomaly_detector_tag_and_state():
+    detector = AnomalyDetector(('ping', 'download'))
+    for ping, down in zip(_noise(100), _noise(100, seed=3, mean=100.0)):
+        assert detector.tag({'ping': ping, 'download': down}) == []
+
+    record = {'ping': 60.0, 'download': 100.0}
+    tags = detector.tag(record)
+    assert [(tag['channel'], tag['kind'], tag['value']) for tag in tags] == [('ping', 'outlier', 60.0)]
+    assert record['anomaly'] == tags
+    assert format_anomaly(tags).startswith('ping outlier (z=+')
+
+    restored = AnomalyDetector(('ping', 'download', 'upload'))
+    restored.load(detector.state())
+    assert restored.channels['ping'].state() == detector.channels['ping'].state()
+    assert restored.channels['upload'].count == 0
+
+
+def test_anomaly_detector_scan():
+    data = [{'timestamp': 1594832400.0 + i, 'ping': val} for i, val in enumerate(_noise(100))]
+    data[80]['ping'] = 50.0
+
+    found = AnomalyDetector(('ping',)).scan([data[:50], [], data[50:]])
+    assert [(epoch, tags[0]['kind']) for epoch, tags in found] == [(1594832480.0, 'outlier')]
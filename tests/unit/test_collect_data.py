@@ -0,0 +1,192 @@
+import sys
+
+import pytest
+
+import src.utils.anomaly_data
+import src.utils.collect_data
+import src.sensors.sensehat
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, secs):
+        self.now += secs
+
+
+class FakeHat:
+    def get_temperature(self):
+        return 20.5
+
+    def get_humidity(self):
+        return 40.0
+
+    def get_pressure(self):
+        return 1000.0
+
+    def get_orientation_degrees(self):
+        self.orientCalls = getattr(self, 'orientCalls', 0) + 1
+        return {'pitch': 1.0, 'roll': 2.0, 'yaw': 3.0}
+
+    def get_accelerometer_raw(self):
+        return {'x': 0.1, 'y': 0.2, 'z': 0.9}
+
+
+@pytest.fixture()
+def sampler():
+    sensor = src.sensors.sensehat.init_sensor(simulate=True, seed=42)
+    return src.utils.collect_data.Sampler(sensor, size=4)
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_ring_buffer_wraps():
+    buf = src.utils.collect_data.RingBuffer(('a', 'b'), size=3)
+    for i in range(5):
+        buf.append(float(i), (i * 10.0, i * 100.0))
+
+    assert len(buf) == 3
+    assert list(buf.column('timestamp')) == [2.0, 3.0, 4.0]
+    assert list(buf.column('a')) == [20.0, 30.0, 40.0]
+    assert buf.latest() == {'timestamp': 4.0, 'a': 40.0, 'b': 400.0}
+
+
+def test_ring_buffer_invalid():
+    with pytest.raises(ValueError):
+        src.utils.collect_data.RingBuffer(('a',), size=0)
+
+    buf = src.utils.collect_data.RingBuffer(('a',), size=2)
+    assert buf.latest() is None
+    with pytest.raises(ValueError):
+        buf.column('--INVALID--')
+
+
+def test_sampler_reads_all_channels(sampler):
+    values = sampler.sample()
+
+    assert len(values) == len(src.sensors.sensehat._CHANNELS_)
+    assert sampler.sensor.reads == 1
+    assert len(sampler.buffer) == 1
+
+
+def test_sampler_timestamp_before_read():
+    clock = FakeClock()
+
+    class SlowSensor:
+        def read(self, channels):
+            clock.sleep(0.5)
+            return (1.0,) * len(channels)
+
+    sampler = src.utils.collect_data.Sampler(SlowSensor(), channels=('pressure',), clock=clock)
+    sampler.sample()
+    sampler.run(1)
+
+    assert list(sampler.buffer.column('timestamp')) == [0.0, 0.5]
+
+
+def test_sampler_run_fixed_rate():
+    clock = FakeClock()
+    sensor = src.sensors.sensehat.init_sensor(simulate=True, seed=1)
+    sampler = src.utils.collect_data.Sampler(sensor, size=8, clock=clock)
+
+    rate = sampler.run(10, rate=20, sleep=clock.sleep)
+
+    assert rate == pytest.approx(20.0)
+    assert len(sampler.buffer) == 8
+    assert list(sampler.buffer.column('timestamp'))[-1] == pytest.approx(0.45)
+
+
+def test_sampler_run_adaptive_interval():
+    import src.utils.scheduler
+
+    clock = FakeClock()
+    sensor = src.sensors.sensehat.init_sensor(simulate=True, seed=1)
+    sampler = src.utils.collect_data.Sampler(sensor, channels=('pressure',), size=8, clock=clock)
+    controller = src.utils.scheduler.AdaptiveInterval(0.1, 0.8, 0.1, cvLimit=1.0, changeLimit=1.0)
+
+    sampler.run(5, rate=10, sleep=clock.sleep, controller=controller)
+
+    # Steady readings back off from 0.1 to 0.125, 0.156, ... seconds
+    stamps = list(sampler.buffer.column('timestamp'))
+    assert stamps[1] == pytest.approx(0.125)
+    assert controller.stats['backOffs'] == 5
+
+
+def test_sampler_stats():
+    sensor = src.sensors.sensehat.init_sensor(simulate=True, seed=3)
+    sampler = src.utils.collect_data.Sampler(sensor, channels=('temperature', 'humidity'), size=4)
+    sampler.run(6)
+
+    stats = sampler.stats()
+    temps = list(sampler.buffer.column('temperature'))
+
+    assert list(stats) == ['temperature', 'humidity']
+    assert stats['temperature']['count'] == 4
+    assert stats['temperature']['min'] == min(temps)
+    assert stats['temperature']['mean'] == pytest.approx(sum(temps) / 4)
+
+
+def test_sampler_flags_anomalies():
+    clock = FakeClock()
+    sensor = src.sensors.sensehat.init_sensor(simulate=True, seed=5)
+    detector = src.utils.anomaly_data.AnomalyDetector(('temperature',))
+    sampler = src.utils.collect_data.Sampler(sensor, channels=('temperature',), size=8, clock=clock, detector=detector)
+
+    sampler.run(100, rate=10, sleep=clock.sleep)
+    assert detector.channels['temperature'].count == 100
+
+    sensor.read = lambda channels: (99.0,)
+    clock.now = 42.0
+    sampler.sample()
+    assert sampler.anomalies[-1][0] == 42.0
+    assert sampler.anomalies[-1][1][0]['kind'] == 'outlier'
+
+
+def test_hardware_sensor_single_pass():
+    hat = FakeHat()
+    sensor = src.sensors.sensehat.SenseHatSensor(hat)
+
+    values = sensor.read(('pitch', 'temperature', 'roll', 'yaw', 'accel_z'))
+
+    assert values == (1.0, 20.5, 2.0, 3.0, 0.9)
+    assert hat.orientCalls == 1
+
+
+def test_init_sensor_defaults_to_hardware(monkeypatch):
+    # Missing 'sense_hat' module must not silently switch to made-up readings
+    monkeypatch.setitem(sys.modules, 'sense_hat', None)
+    monkeypatch.delenv(src.sensors.sensehat._SIMULATE_ENV_, raising=False)
+
+    with pytest.raises(OSError) as excinfo:
+        src.sensors.sensehat.init_sensor()
+    assert "Unable to access SenseHat!" in excinfo.value.args[0]
+
+    monkeypatch.setenv(src.sensors.sensehat._SIMULATE_ENV_, '1')
+    assert isinstance(src.sensors.sensehat.init_sensor(), src.sensors.sensehat.SimulatedSenseHat)
+
+
+def test_collect_helpers(sampler):
+    temp = src.utils.collect_data.collect_temp(sampler)
+    humid = src.utils.collect_data.collect_humid(sampler)
+    pos = src.utils.collect_data.collect_pos(sampler)
+
+    assert isinstance(temp, float)
+    assert isinstance(humid, float)
+    assert len(pos) == 3
+    assert len(sampler.buffer) == 3
+
+
+def test_collect_unconfigured_channel():
+    sensor = src.sensors.sensehat.init_sensor(simulate=True)
+    sampler = src.utils.collect_data.Sampler(sensor, channels=('pressure',))
+
+    with pytest.raises(ValueError):
+        src.utils.collect_data.collect_temp(sampler)
@@ -0,0 +1,196 @@
+import os
+import signal
+
+import pytest
+
+import src.utils.daemon
+from src.utils.show_data import get_speed_data, get_store
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+_CONFIG_DATA_ = """\
+[data]
+retain = {retain}
+
+[main]
+sleep = 1
+storage = CSV
+host = {host}
+"""
+
+
+def _write_config(fname, host, retain=-1):
+    with open(fname, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(host=host, retain=retain))
+
+
+class FakeSpeedtest:
+    def __init__(self, hook=None):
+        self.runs = 0
+        self.hook = hook
+
+    def __call__(self, settings):
+        self.runs += 1
+        if self.hook is not None:
+            self.hook(self.runs)
+
+        return {'timestamp': '2020-07-15T17:08:{:02d}.000000Z'.format(self.runs), 'ping': float(self.runs)}
+
+
+@pytest.fixture()
+def data_dir(tmpdir_factory):
+    return tmpdir_factory.mktemp('test')
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_daemon_batches_and_flushes_on_close(data_dir):
+    configFName = str(data_dir.join('config.ini'))
+    host = str(data_dir.join('data.csv'))
+    _write_config(configFName, host)
+
+    daemon = src.utils.daemon.Daemon({'configFName': configFName}, FakeSpeedtest(), interval=0.001, batchSize=3)
+    assert daemon.interval == 0.001
+
+    stats = daemon.run(5, installSignals=False)
+
+    assert stats['runs'] == 5
+    assert stats['saved'] == 5
+    assert [row['ping'] for row in get_speed_data({'storage': 'csv', 'host': host}, 10)] == [1, 2, 3, 4, 5]
+
+
+def test_daemon_uses_sleep_setting(data_dir):
+    configFName = str(data_dir.join('config.ini'))
+    _write_config(configFName, str(data_dir.join('data.csv')))
+
+    daemon = src.utils.daemon.Daemon({'configFName': configFName}, FakeSpeedtest())
+    assert daemon.scheduler.interval == 1.0
+    daemon.close()
+
+
+def test_daemon_invalid_config():
+    with pytest.raises(OSError):
+        src.utils.daemon.Daemon({'configFName': '--INVALID--'}, FakeSpeedtest())
+
+
+@pytest.mark.skipif(not hasattr(signal, 'SIGHUP'), reason='Requires POSIX signals')
+def test_daemon_signals(data_dir):
+    configFName = str(data_dir.join('config.ini'))
+    host1 = str(data_dir.join('data1.csv'))
+    host2 = str(data_dir.join('data2.csv'))
+    _write_config(configFName, host1)
+
+    sent = []
+
+    def _hook(runNum):
+        # Signals are handled asynchronously, so only send SIGTERM once the reload has happened
+        if runNum == 2:
+            _write_config(configFName, host2, retain=2)
+            os.kill(os.getpid(), signal.SIGHUP)
+        elif daemon.stats['reloads'] and not sent:
+            sent.append(runNum)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    daemon = src.utils.daemon.Daemon({'configFName': configFName}, FakeSpeedtest(_hook), interval=0.001, batchSize=10)
+    stats = daemon.run()
+
+    assert stats['reloads'] == 1
+    assert stats['runs'] == stats['saved']
+    assert signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
+
+    # Reload is applied when the next record arrives, so records are split across both files
+    data1 = [row['ping'] for row in get_speed_data({'storage': 'csv', 'host': host1}, 10)]
+    data2 = [row['ping'] for row in get_speed_data({'storage': 'csv', 'host': host2}, 10)]
+
+    assert data1 == [float(i) for i in range(1, len(data1) + 1)]
+    assert data2 == [float(stats['runs'] - 1), float(stats['runs'])]    # 'retain = 2' after reload
+
+
+def test_daemon_tags_anomalies(data_dir):
+    configFName = str(data_dir.join('config.ini'))
+    host = str(data_dir.join('data.csv'))
+    _write_config(configFName, host)
+
+    shown = []
+
+    def _collect(settings):
+        speedtest.runs += 1
+        ping = 500.0 if speedtest.runs == 40 else 10.0 + speedtest.runs % 3
+        return {'timestamp': '2020-07-15T17:{:02d}:00.000000Z'.format(speedtest.runs), 'ping': ping}
+
+    speedtest = FakeSpeedtest()
+    daemon = src.utils.daemon.Daemon(
+        {'configFName': configFName}, _collect, show=lambda record, runNum: shown.append(record),
+        interval=0.001, batchSize=5)
+    stats = daemon.run(42, installSignals=False)
+
+    assert stats['anomalies'] == 1
+    assert [row['ping'] for row in shown if row.get('anomaly')] == [500.0]
+    assert [tag['timestamp'] for tag in get_store({'storage': 'CSV', 'host': host}).query_anomalies()] == [
+        '2020-07-15T17:40:00.000000Z']
+
+
+def test_daemon_adaptive_interval(data_dir):
+    configFName = str(data_dir.join('config.ini'))
+    with open(configFName, 'w') as fh:
+        fh.write(_CONFIG_DATA_.format(host=str(data_dir.join('data.csv')), retain=-1) + "minsleep = 1\nmaxsleep = 4\n")
+
+    daemon = src.utils.daemon.Daemon({'configFName': configFName}, FakeSpeedtest())
+    assert daemon.controller is not None
+    assert daemon.scheduler.interval == 1.0
+
+    # First run is not delayed, and a stable first reading backs off
+    stats = daemon.run(1, installSignals=False)
+    assert stats['interval'] == 1.25
+    assert stats['rate'] == 0.0
+
+    # Fixed interval overrides the adaptive settings
+    daemon = src.utils.daemon.Daemon({'configFName': configFName}, FakeSpeedtest(), interval=0.001)
+    assert daemon.controller is None
+    stats = daemon.run(3, installSignals=False)
+    assert stats['interval'] == 0.001
+    assert stats['rate'] > 0
+
+
+def test_daemon_survives_failed_runs_and_saves(data_dir, monkeypatch):
+    configFName = str(data_dir.join('config.ini'))
+    host = str(data_dir.join('data.csv'))
+    _write_config(configFName, host)
+
+    def _hook(runNum):
+        if runNum == 3:
+            raise OSError('Unable to run SpeedTest!')
+
+    daemon = src.utils.daemon.Daemon({'configFName': configFName}, FakeSpeedtest(_hook), interval=0.001)
+
+    # First save fails (e.g. network outage), so record is kept and saved with the next one
+    writeRecords = daemon.writer.write
+    failures = [OSError('Unable to save data!')]
+
+    def _write(records):
+        if failures:
+            raise failures.pop()
+        return writeRecords(records)
+
+    monkeypatch.setattr(daemon.writer, 'write', _write)
+    stats = daemon.run(6, installSignals=False)
+
+    assert (stats['runs'], stats['failed'], stats['saveErrors'], stats['saved']) == (6, 1, 1, 5)
+    assert [row['ping'] for row in get_speed_data({'storage': 'csv', 'host': host}, 10)] == [1, 2, 4, 5, 6]
+
+
+def test_daemon_reports_queue_errors_without_saving_twice(data_dir, monkeypatch):
+    configFName = str(data_dir.join('config.ini'))
+    host = str(data_dir.join('data.csv'))
+    _write_config(configFName, host)
+
+    # Writer saved records locally, but could not queue them for upload (see 'uploader.RemoteWriter')
+    daemon = src.utils.daemon.Daemon({'configFName': configFName}, FakeSpeedtest(), interval=0.001)
+    monkeypatch.setattr(daemon.writer, 'queueError', OSError('Unable to queue records!'), raising=False)
+    stats = daemon.run(2, installSignals=False)
+
+    assert (stats['saved'], stats['saveErrors'], stats['queueErrors']) == (2, 0, 2)
+    assert [row['ping'] for row in get_speed_data({'storage': 'csv', 'host': host}, 10)] == [1, 2]
@@ -0,0 +1,98 @@
+import os
+import random
+
+import pytest
+
+import src.utils.datastore.registry
+from src.utils.datastore.anomaly import AnomalyStore, anomaly_name
+from src.utils.show_data import get_store
+from src.utils.store_data import open_speed_detector, save_speed_data
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+@pytest.fixture()
+def make_records(make_records):
+    # One record per minute w random (but repeatable) speeds
+    def _make_records(num, start=0, seed=1):
+        rnd = random.Random(seed)
+        return make_records(
+            num, start, step=60, ping=lambda i: rnd.gauss(20.0, 1.0), download=lambda i: rnd.gauss(1e8, 1e6),
+            upload=lambda i: rnd.gauss(1e7, 1e5))
+
+    return _make_records
+
+
+@pytest.fixture(autouse=True)
+def close_stores():
+    yield
+    src.utils.datastore.registry.close_stores()
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_anomaly_name():
+    assert anomaly_name('/tmp/data.csv') == '/tmp/data.csv.anomaly'
+    assert anomaly_name('/tmp/data.sqlite', 'SpeedTest') == '/tmp/data.sqlite.SpeedTest.anomaly'
+
+
+def test_anomaly_store(tmpdir):
+    tags = [{'channel': 'ping', 'kind': 'outlier', 'value': 50.0, 'score': 12.5}]
+
+    with AnomalyStore(str(tmpdir.join('test.anomaly'))) as store:
+        found = [(1594832400.0, tags), (1594832460.0, tags), (float('nan'), tags)]
+        assert store.add(found, {'ping': {'count': 3}}) == 2
+        assert store.add([(1594832400.0, tags)]) == 1
+        assert len(store) == 2
+        assert store.load_state() == {'ping': {'count': 3}}
+
+        assert store.query(since=1594832401) == [
+            {'timestamp': '2020-07-15T17:01:00.000000Z', 'channel': 'ping', 'kind': 'outlier', 'value': 50.0,
+             'score': 12.5}]
+        assert store.query(until=1594832401)[0]['timestamp'] == '2020-07-15T17:00:00.000000Z'
+
+
+@pytest.mark.parametrize('storage, ext', [('CSV', 'csv'), ('SQLite', 'sqlite'), ('Binary', 'bin')])
+def test_store_tags_anomalies(tmpdir, storage, ext, make_records):
+    settings = {'storage': storage, 'host': str(tmpdir.join('data.' + ext)), 'dbtable': 'SpeedTest'}
+    name = anomaly_name(settings['host'], 'SpeedTest' if storage == 'SQLite' else None)
+
+    # No data store yet: detector starts fresh and does not create any files
+    detector = open_speed_detector(settings)
+    assert not os.path.exists(name)
+
+    store = get_store(settings)
+    data = make_records(60)
+    data[45]['ping'] = 80.0
+    for row in data:
+        detector.tag(row)
+    store.append_batch(data)
+
+    found = store.query_anomalies()
+    assert [(tag['timestamp'], tag['channel'], tag['kind']) for tag in found] == [
+        ('2020-07-15T17:45:00.000000Z', 'ping', 'outlier')]
+    assert store.query_anomalies(since='2020-07-15T17:46:00Z') == []
+
+    # Detector state carries over to the next run
+    src.utils.datastore.registry.close_stores()
+    detector = open_speed_detector(settings)
+    assert detector.channels['ping'].count == 60
+
+
+def test_store_detector_learns_from_history(tmpdir, make_records):
+    settings = {'storage': 'JSON', 'host': str(tmpdir.join('data.json'))}
+    data = make_records(60)
+    data[50]['upload'] = 1.0
+    save_speed_data(settings, data)
+    assert get_store(settings).query_anomalies() == []
+
+    detector = open_speed_detector(settings)
+    assert detector.channels['upload'].count == 60
+    assert [tag['channel'] for tag in get_store(settings).query_anomalies()] == ['upload']
+
+    record = dict(make_records(1, 60)[0], download=1.0)
+    assert [tag['channel'] for tag in detector.tag(record)] == ['download']
+    save_speed_data(settings, [record])
+    assert len(get_store(settings).query_anomalies()) == 2
@@ -0,0 +1,116 @@
+import functools
+import os
+
+import pytest
+
+import src.utils.datastore.binary
+from src.utils.datastore.binary import BinaryReader, BinaryWriter, RecordLayout, StringTable, strings_name
+from src.utils.datastore.index import to_epoch
+from src.utils.show_data import _DB_FLDS_
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+@pytest.fixture()
+def make_records(make_records):
+    # Two locations, one w/o timezone, and one missing value to check string interning and NULLs
+    return functools.partial(
+        make_records,
+        location=lambda i: 'Some City, US' if i % 2 else 'Bergen, NO',
+        locationTZ=lambda i: 'America/New_York' if i % 2 else None,
+        upload=lambda i: None if i == 3 else 500000.0 * i,
+    )
+
+
+@pytest.fixture()
+def bin_file(tmpdir_factory):
+    return str(tmpdir_factory.mktemp('test').join('test.bin'))
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_layout():
+    layout = RecordLayout(_DB_FLDS_['binary'])
+    assert layout.size == 36
+    assert layout.tsPos == 0 and layout.tsOffset == 0
+
+    with pytest.raises(ValueError):
+        RecordLayout({'ping': 'blob'})
+
+
+def test_save_and_read(bin_file, make_records):
+    data = make_records(10)
+    src.utils.datastore.binary.save_data(bin_file, _DB_FLDS_['binary'], data[:6])
+    src.utils.datastore.binary.save_data(bin_file, _DB_FLDS_['binary'], data[6:])
+
+    # Two locations and one timezone are stored once
+    with open(strings_name(bin_file)) as fh:
+        assert fh.read().splitlines() == ['"Bergen, NO"', '"Some City, US"', '"America/New_York"']
+
+    with BinaryReader(bin_file) as reader:
+        assert len(reader) == 10
+        assert os.path.getsize(bin_file) == reader.dataStart + 10 * 36
+        assert reader.timestamp(9) == to_epoch(data[9]['timestamp'])
+        assert reader.records() == data
+        assert reader.records(8, 20) == data[8:]
+        assert reader.rows(3, 4)[0][1:3] == (1, 2)
+
+    assert src.utils.datastore.binary.get_data(bin_file, 3) == data[:3]
+    assert src.utils.datastore.binary.get_data(bin_file, 3, False) == data[-3:]
+    assert src.utils.datastore.binary.get_data(bin_file, 20, False) == data
+
+    found = src.utils.datastore.binary.get_data(
+        bin_file, 2, False, to_epoch(data[2]['timestamp']), to_epoch(data[7]['timestamp']))
+    assert found == data[5:7]
+
+    chunks = list(src.utils.datastore.binary.iter_data(
+        bin_file, to_epoch(data[2]['timestamp']), to_epoch(data[7]['timestamp']), 3))
+    assert [row['ping'] for chunk in chunks for row in chunk] == [2.0, 3.0, 4.0, 5.0, 6.0]
+
+
+def test_writer_checks_layout(bin_file, make_records):
+    src.utils.datastore.binary.save_data(bin_file, _DB_FLDS_['binary'], make_records(2))
+
+    with pytest.raises(OSError):
+        BinaryWriter(bin_file, {'timestamp': 'time', 'ping': 'real'})
+
+    with open(bin_file, 'wb') as fh:
+        fh.write(b'timestamp,ping\n')
+
+    with pytest.raises(OSError):
+        BinaryReader(bin_file)
+
+
+def test_writer_drops_torn_writes(bin_file, make_records):
+    src.utils.datastore.binary.save_data(bin_file, _DB_FLDS_['binary'], make_records(5))
+
+    with open(bin_file, 'ab') as fh:
+        fh.write(b'\x00' * 10)
+    with open(strings_name(bin_file), 'ab') as fh:
+        fh.write(b'"Osl')
+
+    assert len(StringTable(strings_name(bin_file))) == 3
+
+    record = dict(make_records(1, 5)[0], location='Oslo')
+    src.utils.datastore.binary.save_data(bin_file, _DB_FLDS_['binary'], [record])
+    data = src.utils.datastore.binary.get_data(bin_file, 2, False)
+    assert [row['location'] for row in data] == ['Bergen, NO', 'Oslo']
+    assert StringTable(strings_name(bin_file)).value(3) == 'Oslo'
+
+
+def test_compact(bin_file, make_records):
+    data = make_records(10)
+    src.utils.datastore.binary.save_data(bin_file, _DB_FLDS_['binary'], data)
+
+    assert src.utils.datastore.binary.compact(bin_file, -1) == 0
+    assert src.utils.datastore.binary.compact(bin_file, 8, 0.5) == 0
+    assert src.utils.datastore.binary.compact(bin_file, 4) == 6
+    assert src.utils.datastore.binary.get_data(bin_file, 10) == data[6:]
+
+    assert src.utils.datastore.binary.compact(bin_file, 0) == 4
+    assert src.utils.datastore.binary.get_data(bin_file, 10) == []
+
+    with pytest.raises(OSError):
+        src.utils.datastore.binary.compact(bin_file + '.missing', 1)
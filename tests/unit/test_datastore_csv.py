@@ -0,0 +1,136 @@
+import os
+
+import pytest
+
+import src.cli
+import src.utils.datastore.csv
+from src.utils.datastore.index import OffsetIndex, index_name
+from src.utils.show_data import _DB_FLDS_, get_speed_data
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+@pytest.fixture()
+def csv_file(tmpdir_factory):
+    return str(tmpdir_factory.mktemp('test').join('test.csv'))
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_save_and_get_first(csv_file, make_records):
+    src.utils.datastore.csv.save_data(csv_file, _DB_FLDS_['csv'], make_records(20))
+    src.utils.datastore.csv.save_data(csv_file, _DB_FLDS_['csv'], make_records(20, 20))
+
+    data = src.utils.datastore.csv.get_data(csv_file, _DB_FLDS_['raw'], 3, True)
+    assert [row['ping'] for row in data] == [0.0, 1.0, 2.0]
+    assert data[0]['location'] == 'Some City, US'
+
+    with open(csv_file) as fh:
+        assert fh.read().count('timestamp') == 1
+
+
+@pytest.mark.parametrize('blockSize', [7, 64, 4096])
+def test_tail_lines_block_sizes(csv_file, blockSize, make_records):
+    src.utils.datastore.csv.save_data(csv_file, _DB_FLDS_['csv'], make_records(100))
+
+    with open(csv_file, 'rb') as fh:
+        fh.readline()
+        lines = src.utils.datastore.csv._tail_lines(fh, 5, fh.tell(), blockSize)
+
+    assert len(lines) == 5
+    assert lines[-1].startswith(b'2020-07-15T17:01:39')
+
+
+def test_get_last(csv_file, make_records):
+    src.utils.datastore.csv.save_data(csv_file, _DB_FLDS_['csv'], make_records(100))
+
+    data = src.utils.datastore.csv.get_data(csv_file, _DB_FLDS_['raw'], 3, False)
+    assert [row['ping'] for row in data] == [97.0, 98.0, 99.0]
+
+    data = src.utils.datastore.csv.get_data(csv_file, _DB_FLDS_['raw'], 500, False)
+    assert len(data) == 100
+    assert data[0]['ping'] == 0.0
+
+
+def test_get_empty_and_missing(csv_file):
+    open(csv_file, 'w').close()
+    assert src.utils.datastore.csv.get_data(csv_file, _DB_FLDS_['raw'], 3, False) == []
+
+    with pytest.raises(OSError) as excinfo:
+        src.utils.datastore.csv.get_data('--INVALID--', _DB_FLDS_['raw'], 1)
+
+    assert "does NOT exist" in excinfo.value.args[0]
+
+
+def test_new_speed_data_single_writer(csv_file, monkeypatch, make_records):
+    records = iter(make_records(3))
+    opened = []
+    origWriter = src.utils.datastore.csv.CSVWriter
+
+    def _writer(*args):
+        opened.append(args)
+        return origWriter(*args)
+
+    monkeypatch.setattr(src.cli, 'run_speedtest', lambda settings: next(records))
+    monkeypatch.setattr(src.cli, '_APP_SLEEP_', 0)
+    monkeypatch.setattr(src.utils.datastore.csv, 'CSVWriter', _writer)
+
+    settings = {'storage': 'CSV', 'host': csv_file}
+    src.cli.new_speed_data(settings, 3, 'bits', 'none', True, True)
+
+    assert len(opened) == 1
+    assert [row['ping'] for row in get_speed_data(settings, 10, True)] == [0.0, 1.0, 2.0]
+
+
+@pytest.mark.parametrize('concurrent', [False, True])
+def test_new_speed_data_adaptive_sleep(csv_file, monkeypatch, capsys, concurrent, make_records):
+    import src.utils.scheduler
+
+    records = iter(make_records(4))
+    monkeypatch.setattr(src.cli, 'run_speedtest', lambda settings: next(records))
+
+    controller = src.utils.scheduler.AdaptiveInterval(0.001, 0.002, 0.001)
+    src.cli.new_speed_data({'storage': 'CSV', 'host': csv_file}, 4, 'bits', 'none', True, False,
+                           concurrent=concurrent, sleep=60, controller=controller)
+
+    assert controller.stats['samples'] == 4
+    assert '-- Effective rate: ' in capsys.readouterr().out
+
+
+def test_compact(csv_file, make_records):
+    src.utils.datastore.csv.save_data(csv_file, _DB_FLDS_['csv'], make_records(20))
+
+    assert src.utils.datastore.csv.compact(csv_file, -1) == 0
+    assert src.utils.datastore.csv.compact(csv_file, 10, slack=1.0) == 0
+    assert src.utils.datastore.csv.compact(csv_file, 5) == 15
+
+    data = src.utils.datastore.csv.get_data(csv_file, _DB_FLDS_['raw'], 10, True)
+    assert [row['ping'] for row in data] == [15.0, 16.0, 17.0, 18.0, 19.0]
+
+    assert src.utils.datastore.csv.compact(csv_file, 0) == 5
+    with open(csv_file) as fh:
+        assert fh.read().startswith('timestamp,')
+
+
+def test_writer_compact_keeps_appending(csv_file, make_records):
+    with src.utils.datastore.csv.CSVWriter(csv_file, _DB_FLDS_['csv']) as writer:
+        writer.write(make_records(10))
+        assert writer.compact(4) == 6
+        writer.write(make_records(2, 10))
+
+    data = src.utils.datastore.csv.get_data(csv_file, _DB_FLDS_['raw'], 10, True)
+    assert [row['ping'] for row in data] == [6.0, 7.0, 8.0, 9.0, 10.0, 11.0]
+
+
+def test_writer_index_never_ahead_of_data(csv_file, make_records):
+    # Enough records to overflow the data file buffer before 'flush()'
+    with src.utils.datastore.csv.CSVWriter(csv_file, _DB_FLDS_['csv']) as writer:
+        writer.write(make_records(5000))
+        idx = OffsetIndex(index_name(csv_file))
+        assert all(offset < os.path.getsize(csv_file) for offset, _ in idx.entries())
+
+        writer.flush()
+        assert len(idx) == 5000
+        assert idx.entry(-1)[0] < os.path.getsize(csv_file)
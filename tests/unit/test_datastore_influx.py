@@ -0,0 +1,210 @@
+import gzip
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+import src.utils.datastore.influx
+import src.utils.store_data
+from src.utils.datastore.index import to_epoch
+from src.utils.show_data import _DB_FLDS_, get_speed_data, get_store
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+_LINE_ = re.compile(r'^(\S+?),location=(.+?),locationTZ=(\S+) (\S+) (\d+)$')
+
+
+@pytest.fixture()
+def make_records(make_records):
+    # One record per minute, with the last one 'age' seconds before now
+    def _make_records(num, start=0, age=0):
+        return make_records(num, start, step=60, origin=time.time() - age - num * 60)
+
+    return _make_records
+
+
+class FakeInfluxHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append({'path': self.path, 'query': {}, 'headers': dict(self.headers)})
+        self._reply(204 if self.path == '/ping' else 404, b'')
+
+    def do_POST(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        server.requests.append({'path': url.path, 'query': query, 'headers': dict(self.headers)})
+
+        if self.headers.get('Authorization') != 'Token secret':
+            return self._reply(401, b'unauthorized')
+
+        if url.path == '/api/v2/write':
+            if self.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            server.lines.extend(body.decode('utf-8').split('\n'))
+            return self._reply(204, b'')
+
+        if url.path == '/api/v2/query':
+            flux = body.decode('utf-8')
+            found = re.search(r'range\(start: -(\d+)h\)', flux)
+            if found:
+                return self._reply(200, self._query(time.time() - int(found.group(1)) * 3600).encode('utf-8'))
+
+            start, stop = re.search(r'range\(start: (\S+), stop: (\S+)\)', flux).groups()
+            stop = None if stop == 'now()' else to_epoch(stop)
+            return self._reply(200, self._query(to_epoch(start), stop).encode('utf-8'))
+
+        self._reply(404, b'not found')
+
+    def _query(self, start, stop=None):
+        out = [',result,table,_start,_stop,_time,_measurement,location,locationTZ,download,ping,upload']
+        for line in self.server.lines:
+            measurement, location, locationTZ, fields, stamp = _LINE_.match(line).groups()
+            if int(stamp) / 1000 < start or (stop is not None and int(stamp) / 1000 >= stop):
+                continue
+            vals = dict(fld.split('=') for fld in fields.split(','))
+            out.append(',_result,0,x,x,{},{},"{}",{},{},{},{}'.format(
+                datetime.fromtimestamp(int(stamp) / 1000, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f000Z'),
+                measurement, location.replace('\\', ''), locationTZ, vals['download'], vals['ping'], vals['upload']))
+
+        return '\r\n'.join(out) + '\r\n\r\n'
+
+    def _reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def fake_influx():
+    server = HTTPServer(('127.0.0.1', 0), FakeInfluxHandler)
+    server.requests = []
+    server.lines = []
+    server.url = 'http://127.0.0.1:{}'.format(server.server_port)
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def influx_settings(fake_influx):
+    return {
+        'storage': 'Influx', 'host': fake_influx.url, 'org': 'sciLab', 'token': 'secret',
+        'dbname': 'scilab', 'dbtable': 'SpeedTest', 'batch': '4', 'flush': '10',
+    }
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_to_line():
+    line = src.utils.datastore.influx.to_line('Speed Test', _DB_FLDS_['influx'], {
+        'timestamp': '2020-07-15T17:08:55.735084Z', 'location': 'Some City, US', 'locationTZ': 'America/New_York',
+        'ping': 5.056, 'download': 292887701.15, 'upload': None,
+    })
+    assert line == r'Speed\ Test,location=Some\ City\,\ US,locationTZ=America/New_York ping=5.056,download=292887701.15 1594832935735'
+
+    assert src.utils.datastore.influx.to_line('x', _DB_FLDS_['influx'], {'location': 'x'}) is None
+
+
+def test_writer_batches_and_flush_interval(fake_influx, influx_settings, make_records):
+    clock = [0.0]
+    writer = src.utils.datastore.influx.InfluxWriter(
+        fake_influx.url, 'sciLab', 'scilab', 'SpeedTest', 'secret', _DB_FLDS_['influx'],
+        batchSize=4, flushInterval=10, clock=lambda: clock[0])
+
+    writer.write(make_records(9))
+    assert writer.stats['requests'] == 2 and len(fake_influx.lines) == 8
+
+    writer.flush()
+    assert writer.stats['requests'] == 2
+
+    clock[0] = 11.0
+    writer.flush()
+    assert writer.stats['requests'] == 3 and len(fake_influx.lines) == 9
+
+    writer.write(make_records(1, 9))
+    writer.close()
+    assert len(fake_influx.lines) == 10
+
+    req = fake_influx.requests[0]
+    assert req['headers']['Content-Encoding'] == 'gzip'
+    assert req['query'] == {'org': ['sciLab'], 'bucket': ['scilab'], 'precision': ['ms']}
+
+
+def test_writer_keeps_records_on_error(fake_influx, make_records):
+    writer = src.utils.datastore.influx.InfluxWriter(
+        fake_influx.url, 'sciLab', 'scilab', 'SpeedTest', 'wrong', _DB_FLDS_['influx'], batchSize=10)
+    writer.write(make_records(3))
+
+    with pytest.raises(OSError) as excinfo:
+        writer.flush(True)
+    assert "HTTP status 401" in excinfo.value.args[0]
+
+    writer.token = 'secret'
+    writer.headers['Authorization'] = 'Token secret'
+    writer.close()
+    assert len(fake_influx.lines) == 3
+
+
+def test_save_and_get_time_window(influx_settings, make_records):
+    src.utils.store_data.save_speed_data(influx_settings, make_records(3, age=5 * 3600))
+    src.utils.store_data.save_speed_data(influx_settings, make_records(5, 3))
+
+    data = get_speed_data(influx_settings, 1)
+    assert [row['ping'] for row in data] == [3.0, 4.0, 5.0, 6.0, 7.0]
+    assert data[0]['location'] == 'Some City, US'
+    assert data[0]['timestamp'].endswith('Z') and len(data[0]['timestamp']) == 27
+
+    assert len(get_speed_data(influx_settings, 24)) == 8
+    assert src.utils.store_data.compact_speed_data(influx_settings, 1) == 0
+
+
+def test_get_data_unreachable():
+    with pytest.raises(OSError) as excinfo:
+        src.utils.datastore.influx.get_data('http://127.0.0.1:9', 'o', 'b', 'm', 't', _DB_FLDS_['raw'], 1)
+
+    assert "Unable to access data store" in excinfo.value.args[0]
+
+
+def test_store_ping_and_query(fake_influx, influx_settings, make_records):
+    store = get_store(influx_settings)
+    assert store.ping() >= 0
+
+    store.append_batch(make_records(2))
+    store.flush()
+    assert len(store.query_range(1)) == 0      # Still buffered (flush interval not reached)
+    store.close()
+    assert len(store.query_range(1)) == 2
+
+    with pytest.raises(OSError):
+        get_store(dict(influx_settings, host='http://127.0.0.1:9')).ping()
+
+
+def test_store_iter_range(fake_influx, influx_settings, make_records):
+    data = make_records(6)
+    store = get_store(influx_settings)
+    store.append_batch(data)
+    store.close()
+
+    # Time range is part of the Flux query. Records are stored with millisecond precision.
+    chunks = list(store.iter_range(data[1]['timestamp'][:23] + 'Z', data[5]['timestamp'][:23] + 'Z', 3))
+    assert [len(chunk) for chunk in chunks] == [3, 1]
+    assert [row['ping'] for chunk in chunks for row in chunk] == [1.0, 2.0, 3.0, 4.0]
+
+    assert sum(len(chunk) for chunk in store.iter_range()) == 6
+    assert list(store.iter_range(until=data[0]['timestamp'][:23] + 'Z')) == []
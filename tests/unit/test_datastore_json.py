@@ -0,0 +1,123 @@
+import json
+import os
+
+import pytest
+
+import src.utils.datastore.json
+from src.utils.datastore.index import OffsetIndex, bisect_range, index_name, to_epoch
+from src.utils.show_data import _DB_FLDS_
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+@pytest.fixture()
+def json_file(tmpdir_factory):
+    return str(tmpdir_factory.mktemp('test').join('test.jsonl'))
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_to_epoch():
+    assert to_epoch('1970-01-01T00:01:00.000000Z') == 60.0
+    assert to_epoch(12.5) == 12.5
+    assert to_epoch(None) != to_epoch(None)       # NaN
+    assert to_epoch('--INVALID--') != to_epoch('--INVALID--')
+
+
+def test_save_appends_lines_and_index(json_file, make_records):
+    src.utils.datastore.json.save_data(json_file, _DB_FLDS_['json'], make_records(10))
+    src.utils.datastore.json.save_data(json_file, _DB_FLDS_['json'], make_records(5, 10))
+
+    with open(json_file) as fh:
+        lines = fh.readlines()
+
+    assert len(lines) == 15
+    assert json.loads(lines[-1])['ping'] == 14.0
+
+    idx = OffsetIndex(index_name(json_file))
+    assert len(idx) == 15
+    assert idx.entry(-1)[0] == sum(len(line) for line in lines[:-1])
+    assert idx.entry(0)[1] == to_epoch('2020-07-15T17:00:00.000000Z')
+
+
+def test_get_first_last(json_file, make_records):
+    src.utils.datastore.json.save_data(json_file, _DB_FLDS_['json'], make_records(50))
+
+    first = src.utils.datastore.json.get_data(json_file, _DB_FLDS_['raw'], 3, True)
+    assert [row['ping'] for row in first] == [0.0, 1.0, 2.0]
+
+    last = src.utils.datastore.json.get_data(json_file, _DB_FLDS_['raw'], 3, False)
+    assert [row['ping'] for row in last] == [47.0, 48.0, 49.0]
+
+    assert len(src.utils.datastore.json.get_data(json_file, _DB_FLDS_['raw'], 100, False)) == 50
+
+
+def test_index_rebuilt_when_stale(json_file, make_records):
+    src.utils.datastore.json.save_data(json_file, _DB_FLDS_['json'], make_records(5))
+    os.remove(index_name(json_file))
+
+    last = src.utils.datastore.json.get_data(json_file, _DB_FLDS_['raw'], 2, False)
+    assert [row['ping'] for row in last] == [3.0, 4.0]
+    assert len(OffsetIndex(index_name(json_file))) == 5
+
+
+def test_writer_drops_torn_write(json_file, make_records):
+    src.utils.datastore.json.save_data(json_file, _DB_FLDS_['json'], make_records(3))
+    with open(json_file, 'a') as fh:
+        fh.write('{"timestamp": "2020-')
+
+    src.utils.datastore.json.save_data(json_file, _DB_FLDS_['json'], make_records(1, 3))
+
+    data = src.utils.datastore.json.get_data(json_file, _DB_FLDS_['raw'], 10, True)
+    assert [row['ping'] for row in data] == [0.0, 1.0, 2.0, 3.0]
+
+
+def test_compact(json_file, make_records):
+    src.utils.datastore.json.save_data(json_file, _DB_FLDS_['json'], make_records(20))
+
+    assert src.utils.datastore.json.compact(json_file, -1) == 0
+    assert src.utils.datastore.json.compact(json_file, 25) == 0
+    assert src.utils.datastore.json.compact(json_file, 5) == 15
+
+    data = src.utils.datastore.json.get_data(json_file, _DB_FLDS_['raw'], 10, True)
+    assert [row['ping'] for row in data] == [15.0, 16.0, 17.0, 18.0, 19.0]
+    assert OffsetIndex(index_name(json_file)).entry(0)[0] == 0
+
+    assert src.utils.datastore.json.compact(json_file, 0) == 5
+    assert os.path.getsize(json_file) == 0
+
+
+
+def test_index_search(json_file, make_records):
+    src.utils.datastore.json.save_data(json_file, _DB_FLDS_['json'], make_records(100))
+    idx = OffsetIndex(index_name(json_file))
+
+    probes = []
+    assert bisect_range(lambda pos: probes.append(pos) or idx.entry(pos)[1], 100, to_epoch('2020-07-15T17:00:10Z')) \
+        == (10, 100)
+    assert len(probes) <= 7
+
+    assert idx.search() == (0, 100)
+    assert idx.search(to_epoch('2020-07-15T17:00:10Z'), to_epoch('2020-07-15T17:00:20.5Z')) == (10, 21)
+    assert idx.search(until=0.0) == (0, 0)
+    assert idx.search(to_epoch('2020-07-15T17:01:40Z'), 0.0) == (100, 100)
+    assert OffsetIndex(json_file + '.missing').search(0.0) == (0, 0)
+
+    data = src.utils.datastore.json.get_range(
+        json_file, _DB_FLDS_['raw'], 3, False, to_epoch('2020-07-15T17:00:10Z'), to_epoch('2020-07-15T17:00:20Z'))
+    assert [row['ping'] for row in data] == [17.0, 18.0, 19.0]
+
+
+def test_writer_index_never_ahead_of_data(json_file, make_records):
+    # Enough records to overflow the data file buffer before 'flush()'
+    with src.utils.datastore.json.JSONLWriter(json_file, _DB_FLDS_['json']) as writer:
+        writer.write(make_records(5000))
+        idx = OffsetIndex(index_name(json_file))
+        assert os.path.getsize(json_file) > 0
+        assert all(offset < os.path.getsize(json_file) for offset, _ in idx.entries())
+
+        writer.flush()
+        assert len(idx) == 5000
+        assert idx.entry(-1)[0] < os.path.getsize(json_file)
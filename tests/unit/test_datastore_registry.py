@@ -0,0 +1,178 @@
+import functools
+
+import pytest
+
+import src.utils.datastore.registry
+import src.utils.store_data
+from src.utils.datastore.index import to_epoch
+from src.utils.datastore.registry import DataStore, open_store, get_store_class, register_store
+from src.utils.show_data import _DB_FLDS_, get_speed_data, get_store
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+_DB_TABLE_: str = 'TestApp'
+
+
+@pytest.fixture()
+def make_records(make_records):
+    return functools.partial(make_records, step=60, download=1000000.0, upload=500000.0)
+
+
+class MemoryStore(DataStore):
+    """Minimal in-memory backend."""
+
+    storage = 'memory'
+    schemaKey = 'raw'
+
+    def __init__(self, settings, schema):
+        super().__init__(settings, schema)
+        self.rows = []
+
+    def _open_writer(self):
+        store = self
+
+        class _Writer:
+            def write(self, data):
+                store.rows.extend(dict(row) for row in data)
+                return len(data)
+
+            def flush(self):
+                pass
+
+            def close(self):
+                pass
+
+            def compact(self, retain, slack=0.0):
+                return store._compact(retain, slack)
+
+        return _Writer()
+
+    def _query(self, numRecs, first):
+        return self.rows[:numRecs] if first else self.rows[-numRecs:]
+
+    def _iter_range(self, since, until, chunkSize):
+        rows = [row for row in self.rows if (since is None or to_epoch(row['timestamp']) >= since) and
+                (until is None or to_epoch(row['timestamp']) < until)]
+        for i in range(0, len(rows), chunkSize):
+            yield rows[i:i + chunkSize]
+
+    def _compact(self, retain, slack):
+        removed = max(len(self.rows) - retain, 0) if retain >= 0 else 0
+        del self.rows[:removed]
+        return removed
+
+    def _ping(self):
+        pass
+
+    def _rollup_name(self):
+        return None
+
+
+@pytest.fixture(autouse=True)
+def close_stores():
+    yield
+    src.utils.datastore.registry.close_stores()
+
+
+@pytest.fixture(params=['CSV', 'JSON', 'SQLite', 'Binary'])
+def settings(request, tmpdir):
+    ext = {'CSV': 'csv', 'JSON': 'json', 'SQLite': 'sqlite', 'Binary': 'bin'}[request.param]
+    return {'storage': request.param, 'host': str(tmpdir.join('data.' + ext)), 'dbtable': _DB_TABLE_}
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_get_store_class():
+    assert get_store_class('CSV').__name__ == 'CSVStore'
+    assert get_store_class('sqlite').storage == 'sqlite'
+
+    with pytest.raises(OSError) as excinfo:
+        get_store_class('Paper')
+    assert excinfo.value.args[0] == "Data storage type 'Paper' is not supported!"
+
+
+def test_open_store_is_shared(tmpdir):
+    settings = {'storage': 'CSV', 'host': str(tmpdir.join('data.csv'))}
+    store = get_store(settings)
+
+    assert get_store(dict(settings)) is store
+    assert get_store(dict(settings, host=str(tmpdir.join('other.csv')))) is not store
+
+    store.open()
+    changed = get_store(dict(settings, unit='bytes'))
+    assert changed is not store and store._writer is None
+
+
+def test_store_round_trip(settings, make_records):
+    store = get_store(settings)
+
+    with pytest.raises(OSError):
+        store.ping()
+
+    assert store.append_batch(make_records(3)) == 3
+    assert store.append_batch(make_records(3, 3)) == 3
+    assert store.ping() >= 0
+
+    # Buffered records are visible to queries without closing the store
+    assert [row['ping'] for row in store.query_range(2)] == [0.0, 1.0]
+    assert [row['ping'] for row in store.query_range(2, False)] == [4.0, 5.0]
+
+    assert store.compact(4) == 2
+    store.close()
+
+    # A closed store opens its handles again
+    store.append_batch(make_records(1, 6))
+    assert [row['ping'] for row in get_speed_data(settings, 10)] == [2.0, 3.0, 4.0, 5.0, 6.0]
+    assert store.stats == {'appended': 7, 'batches': 3, 'queries': 3}
+
+    store.close()
+    assert src.utils.store_data.compact_speed_data(settings, 1) == 4
+    assert src.utils.store_data.compact_speed_data(settings, -1) == 0
+
+
+def test_store_iter_range(settings, make_records):
+    store = get_store(settings)
+    store.append_batch(make_records(10))
+
+    # Buffered records are flushed first
+    chunks = list(store.iter_range(chunkSize=4))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+    assert chunks[0][0] == make_records(1)[0]
+
+    chunks = list(store.iter_range('2020-07-15T17:02:00Z', '2020-07-15T17:07:00Z', 3))
+    assert max(len(chunk) for chunk in chunks) <= 3
+    assert [row['ping'] for chunk in chunks for row in chunk] == [2.0, 3.0, 4.0, 5.0, 6.0]
+
+    assert [row['ping'] for chunk in store.iter_range(since=1594832820.0) for row in chunk] == [7.0, 8.0, 9.0]
+    assert list(store.iter_range(until='2020-07-15T17:00:00Z')) == []
+
+
+def test_store_query_between(settings, make_records):
+    store = get_store(settings)
+    store.append_batch(make_records(10))
+
+    assert [row['ping'] for row in store.query_range(2, True, '2020-07-15T17:03:00Z')] == [3.0, 4.0]
+    assert [row['ping'] for row in store.query_range(2, False, until='2020-07-15T17:03:00Z')] == [1.0, 2.0]
+    assert [row['ping'] for row in store.query_range(9, False, 1594832580.0, 1594832640.0)] == [3.0]
+    assert store.query_range(5, True, '2020-07-15T17:05:00Z', '2020-07-15T17:05:00Z') == []
+    assert store.query_range(5, True, '2021-01-01T00:00:00Z') == []
+
+
+def test_register_store(make_records):
+    register_store('Memory', MemoryStore)
+    settings = {'storage': 'memory', 'host': 'mem'}
+
+    try:
+        assert src.utils.store_data.save_speed_data(settings, make_records(5)) == 5
+        assert [row['ping'] for row in get_speed_data(settings, 2, False)] == [3.0, 4.0]
+        assert src.utils.store_data.compact_speed_data(settings, 3) == 2
+        assert open_store(settings, _DB_FLDS_).rows[0]['ping'] == 2.0
+
+        # Time range queries fall back to '_iter_range()'
+        assert [row['ping'] for row in get_speed_data(settings, 2, False, until='2020-07-15T17:04:00Z')] == [2.0, 3.0]
+
+    finally:
+        src.utils.datastore.registry._STORES_.pop('memory')
@@ -0,0 +1,118 @@
+import functools
+import os
+
+import pytest
+
+import src.utils.datastore.registry
+import src.utils.datastore.rollup
+from src.utils.datastore.rollup import RollupStore, aggregate, rollup_name
+from src.utils.show_data import get_store, get_speed_rollups
+from src.utils.store_data import save_speed_data
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+@pytest.fixture()
+def make_records(make_records):
+    # 3 records per minute, starting at 2020-07-15T17:00:00Z
+    return functools.partial(make_records, step=20, upload=lambda i: None if i % 2 else 500000.0)
+
+
+@pytest.fixture(autouse=True)
+def close_stores():
+    yield
+    src.utils.datastore.registry.close_stores()
+
+
+@pytest.fixture()
+def rollups(tmpdir):
+    with RollupStore(str(tmpdir.join('test.rollup'))) as store:
+        yield store
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_rollup_name():
+    assert rollup_name('/tmp/data.csv') == '/tmp/data.csv.rollup'
+    assert rollup_name('/tmp/data.sqlite', 'SpeedTest') == '/tmp/data.sqlite.SpeedTest.rollup'
+
+
+def test_aggregate(make_records):
+    buckets = aggregate(make_records(4) + [{'timestamp': 'invalid', 'ping': 1.0}])
+
+    assert sorted(key for key in buckets if key[0] == '1m') == [
+        ('1m', 1594832400, 'Some City, US'), ('1m', 1594832460, 'Some City, US')]
+    first = buckets[('1m', 1594832400, 'Some City, US')]
+    assert first['count'] == 3
+    assert first['ping'] == [3, 0.0, 2.0, 3.0]
+    assert first['upload'] == [2, 500000.0, 500000.0, 1000000.0]
+    assert buckets[('1d', 1594771200, 'Some City, US')]['count'] == 4
+
+
+def test_rollups_merge_batches(rollups, make_records):
+    data = make_records(180 * 3)       # 3 hours
+
+    for i in range(0, len(data), 7):
+        rollups.add(data[i:i + 7])
+
+    hours = rollups.query('1h', 10)
+    assert [row['count'] for row in hours] == [180, 180, 180]
+    assert hours[0]['timestamp'] == '2020-07-15T17:00:00.000000Z'
+    assert hours[0]['ping'] == pytest.approx(89.5)
+    assert (hours[0]['pingMin'], hours[0]['pingMax']) == (0.0, 179.0)
+    assert hours[1]['uploadMin'] == hours[1]['uploadMax'] == 500000.0
+
+    minutes = rollups.query('1m', 2, first=False)
+    assert [row['timestamp'] for row in minutes] == ['2020-07-15T19:58:00.000000Z', '2020-07-15T19:59:00.000000Z']
+    assert rollups.query('1d', 10)[0]['count'] == 540
+    assert len(rollups) == 180 + 3 + 1
+
+
+def test_rollups_per_location(rollups, make_records):
+    rollups.add(make_records(3) + make_records(3, location=None))
+
+    rows = rollups.query('1m', 10)
+    assert [(row['location'], row['count']) for row in rows] == [(None, 3), ('Some City, US', 3)]
+
+
+def test_rollups_invalid_resolution(rollups):
+    with pytest.raises(ValueError):
+        rollups.query('1w', 10)
+
+
+@pytest.mark.parametrize('storage, ext', [('CSV', 'csv'), ('JSON', 'json'), ('SQLite', 'sqlite')])
+def test_store_rollups(tmpdir, storage, ext, make_records):
+    settings = {'storage': storage, 'host': str(tmpdir.join('data.' + ext)), 'dbtable': 'TestApp'}
+
+    with pytest.raises(OSError):
+        get_speed_rollups(settings, '1h', 10)
+    assert not os.listdir(str(tmpdir))
+
+    save_speed_data(settings, make_records(100))
+    save_speed_data(settings, make_records(100, 100))
+
+    rows = get_speed_rollups(settings, '1h', 10)
+    assert [row['count'] for row in rows] == [180, 20]
+    assert rows[1]['ping'] == pytest.approx(189.5)
+
+
+def test_store_rollups_backfill(tmpdir, monkeypatch, make_records):
+    settings = {'storage': 'CSV', 'host': str(tmpdir.join('data.csv'))}
+    save_speed_data(settings, make_records(50))
+
+    # Data store written before rollups existed
+    src.utils.datastore.registry.close_stores()
+    os.remove(rollup_name(settings['host']))
+
+    # Raw records are streamed in chunks, never read all at once
+    def _fail(*args):
+        raise AssertionError('All raw records read at once')
+
+    monkeypatch.setattr(src.utils.datastore.registry, '_CHUNK_SIZE_', 7)
+    monkeypatch.setattr(get_store(settings), '_query', _fail)
+
+    save_speed_data(settings, make_records(10, 50))
+    assert get_store(settings).query_rollup('1d', 1)[0]['count'] == 60
+    assert not os.path.exists(rollup_name(settings['host']) + '.tmp')
@@ -0,0 +1,141 @@
+import functools
+import sqlite3
+
+import pytest
+
+import src.utils.datastore.sqlite
+import src.utils.store_data
+from src.utils.show_data import _DB_FLDS_, _DB_ORDER_, get_speed_data
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+_DB_TABLE_ = 'TestApp'
+
+
+@pytest.fixture()
+def make_records(make_records):
+    # Hourly records, starting at 2020-07-01T00:00:00Z
+    return functools.partial(make_records, step=3600, origin=1593561600.0)
+
+
+@pytest.fixture()
+def db_file(tmpdir_factory):
+    return str(tmpdir_factory.mktemp('test').join('test.sqlite'))
+
+
+@pytest.fixture()
+def db_settings(db_file):
+    return {'storage': 'SQLite', 'host': db_file, 'dbtable': _DB_TABLE_}
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_save_and_get_first_last(db_file, make_records):
+    saved = src.utils.datastore.sqlite.save_data(db_file, _DB_FLDS_['sql'], _DB_TABLE_, make_records(50))
+    assert saved == 50
+
+    first = src.utils.datastore.sqlite.get_data(db_file, _DB_FLDS_['raw'], _DB_TABLE_, _DB_ORDER_, 3, True)
+    assert [row['ping'] for row in first] == [0.0, 1.0, 2.0]
+
+    last = src.utils.datastore.sqlite.get_data(db_file, _DB_FLDS_['raw'], _DB_TABLE_, _DB_ORDER_, 3, False)
+    assert [row['ping'] for row in last] == [47.0, 48.0, 49.0]
+
+
+def test_wal_mode_and_indexes(db_file, make_records):
+    src.utils.datastore.sqlite.save_data(db_file, _DB_FLDS_['sql'], _DB_TABLE_, make_records(5))
+
+    conn = sqlite3.connect(db_file)
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0].lower() == 'wal'
+
+    idxs = {row[1] for row in conn.execute("PRAGMA index_list('{}')".format(_DB_TABLE_))}
+    assert idxs == {'idx_TestApp_timestamp', 'idx_TestApp_location', 'idx_TestApp_locationTZ', 'idx_TestApp__epoch'}
+
+    sql = src.utils.datastore.sqlite._build_query(_DB_FLDS_['raw'], _DB_TABLE_, _DB_ORDER_, False)
+    plan = ' '.join(str(row[-1]) for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, (3,)))
+    assert 'idx_TestApp_timestamp' in plan
+    conn.close()
+
+
+def test_get_data_missing_file():
+    with pytest.raises(OSError) as excinfo:
+        src.utils.datastore.sqlite.get_data('--INVALID--', _DB_FLDS_['raw'], _DB_TABLE_, _DB_ORDER_, 1)
+
+    assert "does NOT exist" in excinfo.value.args[0]
+
+
+def test_get_data_missing_table(db_file):
+    src.utils.datastore.sqlite.save_data(db_file, _DB_FLDS_['sql'], _DB_TABLE_, [])
+    assert src.utils.datastore.sqlite.get_data(db_file, _DB_FLDS_['raw'], 'Other', _DB_ORDER_, 1) == []
+
+
+def test_save_speed_data_roundtrip(db_settings, make_records):
+    src.utils.store_data.save_speed_data(db_settings, make_records(10))
+    src.utils.store_data.save_speed_data(db_settings, make_records(10, 10))
+
+    data = get_speed_data(db_settings, 5, False)
+    assert [row['ping'] for row in data] == [15.0, 16.0, 17.0, 18.0, 19.0]
+
+
+def test_save_speed_data_invalid_storage():
+    with pytest.raises(OSError) as excinfo:
+        src.utils.store_data.save_speed_data({'storage': 'FOOBAR'}, [])
+
+    assert excinfo.value.args[0] == "Data storage type 'FOOBAR' is not supported!"
+
+
+def test_compact(db_file, make_records):
+    src.utils.datastore.sqlite.save_data(db_file, _DB_FLDS_['sql'], _DB_TABLE_, make_records(20))
+
+    assert src.utils.datastore.sqlite.compact(db_file, _DB_TABLE_, -1) == 0
+    assert src.utils.datastore.sqlite.compact(db_file, _DB_TABLE_, 25) == 0
+    assert src.utils.datastore.sqlite.compact(db_file, _DB_TABLE_, 5) == 15
+
+    src.utils.datastore.sqlite.save_data(db_file, _DB_FLDS_['sql'], _DB_TABLE_, make_records(2, 20))
+    assert src.utils.datastore.sqlite.compact(db_file, _DB_TABLE_, 5) == 2
+
+    data = src.utils.datastore.sqlite.get_data(db_file, _DB_FLDS_['raw'], _DB_TABLE_, _DB_ORDER_, 10, True)
+    assert [row['ping'] for row in data] == [17.0, 18.0, 19.0, 20.0, 21.0]
+
+    assert src.utils.datastore.sqlite.compact(db_file, _DB_TABLE_, 0) == 5
+    assert src.utils.datastore.sqlite.compact(db_file, 'Other', 0) == 0
+
+
+def test_get_data_range_mixed_timestamps(db_file, make_records):
+    # Same instants, stored w/o fraction and w/ UTC offset
+    timestamps = ['2020-07-01T00:00:00Z', '2020-07-01T01:00:00.500000Z', '2020-07-01T02:00:00+00:00',
+                  '2020-07-01T05:00:00+02:00', '2020-07-01T04:00:00Z']
+    records = make_records(5)
+    for row, timestamp in zip(records, timestamps):
+        row['timestamp'] = timestamp
+    src.utils.datastore.sqlite.save_data(db_file, _DB_FLDS_['sql'], _DB_TABLE_, records)
+
+    # 2020-07-01T01:00:00Z to 2020-07-01T03:00:00Z
+    data = src.utils.datastore.sqlite.get_data(db_file, _DB_FLDS_['raw'], _DB_TABLE_, _DB_ORDER_, 10, True,
+                                               since=1593565200.0, until=1593572400.0)
+    assert [row['ping'] for row in data] == [1.0, 2.0]
+
+    chunks = src.utils.datastore.sqlite.iter_data(db_file, _DB_FLDS_['raw'], _DB_TABLE_, _DB_ORDER_,
+                                                  since=1593572400.0)
+    assert [row['ping'] for chunk in chunks for row in chunk] == [3.0, 4.0]
+
+
+def test_get_data_range_adds_epoch_to_old_table(db_file, make_records):
+    conn = sqlite3.connect(db_file)
+    conn.execute('CREATE TABLE "{}" (timestamp TEXT, ping REAL)'.format(_DB_TABLE_))
+    conn.executemany('INSERT INTO "{}" VALUES (?, ?)'.format(_DB_TABLE_),
+                     [(row['timestamp'], row['ping']) for row in make_records(5)])
+    conn.commit()
+    conn.close()
+
+    data = src.utils.datastore.sqlite.get_data(db_file, {'timestamp': '', 'ping': ''}, _DB_TABLE_, _DB_ORDER_, 10,
+                                               True, since=1593565200.0)
+    assert [row['ping'] for row in data] == [1.0, 2.0, 3.0, 4.0]
+
+    src.utils.datastore.sqlite.save_data(db_file, {'timestamp': 'TEXT', 'ping': 'REAL'}, _DB_TABLE_,
+                                         make_records(1, 5))
+    data = src.utils.datastore.sqlite.get_data(db_file, {'timestamp': '', 'ping': ''}, _DB_TABLE_, _DB_ORDER_, 10,
+                                               True, since=1593576000.0)
+    assert [row['ping'] for row in data] == [4.0, 5.0]
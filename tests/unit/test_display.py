@@ -0,0 +1,143 @@
+import struct
+import zlib
+
+import pytest
+
+import src.displays.framebuffer
+import src.displays.devices
+import src.displays.pipeline
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+_RECORD_ = {
+    'timestamp': '2020-07-15T17:08:55.735084Z',
+    'location': 'Some City, US',
+    'locationTZ': 'America/New_York',
+    'ping': 5.056,
+    'download': 292887701.15,
+    'upload': 28967314.99,
+}
+
+
+class FakeHat:
+    def __init__(self):
+        self.writes = 0
+        self.clears = 0
+
+    def set_pixel(self, x, y, color):
+        self.writes += 1
+
+    def clear(self):
+        self.clears += 1
+
+
+def _read_png(fname):
+    with open(fname, 'rb') as fh:
+        content = fh.read()
+
+    assert content[:8] == b'\x89PNG\r\n\x1a\n'
+    width, height = struct.unpack('>II', content[16:24])
+    idatLen = struct.unpack('>I', content[33:37])[0]
+    raw = zlib.decompress(content[41:41 + idatLen])
+
+    return width, height, raw
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_framebuffer_text():
+    fb = src.displays.framebuffer.FrameBuffer(20, 10)
+
+    assert fb.text(0, 0, '1') == 6
+    assert fb.get_pixel(2, 0) == 1 and fb.get_pixel(2, 6) == 1
+    assert fb.get_pixel(0, 0) == 0
+
+    fb.fill_rect(-5, -5, 100, 100, 3)
+    assert set(fb.pixels) == {3}
+    assert src.displays.framebuffer.text_size('12', 2) == (24, 14)
+
+
+def test_dirty_regions():
+    prev = src.displays.framebuffer.FrameBuffer(64, 32)
+    curr = prev.copy()
+
+    assert src.displays.framebuffer.dirty_regions(None, curr) == [(0, 0, 64, 32)]
+    assert src.displays.framebuffer.dirty_regions(prev, curr) == []
+
+    curr.set_pixel(9, 1)
+    curr.set_pixel(17, 14)
+    curr.set_pixel(63, 31)
+    assert src.displays.framebuffer.dirty_regions(prev, curr) == [(8, 0, 8, 8), (16, 8, 8, 8), (56, 24, 8, 8)]
+
+    # Same span on consecutive tile rows is merged
+    curr = prev.copy()
+    curr.fill_rect(8, 0, 8, 32)
+    assert src.displays.framebuffer.dirty_regions(prev, curr) == [(8, 0, 8, 32)]
+
+
+def test_pipeline_partial_updates():
+    device = src.displays.devices.FileDisplay()
+    pipeline = src.displays.pipeline.DisplayPipeline(device, fullEvery=2)
+
+    assert pipeline.show(_RECORD_) == [(0, 0, 250, 122)]
+    assert pipeline.show(_RECORD_) == []
+
+    regions = pipeline.show(dict(_RECORD_, ping=6.1))
+    assert 0 < sum(w * h for _, _, w, h in regions) < 0.05 * 250 * 122
+    assert device.screen.pixels == pipeline.last.pixels
+
+    pipeline.show(dict(_RECORD_, ping=7.1))
+    pipeline.show(dict(_RECORD_, ping=8.1))
+
+    assert pipeline.stats == {'frames': 5, 'skipped': 1, 'partial': 2, 'full': 2}
+    assert device.stats['full'] == 2 and device.stats['partial'] == 2
+    assert device.screen.pixels == pipeline.last.pixels
+
+
+def test_pipeline_marks_anomalies():
+    device = src.displays.devices.FileDisplay()
+    pipeline = src.displays.pipeline.DisplayPipeline(device)
+    pipeline.show(_RECORD_)
+
+    tags = [{'channel': 'ping', 'kind': 'outlier', 'value': 5.056, 'score': 6.0}]
+    regions = pipeline.show(dict(_RECORD_, anomaly=tags))
+    assert len(regions) == 1
+    assert regions[0][1] > 122 // 2         # only the ping row changes
+
+
+def test_file_display_png(tmpdir):
+    fname = str(tmpdir.join('epaper.png'))
+    pipeline = src.displays.pipeline.init_display(fname)
+    pipeline.show(_RECORD_, 'bytes')
+    pipeline.close()
+
+    width, height, raw = _read_png(fname)
+    assert (width, height) == (250, 122)
+    assert len(raw) == (width + 1) * height
+    assert set(raw) == {0, 255}
+
+
+def test_file_display_invalid_folder():
+    with pytest.raises(OSError) as excinfo:
+        src.displays.pipeline.init_display('/--INVALID--/epaper.png')
+
+    assert "does NOT exist" in excinfo.value.args[0]
+
+
+def test_sensehat_display_writes_changed_pixels_only():
+    hat = FakeHat()
+    pipeline = src.displays.pipeline.DisplayPipeline(src.displays.devices.SenseHatDisplay(hat), fullRatio=1.1)
+
+    pipeline.show(_RECORD_)
+    first = hat.writes
+    assert hat.clears == 1 and 0 < first < 64
+
+    pipeline.show(_RECORD_)
+    assert hat.writes == first
+
+    pipeline.show(dict(_RECORD_, ping=None))
+    assert hat.writes - first == pipeline.device.stats['pixels'] - first > 0
+    assert pipeline.stats['partial'] == 1
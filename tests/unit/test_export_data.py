@@ -0,0 +1,101 @@
+import csv
+import functools
+import io
+import json
+
+import pytest
+
+import src.utils.datastore.registry
+from src.utils.export_data import ColumnarExporter, export_speed_data, read_columnar
+from src.utils.show_data import _DB_FLDS_, get_store
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+@pytest.fixture()
+def make_records(make_records):
+    return functools.partial(
+        make_records,
+        step=60,
+        location=lambda i: 'City {}, US'.format(i % 2),
+        locationTZ=lambda i: 'America/New_York' if i % 3 else None,
+        upload=lambda i: None if i == 4 else 500000.0,
+    )
+
+
+@pytest.fixture(autouse=True)
+def close_stores():
+    yield
+    src.utils.datastore.registry.close_stores()
+
+
+@pytest.fixture(params=['CSV', 'SQLite'])
+def settings(request, tmpdir, make_records):
+    settings = {'storage': request.param, 'host': str(tmpdir.join('data.' + request.param.lower())),
+                'dbtable': 'TestApp'}
+    get_store(settings).append_batch(make_records(10))
+
+    return settings
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_columnar_round_trip(make_records):
+    data = make_records(7)
+    buf = io.BytesIO()
+
+    exporter = ColumnarExporter(buf, _DB_FLDS_['raw'])
+    exporter.write(data[:4])
+    exporter.write([])
+    exporter.write(data[4:])
+    exporter.close()
+
+    buf.seek(0)
+    chunks = list(read_columnar(buf))
+    assert [len(chunk) for chunk in chunks] == [4, 3]
+    assert [row for chunk in chunks for row in chunk] == data
+
+    with pytest.raises(ValueError):
+        list(read_columnar(io.BytesIO(buf.getvalue()[:-10])))
+
+    with pytest.raises(ValueError):
+        list(read_columnar(io.BytesIO(b'ping,download\n')))
+
+
+def test_export_formats(settings, make_records):
+    buf = io.BytesIO()
+    assert export_speed_data(settings, buf, 'csv', '2020-07-15T17:08:00Z') == 2
+    rows = list(csv.DictReader(io.StringIO(buf.getvalue().decode('utf-8'))))
+    assert [row['ping'] for row in rows] == ['8.0', '9.0']
+
+    buf = io.BytesIO()
+    assert export_speed_data(settings, buf, 'JSONL', until='2020-07-15T17:02:00Z') == 2
+    assert [json.loads(line) for line in buf.getvalue().splitlines()] == make_records(2)
+
+    buf = io.BytesIO()
+    assert export_speed_data(settings, buf, 'columnar', chunkSize=4) == 10
+    buf.seek(0)
+    assert [row for chunk in read_columnar(buf) for row in chunk] == make_records(10)
+
+
+def test_export_empty_range(settings):
+    buf = io.BytesIO()
+    assert export_speed_data(settings, buf, 'csv', since='2021-01-01') == 0
+    assert buf.getvalue() == b'timestamp,location,locationTZ,ping,download,upload\n'
+
+
+@pytest.mark.parametrize('storage', ['CSV', 'JSON', 'SQLite'])
+def test_export_missing_store(tmpdir, storage):
+    settings = {'storage': storage, 'host': str(tmpdir.join('missing.' + storage.lower())), 'dbtable': 'TestApp'}
+    buf = io.BytesIO()
+
+    with pytest.raises(OSError):
+        export_speed_data(settings, buf, 'csv')
+    assert buf.getvalue() == b''
+
+
+def test_export_invalid_format(settings):
+    with pytest.raises(ValueError):
+        export_speed_data(settings, io.BytesIO(), 'xml')
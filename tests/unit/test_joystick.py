@@ -0,0 +1,144 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+import src.sensors.joystick
+import src.utils.collect_data
+from src.sensors.joystick import JoystickReader, pack_event
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+@pytest.fixture()
+def fake_device(tmpdir):
+    """Named pipe that stands in for the joystick event device."""
+    path = str(tmpdir.join('event0'))
+    os.mkfifo(path)
+    return path
+
+
+def _open_writer(path):
+    # Reader must already be open, or a non-blocking open of the write end fails
+    return os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+
+
+class FakePager:
+    def __init__(self):
+        self.index = 0
+
+    def next(self):
+        self.index += 1
+
+    def prev(self):
+        self.index -= 1
+
+
+class FakeSampler:
+    def __init__(self):
+        self.samples = 0
+
+    def sample(self):
+        self.samples += 1
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_parse_events():
+    buf = pack_event('up', 'pressed', 1.5) + pack_event('middle', 'released', 2.0)
+    noise = src.sensors.joystick._EVENT_.pack(0, 0, 0, 0, 0)       # EV_SYN
+
+    events, rest = src.sensors.joystick.parse_events(buf + noise + buf[:5])
+    assert events == [
+        src.sensors.joystick.JoystickEvent(1.5, 'up', 'pressed'),
+        src.sensors.joystick.JoystickEvent(2.0, 'middle', 'released'),
+    ]
+    assert rest == buf[:5]
+
+
+def test_reader_debounce_and_eof(fake_device):
+    async def _run():
+        async with JoystickReader(fake_device, debounce=0.05) as reader:
+            fd = _open_writer(fake_device)
+            os.write(fd, b''.join([
+                pack_event('left', 'pressed', 10.00),
+                pack_event('left', 'pressed', 10.01),       # bounce
+                pack_event('left', 'released', 10.02),
+                pack_event('left', 'pressed', 10.10),
+            ]))
+            os.close(fd)
+
+            events = [event async for event in reader]
+
+        return reader, events
+
+    reader, events = asyncio.run(_run())
+
+    assert [(event.direction, event.action) for event in events] == [
+        ('left', 'pressed'), ('left', 'released'), ('left', 'pressed')]
+    assert reader.stats == {'events': 3, 'debounced': 1, 'dropped': 0}
+
+
+def test_reader_bounded_queue(fake_device):
+    async def _run():
+        async with JoystickReader(fake_device, debounce=0, maxQueue=4) as reader:
+            fd = _open_writer(fake_device)
+            os.write(fd, b''.join(pack_event('down', 'held', i) for i in range(10)))
+            os.close(fd)
+
+            # Let the reader drain the pipe before anybody consumes events
+            while reader._fd is not None:
+                await asyncio.sleep(0.001)
+
+            events = [event async for event in reader]
+
+        return reader, events
+
+    reader, events = asyncio.run(_run())
+
+    # Oldest events are dropped, and end-of-stream marker always fits
+    assert [event.timestamp for event in events] == [7.0, 8.0, 9.0]
+    assert reader.stats['dropped'] == 7
+
+
+def test_reader_invalid_device():
+    async def _run():
+        JoystickReader('/--INVALID--/event0').open()
+
+    with pytest.raises(OSError) as excinfo:
+        asyncio.run(_run())
+
+    assert "Unable to open joystick device" in excinfo.value.args[0]
+
+
+def test_collect_joystick_latency(fake_device):
+    pager = FakePager()
+    sampler = FakeSampler()
+    latency = []
+
+    handlers = src.utils.collect_data.joystick_handlers(pager, sampler)
+    middle = handlers['middle']
+    handlers['middle'] = lambda event: (latency.append(time.perf_counter() - sent[0]), middle(event))
+    sent = []
+
+    async def _run():
+        async with JoystickReader(fake_device) as reader:
+            fd = _open_writer(fake_device)
+            task = asyncio.ensure_future(src.utils.collect_data.collect_joystick(reader, handlers))
+
+            for i, direction in enumerate(['right', 'right', 'left', 'middle']):
+                await asyncio.sleep(0.01)
+                sent[:] = [time.perf_counter()]
+                os.write(fd, pack_event(direction, 'pressed', i) + pack_event(direction, 'released', i + 0.5))
+
+            await asyncio.sleep(0.01)
+            os.close(fd)
+            return await task
+
+    assert asyncio.run(_run()) == 4
+    assert pager.index == 1
+    assert sampler.samples == 1
+    assert latency[0] < 0.05
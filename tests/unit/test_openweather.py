@@ -0,0 +1,209 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+import src.sensors.openweather
+from src.sensors.openweather import WeatherCache, WeatherClient
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+_API_KEY_: str = '0123456789abcdef0123456789abcdef'
+
+
+class StubWeatherHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)
+        location = query['q'][0]
+
+        with server.lock:
+            server.requests.append(location)
+            server.connections.add(self.client_address)
+        time.sleep(server.delay)
+
+        if location.lower().startswith('nowhere'):
+            status, body = 404, {'cod': '404', 'message': 'city not found'}
+        else:
+            status, body = 200, {'name': location, 'weather': [{'description': 'light rain'}]}
+
+        body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubWeatherServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture()
+def stub_weather():
+    """Local stand-in for the OpenWeather API. Set 'delay' to slow down responses."""
+    server = StubWeatherServer(('127.0.0.1', 0), StubWeatherHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.connections = set()
+    server.delay = 0.0
+    server.url = 'http://127.0.0.1:{}/data/2.5/weather'.format(server.server_port)
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+@pytest.mark.parametrize('apiKey, expected', [
+    (_API_KEY_, True),
+    (_API_KEY_.upper(), False),
+    (_API_KEY_ + '0', False),
+    (_API_KEY_[:-1], False),
+    ('', False),
+    (None, False),
+])
+def test_isvalid_api_key(apiKey, expected):
+    assert src.sensors.openweather.isvalid_api_key(apiKey) is expected
+
+
+def test_client_invalid_api_key():
+    with pytest.raises(ValueError):
+        WeatherClient('OWM_API_KEY')
+
+
+def test_cache_ttl():
+    clock = [1000.0]
+    cache = WeatherCache(600, clock=lambda: clock[0])
+
+    cache.put('London,GB', {'x': 1})
+    assert cache.get(' london, gb') == {'x': 1}
+
+    clock[0] += 599
+    assert cache.get('London,GB') == {'x': 1}
+
+    clock[0] += 1
+    assert cache.get('London,GB') is None
+    assert cache.stats == {'hits': 2, 'misses': 1}
+
+
+def test_cache_file(tmpdir):
+    fname = str(tmpdir.join('weather.json'))
+    clock = [1000.0]
+
+    cache = WeatherCache(600, fname, lambda: clock[0])
+    cache.put('London,GB', {'x': 1})
+    clock[0] += 300
+    cache.put('Paris,FR', {'x': 2})
+    cache.save()
+
+    clock[0] += 400
+    cache = WeatherCache(600, fname, lambda: clock[0])
+    assert len(cache) == 1
+    assert cache.get('Paris,FR') == {'x': 2}
+
+    tmpdir.join('weather.json').write('{broken')
+    assert len(WeatherCache(600, fname)) == 0
+
+
+def test_cache_file_write_error(tmpdir):
+    fname = str(tmpdir.join('missing', 'weather.json'))
+
+    # Failed write is ignored, and tried again on the next save
+    cache = WeatherCache(600, fname)
+    cache.put('London,GB', {'x': 1})
+    cache.save()
+    assert not os.path.exists(fname)
+
+    tmpdir.mkdir('missing')
+    cache.save()
+    assert len(WeatherCache(600, fname)) == 1
+
+
+def test_current_uses_cache(stub_weather):
+    clock = [1000.0]
+    client = WeatherClient(_API_KEY_, url=stub_weather.url, clock=lambda: clock[0])
+
+    for _ in range(5):
+        assert client.current('London,GB')['weather'][0]['description'] == 'light rain'
+    assert stub_weather.requests == ['London,GB']
+
+    clock[0] += 600
+    client.current('London,GB')
+    assert len(stub_weather.requests) == 2
+
+    with pytest.raises(OSError) as excinfo:
+        client.current('Nowhere')
+    assert "HTTP status 404" in excinfo.value.args[0]
+
+    # Errors are not cached
+    with pytest.raises(OSError):
+        client.current('Nowhere')
+    assert len(stub_weather.requests) == 4
+
+    client.close()
+
+
+def test_current_persists_between_runs(stub_weather, tmpdir):
+    fname = str(tmpdir.join('weather.json'))
+
+    for _ in range(3):
+        client = WeatherClient(_API_KEY_, cacheFile=fname, url=stub_weather.url)
+        client.current('London,GB')
+        client.close()
+
+    assert stub_weather.requests == ['London,GB']
+
+
+def test_current_many(stub_weather):
+    stub_weather.delay = 0.2
+    locations = ['City{},US'.format(i) for i in range(8)]
+    client = WeatherClient(_API_KEY_, url=stub_weather.url, maxWorkers=8)
+
+    start = time.perf_counter()
+    results, errors = client.current_many(locations + ['city0, us', 'Nowhere'])
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.2 * 4
+    assert sorted(stub_weather.requests) == sorted(locations + ['Nowhere'])
+    assert set(results) == set(locations + ['city0, us'])
+    assert list(errors) == ['Nowhere']
+
+    results, errors = client.current_many(locations)
+    assert len(results) == 8 and not errors
+    assert len(stub_weather.requests) == 9
+
+    # Sequential lookups reuse pooled connections
+    client.cache.clear()
+    stub_weather.delay = 0.0
+    stub_weather.connections.clear()
+    for location in locations:
+        client.current(location)
+    assert len(stub_weather.connections) == 1
+
+    client.close()
+
+
+def test_get_client_is_shared(tmpdir):
+    fname = str(tmpdir.join('weather.json'))
+
+    client = src.sensors.openweather.get_client(_API_KEY_, cacheFile=fname)
+    assert src.sensors.openweather.get_client(_API_KEY_, cacheFile=fname) is client
+    assert src.sensors.openweather.get_client(_API_KEY_) is not client
@@ -0,0 +1,136 @@
+import threading
+import time
+
+import pytest
+
+import src.utils.scheduler
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_run_consumes_in_order():
+    scheduler = src.utils.scheduler.FixedRateScheduler(0.001, workers=3)
+    results = []
+
+    def _collect(i):
+        time.sleep(0.005 * (3 - i % 3))     # Later ticks may finish first
+        return i * 10
+
+    ticks = scheduler.run(6, _collect, lambda i, val: results.append((i, val)))
+
+    assert ticks == 6
+    assert results == [(i, i * 10) for i in range(6)]
+
+
+def test_run_overlaps_consume_with_next_collect():
+    scheduler = src.utils.scheduler.FixedRateScheduler(0.01)
+    collectStarted = threading.Event()
+    overlapped = []
+
+    def _collect(i):
+        if i == 1:
+            collectStarted.set()
+        return i
+
+    def _consume(i, val):
+        if i == 0:
+            # Cycle 1 must be able to start while cycle 0 is still being consumed
+            overlapped.append(collectStarted.wait(2))
+
+    scheduler.run(2, _collect, _consume)
+    assert overlapped == [True]
+
+
+def test_run_fixed_rate():
+    scheduler = src.utils.scheduler.FixedRateScheduler(0.02)
+    stamps = []
+
+    start = time.monotonic()
+    scheduler.run(4, lambda i: stamps.append(time.monotonic() - start), lambda i, val: None)
+
+    assert len(stamps) == 4
+    assert stamps[-1] == pytest.approx(0.06, abs=0.05)
+
+
+def test_run_propagates_errors():
+    scheduler = src.utils.scheduler.FixedRateScheduler(0.001)
+
+    def _collect(i):
+        if i == 2:
+            raise OSError('boom')
+        return i
+
+    consumed = []
+    with pytest.raises(OSError):
+        scheduler.run(100, _collect, lambda i, val: consumed.append(i))
+
+    assert consumed == [0, 1]
+    assert scheduler.stats['ticks'] < 100
+
+
+def test_stop_endless_run():
+    scheduler = src.utils.scheduler.FixedRateScheduler(0.001)
+
+    def _consume(i, val):
+        if i == 4:
+            scheduler.stop()
+
+    ticks = scheduler.run(None, lambda i: i, _consume)
+    assert ticks >= 5
+
+
+def test_set_interval_applies_to_current_wait():
+    scheduler = src.utils.scheduler.FixedRateScheduler(60)
+
+    def _consume(i, val):
+        if i == 0:
+            scheduler.set_interval(0.001)
+        else:
+            scheduler.stop()
+
+    start = time.monotonic()
+    scheduler.run(None, lambda i: i, _consume)
+
+    assert time.monotonic() - start < 5
+    assert scheduler.interval == 0.001
+    assert scheduler.stats['ticks'] >= 2
+    assert scheduler.stats['rate'] > 0
+
+
+def test_adaptive_interval():
+    controller = src.utils.scheduler.AdaptiveInterval(1, 8, 4)
+
+    # Stable readings back off, up to max
+    for _ in range(10):
+        interval = controller.update({'temperature': 20.0, 'label': 'x'})
+    assert interval == 8.0
+
+    # A jump speeds up, down to min
+    for val in (30.0, 20.0, 30.0, 20.0, 30.0):
+        interval = controller.update({'temperature': val})
+    assert interval == 1.0
+    assert controller.stats['samples'] == 15
+    assert controller.stats['speedUps'] == 3
+
+    # Ignores missing and non-numeric values
+    assert controller.update({'temperature': None, 'label': 'x'}) > 1.0
+
+
+@pytest.mark.parametrize('args', [(0, 10), (10, 5), (1, 10, None, None, 0.2, 0.1, 1.5, 1.25)])
+def test_adaptive_interval_invalid(args):
+    with pytest.raises(ValueError):
+        src.utils.scheduler.AdaptiveInterval(*args)
+
+
+def test_run_errors_wake_long_wait():
+    scheduler = src.utils.scheduler.FixedRateScheduler(3600)
+
+    def _consume(i, val):
+        raise OSError('boom')
+
+    start = time.monotonic()
+    with pytest.raises(OSError):
+        scheduler.run(2, lambda i: i, _consume)
+
+    assert time.monotonic() - start < 5
@@ -45,6 +45,18 @@ def test__verify_datastore():
     assert True
 
     
+def test__verify_epaper(tmpdir):
+    config = ConfigParser()
+    config.read_string("[main]\nstorage = CSV\n")
+    assert "not defined" in src.utils.settings._verify_epaper(config)
+
+    config.set('main', 'epaper', str(tmpdir.join('epaper.png')))
+    assert src.utils.settings._verify_epaper(config) == '- ePaper device OK!'
+
+    config.set('main', 'epaper', '/--INVALID--/epaper.png')
+    assert "Unable to access" in src.utils.settings._verify_epaper(config)
+
+    
 def test_is_valid_settings():
     assert True
 
@@ -81,6 +93,129 @@ def test_read_settings_invalid_file_format(invalid_config_ini_fomat):
     assert "Invalid configuration settings!" in exMsg
 
     
+def _write_ini(tmpdir, text, mtime=None):
+    configFile = tmpdir.join('config.ini')
+    configFile.write(text)
+    if mtime is not None:
+        os.utime(str(configFile), (mtime, mtime))
+
+    return str(configFile)
+
+
+_SNAPSHOT_INI_ = """\
+[data]
+retain = 5
+sort = Last
+
+[main]
+count = 3
+sleep = 30
+threads = Single
+unit = bytes
+share = yes
+locationTZ = America/New_York
+storage = CSV
+host = ${data:retain}.csv
+"""
+
+
+def test_load_settings(tmpdir):
+    configFName = _write_ini(tmpdir, _SNAPSHOT_INI_)
+    snapshot = src.utils.settings.load_settings({'configFName': configFName})
+
+    assert (snapshot.retain, snapshot.history, snapshot.sort, snapshot.first) == (5, 1, 'last', False)
+    assert (snapshot.count, snapshot.sleep, snapshot.threads, snapshot.unit) == (3, 30, 'single', 'bytes')
+    assert snapshot.share is True
+    assert snapshot.storage is src.utils.settings.Storage.CSV
+    assert snapshot.main['host'] == '5.csv'
+    assert snapshot.main.get('locationTZ') == snapshot.main.get('locationtz') == 'America/New_York'
+
+    with pytest.raises(Exception):
+        snapshot.retain = 10
+
+    # 'minsleep' and 'maxsleep' default to 'sleep'
+    assert (snapshot.minsleep, snapshot.maxsleep, snapshot.adaptive) == (30, 30, False)
+
+
+def test_load_settings_adaptive_sleep(tmpdir):
+    configFName = _write_ini(tmpdir, _SNAPSHOT_INI_.replace('sleep = 30', 'sleep = 30\nminsleep = 10\nmaxsleep = 300'))
+    snapshot = src.utils.settings.load_settings({'configFName': configFName})
+
+    assert (snapshot.sleep, snapshot.minsleep, snapshot.maxsleep, snapshot.adaptive) == (30, 10, 300, True)
+
+    # Without 'minsleep', a 'maxsleep' below 'sleep' still gives a valid range
+    _write_ini(tmpdir, _SNAPSHOT_INI_.replace('sleep = 30', 'sleep = 30\nmaxsleep = 20'))
+    snapshot = src.utils.settings.load_settings({'configFName': configFName})
+
+    assert (snapshot.minsleep, snapshot.maxsleep, snapshot.adaptive) == (20, 20, False)
+
+
+def test_load_settings_cache(tmpdir, monkeypatch):
+    configFName = _write_ini(tmpdir, _SNAPSHOT_INI_, mtime=1000000000)
+    snapshot = src.utils.settings.load_settings({'configFName': configFName})
+    assert os.path.exists(configFName + '.cache')
+
+    def _fail(config):
+        raise AssertionError('Config file parsed again')
+
+    monkeypatch.setattr(src.utils.settings, '_build_snapshot', _fail)
+    monkeypatch.setattr(src.utils.settings, 'isvalid_settings', _fail)
+    assert src.utils.settings.load_settings({'configFName': configFName}) == snapshot
+
+    # Touching the file forces a re-hash, but same content is not parsed again
+    os.utime(configFName, None)
+    assert src.utils.settings.load_settings({'configFName': configFName}) == snapshot
+
+    monkeypatch.undo()
+    _write_ini(tmpdir, _SNAPSHOT_INI_.replace('sleep = 30', 'sleep = 45'), mtime=1000000000)
+    assert src.utils.settings.load_settings({'configFName': configFName}).sleep == 45
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='Requires POSIX file modes')
+def test_load_settings_cache_mode(tmpdir):
+    # Cache holds secrets like the InfluxDB token, so it must not be more readable than the config file
+    configFName = _write_ini(tmpdir, _SNAPSHOT_INI_ + 'token = secret\n')
+    os.chmod(configFName, 0o600)
+    oldMask = os.umask(0o022)
+    try:
+        src.utils.settings.load_settings({'configFName': configFName})
+    finally:
+        os.umask(oldMask)
+
+    assert os.stat(configFName + '.cache').st_mode & 0o777 == 0o600
+
+
+def test_load_settings_racy_change(tmpdir):
+    """Same size and mtime right after the cache was written must still be detected."""
+    configFName = _write_ini(tmpdir, _SNAPSHOT_INI_)
+    mtime = os.stat(configFName).st_mtime
+    assert src.utils.settings.load_settings({'configFName': configFName}).sleep == 30
+
+    _write_ini(tmpdir, _SNAPSHOT_INI_.replace('sleep = 30', 'sleep = 40'), mtime=mtime)
+    assert src.utils.settings.load_settings({'configFName': configFName}).sleep == 40
+
+
+@pytest.mark.parametrize('text, errMsg', [
+    ("[data]\nretain = 1\n", "Invalid and/or incomplete config info!"),
+    (_SNAPSHOT_INI_.replace('count = 3', 'count = many'), "Invalid configuration settings!"),
+    (_SNAPSHOT_INI_.replace('storage = CSV', 'storage = Paper'), "Invalid configuration settings!"),
+    (_SNAPSHOT_INI_.replace('storage = CSV', 'storage = API'), "not yet implemented"),
+    (_SNAPSHOT_INI_.replace('sort = Last', 'sort = middle'), "Invalid configuration settings!"),
+    (_SNAPSHOT_INI_.replace('sleep = 30', 'minsleep = 60\nmaxsleep = 10'), "Invalid configuration settings!"),
+    (_SNAPSHOT_INI_.replace('sleep = 30', 'sleep = 0\nmaxsleep = 10'), "Invalid configuration settings!"),
+    ("[main\n", "Invalid configuration settings!"),
+])
+def test_load_settings_invalid(tmpdir, text, errMsg):
+    configFName = _write_ini(tmpdir, text)
+
+    with pytest.raises(ValueError) as excinfo:
+        src.utils.settings.load_settings({'configFName': configFName})
+    assert errMsg in excinfo.value.args[0]
+
+    with pytest.raises(OSError):
+        src.utils.settings.load_settings({'configFName': '--INVALID--'})
+
+
 def test_save_settings():
     assert True
 
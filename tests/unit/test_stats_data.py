@@ -0,0 +1,108 @@
+import math
+import random
+import statistics
+
+import pytest
+
+import src.utils.datastore.registry
+from src.utils.stats_data import FieldStats, P2Quantiles, RunningStats, aggregate, get_speed_stats
+from src.utils.show_data import get_store
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+@pytest.fixture(autouse=True)
+def close_stores():
+    yield
+    src.utils.datastore.registry.close_stores()
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_running_stats():
+    rnd = random.Random(42)
+    data = [rnd.gauss(1e9, 5.0) for _ in range(2500)]
+
+    single = RunningStats()
+    for val in data:
+        single.add(val)
+
+    chunked = RunningStats()
+    for idx in range(0, len(data), 1000):
+        chunked.update(data[idx:idx + 1000])
+
+    for stats in (single, chunked):
+        assert stats.count == 2500
+        assert stats.min == min(data) and stats.max == max(data)
+        assert stats.mean == pytest.approx(statistics.fmean(data))
+        assert stats.stdev == pytest.approx(statistics.stdev(data), rel=1e-6)
+
+    assert RunningStats().variance is None
+
+
+def test_p2_quantiles_exact_for_small_streams():
+    quantiles = P2Quantiles((0.5, 0.9))
+    quantiles.update([5.0, 1.0, 4.0, 2.0, 3.0])
+
+    assert quantiles.quantile(0.5) == 3.0
+    assert quantiles.quantile(0.9) == pytest.approx(4.6)
+    assert P2Quantiles().quantile(0.5) is None
+
+    with pytest.raises(ValueError):
+        quantiles.quantile(0.25)
+    with pytest.raises(ValueError):
+        P2Quantiles((0.5, 1.0))
+
+
+@pytest.mark.parametrize('exactSize', [1, 1000])
+def test_p2_quantiles_estimate(exactSize):
+    rnd = random.Random(1)
+    data = [rnd.expovariate(0.1) for _ in range(50000)]
+
+    quantiles = P2Quantiles((0.5, 0.95, 0.99), exactSize)
+    quantiles.update(data)
+
+    data.sort()
+    for prob in (0.5, 0.95, 0.99):
+        assert quantiles.quantile(prob) == pytest.approx(data[int(prob * (len(data) - 1))], rel=0.02)
+
+
+def test_field_stats_skips_missing_values():
+    fldStats = FieldStats()
+    fldStats.update([1.0, None, 3.0, math.nan])
+    fldStats.add(None)
+    fldStats.add(2.0)
+
+    assert fldStats.summary() == {
+        'count': 3, 'min': 1.0, 'max': 3.0, 'mean': 2.0, 'stdev': 1.0, 'p50': 2.0, 'p95': 2.9, 'p99': 2.98,
+    }
+    assert FieldStats().summary()['mean'] is None
+
+
+def test_aggregate_chunks():
+    chunks = iter([[{'ping': 1.0}, {'ping': 2.0}], [], [{'ping': 6.0, 'upload': 5.0}]])
+    stats = aggregate(chunks, ('ping', 'upload'), (0.5,))
+
+    assert stats['ping'].summary()['mean'] == 3.0
+    assert stats['ping'].summary()['p50'] == 2.0
+    assert stats['upload'].summary()['count'] == 1
+
+
+@pytest.mark.parametrize('storage', ['JSON', 'Binary'])
+def test_get_speed_stats(tmpdir, storage):
+    settings = {'storage': storage, 'host': str(tmpdir.join('data.' + storage.lower()))}
+    get_store(settings).append_batch([
+        {'timestamp': '2020-07-15T17:{:02d}:00.000000Z'.format(i), 'location': 'Some City, US',
+         'ping': float(i), 'download': 1000000.0 * i, 'upload': None if i == 4 else 500000.0}
+        for i in range(10)
+    ])
+
+    stats = get_speed_stats(settings, '2020-07-15T17:02:00Z', '2020-07-15T17:08:00Z', chunkSize=4)
+    assert stats['ping']['count'] == 6
+    assert stats['ping']['min'] == 2.0 and stats['ping']['max'] == 7.0
+    assert stats['download']['p50'] == 4500000.0
+    assert stats['upload']['count'] == 5
+
+    assert get_speed_stats(settings, since='2021-01-01')['ping']['count'] == 0
@@ -0,0 +1,55 @@
+import pytest
+
+import src.utils.timestamps
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+_FMT_: str = '%m/%d/%y %H:%M'
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    src.utils.timestamps.cache_clear()
+    yield
+    src.utils.timestamps.cache_clear()
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+@pytest.mark.parametrize('timestamp, expected', [
+    ('2020-07-15T17:08:55.735084Z', '2020-07-15T17:08Z'),
+    ('2020-07-15T17:08:55+05:30', '2020-07-15T17:08+05:30'),
+    ('2020-07-15T17:08:55-0400', '2020-07-15T17:08-0400'),
+    ('2020-07-15T17:08:55', '2020-07-15T17:08'),
+    ('2020-07-15T17:08', '2020-07-15T17:08'),
+    ('2020-07-15', '2020-07-15'),
+])
+def test_minute_key(timestamp, expected):
+    assert src.utils.timestamps._minute_key(timestamp) == expected
+
+
+def test_format_minute():
+    assert src.utils.timestamps.format_minute('2020-07-15T17:08:55.735084Z', None, _FMT_) == '07/15/20 17:08'
+    assert src.utils.timestamps.format_minute('2020-07-15T17:08:55.735084Z', '', _FMT_) == '07/15/20 17:08'
+    assert src.utils.timestamps.format_minute('2020-07-15T17:08:55Z', 'America/New_York', _FMT_) == '07/15/20 13:08'
+    assert src.utils.timestamps.format_minute('2020-07-15T17:08:55+05:30', 'UTC', _FMT_) == '07/15/20 11:38'
+    assert src.utils.timestamps.format_minute('2020-07-15T17:08:55+05:30', None, _FMT_) == '07/15/20 17:08'
+
+
+def test_format_minute_cache():
+    for sec in range(60):
+        src.utils.timestamps.format_minute('2020-07-15T17:08:{:02d}.000000Z'.format(sec), 'America/New_York')
+        src.utils.timestamps.format_minute('2020-07-15T17:09:{:02d}.000000Z'.format(sec), 'America/New_York')
+
+    info = src.utils.timestamps.cache_info()
+    assert info['minute'].misses == 2
+    assert info['minute'].hits == 118
+    assert info['timezone'].misses == 1
+
+
+def test_format_minute_invalid():
+    with pytest.raises(ValueError):
+        src.utils.timestamps.format_minute('--INVALID--')
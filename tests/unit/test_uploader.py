@@ -0,0 +1,181 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import src.utils.show_data
+import src.utils.store_data
+import src.utils.uploader
+from src.utils.datastore.outbox import Outbox
+
+
+# =========================================================
+#     G L O B A L S   &   P Y T E S T   F I X T U R E S
+# =========================================================
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        server.requests.append({
+            'headers': dict(self.headers),
+            'records': json.loads(gzip.decompress(body))['records'],
+            'size': len(body),
+        })
+
+        status = server.statuses.pop(0) if server.statuses else 200
+        self.send_response(status)
+        if status == 503:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def stub_server():
+    """Local HTTP server that records uploads. Set 'statuses' to fail requests."""
+    server = HTTPServer(('127.0.0.1', 0), StubHandler)
+    server.requests = []
+    server.statuses = []
+    server.url = 'http://127.0.0.1:{}/api/speedtest'.format(server.server_port)
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def outbox(tmpdir):
+    with Outbox(str(tmpdir.join('test.outbox'))) as box:
+        yield box
+
+
+# =========================================================
+#                T E S T   F U N C T I O N S
+# =========================================================
+def test_outbox_fifo_and_persistence(tmpdir, make_records):
+    fname = str(tmpdir.join('test.outbox'))
+
+    with Outbox(fname) as box:
+        assert box.append(make_records(5)) == 5
+        rows = box.peek(2)
+        assert [row[2]['ping'] for row in rows] == [0.0, 1.0]
+        assert len({row[1] for row in box.peek(5)}) == 5
+        box.ack([row[0] for row in rows])
+
+    with Outbox(fname) as box:
+        assert len(box) == 3
+        assert box.peek(1)[0][2]['ping'] == 2.0
+
+
+def test_uploader_batches(stub_server, outbox, make_records):
+    outbox.append(make_records(25))
+    uploader = src.utils.uploader.Uploader(outbox, stub_server.url, batchSize=10)
+
+    assert uploader.drain() == 25
+    assert len(outbox) == 0
+    assert [len(req['records']) for req in stub_server.requests] == [10, 10, 5]
+    assert [rec['ping'] for req in stub_server.requests for rec in req['records']] == [float(i) for i in range(25)]
+
+    headers = stub_server.requests[0]['headers']
+    assert headers['Content-Encoding'] == 'gzip'
+    assert len({req['headers']['Idempotency-Key'] for req in stub_server.requests}) == 3
+
+
+def test_uploader_retry_keeps_idempotency_key(stub_server, outbox, make_records):
+    outbox.append(make_records(3))
+    stub_server.statuses = [503, 500]
+    uploader = src.utils.uploader.Uploader(outbox, stub_server.url, backoff=1.0, maxBackoff=3.0)
+
+    assert uploader.drain() == 0
+    assert uploader.failures == 1 and 0.5 <= uploader.next_delay() <= 1.0
+    assert uploader.drain() == 0
+    assert uploader.failures == 2 and 1.0 <= uploader.next_delay() <= 2.0
+    assert "HTTP status 500" in str(uploader.lastError)
+
+    uploader.failures = 10
+    assert uploader.next_delay() <= 3.0
+
+    assert uploader.drain() == 3
+    assert uploader.failures == 0 and uploader.next_delay() == 0.0
+    assert len({req['headers']['Idempotency-Key'] for req in stub_server.requests}) == 1
+    assert len(outbox) == 0
+
+
+def test_uploader_offline(outbox, make_records):
+    outbox.append(make_records(3))
+    uploader = src.utils.uploader.Uploader(outbox, 'http://127.0.0.1:9/invalid', timeout=1)
+
+    assert uploader.drain() == 0
+    assert "Unable to upload" in str(uploader.lastError)
+    assert len(outbox) == 3
+
+
+def test_uploader_background(stub_server, outbox, make_records):
+    uploader = src.utils.uploader.Uploader(outbox, stub_server.url, interval=60)
+    uploader.start()
+
+    for i in range(3):
+        outbox.append(make_records(1, i))
+        uploader.notify()
+
+    assert uploader.stop() == 0
+    assert [rec['ping'] for req in stub_server.requests for rec in req['records']] == [0.0, 1.0, 2.0]
+
+
+def test_upload_to_remote(stub_server, tmpdir, make_records):
+    settings = {'storage': 'CSV', 'host': str(tmpdir.join('test.csv')), 'remote': 'http://127.0.0.1:9/invalid'}
+
+    with pytest.raises(OSError):
+        src.utils.store_data.upload_to_remote(settings, make_records(4))
+
+    settings['remote'] = stub_server.url
+    assert src.utils.store_data.upload_to_remote(settings, make_records(1, 4)) == (5, 0)
+
+    with pytest.raises(OSError) as excinfo:
+        src.utils.store_data.upload_to_remote({'storage': 'CSV', 'host': 'x'})
+    assert excinfo.value.args[0] == "Remote upload URL is not defined!"
+
+
+def test_remote_writer(stub_server, tmpdir, make_records):
+    settings = {'storage': 'JSON', 'host': str(tmpdir.join('test.jsonl')), 'remote': stub_server.url}
+
+    with src.utils.store_data.open_speed_writer(settings) as writer:
+        writer.write(make_records(3))
+        writer.write(make_records(2, 3))
+
+    assert sorted(rec['ping'] for req in stub_server.requests for rec in req['records']) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    with Outbox(str(tmpdir.join('test.jsonl.outbox'))) as box:
+        assert len(box) == 0
+
+
+def test_remote_writer_outbox_error(stub_server, tmpdir, make_records, monkeypatch):
+    settings = {'storage': 'JSON', 'host': str(tmpdir.join('test.jsonl')), 'remote': stub_server.url}
+
+    with src.utils.store_data.open_speed_writer(settings) as writer:
+        append = writer.uploader.outbox.append
+        failures = [OSError('Unable to queue records!')]
+
+        def _append(data):
+            if failures:
+                raise failures.pop()
+            return append(data)
+
+        monkeypatch.setattr(writer.uploader.outbox, 'append', _append)
+
+        # Saved locally, but not queued. Caller can tell, and records are queued with the next write.
+        assert writer.write(make_records(3)) == 3
+        assert len(writer.pending) == 3 and writer.queueError is not None
+
+        writer.write(make_records(2, 3))
+        assert writer.pending == [] and writer.queueError is None
+
+    assert [row['ping'] for row in src.utils.show_data.get_speed_data(settings, 10)] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert sorted(rec['ping'] for req in stub_server.requests for rec in req['records']) == [0.0, 1.0, 2.0, 3.0, 4.0]